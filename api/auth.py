@@ -5,14 +5,17 @@ Handles login, register, logout
 
 from flask import Blueprint, request, jsonify
 import secrets
-import hashlib
-from datetime import datetime, timedelta
+from datetime import datetime
+
+from services.passwords import PasswordHasherBusy, hash_password, verify_and_update
+from services.sessions import SESSION_TTL, MemorySessions
 
 bp = Blueprint('api_auth', __name__, url_prefix='/api/auth')
 
 # In-memory user storage (replace with database later)
 users = {}
-sessions = {}
+# Expiring, size-capped token store (keys are token digests)
+sessions = MemorySessions()
 
 # Map emails to integer user IDs for database compatibility
 user_id_counter = 1
@@ -33,13 +36,16 @@ def register():
     if email in users:
         return jsonify({'error': 'User already exists'}), 409
     
+    try:
+        password_hash = hash_password(data['password'])
+    except PasswordHasherBusy:
+        return jsonify({'error': 'Server busy, please retry'}), 503
+    
     # Create user with incremental integer ID
     global user_id_counter
     user_id = user_id_counter
     user_id_counter += 1
     
-    password_hash = hashlib.sha256(data['password'].encode()).hexdigest()
-    
     users[email] = {
         'id': user_id,
         'email': email,
@@ -56,7 +62,7 @@ def register():
     sessions[token] = {
         'user_id': user_id,
         'email': email,
-        'expires_at': (datetime.now() + timedelta(days=30)).isoformat()
+        'expires_at': (datetime.now() + SESSION_TTL).isoformat()
     }
     
     return jsonify({
@@ -79,19 +85,26 @@ def login():
         return jsonify({'error': 'Email and password required'}), 400
     
     email = data['email'].lower()
-    password_hash = hashlib.sha256(data['password'].encode()).hexdigest()
     
     # Check credentials
     user = users.get(email)
-    if not user or user['password_hash'] != password_hash:
+    try:
+        valid, new_hash = verify_and_update(data['password'], user['password_hash'] if user else None)
+    except PasswordHasherBusy:
+        return jsonify({'error': 'Server busy, please retry'}), 503
+    if not valid:
         return jsonify({'error': 'Invalid credentials'}), 401
     
+    # Unsalted SHA-256 hashes from before are replaced on login
+    if new_hash:
+        user['password_hash'] = new_hash
+    
     # Create session token
     token = secrets.token_hex(32)
     sessions[token] = {
         'user_id': user['id'],
         'email': email,
-        'expires_at': (datetime.now() + timedelta(days=30)).isoformat()
+        'expires_at': (datetime.now() + SESSION_TTL).isoformat()
     }
     
     print(f"[AUTH] User logged in: {email}, user_id: {user['id']}, token: {token[:16]}...")
@@ -111,8 +124,7 @@ def logout():
     """Logout user"""
     token = request.headers.get('Authorization', '').replace('Bearer ', '')
     
-    if token in sessions:
-        del sessions[token]
+    sessions.pop(token)
     
     return jsonify({'success': True})
 
@@ -0,0 +1,49 @@
+"""
+API routes for the car catalogue
+Serves makes and models from the in-memory table in services/catalog.py
+"""
+
+from flask import Blueprint, request, jsonify
+
+from services.catalog import load_catalogue
+
+bp = Blueprint('api_catalog', __name__, url_prefix='/api/catalog')
+
+# The catalogue only changes on deploy
+CACHE_MAX_AGE = 86400
+
+bp.record_once(lambda state: load_catalogue())
+
+
+def _cached(payload):
+    response = jsonify(payload)
+    response.cache_control.public = True
+    response.cache_control.max_age = CACHE_MAX_AGE
+    response.add_etag()
+    return response.make_conditional(request)
+
+
+@bp.route('/makes', methods=['GET'])
+def makes():
+    """All makes with listing counts and number of known models"""
+    catalogue = load_catalogue()
+    return _cached({
+        'makes': [
+            {'slug': entry['slug'], 'name': entry['name'], 'count': entry['count'], 'models': len(entry['models'])}
+            for entry in catalogue.makes
+        ]
+    })
+
+
+@bp.route('/models', methods=['GET'])
+def models():
+    """
+    Models for one make
+
+    Query params:
+        make: Make name or slug, free text accepted ("mercedes", "VW")
+    """
+    entry = load_catalogue().make(request.args.get('make', ''))
+    if entry is None:
+        return jsonify({'error': 'Unknown make'}), 404
+    return _cached({'make': {'slug': entry['slug'], 'name': entry['name']}, 'models': entry['models']})
@@ -0,0 +1,85 @@
+"""
+API routes for favourites
+Add/remove a favourite, bulk favourite state for a page of cards, and the
+user's favourites with keyset pagination
+"""
+
+from flask import Blueprint, jsonify, request
+
+from services.favourites import MAX_PAGE_SIZE, MAX_STATE_IDS, PAGE_SIZE, FavouriteError, get_favourites_store
+from services.request_auth import authenticated_user_id, unauthorized
+
+bp = Blueprint('api_favourites', __name__, url_prefix='/api/favourites')
+
+
+@bp.route('', methods=['GET'])
+def list_favourites():
+    """
+    The user's favourites, newest first
+
+    Query: limit (default 24, max 100), cursor (next_cursor of the previous page)
+    """
+    user_id = authenticated_user_id()
+    if user_id is None:
+        return unauthorized()
+    try:
+        limit = min(max(int(request.args.get('limit', PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+        listings, next_cursor = get_favourites_store().page(user_id, limit, request.args.get('cursor'))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        print(f"❌ Error loading favourites: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+    return jsonify({'success': True, 'favourites': listings, 'next_cursor': next_cursor})
+
+
+@bp.route('/state', methods=['POST'])
+def favourite_state():
+    """Which of these cards the user has favourited: {"ids": [...]} -> {"favourited": [...]}"""
+    user_id = authenticated_user_id()
+    ids = (request.get_json(silent=True) or {}).get('ids')
+    if not isinstance(ids, list) or len(ids) > MAX_STATE_IDS:
+        return jsonify({'success': False, 'error': f'Expected an "ids" array of at most {MAX_STATE_IDS} items'}), 400
+    # Signed-out visitors have no favourites; answer without touching the store
+    if user_id is None or not ids:
+        return jsonify({'success': True, 'favourited': []})
+    try:
+        favourited = get_favourites_store().states(user_id, ids)
+    except Exception as e:
+        print(f"❌ Error loading favourite state: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+    return jsonify({'success': True, 'favourited': [str(listing_id) for listing_id in ids if str(listing_id) in favourited]})
+
+
+@bp.route('/<listing_id>', methods=['PUT'])
+def add_favourite(listing_id):
+    """Favourite a listing (idempotent)"""
+    user_id = authenticated_user_id()
+    if user_id is None:
+        return unauthorized()
+    try:
+        added = get_favourites_store().add(user_id, listing_id)
+    except FavouriteError as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
+    except Exception as e:
+        print(f"❌ Error adding favourite: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+    return jsonify({'success': True, 'favourited': True}), 201 if added else 200
+
+
+@bp.route('/<listing_id>', methods=['DELETE'])
+def remove_favourite(listing_id):
+    """Remove a favourite (idempotent)"""
+    user_id = authenticated_user_id()
+    if user_id is None:
+        return unauthorized()
+    try:
+        get_favourites_store().remove(user_id, listing_id)
+    except Exception as e:
+        print(f"❌ Error removing favourite: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+    return jsonify({'success': True, 'favourited': False})
@@ -0,0 +1,40 @@
+"""
+API routes for the ranked feed
+GET /api/feed/for-you: listings ordered by recency, engagement and distance
+from the viewer, without the ones the signed-in user has already watched
+"""
+
+from flask import Blueprint, jsonify, request
+
+from services.listing_cards import json_response, listing_cards
+from services.ranking import PAGE_SIZE, for_you_page
+from services.request_auth import authenticated_user_id
+
+bp = Blueprint('api_feed', __name__, url_prefix='/api/feed')
+
+
+@bp.route('/for-you', methods=['GET'])
+def for_you():
+    """
+    Ranked feed page
+
+    Query: category, city (Cities.txt name) or lat/lon, limit (default 24,
+    max 100), cursor (next_cursor of the previous page)
+    """
+    try:
+        cards, next_cursor = for_you_page(
+            limit=int(request.args.get('limit', PAGE_SIZE)),
+            category=request.args.get('category') or None,
+            city=request.args.get('city'),
+            lat=request.args.get('lat'),
+            lon=request.args.get('lon'),
+            user_id=authenticated_user_id(),
+            cursor=request.args.get('cursor'),
+        )
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        print(f"❌ Error loading the For You feed: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+    return json_response({'success': True, 'items': listing_cards(cards), 'next_cursor': next_cursor})
@@ -1,179 +1,55 @@
 """
 API routes for listings/uploads
-Handles creating, updating, deleting listings
+Handles creating, updating, deleting listings. Writes need a signed-in user
+and only ever touch that user's listings.
 """
 
 from flask import Blueprint, request, jsonify
-import secrets
-import os
-import json
-import uuid
-from datetime import datetime
 
-bp = Blueprint('api_listings', __name__, url_prefix='/api/listings')
+from services.listings import (
+    BUCKET_PAGE_SIZE, MAX_BULK_SIZE, MAX_BUCKET_PAGE_SIZE, ListingError, changes_from_payload, delete_listings,
+    get_listing as find_listing, listing_from_payload, save_listings, update_listings, user_listing_buckets,
+    user_listing_page,
+)
+from services import counters, ranking
+from services.favourites import FavouriteError, get_likes_store
+from services.media import ingest_files
+from services.request_auth import authenticated_user_id, unauthorized
 
-# Import sessions from auth module
-from api.auth import sessions
+bp = Blueprint('api_listings', __name__, url_prefix='/api/listings')
 
-def get_current_user_id():
-    """Get user ID from authorization token"""
-    token = request.headers.get('Authorization', '').replace('Bearer ', '')
-    
-    if token and token in sessions:
-        return sessions[token].get('user_id')
-    
-    # Default to user_id 1 if no auth token
-    return 1
+def _bulk_items(data, key):
+    """List payload of a bulk request, or raise ListingError"""
+    items = (data or {}).get(key)
+    if not isinstance(items, list) or not items:
+        raise ListingError(f'Expected a non-empty "{key}" array')
+    if len(items) > MAX_BULK_SIZE:
+        raise ListingError(f'At most {MAX_BULK_SIZE} items per request')
+    return items
 
 @bp.route('', methods=['POST'])
 def create_listing():
     """Create a new listing"""
+    user_id = authenticated_user_id()
+    if user_id is None:
+        return unauthorized()
     try:
-        data = request.get_json()
-        
-        # Validate required fields
-        if not data or not data.get('title') or not data.get('price'):
-            return jsonify({
-                'success': False,
-                'error': 'Title and price are required'
-            }), 400
-        
-        # Generate ID if not provided
-        listing_id = data.get('id', f'listing-{uuid.uuid4()}')
-        
-        # Extract data with defaults
-        title = data['title']
-        category = data.get('category', 'other')
-        description = data.get('description', '')
-        price = float(data['price'])
-        currency = data.get('currency', 'EUR')
-        location = data.get('location', '')
-        video_url = data.get('videoUrl', data.get('video_url', ''))
-        thumbnail_url = data.get('thumbnailUrl', data.get('thumbnail_url', video_url))
-        condition = data.get('condition', 'good')
-        status = data.get('status', 'active')
-        metadata = data.get('metadata', {})
-        
-        # Get user_id from auth token
-        user_id = get_current_user_id()
-        print(f"[DEBUG] Creating listing with user_id: {user_id}")
-        
-        # Try to save to database
-        DATABASE_URL = os.environ.get('DATABASE_URL')
-        if DATABASE_URL:
-            try:
-                import psycopg2
-                from psycopg2.extras import RealDictCursor
-                
-                conn = psycopg2.connect(DATABASE_URL, cursor_factory=RealDictCursor)
-                cur = conn.cursor()
-                
-                cur.execute("""
-                    INSERT INTO listings (
-                        id, user_id, title, description, category, 
-                        price, currency, location, video_url, thumbnail_url,
-                        status, metadata, 
-                        created_at, updated_at
-                    ) VALUES (
-                        %s, %s, %s, %s, %s, 
-                        %s, %s, %s, %s, %s,
-                        %s, %s::jsonb,
-                        CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
-                    )
-                    ON CONFLICT (id) 
-                    DO UPDATE SET
-                        title = EXCLUDED.title,
-                        description = EXCLUDED.description,
-                        price = EXCLUDED.price,
-                        video_url = EXCLUDED.video_url,
-                        thumbnail_url = EXCLUDED.thumbnail_url,
-                        updated_at = CURRENT_TIMESTAMP
-                    RETURNING id;
-                """, (
-                    listing_id,
-                    user_id,
-                    title,
-                    description,
-                    category,
-                    price,
-                    currency,
-                    location,
-                    video_url,
-                    thumbnail_url,
-                    status,
-                    json.dumps(metadata)
-                ))
-                
-                conn.commit()
-                cur.close()
-                conn.close()
-                
-                print(f"✅ Listing saved to database: {listing_id}")
-                
-                return jsonify({
-                    'success': True,
-                    'listing_id': listing_id,
-                    'message': 'Listing created successfully',
-                    'saved_to': 'database'
-                }), 201
-                
-            except Exception as db_error:
-                print(f"⚠️ Database error: {db_error}")
-                import traceback
-                traceback.print_exc()
-                # Fall through to localStorage fallback
-        
-        # Fallback: Save to db.json
-        db_file = os.path.join(os.path.dirname(__file__), '..', 'db.json')
-        
-        # Load existing data
-        if os.path.exists(db_file):
-            with open(db_file, 'r') as f:
-                db_data = json.load(f)
-        else:
-            db_data = {'listings': []}
-        
-        # Add new listing
-        listing = {
-            'id': listing_id,
-            'user_id': user_id,
-            'title': title,
-            'description': description,
-            'category': category,
-            'price': price,
-            'currency': currency,
-            'location': location,
-            'video_url': video_url,
-            'thumbnail_url': thumbnail_url,
-            'seller_name': 'VidX User',
-            'seller_avatar': 'https://api.dicebear.com/7.x/avataaars/svg?seed=vidx',
-            'status': status,
-            'metadata': metadata,
-            'views': 0,
-            'likes': 0,
-            'created_at': datetime.now().isoformat(),
-            'updated_at': datetime.now().isoformat()
-        }
-        
-        # Remove existing listing with same ID
-        db_data['listings'] = [l for l in db_data['listings'] if l.get('id') != listing_id]
-        
-        # Add new listing at the beginning
-        db_data['listings'].insert(0, listing)
+        listing = listing_from_payload(request.get_json(silent=True), user_id)
+        saved, backend = save_listings([listing])
+        if not saved:
+            return jsonify({'success': False, 'error': 'Listing id belongs to another user'}), 403
         
-        # Save to file
-        with open(db_file, 'w') as f:
-            json.dump(db_data, f, indent=2)
-        
-        print(f"✅ Listing saved to db.json: {listing_id}")
+        print(f"✅ Listing saved to {backend}: {listing['id']}")
         
         return jsonify({
             'success': True,
-            'listing_id': listing_id,
+            'listing_id': listing['id'],
             'message': 'Listing created successfully',
-            'saved_to': 'json'
+            'saved_to': backend
         }), 201
         
+    except ListingError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         print(f"❌ Error creating listing: {e}")
         import traceback
@@ -183,37 +59,191 @@ def create_listing():
             'error': str(e)
         }), 500
 
+@bp.route('/bulk', methods=['POST'])
+def bulk_create_listings():
+    """
+    Create or replace many listings in one request
+    
+    Expected JSON payload: {"listings": [{...same fields as POST /api/listings...}]}
+    Invalid items, and ids that belong to another user, are reported by
+    index; the valid ones are still saved.
+    """
+    user_id = authenticated_user_id()
+    if user_id is None:
+        return unauthorized()
+    try:
+        items = _bulk_items(request.get_json(silent=True), 'listings')
+        
+        listings, indexes, errors = [], [], []
+        for index, item in enumerate(items):
+            try:
+                listings.append(listing_from_payload(item, user_id))
+                indexes.append(index)
+            except ListingError as e:
+                errors.append({'index': index, 'error': str(e)})
+        
+        ids, backend = save_listings(listings) if listings else ([], None)
+        saved = set(ids)
+        errors.extend({'index': index, 'error': 'Listing id belongs to another user'}
+                      for index, listing in zip(indexes, listings) if listing['id'] not in saved)
+        errors.sort(key=lambda error: error['index'])
+        print(f"✅ Bulk saved {len(ids)} listings to {backend} ({len(errors)} rejected)")
+        
+        return jsonify({
+            'success': not errors,
+            'created': len(ids),
+            'listing_ids': ids,
+            'errors': errors,
+            'saved_to': backend
+        }), 201 if ids else 400
+        
+    except ListingError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        print(f"❌ Error bulk creating listings: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@bp.route('/bulk', methods=['PATCH'])
+def bulk_update_listings():
+    """
+    Partially update many listings in one request
+    
+    Expected JSON payload: {"listings": [{"id": "...", "price": 6000, "status": "sold"}, ...]}
+    Ids that do not exist or belong to another user come back in "missing".
+    """
+    user_id = authenticated_user_id()
+    if user_id is None:
+        return unauthorized()
+    try:
+        items = _bulk_items(request.get_json(silent=True), 'listings')
+        changes = {}
+        for index, item in enumerate(items):
+            if not isinstance(item, dict) or not item.get('id'):
+                raise ListingError(f'Item {index} has no id')
+            changes[str(item['id'])] = changes_from_payload({k: v for k, v in item.items() if k != 'id'})
+        
+        updated, backend = update_listings(changes, user_id)
+        updated_set = set(updated)
+        
+        return jsonify({
+            'success': True,
+            'updated': len(updated),
+            'missing': [listing_id for listing_id in changes if listing_id not in updated_set],
+            'saved_to': backend
+        })
+        
+    except ListingError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        print(f"❌ Error bulk updating listings: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@bp.route('/bulk', methods=['DELETE'])
+def bulk_delete_listings():
+    """Soft delete many of the user's listings: {"ids": ["...", ...]}"""
+    user_id = authenticated_user_id()
+    if user_id is None:
+        return unauthorized()
+    try:
+        ids = [str(listing_id) for listing_id in _bulk_items(request.get_json(silent=True), 'ids')]
+        deleted, backend = delete_listings(ids, user_id)
+        return jsonify({'success': True, 'deleted': len(deleted), 'saved_to': backend})
+    except ListingError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        print(f"❌ Error bulk deleting listings: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@bp.route('/mine', methods=['GET'])
+def my_listings():
+    """
+    The current user's listings by status
+    
+    Without ?status: counts plus the first page of every bucket (one query).
+    With ?status=sold&cursor=...: the next page of that bucket.
+    """
+    user_id = authenticated_user_id()
+    if user_id is None:
+        return unauthorized()
+    try:
+        limit = min(max(int(request.args.get('limit', BUCKET_PAGE_SIZE)), 1), MAX_BUCKET_PAGE_SIZE)
+        status = request.args.get('status')
+        if status:
+            listings, next_cursor = user_listing_page(user_id, status, limit, request.args.get('cursor'))
+            return jsonify({'success': True, 'status': status, 'listings': listings, 'next_cursor': next_cursor})
+        
+        buckets, _ = user_listing_buckets(user_id, limit)
+        return jsonify({'success': True, 'buckets': buckets})
+        
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        print(f"❌ Error loading user listings: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @bp.route('/<listing_id>', methods=['GET'])
 def get_listing(listing_id):
     """Get a specific listing"""
-    listing = listings.get(listing_id)
+    try:
+        listing = find_listing(listing_id)
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
     
     if not listing:
-        return jsonify({'error': 'Listing not found'}), 404
+        return jsonify({'success': False, 'error': 'Listing not found'}), 404
     
-    return jsonify(listing)
+    listing['views'], listing['likes'] = counters.counts(listing)
+    return jsonify({'success': True, 'listing': listing})
+
+@bp.route('/<listing_id>/view', methods=['POST'])
+def record_view(listing_id):
+    """Count a view (buffered in memory, written to the store in batches; unknown ids are dropped)"""
+    counters.record_view(listing_id)
+    # Signed-in viewers do not get the listing again in their For You feed
+    ranking.mark_seen(authenticated_user_id(), listing_id)
+    return jsonify({'success': True}), 202
+
+@bp.route('/<listing_id>/like', methods=['POST'])
+def record_like(listing_id):
+    """
+    Like or unlike: {"liked": true|false}. One like per user; the counter
+    (buffered like views) only moves when the user's like actually changes.
+    """
+    user_id = authenticated_user_id()
+    if user_id is None:
+        return unauthorized()
+    liked = bool((request.get_json(silent=True) or {}).get('liked', True))
+    likes = get_likes_store()
+    try:
+        changed = likes.add(user_id, listing_id) if liked else likes.remove(user_id, listing_id)
+    except FavouriteError as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
+    except Exception as e:
+        print(f"❌ Error recording like: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+    if changed:
+        counters.record_like(listing_id, liked=liked)
+    return jsonify({'success': True, 'liked': liked}), 202
 
-@bp.route('/<listing_id>', methods=['PUT'])
+@bp.route('/<listing_id>', methods=['PUT', 'PATCH'])
 def update_listing(listing_id):
-    """Update a listing"""
-    listing = listings.get(listing_id)
-    
-    if not listing:
-        return jsonify({'error': 'Listing not found'}), 404
-    
-    data = request.get_json()
-    
-    # Update fields
-    if 'title' in data:
-        listing['title'] = data['title']
-    if 'description' in data:
-        listing['description'] = data['description']
-    if 'price' in data:
-        listing['price'] = data['price']
-    if 'status' in data:
-        listing['status'] = data['status']
+    """Update one of the user's listings (only the fields present in the payload change)"""
+    user_id = authenticated_user_id()
+    if user_id is None:
+        return unauthorized()
+    try:
+        changes = changes_from_payload(request.get_json(silent=True))
+        if not changes:
+            return jsonify({'success': False, 'error': 'No updatable fields provided'}), 400
+        updated, _ = update_listings({listing_id: changes}, user_id)
+    except ListingError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        print(f"❌ Error updating listing: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
     
-    listing['updated_at'] = datetime.now().isoformat()
+    if not updated:
+        return jsonify({'success': False, 'error': 'Listing not found'}), 404
     
     return jsonify({
         'success': True,
@@ -222,11 +252,18 @@ def update_listing(listing_id):
 
 @bp.route('/<listing_id>', methods=['DELETE'])
 def delete_listing(listing_id):
-    """Delete a listing"""
-    if listing_id not in listings:
-        return jsonify({'error': 'Listing not found'}), 404
+    """Delete one of the user's listings (soft delete, the row is kept with status 'deleted')"""
+    user_id = authenticated_user_id()
+    if user_id is None:
+        return unauthorized()
+    try:
+        deleted, _ = delete_listings([listing_id], user_id)
+    except Exception as e:
+        print(f"❌ Error deleting listing: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
     
-    del listings[listing_id]
+    if not deleted:
+        return jsonify({'success': False, 'error': 'Listing not found'}), 404
     
     return jsonify({
         'success': True,
@@ -235,31 +272,30 @@ def delete_listing(listing_id):
 
 @bp.route('/upload', methods=['POST'])
 def upload_files():
-    """Handle file uploads"""
+    """Handle file uploads (stored through the media service, see /api/media)"""
+    if authenticated_user_id() is None:
+        return unauthorized()
     # Check if files are present
     if 'files' not in request.files:
         return jsonify({'error': 'No files provided'}), 400
     
-    files = request.files.getlist('files')
-    uploaded_files = []
+    try:
+        stored, errors = ingest_files(request.files.getlist('files'))
+    except Exception as e:
+        print(f"❌ Error storing uploads: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
     
-    for file in files:
-        if file.filename:
-            # Generate unique filename
-            file_id = secrets.token_hex(8)
-            file_ext = file.filename.rsplit('.', 1)[1].lower() if '.' in file.filename else ''
-            filename = f"{file_id}.{file_ext}"
-            
-            # In production, save to S3 or similar
-            # For now, just return the filename
-            uploaded_files.append({
-                'id': file_id,
-                'filename': filename,
-                'original_name': file.filename,
-                'url': f'/uploads/{filename}'  # Placeholder URL
-            })
+    uploaded_files = [{
+        'id': media['id'],
+        'key': media['key'],
+        'filename': media['key'].rsplit('/', 1)[-1],
+        'original_name': media['original_name'],
+        'url': media['url'],
+        'derivatives': media['derivatives'],
+    } for media in stored]
     
     return jsonify({
         'success': True,
-        'files': uploaded_files
+        'files': uploaded_files,
+        'errors': errors
     })
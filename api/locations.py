@@ -0,0 +1,42 @@
+"""
+API routes for location autocomplete
+Serves suggestions from the in-memory index in services/locations.py
+"""
+
+from flask import Blueprint, request, jsonify
+
+from services.locations import DEFAULT_LIMIT, load_location_index, suggest_locations
+
+bp = Blueprint('api_locations', __name__, url_prefix='/api/locations')
+
+# Suggestions only change when the datasets do; let browsers and CDNs keep them
+CACHE_MAX_AGE = 86400
+
+# Load the index when the blueprint is registered, not on the first keystroke
+bp.record_once(lambda state: load_location_index())
+
+
+@bp.route('/suggest', methods=['GET'])
+def suggest():
+    """
+    Suggest counties and localities for a typed prefix
+
+    Query params:
+        q: Prefix typed by the user (diacritics optional)
+        county: Prefer localities in this county
+        limit: Maximum number of results (default 10, max 50)
+    """
+    query = request.args.get('q', '').strip()
+    county = request.args.get('county', '').strip() or None
+    try:
+        limit = int(request.args.get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+
+    results = list(suggest_locations(query, county, limit)) if query else []
+
+    response = jsonify({'query': query, 'results': results})
+    response.cache_control.public = True
+    response.cache_control.max_age = CACHE_MAX_AGE
+    response.add_etag()
+    return response.make_conditional(request)
@@ -0,0 +1,122 @@
+"""
+API routes for media
+Photo uploads (stored once per content hash, derivatives rendered in the
+background), derivative status, and presigned direct-to-storage uploads.
+Uploading needs a signed-in user; the local PUT target is authorised by its
+signed URL instead.
+"""
+
+from flask import Blueprint, current_app, jsonify, request
+
+from services.direct_uploads import UploadDenied, abort_upload, complete_upload, receive_local_upload, start_upload
+from services.media import MediaError, ingest_files, media_status
+from services.request_auth import authenticated_user_id, unauthorized
+
+bp = Blueprint('api_media', __name__, url_prefix='/api/media')
+
+
+@bp.route('', methods=['POST'])
+def upload_media():
+    """
+    Store uploaded photos (multipart field "files")
+
+    Returns the stored media (key, url, derivative urls) and the rejected files.
+    The key is what /api/video/generate accepts in "image_keys".
+    """
+    if authenticated_user_id() is None:
+        return unauthorized()
+    files = request.files.getlist('files')
+    if not files:
+        return jsonify({'success': False, 'error': 'No files provided'}), 400
+    try:
+        stored, errors = ingest_files(files)
+    except Exception as e:
+        print(f"❌ Error storing media: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+    status = 201 if stored else 400
+    return jsonify({'success': bool(stored), 'media': stored, 'errors': errors}), status
+
+
+@bp.route('/<media_id>', methods=['GET'])
+def get_media(media_id):
+    """Derivative urls of a stored photo; null until rendered"""
+    try:
+        derivatives = media_status(media_id)
+    except MediaError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    return jsonify({'success': True, 'id': media_id, 'derivatives': derivatives,
+                    'ready': all(derivatives.values())})
+
+
+@bp.route('/uploads', methods=['POST'])
+def start_direct_upload():
+    """
+    Sign a browser upload straight to storage
+
+    JSON: {"content_type", "size", "sha256" (hex, lets files up to 32 MB go
+    in one deduplicated PUT)}. Returns exists + media when the file is already
+    stored, a PUT url + headers, or a multipart upload_id + part urls.
+    """
+    if authenticated_user_id() is None:
+        return unauthorized()
+    data = request.get_json(silent=True) or {}
+    try:
+        upload = start_upload(data.get('content_type'), data.get('size'), data.get('sha256'),
+                              current_app.config['SECRET_KEY'])
+    except MediaError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        print(f"❌ Error signing upload: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+    return jsonify({'success': True, **upload})
+
+
+@bp.route('/uploads/complete', methods=['POST'])
+def complete_direct_upload():
+    """Register an uploaded file: {"key", "upload_id"?, "parts"?: [{"part_number", "etag"}]}"""
+    if authenticated_user_id() is None:
+        return unauthorized()
+    data = request.get_json(silent=True) or {}
+    try:
+        media = complete_upload(data.get('key'), data.get('upload_id'), data.get('parts'))
+    except MediaError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        print(f"❌ Error completing upload: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+    return jsonify({'success': True, 'media': media}), 201
+
+
+@bp.route('/uploads', methods=['DELETE'])
+def abort_direct_upload():
+    """Abandon a multipart upload: {"key", "upload_id"}"""
+    if authenticated_user_id() is None:
+        return unauthorized()
+    data = request.get_json(silent=True) or {}
+    try:
+        abort_upload(data.get('key'), data.get('upload_id'))
+    except MediaError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        print(f"❌ Error aborting upload: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+    return jsonify({'success': True})
+
+
+@bp.route('/local/<path:key>', methods=['PUT'])
+def local_upload(key):
+    """Target of the signed upload URLs issued when R2 is not configured"""
+    try:
+        receive_local_upload(key, request.stream, request.content_type, request.args.get('size'),
+                             request.args.get('expires'), request.args.get('signature'),
+                             current_app.config['SECRET_KEY'])
+    except UploadDenied as e:
+        return jsonify({'success': False, 'error': str(e)}), 403
+    except MediaError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    return '', 200
@@ -17,10 +17,18 @@ except ImportError:
 
 import os
 import secrets
-import hashlib
-from datetime import datetime, timedelta
+from datetime import datetime
 from functools import wraps
 
+from services.counters import start_counter_flusher
+from services.listing_cards import json_loads
+from services.passwords import PasswordHasherBusy, hash_password, verify_and_update
+from services.request_auth import bearer_token, resolve_token
+from services.sessions import create_session, delete_session, start_session_sweeper
+from services.tokens import (
+    DEV_SECRET_KEY, TokenUser, check_signing_key, issue_token, revoke_token, signed_tokens_enabled,
+)
+
 # Load environment variables
 from dotenv import load_dotenv
 # Load .env.production if it exists (for Azure deployment)
@@ -32,7 +40,9 @@ else:
 app = Flask(__name__)
 
 # Secret key for sessions
-app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
+app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', DEV_SECRET_KEY)
+# Signed session tokens must not be signed with the public fallback key
+check_signing_key(os.getenv('SECRET_KEY'))
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 
 # Configure CORS - allow frontend domain
@@ -71,11 +81,21 @@ def register_api_routes():
     """Register all API routes (JSON endpoints)"""
     try:
         from api.auth import bp as api_auth_bp
+        from api.catalog import bp as api_catalog_bp
+        from api.favourites import bp as api_favourites_bp
+        from api.feed import bp as api_feed_bp
         from api.listings import bp as api_listings_bp
+        from api.locations import bp as api_locations_bp
+        from api.media import bp as api_media_bp
         from routes.video_api import bp as video_api_bp
         
         app.register_blueprint(api_auth_bp)
+        app.register_blueprint(api_catalog_bp)
+        app.register_blueprint(api_favourites_bp)
+        app.register_blueprint(api_feed_bp)
         app.register_blueprint(api_listings_bp)
+        app.register_blueprint(api_locations_bp)
+        app.register_blueprint(api_media_bp)
         app.register_blueprint(video_api_bp)
         print("API routes registered successfully")
     except ImportError as e:
@@ -92,88 +112,118 @@ def get_db():
     """Get database connection"""
     return psycopg2.connect(DATABASE_URL, cursor_factory=RealDictCursor)
 
-def hash_password(password):
-    """Hash a password using SHA-256 with salt"""
-    salt = secrets.token_hex(16)
-    pwd_hash = hashlib.sha256((password + salt).encode()).hexdigest()
-    return f"{salt}${pwd_hash}"
+# json/jsonb values (listing metadata, json_agg feed pages) are decoded with orjson when installed
+if DB_AVAILABLE:
+    from psycopg2.extras import register_default_json, register_default_jsonb
+    register_default_json(globally=True, loads=json_loads)
+    register_default_jsonb(globally=True, loads=json_loads)
 
-def verify_password(password, hash_string):
-    """Verify a password against a hash"""
-    try:
-        salt, pwd_hash = hash_string.split('$')
-        return hashlib.sha256((password + salt).encode()).hexdigest() == pwd_hash
-    except:
-        return False
+# Expired sessions are deleted (only when DATABASE_URL is set) and view/like
+# counters are flushed in the background. Under gunicorn the master preloads
+# this module; workers start both threads in post_fork.
+if not os.environ.get('SERVER_SOFTWARE', '').startswith('gunicorn'):
+    start_session_sweeper()
+    start_counter_flusher()
+
+def warm_shared_data():
+    """Load the static indexes and compile every template (gunicorn runs this before forking)"""
+    from services.catalog import load_catalogue
+    from services.geo import load_city_index
+    from services.locations import load_location_index
+    
+    load_catalogue()
+    load_city_index()
+    load_location_index()
+    for name in app.jinja_env.list_templates():
+        try:
+            app.jinja_env.get_template(name)
+        except Exception as e:
+            print(f"⚠️ Template {name} failed to compile: {e}")
 
 def generate_token():
     """Generate a secure random session token"""
     return secrets.token_urlsafe(32)
 
+def start_user_session(cur, user_id):
+    """Token for a fresh login: signed (AUTH_TOKEN_MODE=signed) or an opaque sessions row"""
+    if signed_tokens_enabled():
+        token, _ = issue_token(user_id, app.config['SECRET_KEY'])
+        return token
+    token = generate_token()
+    create_session(cur, user_id, token)
+    return token
+
+def load_user(user_id):
+    """User row by id (lazy profile lookup for signed tokens)"""
+    conn = get_db()
+    cur = conn.cursor()
+    try:
+        cur.execute('SELECT * FROM users WHERE id = %s', (user_id,))
+        user = cur.fetchone()
+        return dict(user) if user else None
+    finally:
+        cur.close()
+        conn.close()
+
 def require_auth(f):
     """Decorator to require authentication"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        token = request.headers.get('Authorization', '').replace('Bearer ', '')
+        token = bearer_token()
         
         if not token:
             return jsonify({'error': 'No authentication token provided'}), 401
         
-        conn = get_db()
-        cur = conn.cursor()
-        
-        try:
-            # Check if token is valid and not expired
-            cur.execute("""
-                SELECT s.user_id, u.* 
-                FROM sessions s
-                JOIN users u ON s.user_id = u.id
-                WHERE s.token = %s AND s.expires_at > NOW()
-            """, (token,))
-            
-            user = cur.fetchone()
-            
-            if not user:
-                return jsonify({'error': 'Invalid or expired token'}), 401
-            
-            request.user = dict(user)
-            return f(*args, **kwargs)
-            
-        finally:
-            cur.close()
-            conn.close()
+        # Signed tokens are checked in-process, without a database round trip;
+        # opaque ones against the sessions table (not api/auth.py's in-memory
+        # sessions, whose user ids are not rows of users)
+        identity = resolve_token(token, memory_sessions=False)
+        if not identity:
+            return jsonify({'error': 'Invalid or expired token'}), 401
+        
+        if 'claims' in identity:
+            request.user = TokenUser(identity['user_id'], load_user)
+            request.token_claims = identity['claims']
+        else:
+            request.user = identity['user']
+        return f(*args, **kwargs)
     
     return decorated_function
 
-# Health check endpoint
+# Health check endpoints
 @app.route('/health', methods=['GET'])
 def health():
-    """Health check endpoint"""
+    """Health check endpoint (cached dependency probes)"""
+    from services.health import get_health
+    
+    result = get_health()
+    database = result['checks']['database']
     health_status = {
-        'status': 'healthy',
+        'status': result['status'],
         'timestamp': datetime.now().isoformat(),
         'app': 'VidX Marketplace',
-        'version': '1.0.0'
+        'version': '1.0.0',
+        'database': 'connected' if database['status'] == 'ok' else database.get('error', database['status']),
+        'checks': result['checks'],
+        'checked_at': result['checked_at']
     }
     
-    # Check database if configured
-    if DATABASE_URL and DB_AVAILABLE:
-        try:
-            conn = get_db()
-            cur = conn.cursor()
-            cur.execute('SELECT 1')
-            cur.close()
-            conn.close()
-            health_status['database'] = 'connected'
-        except Exception as e:
-            health_status['database'] = f'error: {str(e)}'
-            health_status['status'] = 'degraded'
-    else:
-        health_status['database'] = 'not configured'
-    
     status_code = 200 if health_status['status'] in ['healthy', 'degraded'] else 500
     return jsonify(health_status), status_code
 
+@app.route('/health/live', methods=['GET'])
+def health_live():
+    """Liveness: the process is up and serving (no dependency checks)"""
+    return jsonify({'status': 'alive', 'timestamp': datetime.now().isoformat()}), 200
+
+@app.route('/health/ready', methods=['GET'])
+def health_ready():
+    """Readiness: critical dependencies (database) answer; 503 otherwise"""
+    from services.health import get_health
+    
+    result = get_health()
+    return jsonify(result), 200 if result['ready'] else 503
+
 # Test seed page (development only)
 @app.route('/test-seed')
 def test_seed():
@@ -218,13 +268,7 @@ def register():
         user = cur.fetchone()
         
         # Create session
-        token = generate_token()
-        expires_at = datetime.now() + timedelta(days=30)
-        
-        cur.execute("""
-            INSERT INTO sessions (user_id, token, expires_at)
-            VALUES (%s, %s, %s)
-        """, (user['id'], token, expires_at))
+        token = start_user_session(cur, user['id'])
         
         conn.commit()
         
@@ -239,6 +283,9 @@ def register():
             }
         }), 201
         
+    except PasswordHasherBusy:
+        conn.rollback()
+        return jsonify({'error': 'Server busy, please retry'}), 503
     except Exception as e:
         conn.rollback()
         return jsonify({'error': str(e)}), 500
@@ -267,17 +314,16 @@ def login():
         cur.execute('SELECT * FROM users WHERE email = %s', (email,))
         user = cur.fetchone()
         
-        if not user or not verify_password(password, user['password_hash']):
+        valid, new_hash = verify_and_update(password, user['password_hash'] if user else None)
+        if not valid:
             return jsonify({'error': 'Invalid email or password'}), 401
         
-        # Create session
-        token = generate_token()
-        expires_at = datetime.now() + timedelta(days=30)
+        # Legacy SHA-256 (or outdated scrypt cost) hashes are upgraded on login
+        if new_hash:
+            cur.execute('UPDATE users SET password_hash = %s WHERE id = %s', (new_hash, user['id']))
         
-        cur.execute("""
-            INSERT INTO sessions (user_id, token, expires_at)
-            VALUES (%s, %s, %s)
-        """, (user['id'], token, expires_at))
+        # Create session
+        token = start_user_session(cur, user['id'])
         
         conn.commit()
         
@@ -293,6 +339,9 @@ def login():
             }
         }), 200
         
+    except PasswordHasherBusy:
+        conn.rollback()
+        return jsonify({'error': 'Server busy, please retry'}), 503
     except Exception as e:
         conn.rollback()
         return jsonify({'error': str(e)}), 500
@@ -323,13 +372,17 @@ def get_current_user():
 @require_auth
 def logout():
     """Logout user (invalidate session)"""
-    token = request.headers.get('Authorization', '').replace('Bearer ', '')
+    token = bearer_token()
     
     conn = get_db()
     cur = conn.cursor()
     
     try:
-        cur.execute('DELETE FROM sessions WHERE token = %s', (token,))
+        claims = getattr(request, 'token_claims', None)
+        if claims:
+            revoke_token(cur, claims)
+        else:
+            delete_session(cur, token)
         conn.commit()
         return jsonify({'success': True}), 200
         
@@ -0,0 +1,50 @@
+-- Listing full-text search
+-- PostgreSQL 12+ (generated columns)
+--
+-- Apply with:
+--   psql "$DATABASE_URL" -f database/migrations/001_listing_search.sql
+
+-- Romanian-aware configuration that also folds diacritics, so "benzină",
+-- "benzina" and "BENZINA" all produce the same lexeme
+CREATE EXTENSION IF NOT EXISTS unaccent;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'vidx_ro') THEN
+        CREATE TEXT SEARCH CONFIGURATION vidx_ro (COPY = pg_catalog.romanian);
+        ALTER TEXT SEARCH CONFIGURATION vidx_ro
+            ALTER MAPPING FOR hword, hword_part, word
+            WITH unaccent, romanian_stem;
+    END IF;
+END
+$$;
+
+-- Weighted document: title (A) > make/model metadata (B) > location (C) > description (D)
+-- Weights match FIELD_WEIGHTS in services/search.py
+ALTER TABLE listings ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('vidx_ro', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('vidx_ro',
+            coalesce(metadata->>'make', '') || ' ' ||
+            coalesce(metadata->>'model', '') || ' ' ||
+            coalesce(metadata->>'brand', '') || ' ' ||
+            coalesce(metadata->>'type', '') || ' ' ||
+            coalesce(metadata->>'fuel_type', '') || ' ' ||
+            coalesce(metadata->>'transmission', '') || ' ' ||
+            coalesce(metadata->>'body_type', '') || ' ' ||
+            coalesce(metadata->>'color', '') || ' ' ||
+            coalesce(metadata->>'condition', '') || ' ' ||
+            coalesce(metadata->>'size', '') || ' ' ||
+            coalesce(metadata->>'material', '')), 'B') ||
+        setweight(to_tsvector('vidx_ro', coalesce(location, '')), 'C') ||
+        setweight(to_tsvector('vidx_ro', coalesce(description, '')), 'D')
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_listings_search ON listings USING GIN (search_vector);
+
+-- Tie-breaker ordering for keyset pagination (rank DESC, created_at DESC, id DESC)
+CREATE INDEX IF NOT EXISTS idx_listings_active_created
+    ON listings (created_at DESC, id DESC)
+    WHERE status = 'active';
+
+ANALYZE listings;
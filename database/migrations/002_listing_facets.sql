@@ -0,0 +1,60 @@
+-- Server-side category filters and facet counts
+-- PostgreSQL 12+ (generated columns), requires 001_listing_search.sql (unaccent)
+--
+-- Apply with:
+--   psql "$DATABASE_URL" -f database/migrations/002_listing_facets.sql
+
+-- unaccent() is only STABLE; pinning the dictionary makes it safe to use in
+-- generated columns and expression indexes
+CREATE OR REPLACE FUNCTION vidx_unaccent(text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$;
+
+-- Facet slug, must match facet_value() in services/filters.py:
+-- "Benzină" -> "benzina", "Land Rover" -> "land-rover"
+CREATE OR REPLACE FUNCTION vidx_facet(text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    AS $$ SELECT trim(both '-' from regexp_replace(lower(vidx_unaccent(trim($1))), '[^a-z0-9]+', '-', 'g')) $$;
+
+-- Numeric metadata value, NULL instead of a cast error for free text
+CREATE OR REPLACE FUNCTION vidx_numeric(text) RETURNS numeric
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    AS $$ SELECT CASE WHEN replace($1, ',', '') ~ '^\s*-?[0-9]+(\.[0-9]+)?\s*$'
+                      THEN replace($1, ',', '')::numeric END $$;
+
+-- All scalar metadata values as "key=slug" tokens
+CREATE OR REPLACE FUNCTION vidx_facet_values(jsonb) RETURNS text[]
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE
+    AS $$
+        SELECT coalesce(array_agg(key || '=' || vidx_facet(value)), '{}')
+        FROM jsonb_each_text(coalesce($1, '{}'::jsonb))
+        WHERE jsonb_typeof($1 -> key) IN ('string', 'number', 'boolean')
+          AND length(value) <= 100
+    $$;
+
+ALTER TABLE listings ADD COLUMN IF NOT EXISTS facet_values text[]
+    GENERATED ALWAYS AS (vidx_facet_values(metadata)) STORED;
+
+-- One GIN index serves every choice filter of every category (facet_values && ARRAY[...])
+CREATE INDEX IF NOT EXISTS idx_listings_facets
+    ON listings USING GIN (facet_values)
+    WHERE status = 'active';
+
+-- Range filters and the default feed order
+CREATE INDEX IF NOT EXISTS idx_listings_category_price
+    ON listings (category, price)
+    WHERE status = 'active';
+
+CREATE INDEX IF NOT EXISTS idx_listings_category_created
+    ON listings (category, created_at DESC, id DESC)
+    WHERE status = 'active';
+
+CREATE INDEX IF NOT EXISTS idx_listings_year
+    ON listings (category, vidx_numeric(metadata->>'year'))
+    WHERE status = 'active';
+
+CREATE INDEX IF NOT EXISTS idx_listings_mileage
+    ON listings (category, vidx_numeric(metadata->>'mileage'))
+    WHERE status = 'active';
+
+ANALYZE listings;
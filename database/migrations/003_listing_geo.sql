@@ -0,0 +1,14 @@
+-- Listing coordinates for radius search
+-- Plain columns + btree bounding box, no PostGIS/earthdistance required.
+-- services/geo.listing_radius_sql() filters on the box, then refines with Haversine.
+--
+-- Apply with:
+--   psql "$DATABASE_URL" -f database/migrations/003_listing_geo.sql
+--   python scripts/backfill_listing_geo.py
+
+ALTER TABLE listings ADD COLUMN IF NOT EXISTS latitude DOUBLE PRECISION;
+ALTER TABLE listings ADD COLUMN IF NOT EXISTS longitude DOUBLE PRECISION;
+
+CREATE INDEX IF NOT EXISTS idx_listings_lat_lon
+    ON listings (latitude, longitude)
+    WHERE status = 'active' AND latitude IS NOT NULL;
@@ -0,0 +1,45 @@
+-- Compact session storage
+-- Sessions are looked up by a fixed 32-byte SHA-256 digest of the bearer
+-- token instead of the raw VARCHAR(500) token, so the table and its unique
+-- index stay small enough to live in shared buffers; services/sessions.py
+-- hashes the token on every lookup.
+--
+-- This step is rollout-safe: the plaintext token column stays populated so
+-- app instances still running the old code keep finding every session, and
+-- new instances keep writing it while SESSION_LEGACY_TOKENS=1 (the default).
+-- Once every instance runs the new code with SESSION_LEGACY_TOKENS=0, apply
+-- 011_drop_session_token.sql to get rid of the plaintext tokens.
+--
+-- Expired rows are removed in small batches by the sweeper in
+-- services/sessions.py (idx_sessions_expires_at keeps that cheap).
+--
+-- Apply with:
+--   psql "$DATABASE_URL" -f database/migrations/004_session_tokens.sql
+
+BEGIN;
+
+ALTER TABLE sessions ADD COLUMN IF NOT EXISTS token_hash BYTEA;
+ALTER TABLE sessions ALTER COLUMN token DROP NOT NULL;
+
+-- Existing sessions keep working: hash their tokens (the plaintext stays
+-- until 011)
+UPDATE sessions
+SET token_hash = sha256(convert_to(token, 'UTF8'))
+WHERE token_hash IS NULL AND token IS NOT NULL;
+
+-- Expired sessions are dead weight; the sweeper keeps them out from now on
+DELETE FROM sessions WHERE expires_at <= NOW();
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_sessions_token_hash
+    ON sessions (token_hash) INCLUDE (user_id, expires_at);
+
+CREATE INDEX IF NOT EXISTS idx_sessions_expires_at ON sessions (expires_at);
+
+-- The full-width token index is replaced by a partial one that serves
+-- old-code lookups during the rollout and is dropped with the column in 011
+ALTER TABLE sessions DROP CONSTRAINT IF EXISTS sessions_token_key;
+DROP INDEX IF EXISTS idx_sessions_token;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_sessions_legacy_token
+    ON sessions (token) WHERE token IS NOT NULL;
+
+COMMIT;
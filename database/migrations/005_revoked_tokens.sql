@@ -0,0 +1,18 @@
+-- Revocation list for signed session tokens (AUTH_TOKEN_MODE=signed)
+-- Signed tokens are verified without a database lookup; logout records the
+-- token id here and every app process mirrors the live rows in memory
+-- (services/tokens.py). Rows are purged by the session sweeper once the
+-- token would have expired anyway, so the table stays tiny.
+--
+-- Apply with:
+--   psql "$DATABASE_URL" -f database/migrations/005_revoked_tokens.sql
+
+CREATE TABLE IF NOT EXISTS revoked_tokens (
+    jti BYTEA PRIMARY KEY,
+    expires_at TIMESTAMPTZ NOT NULL,
+    revoked_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Incremental refresh in each process reads by revoked_at
+CREATE INDEX IF NOT EXISTS idx_revoked_tokens_revoked_at ON revoked_tokens (revoked_at);
+CREATE INDEX IF NOT EXISTS idx_revoked_tokens_expires_at ON revoked_tokens (expires_at);
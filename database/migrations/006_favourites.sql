@@ -0,0 +1,47 @@
+-- Favourites
+-- One row per (user, listing) instead of the ads.favourited_by INTEGER[]
+-- column: favouriting is a single-row insert/delete, "is this favourited by
+-- me" is a primary key probe, and a user's favourites page is an index range
+-- scan (services/favourites.py pages it by (created_at, listing_id)).
+--
+-- Apply with:
+--   psql "$DATABASE_URL" -f database/migrations/006_favourites.sql
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS favourites (
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    listing_id VARCHAR(50) NOT NULL REFERENCES listings(id) ON DELETE CASCADE,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    -- Also serves the bulk "which of these cards has this user favourited" lookup
+    PRIMARY KEY (user_id, listing_id)
+);
+
+-- A user's favourites, newest first (keyset pagination)
+CREATE INDEX IF NOT EXISTS idx_favourites_user_created
+    ON favourites (user_id, created_at DESC, listing_id DESC);
+
+-- The other direction: who favourited a listing, counts, ON DELETE CASCADE
+CREATE INDEX IF NOT EXISTS idx_favourites_listing ON favourites (listing_id);
+
+-- Carry over the array column where the ad has a matching listing and user
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'ads' AND column_name = 'favourited_by'
+    ) THEN
+        INSERT INTO favourites (user_id, listing_id, created_at)
+        SELECT f.user_id, l.id, coalesce(a.updated_at, NOW())
+        FROM ads a
+        CROSS JOIN LATERAL unnest(a.favourited_by) AS f(user_id)
+        JOIN listings l ON l.id = a.id::text
+        JOIN users u ON u.id = f.user_id
+        ON CONFLICT DO NOTHING;
+
+        ALTER TABLE ads DROP COLUMN favourited_by;
+    END IF;
+END
+$$;
+
+COMMIT;
@@ -0,0 +1,15 @@
+-- My ads
+-- The my-ads page reads a seller's listings per status bucket, newest
+-- first: per-status counts plus the first page of each bucket come from one
+-- window-function query, and further pages of a bucket are keyset scans
+-- (services/listing_store.py status_pages / status_page). This index serves
+-- both in order, so neither sorts the seller's whole history.
+--
+-- Apply with:
+--   psql "$DATABASE_URL" -f database/migrations/007_user_listings.sql
+
+CREATE INDEX IF NOT EXISTS idx_listings_user_status_created
+    ON listings (user_id, status, created_at DESC, id DESC);
+
+-- Superseded by the index above (user_id is its leading column)
+DROP INDEX IF EXISTS idx_listings_user_id;
@@ -0,0 +1,40 @@
+-- Listing price display
+-- The card price string ("€5,000", "€5,000.50") is computed once when a
+-- listing's price or currency is written instead of on every page render.
+-- services/listing_cards.py format_price produces the same format for the
+-- embedded store and for rows that predate this column.
+--
+-- Apply with:
+--   psql "$DATABASE_URL" -f database/migrations/008_listing_price_display.sql
+
+BEGIN;
+
+ALTER TABLE listings ADD COLUMN IF NOT EXISTS price_display TEXT;
+
+CREATE OR REPLACE FUNCTION listing_price_display(price NUMERIC, currency TEXT)
+RETURNS TEXT AS $$
+    SELECT CASE coalesce(currency, 'EUR') WHEN 'EUR' THEN '€' ELSE '$' END ||
+           CASE WHEN coalesce(price, 0) = trunc(coalesce(price, 0))
+                THEN to_char(coalesce(price, 0), 'FM999,999,999,990')
+                ELSE to_char(price, 'FM999,999,999,990.00')
+           END
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION set_listing_price_display()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.price_display := listing_price_display(NEW.price, NEW.currency);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS listings_price_display ON listings;
+CREATE TRIGGER listings_price_display
+    BEFORE INSERT OR UPDATE OF price, currency ON listings
+    FOR EACH ROW EXECUTE FUNCTION set_listing_price_display();
+
+UPDATE listings
+SET price_display = listing_price_display(price, currency)
+WHERE price_display IS DISTINCT FROM listing_price_display(price, currency);
+
+COMMIT;
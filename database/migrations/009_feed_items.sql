@@ -0,0 +1,111 @@
+-- Category feed projection
+-- feed_items holds one narrow row per active listing with just the card
+-- columns. A trigger on listings keeps it current: a listing that is
+-- created, edited or gets new counters is upserted, and one that is sold,
+-- archived, deleted or removed drops out. The unfiltered category feed is
+-- then a single range scan of idx_feed_items_category_created
+-- (services/listing_store.py feed_page) instead of sorting every active
+-- listing of the category.
+--
+-- The projected columns are as loose as the listings columns they copy
+-- (TEXT / NUMERIC, nullable), so no listing write can fail in the trigger;
+-- only category is coalesced to 'other' for the feed index.
+--
+-- Apply with:
+--   psql "$DATABASE_URL" -f database/migrations/009_feed_items.sql
+-- (after 008, which adds listings.price_display)
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS feed_items (
+    listing_id VARCHAR(50) PRIMARY KEY REFERENCES listings(id) ON DELETE CASCADE,
+    category TEXT NOT NULL,
+    created_at TIMESTAMP NOT NULL,
+    title TEXT,
+    price NUMERIC,
+    price_display TEXT,
+    currency TEXT,
+    location TEXT,
+    video_url TEXT,
+    thumbnail_url TEXT,
+    seller_name TEXT,
+    seller_avatar TEXT,
+    views INTEGER NOT NULL DEFAULT 0,
+    likes INTEGER NOT NULL DEFAULT 0
+);
+
+-- Tables created by an earlier version of this migration
+ALTER TABLE feed_items
+    ALTER COLUMN category TYPE TEXT,
+    ALTER COLUMN title TYPE TEXT,
+    ALTER COLUMN title DROP NOT NULL,
+    ALTER COLUMN price TYPE NUMERIC,
+    ALTER COLUMN currency TYPE TEXT,
+    ALTER COLUMN location TYPE TEXT,
+    ALTER COLUMN seller_name TYPE TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_feed_items_category_created
+    ON feed_items (category, created_at DESC, listing_id DESC);
+
+-- All-categories feed (home page)
+CREATE INDEX IF NOT EXISTS idx_feed_items_created
+    ON feed_items (created_at DESC, listing_id DESC);
+
+CREATE OR REPLACE FUNCTION refresh_feed_item()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'DELETE' OR NEW.status IS DISTINCT FROM 'active' THEN
+        DELETE FROM feed_items WHERE listing_id = OLD.id;
+        RETURN NULL;
+    END IF;
+
+    INSERT INTO feed_items (
+        listing_id, category, created_at, title, price, price_display, currency, location,
+        video_url, thumbnail_url, seller_name, seller_avatar, views, likes
+    ) VALUES (
+        NEW.id, coalesce(NEW.category, 'other'), coalesce(NEW.created_at, CURRENT_TIMESTAMP), NEW.title, NEW.price,
+        NEW.price_display, NEW.currency, NEW.location, NEW.video_url, NEW.thumbnail_url,
+        NEW.seller_name, NEW.seller_avatar, coalesce(NEW.views, 0), coalesce(NEW.likes, 0)
+    )
+    ON CONFLICT (listing_id) DO UPDATE SET
+        category = EXCLUDED.category,
+        created_at = EXCLUDED.created_at,
+        title = EXCLUDED.title,
+        price = EXCLUDED.price,
+        price_display = EXCLUDED.price_display,
+        currency = EXCLUDED.currency,
+        location = EXCLUDED.location,
+        video_url = EXCLUDED.video_url,
+        thumbnail_url = EXCLUDED.thumbnail_url,
+        seller_name = EXCLUDED.seller_name,
+        seller_avatar = EXCLUDED.seller_avatar,
+        views = EXCLUDED.views,
+        likes = EXCLUDED.likes;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Only changes to projected columns (or status) touch feed_items;
+-- updated_at / search_vector / facet_values-only writes do not
+DROP TRIGGER IF EXISTS listings_feed_items ON listings;
+CREATE TRIGGER listings_feed_items
+    AFTER INSERT OR DELETE OR UPDATE OF
+        status, category, created_at, title, price, price_display, currency, location,
+        video_url, thumbnail_url, seller_name, seller_avatar, views, likes
+    ON listings
+    FOR EACH ROW EXECUTE FUNCTION refresh_feed_item();
+
+-- Initial fill
+INSERT INTO feed_items (
+    listing_id, category, created_at, title, price, price_display, currency, location,
+    video_url, thumbnail_url, seller_name, seller_avatar, views, likes
+)
+SELECT id, coalesce(category, 'other'), coalesce(created_at, CURRENT_TIMESTAMP), title, price, price_display, currency,
+       location, video_url, thumbnail_url, seller_name, seller_avatar, coalesce(views, 0), coalesce(likes, 0)
+FROM listings
+WHERE status = 'active'
+ON CONFLICT (listing_id) DO NOTHING;
+
+ANALYZE feed_items;
+
+COMMIT;
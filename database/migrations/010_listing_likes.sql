@@ -0,0 +1,23 @@
+-- Listing likes
+-- One row per (user, listing), like favourites (006): a user can like a
+-- listing once, and POST /api/listings/<id>/like only moves the buffered
+-- like counter when a row is inserted or deleted.
+--
+-- Apply with:
+--   psql "$DATABASE_URL" -f database/migrations/010_listing_likes.sql
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS listing_likes (
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    listing_id VARCHAR(50) NOT NULL REFERENCES listings(id) ON DELETE CASCADE,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (user_id, listing_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_listing_likes_user_created
+    ON listing_likes (user_id, created_at DESC, listing_id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_listing_likes_listing ON listing_likes (listing_id);
+
+COMMIT;
@@ -0,0 +1,26 @@
+-- Drop plaintext session tokens
+-- Second step of 004_session_tokens.sql. Apply only after every app instance
+-- runs the token_hash code with SESSION_LEGACY_TOKENS=0: from then on nothing
+-- reads or writes sessions.token, so the column (and its partial index) can
+-- go, and a leaked table no longer contains usable tokens.
+--
+-- Apply with:
+--   psql "$DATABASE_URL" -f database/migrations/011_drop_session_token.sql
+-- then optionally reclaim the space of the old column:
+--   psql "$DATABASE_URL" -c 'VACUUM (FULL, ANALYZE) sessions'
+
+BEGIN;
+
+-- Sessions written by old instances before the sweeper hashed them
+UPDATE sessions
+SET token_hash = sha256(convert_to(token, 'UTF8'))
+WHERE token_hash IS NULL AND token IS NOT NULL;
+
+DELETE FROM sessions WHERE token_hash IS NULL;
+
+ALTER TABLE sessions ALTER COLUMN token_hash SET NOT NULL;
+
+DROP INDEX IF EXISTS idx_sessions_legacy_token;
+ALTER TABLE sessions DROP COLUMN IF EXISTS token;
+
+COMMIT;
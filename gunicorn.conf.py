@@ -0,0 +1,86 @@
+"""
+Gunicorn configuration for VidX Marketplace
+Loaded automatically by `gunicorn app:app` from the project root.
+
+- preload_app: the app, the static indexes (car catalogue, city and
+  location indexes) and the compiled templates are loaded once in the
+  master and shared copy-on-write by every worker. gc.freeze() keeps the
+  collector from touching (and so copying) those pages after fork.
+- gthread workers by default: a long request (video render, OpenAI call)
+  occupies one thread instead of a whole worker, so a couple of renders
+  no longer take the site down. GUNICORN_WORKER_CLASS=sync restores the
+  old model; gevent works too once gevent (and psycogreen) are installed.
+- VIDX_SERVER_ROLE=video starts a separate process group for video
+  generation (few workers, long timeout) on VIDEO_PORT; route /api/video/
+  to it from the proxy in front (startup.sh starts it when VIDEO_PORT is set).
+
+Tuning (environment):
+    WEB_CONCURRENCY / GUNICORN_WORKERS   worker processes (default: cores, min 2)
+    GUNICORN_THREADS                     threads per gthread worker (default 8)
+    GUNICORN_WORKER_CLASS                gthread | sync | gevent
+    GUNICORN_TIMEOUT                     worker timeout in seconds
+"""
+
+import gc
+import multiprocessing
+import os
+
+ROLE = os.environ.get('VIDX_SERVER_ROLE', 'web')
+CORES = multiprocessing.cpu_count()
+
+if ROLE == 'video':
+    bind = f"0.0.0.0:{os.environ.get('VIDEO_PORT', '8001')}"
+    workers = int(os.environ.get('VIDEO_WORKERS', max(1, CORES // 2)))
+    worker_class = 'gthread'
+    threads = int(os.environ.get('VIDEO_THREADS', 2))
+    timeout = int(os.environ.get('GUNICORN_TIMEOUT', 600))
+else:
+    bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+    workers = int(os.environ.get('WEB_CONCURRENCY', os.environ.get('GUNICORN_WORKERS', max(2, CORES))))
+    worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+    # gunicorn silently turns sync workers into gthread when threads > 1
+    threads = int(os.environ.get('GUNICORN_THREADS', 8)) if worker_class == 'gthread' else 1
+    # gthread workers heartbeat from their main loop, so long requests do not trip the timeout;
+    # sync workers block for the whole request and need the old render-sized timeout
+    timeout = int(os.environ.get('GUNICORN_TIMEOUT', 600 if worker_class == 'sync' else 120))
+
+if worker_class == 'gevent':
+    worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 100))
+
+preload_app = True
+graceful_timeout = 30
+keepalive = 5
+accesslog = '-'
+errorlog = '-'
+
+
+def when_ready(server):
+    """Runs in the master after the app is preloaded and before any worker forks"""
+    from app import warm_shared_data
+
+    warm_shared_data()
+    # Move everything loaded so far out of the collector's reach so workers
+    # do not dirty the shared pages when they run a collection
+    gc.freeze()
+    server.log.info(f"VidX {ROLE}: {workers} {worker_class} workers x {threads} threads, shared data warmed")
+
+
+def post_fork(server, worker):
+    """Per-worker state that must not be inherited from the master"""
+    from services import health
+    from services.counters import start_counter_flusher
+    from services.sessions import start_session_sweeper
+
+    # Sockets opened in the master would be shared by every worker
+    health.reset_connections()
+    # Threads do not survive fork; each worker runs its own sweeper (batches use SKIP LOCKED)
+    start_session_sweeper()
+    # and buffers/flushes its own view and like counters
+    start_counter_flusher()
+
+
+def worker_exit(server, worker):
+    """Write the buffered counters before the worker goes away"""
+    from services.counters import flush_counters
+
+    flush_counters()
@@ -5,12 +5,47 @@ Each category has its own template with custom filters
 """
 
 from flask import Blueprint, render_template, request, abort
+import json
+
+from services.search import search_listings
 
 bp = Blueprint('search', __name__)
 
 # Import categories from categories route
 from .categories import CATEGORIES
 
+
+def format_result(listing):
+    """Shape a listing row into the card fields used by the search templates"""
+    metadata = listing.get('metadata') or {}
+    if isinstance(metadata, str):
+        try:
+            metadata = json.loads(metadata)
+        except ValueError:
+            metadata = {}
+
+    price_value = listing.get('price') or 0
+    duration = metadata.get('duration')
+    if duration:
+        duration = f"{int(float(duration)) // 60}:{int(float(duration)) % 60:02d}"
+
+    return {
+        'id': listing['id'],
+        'title': listing['title'],
+        'category': listing.get('category', ''),
+        'price': f"{float(price_value):,.0f}",
+        'location': listing.get('location', ''),
+        'video_url': listing.get('video_url', ''),
+        'thumbnail': listing.get('thumbnail_url') or listing.get('video_url'),
+        'duration': duration or '',
+        'year': metadata.get('year', ''),
+        'mileage': f"{int(metadata['mileage']):,}" if metadata.get('mileage') else '',
+        'brand': metadata.get('brand') or metadata.get('make', ''),
+        'condition': listing.get('condition') or metadata.get('condition', ''),
+        'size': metadata.get('size', ''),
+    }
+
+
 @bp.route('/search')
 @bp.route('/search/<category>')
 def search_page(category=None):
@@ -19,22 +54,23 @@ def search_page(category=None):
     """
     # Get search query
     query = request.args.get('q', '')
-    
+    cursor = request.args.get('cursor')
+
     # Validate category if specified
     if category and category not in CATEGORIES:
         abort(404)
-    
+
     category_info = CATEGORIES.get(category) if category else None
-    
-    # TODO: Fetch search results from database
-    # For now, return empty list
-    results = []
-    
-    # Use category-specific template if it exists
-    template = f'search/{category}.html' if category else 'search/general.html'
-    
-    return render_template(template,
+
+    page = search_listings(query, category=category, cursor=cursor)
+    results = [format_result(listing) for listing in page['results']]
+
+    # Use category-specific template if it exists, general search otherwise
+    templates = [f'search/{category}.html', 'search/general.html'] if category else ['search/general.html']
+
+    return render_template(templates,
                          category=category,
                          category_info=category_info,
                          query=query,
-                         results=results)
+                         results=results,
+                         next_cursor=page['next_cursor'])
@@ -3,7 +3,9 @@ Upload flow routes
 Handles the 3-step upload process
 """
 
-from flask import Blueprint, render_template
+from flask import Blueprint, redirect, render_template, send_from_directory
+
+from services.media import get_media_storage
 
 bp = Blueprint('upload', __name__)
 
@@ -21,3 +23,13 @@ def upload_step2():
 def upload_step3():
     """Upload - Step 3: Review and publish"""
     return render_template('upload/step3.html')
+
+@bp.route('/media/<path:path>')
+def media_file(path):
+    """Stored media: from the local media directory, or a redirect to R2"""
+    key = f"media/{path}"
+    storage = get_media_storage()
+    if storage.backend != 'local':
+        return redirect(storage.url(key), code=301)
+    # Keys are content hashes, so the files never change
+    return send_from_directory(storage.root, key, max_age=31536000)
@@ -3,9 +3,9 @@ User pages routes
 Profile, my ads, favourites, login, register
 """
 
-from flask import Blueprint, render_template, session, request
-import json
-import os
+from flask import Blueprint, abort, make_response, render_template, session, request
+
+from services.listings import user_listing_buckets, user_listing_page
 
 bp = Blueprint('user', __name__)
 
@@ -16,44 +16,6 @@ def get_current_user_id():
     # Note: Using numeric ID 1 for demo user (matches users.id in database)
     return session.get('user_id', 1)
 
-def load_user_listings(user_id):
-    """Load listings for a specific user from PostgreSQL database"""
-    try:
-        from app import get_db
-        conn = get_db()
-        cur = conn.cursor()
-        
-        cur.execute("""
-            SELECT * FROM listings 
-            WHERE user_id = %s
-            ORDER BY created_at DESC;
-        """, (user_id,))
-        
-        listings = cur.fetchall()
-        cur.close()
-        conn.close()
-        
-        # Convert to list of dicts
-        return [dict(listing) for listing in listings]
-        
-    except Exception as e:
-        print(f"[ERROR] Database error loading user listings: {e}")
-        # Fallback to db.json
-        return load_user_listings_from_json(user_id)
-
-def load_user_listings_from_json(user_id):
-    """Load user listings from db.json (fallback)"""
-    db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'db.json')
-    try:
-        with open(db_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            listings = data.get('listings', [])
-            # Filter by user_id
-            return [l for l in listings if l.get('user_id') == user_id]
-    except Exception as e:
-        print(f"[ERROR] Failed to load from db.json: {e}")
-        return []
-
 @bp.route('/login')
 def login():
     """Login page"""
@@ -71,21 +33,21 @@ def profile():
 
 @bp.route('/my-ads')
 def my_ads():
-    """User's ads page"""
+    """User's ads page: counts and the first page of every status tab from one query"""
     user_id = get_current_user_id()
-    listings = load_user_listings(user_id)
-    
-    # Categorize listings by status
-    active_listings = [l for l in listings if l.get('status') == 'active']
-    pending_listings = [l for l in listings if l.get('status') == 'pending']
-    sold_listings = [l for l in listings if l.get('status') == 'sold']
-    archived_listings = [l for l in listings if l.get('status') == 'archived']
-    
-    return render_template('user/my-ads.html',
-                         active_listings=active_listings,
-                         pending_listings=pending_listings,
-                         sold_listings=sold_listings,
-                         archived_listings=archived_listings)
+    buckets, _ = user_listing_buckets(user_id)
+    return render_template('user/my-ads.html', buckets=buckets)
+
+@bp.route('/my-ads/<status>')
+def my_ads_page(status):
+    """Next page of one my-ads tab as card HTML (cursor of the page after it in X-Next-Cursor)"""
+    try:
+        listings, next_cursor = user_listing_page(get_current_user_id(), status, cursor=request.args.get('cursor'))
+    except ValueError:
+        abort(400)
+    response = make_response(render_template('user/my-ads-cards.html', listings=listings))
+    response.headers['X-Next-Cursor'] = next_cursor or ''
+    return response
 
 @bp.route('/favourites')
 def favourites():
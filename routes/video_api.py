@@ -7,14 +7,20 @@ from flask import Blueprint, request, jsonify
 import os
 import json
 from pathlib import Path
-import tempfile
 import hashlib
 from datetime import datetime
-from video_pipeline import generate_video_pipeline
 
 bp = Blueprint('video', __name__, url_prefix='/api/video')
 
 
+def _remove_files(paths):
+    for path in paths:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
 @bp.route('/generate', methods=['POST'])
 def generate_video():
     """
@@ -26,7 +32,9 @@ def generate_video():
         "category": "automotive",
         "description": "Product description",
         "price": 6500,
+        "image_keys": ["media/originals/<sha256>.jpg", ...],
         "images": ["base64_image_1", "base64_image_2", ...],
+        "theme": "dark",  // placeholder card when there are no images
         "details": {
             "condition": "good",
             "location": "Cluj-Napoca",
@@ -43,122 +51,78 @@ def generate_video():
     }
     """
     try:
-        data = request.get_json()
-        
-        # Validate required fields
-        required_fields = ['title', 'category', 'description', 'price']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({
-                    'success': False,
-                    'error': f'Missing required field: {field}'
-                }), 400
-        
-        # Extract data
-        title = data['title']
-        category = data['category']
-        description = data['description']
-        price = float(data['price'])
-        details = data.get('details', {})
-        images_data = data.get('images', [])
-        
-        # Convert base64 images to temp files
-        import base64
+        if not request.is_json:
+            return jsonify({'success': False, 'error': 'Expected a JSON body'}), 415
+        
+        # Base64 photos are decoded into temp files while the body is read,
+        # instead of holding the whole payload (see services/payload_stream.py)
+        from services.payload_stream import PayloadError, read_image_payload
+        try:
+            data, decoded_images = read_image_payload(request.stream)
+        except PayloadError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        # Temp files (decoded photos and originals fetched by key) are removed
+        # however the request ends
         image_files = []
-        
-        for i, img_data in enumerate(images_data):
-            # Remove data URI prefix if present
-            if ',' in img_data:
-                img_data = img_data.split(',')[1]
-            
-            # Decode base64
-            img_bytes = base64.b64decode(img_data)
-            
-            # Save to temp file
-            temp_img = tempfile.NamedTemporaryFile(suffix='.jpg', delete=False)
-            temp_img.write(img_bytes)
-            temp_img.close()
-            image_files.append(temp_img.name)
-        
-        # If no images provided, create placeholder images
-        if not image_files:
-            print("⚠️ No images provided, creating placeholder image...")
-            from PIL import Image, ImageDraw, ImageFont
-            
-            # Create a simple placeholder image
-            img = Image.new('RGB', (1920, 1080), color='#1f2937')
-            draw = ImageDraw.Draw(img)
-            
-            # Use default font (works on all platforms)
-            # Note: For better fonts on Linux, install: fonts-dejavu-core
-            try:
-                # Try common font paths (Linux/Mac/Windows)
-                font_paths = [
-                    "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",  # Linux (Azure)
-                    "/System/Library/Fonts/Helvetica.ttc",  # macOS
-                    "C:\\Windows\\Fonts\\Arial.ttf",  # Windows
-                ]
-                font = None
-                small_font = None
-                for font_path in font_paths:
-                    try:
-                        font = ImageFont.truetype(font_path, 120)
-                        small_font = ImageFont.truetype(font_path, 60)
-                        break
-                    except:
-                        continue
-                
-                if not font:
-                    # Fallback to default font
-                    font = ImageFont.load_default()
-                    small_font = ImageFont.load_default()
-            except Exception as e:
-                print(f"⚠️ Font loading error: {e}, using default font")
-                font = ImageFont.load_default()
-                small_font = ImageFont.load_default()
-            
-            # Center text
-            text = title[:40]  # Limit text length
-            text_width = len(text) * 50  # Approximate width
-            x = max(100, (1920 - text_width) / 2)
-            y = 400
-            
-            draw.text((x, y), text, fill='#ffffff', font=font)
-            draw.text((860, y + 150), f"€{price:,.0f}", fill='#6366f1', font=small_font)
-            
-            # Save placeholder
-            temp_img = tempfile.NamedTemporaryFile(suffix='.jpg', delete=False)
-            img.save(temp_img.name, 'JPEG', quality=85)
-            temp_img.close()
-            image_files.append(temp_img.name)
-        
-        # Generate video using the pipeline
-        print(f"🎬 Generating video for: {title}")
-        print(f"   Category: {category}")
-        print(f"   Price: €{price}")
-        print(f"   Images: {len(image_files)}")
-        
-        import time
-        start_time = time.time()
-        
-        result = generate_video_pipeline(
-            images=image_files,
-            description=description,
-            title=title,
-            category=category,
-            price=price,
-            details=details,
-            language='ro'  # Romanian by default
-        )
-        
-        processing_time = time.time() - start_time
-        
-        # Clean up temp files
-        for img_file in image_files:
+        try:
+            # Validate required fields
+            required_fields = ['title', 'category', 'description', 'price']
+            for field in required_fields:
+                if field not in data:
+                    return jsonify({
+                        'success': False,
+                        'error': f'Missing required field: {field}'
+                    }), 400
+        
+            # Extract data
+            title = data['title']
+            category = data['category']
+            description = data['description']
+            price = float(data['price'])
+            details = data.get('details', {})
+            image_keys = data.get('image_keys') or []
+        
+            # Photos already stored by /api/media are fetched by key, not sent again
+            from services.media import MediaError, fetch_to_file, media_url
+            thumbnail_url = media_url(image_keys[0]) if image_keys else None
             try:
-                os.unlink(img_file)
-            except:
-                pass
+                for key in image_keys:
+                    image_files.append(fetch_to_file(key))
+            except MediaError as e:
+                return jsonify({'success': False, 'error': str(e)}), 400
+        
+            # If no images provided, use a placeholder card (cached and shared, not cleaned up)
+            video_images = image_files + decoded_images
+            if not video_images:
+                print("⚠️ No images provided, using placeholder card...")
+                from services.placeholders import get_placeholder
+                video_images = [get_placeholder(title, price, data.get('theme'))]
+        
+            # Generate video using the pipeline
+            print(f"🎬 Generating video for: {title}")
+            print(f"   Category: {category}")
+            print(f"   Price: €{price}")
+            print(f"   Images: {len(image_files) + len(decoded_images)}")
+        
+            import time
+            from video_pipeline import generate_video_pipeline
+            start_time = time.time()
+        
+            result = generate_video_pipeline(
+                images=video_images,
+                description=description,
+                title=title,
+                category=category,
+                price=price,
+                details=details,
+                language='ro',  # Romanian by default
+                thumbnail_url=thumbnail_url
+            )
+        
+            processing_time = time.time() - start_time
+        finally:
+            _remove_files(image_files + decoded_images)
         
         # Create ad listing data
         ad_listing = {
@@ -172,7 +136,7 @@ def generate_video():
             'video_url': result['video_url'],
             'video_key': result.get('video_key', ''),
             'script': result.get('script', ''),
-            'thumbnail_url': result['video_url'],  # Video URL also serves as thumbnail
+            'thumbnail_url': result.get('thumbnail_url') or result['video_url'],
             'created_at': datetime.now().isoformat(),
             'views': 0,
             'likes': 0,
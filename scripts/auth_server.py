@@ -1,79 +1,82 @@
 """
 VidX Authentication Server
-A simple JSON-based authentication server with bcrypt password hashing.
+A simple authentication server backed by an indexed SQLite store (auth_store.py).
 Ready for migration to a real database (PostgreSQL, MySQL, etc.)
 """
 
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from http.server import HTTPServer, ThreadingHTTPServer, BaseHTTPRequestHandler
+import argparse
 import json
 import os
 from urllib.parse import parse_qs, urlparse
 from datetime import datetime
 import secrets
-import hashlib
+import sys
+
+from auth_store import AuthStore, EmailExistsError
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services import passwords  # noqa: E402
+from services.passwords import PasswordHasherBusy, hash_password  # noqa: E402
 
-# Simple password hashing (using hashlib for now - easy to swap for bcrypt later)
-def hash_password(password):
-    """Hash a password using SHA-256 with salt"""
-    salt = secrets.token_hex(16)
-    pwd_hash = hashlib.sha256((password + salt).encode()).hexdigest()
-    return f"{salt}${pwd_hash}"
 
 def verify_password(password, hash_string):
-    """Verify a password against a hash"""
-    try:
-        salt, pwd_hash = hash_string.split('$')
-        return hashlib.sha256((password + salt).encode()).hexdigest() == pwd_hash
-    except:
-        # Fallback for plain text passwords (backwards compatibility)
-        return password == hash_string
+    """Verify a password against a stored hash (plain text accepted for old dev data)"""
+    return passwords.verify_password(password, hash_string, allow_plaintext=True)
 
 def generate_token():
     """Generate a secure random token"""
     return secrets.token_urlsafe(32)
 
+def utc_now():
+    return datetime.utcnow().isoformat() + 'Z'
+
+def public_user(user):
+    """User fields returned to clients (never the password hash)"""
+    return {
+        'id': user['id'],
+        'name': user['name'],
+        'email': user['email'],
+        'createdAt': user.get('createdAt', '')
+    }
+
 class AuthHandler(BaseHTTPRequestHandler):
-    # Database path relative to project root
-    DB_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'auth_db.json')
+    # Keep-alive: clients reuse one connection for many requests
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are separate writes; without TCP_NODELAY each response waits on delayed ACK
+    disable_nagle_algorithm = True
     
-    def _load_db(self):
-        """Load database from JSON file"""
-        if not os.path.exists(self.DB_FILE):
-            return {
-                'users': [],
-                'sessions': [],
-                'profiles': [],
-                'resetTokens': []
-            }
-        with open(self.DB_FILE, 'r') as f:
-            db = json.load(f)
-            # Add resetTokens if not present (backwards compatibility)
-            if 'resetTokens' not in db:
-                db['resetTokens'] = []
-            return db
+    # Shared indexed store (opened in run())
+    store = None
     
-    def _save_db(self, db):
-        """Save database to JSON file"""
-        with open(self.DB_FILE, 'w') as f:
-            json.dump(db, f, indent=2)
+    def _bearer_token(self):
+        auth_header = self.headers.get('Authorization', '')
+        return auth_header.replace('Bearer ', '') if auth_header.startswith('Bearer ') else None
     
-    def _set_headers(self, status_code=200, content_type='application/json'):
+    def _set_headers(self, status_code=200, content_type='application/json', content_length=0):
         self.send_response(status_code)
         self.send_header('Content-type', content_type)
+        self.send_header('Content-Length', str(content_length))
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, PUT, DELETE, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization')
         self.end_headers()
     
     def _send_json(self, data, status_code=200):
-        self._set_headers(status_code)
-        self.wfile.write(json.dumps(data).encode())
+        body = json.dumps(data).encode()
+        self._set_headers(status_code, content_length=len(body))
+        self.wfile.write(body)
+    
+    def _read_body(self):
+        """Request body, read once (unread bytes would corrupt the next request on a kept-alive connection)"""
+        if self._body is None:
+            content_length = int(self.headers.get('Content-Length') or 0)
+            self._body = self.rfile.read(content_length) if content_length else b''
+        return self._body
     
     def _get_post_data(self):
         """Read and parse POST data"""
-        content_length = int(self.headers['Content-Length'])
-        post_data = self.rfile.read(content_length)
-        return json.loads(post_data.decode('utf-8'))
+        return json.loads(self._read_body().decode('utf-8'))
     
     def do_OPTIONS(self):
         """Handle CORS preflight"""
@@ -82,6 +85,7 @@ class AuthHandler(BaseHTTPRequestHandler):
     def do_POST(self):
         """Handle POST requests"""
         parsed_path = urlparse(self.path)
+        self._body = None
         
         try:
             if parsed_path.path == '/api/auth/register':
@@ -100,9 +104,13 @@ class AuthHandler(BaseHTTPRequestHandler):
                 self.handle_password_reset()
             else:
                 self._send_json({'error': 'Endpoint not found'}, 404)
+        except PasswordHasherBusy:
+            self._send_json({'error': 'Server busy, please retry'}, 503)
         except Exception as e:
             print(f"Error: {e}")
             self._send_json({'error': str(e)}, 500)
+        finally:
+            self._read_body()
     
     def do_GET(self):
         """Handle GET requests"""
@@ -147,63 +155,24 @@ class AuthHandler(BaseHTTPRequestHandler):
             self._send_json({'error': 'Password must be at least 8 characters'}, 400)
             return
         
-        # Load database
-        db = self._load_db()
-        
-        # Check if email already exists
-        if any(u['email'] == email for u in db['users']):
+        # Create user and profile (the unique email index rejects duplicates)
+        now = utc_now()
+        try:
+            new_user, new_profile = self.store.create_user(
+                name, email, hash_password(password),
+                f"https://api.dicebear.com/7.x/avataaars/svg?seed={email}", now
+            )
+        except EmailExistsError:
             self._send_json({'error': 'Email already registered'}, 409)
             return
         
-        # Create new user
-        user_id = max([u['id'] for u in db['users']], default=0) + 1
-        new_user = {
-            'id': user_id,
-            'name': name,
-            'email': email,
-            'password': hash_password(password),
-            'createdAt': datetime.utcnow().isoformat() + 'Z',
-            'updatedAt': datetime.utcnow().isoformat() + 'Z'
-        }
-        db['users'].append(new_user)
-        
-        # Create profile
-        profile_id = max([p['id'] for p in db['profiles']], default=0) + 1
-        new_profile = {
-            'id': profile_id,
-            'userId': user_id,
-            'avatar': f"https://api.dicebear.com/7.x/avataaars/svg?seed={email}",
-            'bio': '',
-            'phone': '',
-            'location': '',
-            'createdAt': datetime.utcnow().isoformat() + 'Z',
-            'updatedAt': datetime.utcnow().isoformat() + 'Z'
-        }
-        db['profiles'].append(new_profile)
-        
-        # Create session
+        # Create session (no expiration for now)
         token = generate_token()
-        session_id = max([s['id'] for s in db['sessions']], default=0) + 1
-        new_session = {
-            'id': session_id,
-            'userId': user_id,
-            'token': token,
-            'createdAt': datetime.utcnow().isoformat() + 'Z',
-            'expiresAt': None  # No expiration for now
-        }
-        db['sessions'].append(new_session)
-        
-        # Save database
-        self._save_db(db)
+        self.store.create_session(new_user['id'], token, now)
         
         # Return user data (without password)
         response = {
-            'user': {
-                'id': user_id,
-                'name': name,
-                'email': email,
-                'createdAt': new_user['createdAt']
-            },
+            'user': public_user(new_user),
             'profile': new_profile,
             'token': token
         }
@@ -222,44 +191,28 @@ class AuthHandler(BaseHTTPRequestHandler):
             self._send_json({'error': 'Email and password required'}, 400)
             return
         
-        # Load database
-        db = self._load_db()
-        
-        # Find user
-        user = next((u for u in db['users'] if u['email'] == email), None)
-        if not user:
-            self._send_json({'error': 'Invalid credentials'}, 401)
-            return
+        # Find user; unknown emails are checked against a dummy hash so they take as long
+        user = self.store.user_by_email(email)
         
-        # Verify password
-        if not verify_password(password, user['password']):
+        # Verify password; legacy SHA-256 and plain text hashes are upgraded on success
+        valid, new_hash = passwords.verify_and_update(password, user['password'] if user else None,
+                                                      allow_plaintext=True)
+        if not valid:
             self._send_json({'error': 'Invalid credentials'}, 401)
             return
+        if new_hash:
+            self.store.set_password(user['id'], new_hash, utc_now())
         
         # Get profile
-        profile = next((p for p in db['profiles'] if p['userId'] == user['id']), None)
+        profile = self.store.profile_for_user(user['id'])
         
         # Create new session
         token = generate_token()
-        session_id = max([s['id'] for s in db['sessions']], default=0) + 1
-        new_session = {
-            'id': session_id,
-            'userId': user['id'],
-            'token': token,
-            'createdAt': datetime.utcnow().isoformat() + 'Z',
-            'expiresAt': None
-        }
-        db['sessions'].append(new_session)
-        self._save_db(db)
+        self.store.create_session(user['id'], token, utc_now())
         
         # Return user data (without password)
         response = {
-            'user': {
-                'id': user['id'],
-                'name': user['name'],
-                'email': user['email'],
-                'createdAt': user.get('createdAt', '')
-            },
+            'user': public_user(user),
             'profile': profile,
             'token': token
         }
@@ -269,66 +222,49 @@ class AuthHandler(BaseHTTPRequestHandler):
     
     def handle_logout(self):
         """Logout a user by invalidating their token"""
-        auth_header = self.headers.get('Authorization', '')
-        token = auth_header.replace('Bearer ', '') if auth_header.startswith('Bearer ') else None
+        token = self._bearer_token()
         
         if not token:
             self._send_json({'error': 'No token provided'}, 401)
             return
         
-        db = self._load_db()
-        
         # Remove session
-        db['sessions'] = [s for s in db['sessions'] if s['token'] != token]
-        self._save_db(db)
+        self.store.delete_session(token)
         
         self._send_json({'message': 'Logged out successfully'})
         print(f"✅ User logged out")
     
     def handle_get_profile(self):
         """Get current user profile"""
-        auth_header = self.headers.get('Authorization', '')
-        token = auth_header.replace('Bearer ', '') if auth_header.startswith('Bearer ') else None
+        token = self._bearer_token()
         
         if not token:
             self._send_json({'error': 'No token provided'}, 401)
             return
         
-        db = self._load_db()
-        
         # Find session
-        session = next((s for s in db['sessions'] if s['token'] == token), None)
-        if not session:
+        session = self.store.session_by_token(token)
+        user = self.store.user_by_id(session['userId']) if session else None
+        if not user:
             self._send_json({'error': 'Invalid token'}, 401)
             return
         
-        # Find user
-        user = next((u for u in db['users'] if u['id'] == session['userId']), None)
-        profile = next((p for p in db['profiles'] if p['userId'] == session['userId']), None)
-        
         response = {
-            'user': {
-                'id': user['id'],
-                'name': user['name'],
-                'email': user['email'],
-                'createdAt': user.get('createdAt', '')
-            },
-            'profile': profile
+            'user': public_user(user),
+            'profile': self.store.profile_for_user(user['id'])
         }
         
         self._send_json(response)
     
     def handle_verify_token(self):
         """Verify if a token is valid"""
-        auth_header = self.headers.get('Authorization', '')
-        token = auth_header.replace('Bearer ', '') if auth_header.startswith('Bearer ') else None
+        token = self._bearer_token()
         
         if not token:
             self._send_json({'valid': False}, 200)
             return
         
-        db = self._load_db()
-        session = next((s for s in db['sessions'] if s['token'] == token), None)
+        session = self.store.session_by_token(token)
         
         self._send_json({'valid': session is not None})
 
@@ -342,10 +278,8 @@ class AuthHandler(BaseHTTPRequestHandler):
             self._send_json({'error': 'Email is required'}, 400)
             return
         
-        db = self._load_db()
-        
         # Find user
-        user = next((u for u in db['users'] if u['email'] == email), None)
+        user = self.store.user_by_email(email)
         
         # Always return success (don't reveal if email exists)
         # In production, send email here
@@ -353,24 +287,10 @@ class AuthHandler(BaseHTTPRequestHandler):
             # Generate reset token (6-digit code for simplicity)
             reset_code = ''.join([str(secrets.randbelow(10)) for _ in range(6)])
             
-            # Remove old tokens for this user
-            db['resetTokens'] = [t for t in db.get('resetTokens', []) if t['userId'] != user['id']]
-            
-            # Add new token (expires in 1 hour)
+            # Replace old tokens for this user (new one expires in 1 hour)
             from datetime import timedelta
             expires_at = (datetime.utcnow() + timedelta(hours=1)).isoformat() + 'Z'
-            
-            token_id = max([t['id'] for t in db['resetTokens']], default=0) + 1
-            reset_token = {
-                'id': token_id,
-                'userId': user['id'],
-                'code': reset_code,
-                'createdAt': datetime.utcnow().isoformat() + 'Z',
-                'expiresAt': expires_at,
-                'used': False
-            }
-            db['resetTokens'].append(reset_token)
-            self._save_db(db)
+            self.store.replace_reset_token(user['id'], reset_code, utc_now(), expires_at)
             
             print(f"🔑 Password reset requested for {email}")
             print(f"   Reset code: {reset_code} (expires in 1 hour)")
@@ -399,23 +319,15 @@ class AuthHandler(BaseHTTPRequestHandler):
             self._send_json({'error': 'Email and code are required'}, 400)
             return
         
-        db = self._load_db()
-        
         # Find user
-        user = next((u for u in db['users'] if u['email'] == email), None)
+        user = self.store.user_by_email(email)
         if not user:
             self._send_json({'error': 'Invalid code'}, 401)
             return
         
         # Find valid reset token
-        now = datetime.utcnow().isoformat() + 'Z'
-        reset_token = next((
-            t for t in db.get('resetTokens', [])
-            if t['userId'] == user['id']
-            and t['code'] == code
-            and not t['used']
-            and t['expiresAt'] > now
-        ), None)
+        now = utc_now()
+        reset_token = self.store.valid_reset_token(user['id'], code, now)
         
         if not reset_token:
             self._send_json({'error': 'Invalid or expired code'}, 401)
@@ -443,39 +355,22 @@ class AuthHandler(BaseHTTPRequestHandler):
             self._send_json({'error': 'Password must be at least 8 characters'}, 400)
             return
         
-        db = self._load_db()
-        
         # Find user
-        user = next((u for u in db['users'] if u['email'] == email), None)
+        user = self.store.user_by_email(email)
         if not user:
             self._send_json({'error': 'Invalid code'}, 401)
             return
         
         # Find valid reset token
-        now = datetime.utcnow().isoformat() + 'Z'
-        reset_token = next((
-            t for t in db.get('resetTokens', [])
-            if t['userId'] == user['id']
-            and t['code'] == code
-            and not t['used']
-            and t['expiresAt'] > now
-        ), None)
+        now = utc_now()
+        reset_token = self.store.valid_reset_token(user['id'], code, now)
         
         if not reset_token:
             self._send_json({'error': 'Invalid or expired code'}, 401)
             return
         
-        # Update password
-        user['password'] = hash_password(new_password)
-        user['updatedAt'] = datetime.utcnow().isoformat() + 'Z'
-        
-        # Mark token as used
-        reset_token['used'] = True
-        
-        # Invalidate all existing sessions for security
-        db['sessions'] = [s for s in db['sessions'] if s['userId'] != user['id']]
-        
-        self._save_db(db)
+        # Update password, mark token as used and invalidate all existing sessions for security
+        self.store.reset_password(user['id'], reset_token['id'], hash_password(new_password), now)
         
         self._send_json({
             'message': 'Password reset successfully',
@@ -486,8 +381,7 @@ class AuthHandler(BaseHTTPRequestHandler):
     def handle_change_password(self):
         """Change password for authenticated user"""
         # Get auth token
-        auth_header = self.headers.get('Authorization', '')
-        token = auth_header.replace('Bearer ', '') if auth_header.startswith('Bearer ') else None
+        token = self._bearer_token()
         
         if not token:
             self._send_json({'error': 'Not authenticated'}, 401)
@@ -506,16 +400,14 @@ class AuthHandler(BaseHTTPRequestHandler):
             self._send_json({'error': 'New password must be at least 8 characters'}, 400)
             return
         
-        db = self._load_db()
-        
         # Find session
-        session = next((s for s in db['sessions'] if s['token'] == token), None)
+        session = self.store.session_by_token(token)
         if not session:
             self._send_json({'error': 'Invalid session'}, 401)
             return
         
         # Find user
-        user = next((u for u in db['users'] if u['id'] == session['userId']), None)
+        user = self.store.user_by_id(session['userId'])
         if not user:
             self._send_json({'error': 'User not found'}, 404)
             return
@@ -531,23 +423,21 @@ class AuthHandler(BaseHTTPRequestHandler):
             return
         
         # Update password
-        user['password'] = hash_password(new_password)
-        user['updatedAt'] = datetime.utcnow().isoformat() + 'Z'
-        
-        self._save_db(db)
+        self.store.set_password(user['id'], hash_password(new_password), utc_now())
         
         self._send_json({
             'message': 'Password changed successfully'
         })
         print(f"✅ Password changed for {user['email']}")
 
-def run(port=3001):
+def run(port=3001, server_class=ThreadingHTTPServer):
     """Start the authentication server"""
+    AuthHandler.store = AuthStore()
     server_address = ('', port)
-    httpd = HTTPServer(server_address, AuthHandler)
-    print(f'🚀 VidX Authentication Server running on port {port}')
-    print(f'📁 Database file: auth_db.json')
-    print(f'🔐 Password hashing: SHA-256 with salt (ready for bcrypt migration)')
+    httpd = server_class(server_address, AuthHandler)
+    print(f'🚀 VidX Authentication Server running on port {port} ({server_class.__name__}, {AuthHandler.protocol_version})')
+    print(f'📁 Database file: {os.path.relpath(AuthHandler.store.path)}')
+    print(f'🔐 Password hashing: {passwords.DEFAULT_HASHER} ({passwords.HASH_WORKERS} hashing threads)')
     print(f'\nEndpoints:')
     print(f'  POST /api/auth/register                    - Register new user')
     print(f'  POST /api/auth/login                       - Login user')
@@ -562,4 +452,14 @@ def run(port=3001):
     httpd.serve_forever()
 
 if __name__ == '__main__':
-    run()
+    parser = argparse.ArgumentParser(description='VidX authentication server')
+    parser.add_argument('--port', type=int, default=3001)
+    parser.add_argument('--single-threaded', action='store_true',
+                        help='Legacy HTTPServer without keep-alive (for load-test comparisons)')
+    args = parser.parse_args()
+    
+    if args.single_threaded:
+        AuthHandler.protocol_version = 'HTTP/1.0'
+        run(args.port, HTTPServer)
+    else:
+        run(args.port)
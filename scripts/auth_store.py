@@ -0,0 +1,208 @@
+"""
+Indexed storage for the VidX authentication server
+SQLite (WAL mode) replacement for the whole-file reads and rewrites of
+data/auth_db.json: unique indexes on users.email and sessions.token make
+login and token checks single index lookups, ids come from AUTOINCREMENT
+sequences, and every multi-row change runs in one transaction.
+
+On first start the existing auth_db.json is imported with its ids intact.
+Rows are returned in the same camelCase shape the JSON file used, so
+responses from the server do not change.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+DB_PATH = os.environ.get('AUTH_DB_PATH', os.path.join(DATA_DIR, 'auth.sqlite3'))
+LEGACY_JSON_PATH = os.path.join(DATA_DIR, 'auth_db.json')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    email TEXT NOT NULL UNIQUE,
+    password TEXT NOT NULL,
+    createdAt TEXT,
+    updatedAt TEXT
+);
+CREATE TABLE IF NOT EXISTS profiles (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    userId INTEGER NOT NULL UNIQUE REFERENCES users(id) ON DELETE CASCADE,
+    avatar TEXT,
+    bio TEXT DEFAULT '',
+    phone TEXT DEFAULT '',
+    location TEXT DEFAULT '',
+    createdAt TEXT,
+    updatedAt TEXT
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    userId INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    token TEXT NOT NULL UNIQUE,
+    createdAt TEXT,
+    expiresAt TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_user ON sessions (userId);
+CREATE TABLE IF NOT EXISTS resetTokens (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    userId INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    code TEXT NOT NULL,
+    createdAt TEXT,
+    expiresAt TEXT,
+    used INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_reset_tokens_user ON resetTokens (userId);
+"""
+
+TABLE_COLUMNS = {
+    'users': ('id', 'name', 'email', 'password', 'createdAt', 'updatedAt'),
+    'profiles': ('id', 'userId', 'avatar', 'bio', 'phone', 'location', 'createdAt', 'updatedAt'),
+    'sessions': ('id', 'userId', 'token', 'createdAt', 'expiresAt'),
+    'resetTokens': ('id', 'userId', 'code', 'createdAt', 'expiresAt', 'used'),
+}
+
+
+class EmailExistsError(Exception):
+    """Raised when registering an email that already has an account"""
+
+
+class AuthStore:
+    """Users, profiles, sessions and reset codes; safe to share between request threads"""
+
+    def __init__(self, path=DB_PATH, legacy_json_path=LEGACY_JSON_PATH):
+        self.path = path
+        self.legacy_json_path = legacy_json_path
+        self._local = threading.local()
+        is_new = not os.path.exists(path)
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        if is_new:
+            self._import_legacy_json(conn)
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _import_legacy_json(self, conn):
+        try:
+            with open(self.legacy_json_path, 'r') as f:
+                db = json.load(f)
+        except FileNotFoundError:
+            return
+
+        # Old files can hold sessions of deleted users; keep them as they were
+        conn.execute("PRAGMA foreign_keys=OFF")
+        with self._transaction() as conn:
+            for table, columns in TABLE_COLUMNS.items():
+                rows = [tuple(row.get(column) for column in columns) for row in db.get(table, [])]
+                conn.executemany(
+                    f"INSERT OR IGNORE INTO {table} ({', '.join(columns)}) "
+                    f"VALUES ({', '.join('?' * len(columns))})",
+                    rows
+                )
+        conn.execute("PRAGMA foreign_keys=ON")
+        print(f"✅ Imported {len(db.get('users', []))} users from {os.path.basename(self.legacy_json_path)}")
+
+    @staticmethod
+    def _dict(row):
+        if row is None:
+            return None
+        data = dict(row)
+        if 'used' in data:
+            data['used'] = bool(data['used'])
+        return data
+
+    # Users and profiles
+
+    def user_by_email(self, email):
+        return self._dict(self._connect().execute("SELECT * FROM users WHERE email = ?", (email,)).fetchone())
+
+    def user_by_id(self, user_id):
+        return self._dict(self._connect().execute("SELECT * FROM users WHERE id = ?", (user_id,)).fetchone())
+
+    def profile_for_user(self, user_id):
+        return self._dict(self._connect().execute("SELECT * FROM profiles WHERE userId = ?", (user_id,)).fetchone())
+
+    def create_user(self, name, email, password_hash, avatar, now):
+        """Create a user and their profile atomically; raises EmailExistsError"""
+        try:
+            with self._transaction() as conn:
+                user_id = conn.execute(
+                    "INSERT INTO users (name, email, password, createdAt, updatedAt) VALUES (?, ?, ?, ?, ?)",
+                    (name, email, password_hash, now, now)
+                ).lastrowid
+                conn.execute(
+                    "INSERT INTO profiles (userId, avatar, bio, phone, location, createdAt, updatedAt) "
+                    "VALUES (?, ?, '', '', '', ?, ?)",
+                    (user_id, avatar, now, now)
+                )
+        except sqlite3.IntegrityError:
+            raise EmailExistsError(email)
+        return self.user_by_id(user_id), self.profile_for_user(user_id)
+
+    def set_password(self, user_id, password_hash, now):
+        with self._transaction() as conn:
+            conn.execute("UPDATE users SET password = ?, updatedAt = ? WHERE id = ?", (password_hash, now, user_id))
+
+    # Sessions
+
+    def create_session(self, user_id, token, now, expires_at=None):
+        with self._transaction() as conn:
+            session_id = conn.execute(
+                "INSERT INTO sessions (userId, token, createdAt, expiresAt) VALUES (?, ?, ?, ?)",
+                (user_id, token, now, expires_at)
+            ).lastrowid
+        return {'id': session_id, 'userId': user_id, 'token': token, 'createdAt': now, 'expiresAt': expires_at}
+
+    def session_by_token(self, token):
+        return self._dict(self._connect().execute("SELECT * FROM sessions WHERE token = ?", (token,)).fetchone())
+
+    def delete_session(self, token):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM sessions WHERE token = ?", (token,))
+
+    # Password reset codes
+
+    def replace_reset_token(self, user_id, code, now, expires_at):
+        """Store a new reset code, dropping any earlier ones for the user"""
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM resetTokens WHERE userId = ?", (user_id,))
+            conn.execute(
+                "INSERT INTO resetTokens (userId, code, createdAt, expiresAt, used) VALUES (?, ?, ?, ?, 0)",
+                (user_id, code, now, expires_at)
+            )
+
+    def valid_reset_token(self, user_id, code, now):
+        return self._dict(self._connect().execute(
+            "SELECT * FROM resetTokens WHERE userId = ? AND code = ? AND used = 0 AND expiresAt > ?",
+            (user_id, code, now)
+        ).fetchone())
+
+    def reset_password(self, user_id, reset_token_id, password_hash, now):
+        """Set the new password, consume the code and end every session of the user"""
+        with self._transaction() as conn:
+            conn.execute("UPDATE users SET password = ?, updatedAt = ? WHERE id = ?", (password_hash, now, user_id))
+            conn.execute("UPDATE resetTokens SET used = 1 WHERE id = ?", (reset_token_id,))
+            conn.execute("DELETE FROM sessions WHERE userId = ?", (user_id,))
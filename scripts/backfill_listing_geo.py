@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Backfill listings.latitude/longitude from the free-text location column
+using the city index over data/Cities.txt (run after migration 003)
+"""
+
+import os
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+import psycopg2  # noqa: E402
+from psycopg2.extras import execute_values  # noqa: E402
+
+from services.geo import resolve_location  # noqa: E402
+
+
+def backfill():
+    conn = psycopg2.connect(os.environ['DATABASE_URL'])
+    cur = conn.cursor()
+    cur.execute("SELECT id, location FROM listings WHERE latitude IS NULL AND location <> ''")
+    rows = cur.fetchall()
+
+    updates = []
+    for listing_id, location in rows:
+        resolved = resolve_location(location)
+        if resolved is not None:
+            updates.append((listing_id, resolved[0], resolved[1]))
+
+    execute_values(cur, """
+        UPDATE listings AS l
+        SET latitude = v.latitude, longitude = v.longitude
+        FROM (VALUES %s) AS v(id, latitude, longitude)
+        WHERE l.id = v.id
+    """, updates, page_size=1000)
+    conn.commit()
+    cur.close()
+    conn.close()
+
+    print(f"✅ Geocoded {len(updates)} of {len(rows)} listings without coordinates")
+
+
+if __name__ == '__main__':
+    backfill()
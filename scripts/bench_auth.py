@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Auth latency benchmark
+Times require_auth per request for signed tokens (verified in-process) and
+for opaque tokens (sessions table lookup, needs DATABASE_URL), and reports
+p50/p99 for each.
+
+Usage:
+    python scripts/bench_auth.py
+    python scripts/bench_auth.py --requests 5000
+    DATABASE_URL=postgresql://... python scripts/bench_auth.py
+"""
+
+import argparse
+import os
+import secrets
+import statistics
+import sys
+import time
+
+# Signed tokens are only accepted in signed mode, which needs a private key
+os.environ.setdefault('AUTH_TOKEN_MODE', 'signed')
+os.environ.setdefault('SECRET_KEY', secrets.token_hex(32))
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from app import app, generate_token, get_db, require_auth  # noqa: E402
+from services.sessions import create_session, delete_session  # noqa: E402
+from services.tokens import issue_token  # noqa: E402
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def report(label, samples):
+    print(f"  {label:<10} p50={percentile(samples, 50):8.3f} ms   "
+          f"p99={percentile(samples, 99):8.3f} ms   mean={statistics.mean(samples):8.3f} ms")
+
+
+@require_auth
+def protected():
+    return 'ok'
+
+
+def time_auth(token, requests):
+    samples = []
+    headers = {'Authorization': f'Bearer {token}'}
+    for _ in range(requests):
+        with app.test_request_context('/bench', headers=headers):
+            start = time.perf_counter()
+            result = protected()
+            samples.append((time.perf_counter() - start) * 1000)
+        if result != 'ok':
+            raise RuntimeError(f'Token rejected: {result}')
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark per-request auth latency')
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"⏱️  {args.requests} authenticated requests per mode")
+
+    signed, _ = issue_token(1, app.config['SECRET_KEY'])
+    report('signed', time_auth(signed, args.requests))
+
+    if not os.environ.get('DATABASE_URL'):
+        print("⚠️  DATABASE_URL not set, skipping opaque (sessions table) benchmark")
+        return
+
+    conn = get_db()
+    cur = conn.cursor()
+    cur.execute('SELECT id FROM users ORDER BY id LIMIT 1')
+    user = cur.fetchone()
+    if not user:
+        print("⚠️  No users in the database, skipping opaque benchmark")
+        return
+    opaque = generate_token()
+    create_session(cur, user['id'], opaque)
+    conn.commit()
+    try:
+        report('opaque', time_auth(opaque, args.requests))
+    finally:
+        delete_session(cur, opaque)
+        conn.commit()
+        cur.close()
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+For You feed benchmark
+Scores a synthetic candidate set once and measures p50/p99 page latency
+(with a viewer location, watched items and a cursor) against it.
+
+Usage:
+    python scripts/bench_feed.py
+    python scripts/bench_feed.py --candidates 20000 --pages 2000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from services.ranking import FeedCandidates  # noqa: E402
+
+CATEGORIES = ['automotive', 'electronics', 'fashion', 'real-estate', 'home-garden', 'sports', 'services', 'jobs']
+CITIES = ['București', 'Cluj-Napoca', 'Timișoara', 'Iași', 'Constanța', 'Brașov', 'Craiova', 'Galați', 'Oradea', 'Sibiu']
+VIEWERS = [(44.43, 26.10), (46.77, 23.59), (45.75, 21.23), (47.16, 27.59), (None, None)]
+
+
+def make_card(i, rng, now):
+    return {
+        'id': f'bench-{i}',
+        'title': f'Listing {i}',
+        'category': rng.choice(CATEGORIES),
+        'location': f"{rng.choice(CITIES)}, România",
+        'views': int(rng.paretovariate(1.2) * 10),
+        'likes': int(rng.paretovariate(1.5)),
+        'created_at': (now - timedelta(minutes=i * 3)).isoformat(),
+    }
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--candidates', type=int, default=5000)
+    parser.add_argument('--pages', type=int, default=1000)
+    parser.add_argument('--limit', type=int, default=24)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    now = datetime.now()
+    cards = [make_card(i, rng, now) for i in range(args.candidates)]
+
+    started = time.perf_counter()
+    candidates = FeedCandidates(cards)
+    print(f"📊 Scored {len(candidates)} candidates in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    samples = []
+    cursor = None
+    for _ in range(args.pages):
+        lat, lon = rng.choice(VIEWERS)
+        seen = [f'bench-{rng.randrange(args.candidates)}' for _ in range(200)]
+        category = rng.choice(CATEGORIES + [None, None])
+        started = time.perf_counter()
+        _, cursor = candidates.page(args.limit, category, lat, lon, seen, cursor if rng.random() < 0.5 else None)
+        samples.append((time.perf_counter() - started) * 1000)
+
+    print(f"⏱️ Page of {args.limit}: p50 {statistics.median(samples):.3f} ms, "
+          f"p99 {percentile(samples, 99):.3f} ms over {args.pages} pages")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Search benchmark
+Builds a synthetic listing corpus and measures p50/p99 query latency
+for the in-process inverted index (and PostgreSQL when --postgres is given).
+
+Usage:
+    python scripts/bench_search.py
+    python scripts/bench_search.py --listings 100000 --queries 2000
+    DATABASE_URL=postgresql://... python scripts/bench_search.py --postgres
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from services.search import InvertedIndex, search_listings_db  # noqa: E402
+
+CATEGORIES = ['automotive', 'electronics', 'fashion', 'real-estate', 'home-garden', 'sports', 'services', 'jobs']
+MAKES = {
+    'Dacia': ['Logan', 'Sandero', 'Duster', 'Spring'],
+    'Volkswagen': ['Golf', 'Passat', 'Polo', 'Tiguan'],
+    'Renault': ['Clio', 'Megane', 'Wind', 'Captur'],
+    'BMW': ['Seria 3', 'Seria 5', 'X3', 'X5'],
+    'Škoda': ['Octavia', 'Fabia', 'Superb', 'Kodiaq'],
+    'Audi': ['A3', 'A4', 'A6', 'Q5'],
+}
+FUELS = ['Benzină', 'Motorină', 'Electric', 'Hibrid', 'GPL']
+CITIES = ['București', 'Cluj-Napoca', 'Timișoara', 'Iași', 'Constanța', 'Brașov', 'Craiova', 'Galați', 'Oradea', 'Sibiu']
+WORDS = (
+    'stare foarte bună întreținută revizie făcută proprietar unic garantie jante aliaj '
+    'scaune încălzite navigație senzori parcare cameră climatronic pilot automat piele '
+    'telefon laptop canapea bicicletă apartament decomandat centrală termică balcon '
+    'rochie pantofi geacă mărime nou sigilat cutie accesorii livrare rapidă negociabil'
+).split()
+
+
+def make_listing(i, rng):
+    category = rng.choice(CATEGORIES)
+    make = rng.choice(list(MAKES))
+    model = rng.choice(MAKES[make])
+    fuel = rng.choice(FUELS)
+    metadata = {'make': make, 'model': model, 'fuel_type': fuel} if category == 'automotive' else {'condition': 'nou'}
+    title = f"{make} {model} {rng.randint(2005, 2024)}" if category == 'automotive' else ' '.join(rng.sample(WORDS, 3)).title()
+    return {
+        'id': f'bench-{i}',
+        'title': title,
+        'description': ' '.join(rng.choices(WORDS, k=40)),
+        'category': category,
+        'location': f"{rng.choice(CITIES)}, România",
+        'price': rng.randint(50, 60000),
+        'status': 'active',
+        'metadata': metadata,
+        'created_at': f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:00:00",
+    }
+
+
+def make_queries(count, rng):
+    queries = []
+    for _ in range(count):
+        kind = rng.random()
+        if kind < 0.4:
+            make = rng.choice(list(MAKES))
+            queries.append(f"{make} {rng.choice(MAKES[make])}".lower())
+        elif kind < 0.6:
+            queries.append(f"{rng.choice(list(MAKES))} benzina")
+        elif kind < 0.8:
+            queries.append(rng.choice(CITIES).lower().replace('ș', 's').replace('ț', 't'))
+        else:
+            queries.append(' '.join(rng.sample(WORDS, 2)))
+    return queries
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def report(label, samples):
+    print(f"  {label:<28} p50={percentile(samples, 50):7.3f} ms   "
+          f"p99={percentile(samples, 99):7.3f} ms   mean={statistics.mean(samples):7.3f} ms")
+
+
+def run_queries(search, queries, categories):
+    samples = []
+    for query, category in zip(queries, categories):
+        start = time.perf_counter()
+        search(query, category)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark listing search latency')
+    parser.add_argument('--listings', type=int, default=100_000)
+    parser.add_argument('--queries', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--postgres', action='store_true', help='Also query PostgreSQL (DATABASE_URL)')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"🔧 Generating {args.listings:,} synthetic listings...")
+    corpus = [make_listing(i, rng) for i in range(args.listings)]
+
+    start = time.perf_counter()
+    index = InvertedIndex(corpus)
+    print(f"📚 Index built in {time.perf_counter() - start:.2f}s "
+          f"({len(index.vocabulary):,} tokens)")
+
+    queries = make_queries(args.queries, rng)
+    no_category = [None] * len(queries)
+    with_category = [rng.choice(CATEGORIES) for _ in queries]
+
+    print(f"\n⏱️  {args.queries} queries, page size 24")
+    report('index', run_queries(lambda q, c: index.search(q, c), queries, no_category))
+    report('index + category', run_queries(lambda q, c: index.search(q, c), queries, with_category))
+
+    if args.postgres:
+        if not os.environ.get('DATABASE_URL'):
+            print("⚠️  DATABASE_URL not set, skipping PostgreSQL benchmark")
+            return
+        report('postgres', run_queries(lambda q, c: search_listings_db(q, c), queries, no_category))
+        report('postgres + category', run_queries(lambda q, c: search_listings_db(q, c), queries, with_category))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark
+Imports the app in fresh interpreters with `python -X importtime` and
+reports the wall time, the cumulative import time of the module and the
+slowest imports below it, so import-time regressions show up before they
+reach worker boot.
+
+Usage:
+    python scripts/bench_startup.py
+    python scripts/bench_startup.py --runs 10 --top 20
+    python scripts/bench_startup.py --module video_pipeline
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_importtime(stderr):
+    """[(name, depth, self_us, cumulative_us)] from -X importtime output"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        fields = line[len('import time:'):].split('|')
+        self_us, cumulative_us, raw_name = int(fields[0]), int(fields[1]), fields[2]
+        name = raw_name.strip()
+        depth = (len(raw_name) - len(raw_name.lstrip()) - 1) // 2
+        rows.append((name, depth, self_us, cumulative_us))
+    return rows
+
+
+def run_once(module):
+    env = dict(os.environ)
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=PROJECT_ROOT, env=env, capture_output=True, text=True)
+    elapsed = (time.perf_counter() - start) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(f'import {module} failed:\n{result.stderr[-2000:]}')
+    return elapsed, parse_importtime(result.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark app import time')
+    parser.add_argument('--module', default='app')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15, help='Slowest imports to list')
+    args = parser.parse_args()
+
+    walls, totals, last_rows = [], [], []
+    for _ in range(args.runs):
+        wall, rows = run_once(args.module)
+        walls.append(wall)
+        totals.append(next(cumulative for name, depth, _, cumulative in rows if name == args.module) / 1000)
+        last_rows = rows
+
+    print(f"⏱️  import {args.module} ({args.runs} fresh interpreters)")
+    print(f"  wall time       median={statistics.median(walls):8.1f} ms   max={max(walls):8.1f} ms")
+    print(f"  import {args.module:<9} median={statistics.median(totals):8.1f} ms   max={max(totals):8.1f} ms")
+
+    # Direct and second-level children carry the actionable numbers
+    module_depth = next(depth for name, depth, _, _ in last_rows if name == args.module)
+    children = [row for row in last_rows if module_depth < row[1] <= module_depth + 2]
+    print(f"\n  slowest imports under {args.module} (last run, cumulative)")
+    for name, depth, _, cumulative in sorted(children, key=lambda row: -row[3])[:args.top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {'  ' * (depth - module_depth - 1)}{name}")
+
+
+if __name__ == '__main__':
+    main()
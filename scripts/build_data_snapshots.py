@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Precompile data snapshots
+Parses the static datasets under data/ and writes their pickled indexes to
+data/.cache/ so app workers start without parsing JSON. Run during deployment;
+the app rebuilds stale snapshots on its own if this step is skipped.
+
+Usage:
+    python scripts/build_data_snapshots.py
+"""
+
+import os
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from services.catalog import load_catalogue  # noqa: E402
+from services.geo import load_city_index  # noqa: E402
+from services.locations import load_location_index  # noqa: E402
+from services.snapshot import snapshot_path  # noqa: E402
+
+SNAPSHOTS = [
+    ('catalog', load_catalogue),
+    ('cities', load_city_index),
+    ('locations', load_location_index),
+]
+
+
+def main():
+    for name, loader in SNAPSHOTS:
+        start = time.perf_counter()
+        loader(rebuild=True)
+        build_ms = (time.perf_counter() - start) * 1000
+        path = snapshot_path(name)
+        print(f"✅ {name}: {os.path.getsize(path):,} bytes in {build_ms:.1f} ms -> {os.path.relpath(path, PROJECT_ROOT)}")
+
+
+if __name__ == '__main__':
+    main()
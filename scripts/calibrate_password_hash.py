@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Calibrate password hashing cost on this machine
+Times scrypt for increasing N (and PBKDF2-SHA256 iterations) and picks the
+largest cost that stays under the target latency, then replays a login
+spike through the bounded hashing pool with the chosen parameters.
+Copy the printed variables into the deployment environment.
+
+Usage:
+    python scripts/calibrate_password_hash.py
+    python scripts/calibrate_password_hash.py --target-ms 250 --spike 64
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from services import passwords  # noqa: E402
+from services.passwords import Pbkdf2Hasher, ScryptHasher  # noqa: E402
+
+PASSWORD = 'correct horse battery staple'
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def time_hash(hasher, rounds):
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        hasher.encode(PASSWORD)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def calibrate_scrypt(target_ms, r, p, rounds):
+    print(f"\n⏱️  scrypt (r={r}, p={p})")
+    chosen = None
+    for log_n in range(12, 21):
+        n = 2 ** log_n
+        elapsed = time_hash(ScryptHasher(n, r, p), rounds)
+        print(f"  N=2^{log_n:<3} {elapsed:8.1f} ms   {128 * n * r * p / 2 ** 20:6.0f} MiB")
+        if elapsed > target_ms:
+            break
+        chosen = n
+    return chosen or 2 ** 12
+
+
+def calibrate_pbkdf2(target_ms, rounds):
+    print("\n⏱️  pbkdf2_sha256")
+    probe = 100_000
+    elapsed = time_hash(Pbkdf2Hasher(probe), rounds)
+    iterations = max(probe, int(probe * target_ms / elapsed) // 10_000 * 10_000)
+    print(f"  {probe:,} iterations {elapsed:8.1f} ms -> {iterations:,} iterations for {target_ms} ms")
+    return iterations
+
+
+def run_spike(hasher, logins):
+    """logins simultaneous hash requests through the bounded pool"""
+    samples, errors = [], []
+
+    def login():
+        start = time.perf_counter()
+        try:
+            passwords.hash_password(PASSWORD, hasher)
+            samples.append((time.perf_counter() - start) * 1000)
+        except passwords.PasswordHasherBusy:
+            errors.append(1)
+
+    threads = [threading.Thread(target=login) for _ in range(logins)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    print(f"\n🔥 Spike: {logins} simultaneous logins, {passwords.HASH_WORKERS} hashing threads")
+    if samples:
+        print(f"  {len(samples) / elapsed:6.1f} hashes/s   p50={percentile(samples, 50):8.1f} ms   "
+              f"p99={percentile(samples, 99):8.1f} ms   rejected={len(errors)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Calibrate password hashing cost parameters')
+    parser.add_argument('--target-ms', type=float, default=100, help='Target time for one hash')
+    parser.add_argument('--scrypt-r', type=int, default=8)
+    parser.add_argument('--scrypt-p', type=int, default=1)
+    parser.add_argument('--rounds', type=int, default=5, help='Timed hashes per setting')
+    parser.add_argument('--spike', type=int, default=32, help='Simultaneous logins to replay (0 to skip)')
+    args = parser.parse_args()
+
+    print(f"🔧 Target {args.target_ms:.0f} ms per hash on {os.cpu_count()} CPUs")
+    n = calibrate_scrypt(args.target_ms, args.scrypt_r, args.scrypt_p, args.rounds)
+    iterations = calibrate_pbkdf2(args.target_ms, args.rounds)
+
+    if args.spike:
+        run_spike(ScryptHasher(n, args.scrypt_r, args.scrypt_p), args.spike)
+
+    workers = passwords.HASH_WORKERS
+    print("\n✅ Suggested environment:")
+    print(f"  PASSWORD_HASHER=scrypt")
+    print(f"  PASSWORD_SCRYPT_N={n}")
+    print(f"  PASSWORD_SCRYPT_R={args.scrypt_r}")
+    print(f"  PASSWORD_SCRYPT_P={args.scrypt_p}")
+    print(f"  PASSWORD_PBKDF2_ITERATIONS={iterations}")
+    print(f"  PASSWORD_HASH_WORKERS={workers}   "
+          f"# peak scrypt memory {workers * 128 * n * args.scrypt_r * args.scrypt_p / 2 ** 20:.0f} MiB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Compact the embedded listing store (data/listings.sqlite3): checkpoint the
+WAL into the main file and VACUUM free pages. Safe to run while the app is up.
+
+Usage:
+    python scripts/compact_listing_store.py
+"""
+
+import os
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from services.listing_store import get_fallback_store  # noqa: E402
+
+
+def file_size(path):
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def main():
+    store = get_fallback_store()
+    paths = [store.path, store.path + '-wal']
+    before = sum(file_size(path) for path in paths)
+    store.compact()
+    after = sum(file_size(path) for path in paths)
+    print(f"✅ Compacted {os.path.relpath(store.path, PROJECT_ROOT)}: {before:,} -> {after:,} bytes")
+
+
+if __name__ == '__main__':
+    main()
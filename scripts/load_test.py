@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Load test for the development servers (auth_server.py, server.py)
+Starts the server in its legacy single-threaded mode and in the default
+threaded keep-alive mode on a throwaway database, drives both with the same
+concurrent clients and reports req/s and p50/p99 latency side by side.
+
+Slow clients (--slow-clients) send each request in two halves with a pause
+in between, the way a client on a bad mobile connection does; on the
+single-threaded server every other caller waits behind them.
+
+Usage:
+    python scripts/load_test.py
+    python scripts/load_test.py --server json --clients 64 --requests 500
+    python scripts/load_test.py --slow-clients 2 --slow-delay 0.2
+    python scripts/load_test.py --url http://localhost:3001/api/auth/verify --header "Authorization: Bearer ..."
+"""
+
+import argparse
+import http.client
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlparse
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+BENCH_EMAIL = 'loadtest@vidx.ro'
+BENCH_PASSWORD = 'loadtest-password'
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f'Server did not start on port {port}')
+
+
+def request_json(port, method, path, body=None, headers=None):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    try:
+        conn.request(method, path, body=json.dumps(body) if body is not None else None,
+                     headers={'Content-Type': 'application/json', **(headers or {})})
+        response = conn.getresponse()
+        return response.status, json.loads(response.read() or b'null')
+    finally:
+        conn.close()
+
+
+# Server fixtures: start(port, single_threaded, workdir) -> (process, path, headers)
+
+def start_auth_server(port, single_threaded, workdir):
+    env = dict(os.environ, AUTH_DB_PATH=os.path.join(workdir, 'auth.sqlite3'),
+               PYTHONUNBUFFERED='1')
+    args = [sys.executable, os.path.join(SCRIPTS_DIR, 'auth_server.py'), '--port', str(port)]
+    if single_threaded:
+        args.append('--single-threaded')
+    process = subprocess.Popen(args, env=env, cwd=workdir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    wait_for_port(port)
+
+    credentials = {'name': 'Load Test', 'email': BENCH_EMAIL, 'password': BENCH_PASSWORD}
+    request_json(port, 'POST', '/api/auth/register', credentials)
+    status, data = request_json(port, 'POST', '/api/auth/login', credentials)
+    if status != 200:
+        raise RuntimeError(f'Login failed: {status} {data}')
+    return process, '/api/auth/verify', {'Authorization': f"Bearer {data['token']}"}
+
+
+def start_json_server(port, single_threaded, workdir):
+    users = [{'id': i, 'name': f'User {i}', 'email': f'user{i}@vidx.ro', 'password': 'x'} for i in range(1, 2001)]
+    profiles = [{'id': i, 'userId': i, 'avatar': '', 'bio': ''} for i in range(1, 2001)]
+    with open(os.path.join(workdir, 'db.json'), 'w') as f:
+        json.dump({'users': users, 'profiles': profiles, 'sessions': []}, f)
+
+    args = [sys.executable, os.path.join(SCRIPTS_DIR, 'server.py'), '--port', str(port)]
+    if single_threaded:
+        args.append('--single-threaded')
+    process = subprocess.Popen(args, cwd=workdir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    wait_for_port(port)
+    return process, '/users?email=user1000@vidx.ro', {}
+
+
+SERVERS = {
+    'auth': start_auth_server,
+    'json': start_json_server,
+}
+
+
+# Load generation
+
+def run_client(host, port, path, headers, count, samples, errors):
+    """One keep-alive client issuing count GETs back to back"""
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    for _ in range(count):
+        start = time.perf_counter()
+        try:
+            conn.request('GET', path, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            if response.status >= 500:
+                errors.append(response.status)
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(type(e).__name__)
+            conn.close()
+            continue
+        samples.append((time.perf_counter() - start) * 1000)
+    conn.close()
+
+
+def run_slow_client(host, port, path, delay, stop):
+    """Send each request in two halves with a pause in between until stopped"""
+    head, tail = f'GET {path} HTTP/1.1\r\nHost: {host}\r\n', 'Connection: close\r\n\r\n'
+    while not stop.is_set():
+        try:
+            with socket.create_connection((host, port), timeout=30) as sock:
+                sock.sendall(head.encode())
+                time.sleep(delay)
+                sock.sendall(tail.encode())
+                while sock.recv(65536):
+                    pass
+        except OSError:
+            time.sleep(delay)
+
+
+def run_load(host, port, path, headers, clients, requests, slow_clients, slow_delay):
+    samples, errors = [], []
+    stop = threading.Event()
+    slow = [threading.Thread(target=run_slow_client, args=(host, port, path, slow_delay, stop), daemon=True)
+            for _ in range(slow_clients)]
+    for thread in slow:
+        thread.start()
+
+    workers = [threading.Thread(target=run_client, args=(host, port, path, headers, requests, samples, errors))
+               for _ in range(clients)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    return samples, errors, elapsed
+
+
+def report(label, samples, errors, elapsed):
+    if not samples:
+        print(f"  {label:<18} no successful requests ({len(errors)} errors)")
+        return
+    print(f"  {label:<18} {len(samples) / elapsed:9.0f} req/s   "
+          f"p50={percentile(samples, 50):8.2f} ms   p99={percentile(samples, 99):8.2f} ms   "
+          f"errors={len(errors)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the development servers')
+    parser.add_argument('--server', choices=sorted(SERVERS), default='auth')
+    parser.add_argument('--clients', type=int, default=32, help='Concurrent keep-alive clients')
+    parser.add_argument('--requests', type=int, default=200, help='Requests per client')
+    parser.add_argument('--slow-clients', type=int, default=0)
+    parser.add_argument('--slow-delay', type=float, default=0.1, help='Pause inside each slow request (s)')
+    parser.add_argument('--url', help='Load an already running server instead of starting one')
+    parser.add_argument('--header', action='append', default=[], help='Extra header for --url, "Name: value"')
+    args = parser.parse_args()
+
+    print(f"🔧 {args.clients} clients x {args.requests} requests, {args.slow_clients} slow clients")
+
+    if args.url:
+        url = urlparse(args.url)
+        path = url.path + (f'?{url.query}' if url.query else '')
+        headers = dict(h.split(':', 1) for h in args.header)
+        headers = {name.strip(): value.strip() for name, value in headers.items()}
+        report(url.netloc, *run_load(url.hostname, url.port or 80, path, headers,
+                                     args.clients, args.requests, args.slow_clients, args.slow_delay))
+        return
+
+    start_server = SERVERS[args.server]
+    for label, single_threaded in (('single-threaded', True), ('threaded', False)):
+        workdir = tempfile.mkdtemp(prefix='vidx-load-')
+        port = free_port()
+        process = None
+        try:
+            process, path, headers = start_server(port, single_threaded, workdir)
+            report(label, *run_load('127.0.0.1', port, path, headers,
+                                    args.clients, args.requests, args.slow_clients, args.slow_delay))
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Load test for the production server setup
+Starts the app under gunicorn in several configurations, keeps a number of
+slow "video renders" in flight (a test-only endpoint that sleeps, holding a
+worker or thread the way /api/video/generate does) and measures how the
+rest of the site holds up: boot time, req/s and p50/p99 for regular pages,
+and the memory (PSS) of master plus workers.
+
+Configurations:
+    legacy   the old startup.sh command: 2 sync workers, no preload
+    sync     gunicorn.conf.py with GUNICORN_WORKER_CLASS=sync
+    gthread  gunicorn.conf.py defaults
+
+Usage:
+    python scripts/load_test_app.py
+    python scripts/load_test_app.py --configs legacy gthread --renders 2 --path /api/locations/suggest?q=cluj
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+from load_test import free_port, report, run_client
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Test-only app module with an endpoint that behaves like a long render
+RENDER_APP = '''
+import time
+from flask import request
+from app import app
+
+
+@app.route('/__loadtest/render')
+def loadtest_render():
+    time.sleep(float(request.args.get('seconds', 10)))
+    return 'rendered'
+'''
+
+LEGACY_ARGS = ['--config', 'legacy.conf.py', '--workers', '2', '--timeout', '600']
+
+CONFIGS = {
+    'legacy': (LEGACY_ARGS, {}),
+    'sync': (['--config', os.path.join(PROJECT_ROOT, 'gunicorn.conf.py')], {'GUNICORN_WORKER_CLASS': 'sync'}),
+    'gthread': (['--config', os.path.join(PROJECT_ROOT, 'gunicorn.conf.py')], {}),
+}
+
+
+def pss_kb(pid):
+    """Proportional set size of a process (shared pages split between sharers)"""
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            for line in f:
+                if line.startswith('Pss:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def process_tree(pid):
+    pids = [pid]
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as f:
+            for child in f.read().split():
+                pids.extend(process_tree(int(child)))
+    except OSError:
+        pass
+    return pids
+
+
+def start_gunicorn(name, port, workers, workdir):
+    args, extra_env = CONFIGS[name]
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([workdir, PROJECT_ROOT]),
+               WEB_CONCURRENCY=str(workers), **extra_env)
+    command = [sys.executable, '-m', 'gunicorn', *args, '--bind', f'127.0.0.1:{port}',
+               '--chdir', PROJECT_ROOT, '--access-logfile', '/dev/null', 'loadtest_app:app']
+    started = time.perf_counter()
+    process = subprocess.Popen(command, cwd=workdir, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{port}/health/live', timeout=1) as response:
+                if response.status == 200:
+                    return process, (time.perf_counter() - started) * 1000
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError(f'{name}: gunicorn did not become ready')
+
+
+def run_renders(port, count, seconds):
+    def render():
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/__loadtest/render?seconds={seconds}',
+                                   timeout=seconds + 60).read()
+        except OSError:
+            pass
+
+    threads = [threading.Thread(target=render, daemon=True) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare gunicorn configurations under load')
+    parser.add_argument('--configs', nargs='+', choices=sorted(CONFIGS), default=['legacy', 'sync', 'gthread'])
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=100, help='Requests per client')
+    parser.add_argument('--renders', type=int, default=2, help='Slow renders kept in flight')
+    parser.add_argument('--render-seconds', type=float, default=10)
+    parser.add_argument('--path', default='/api/catalog/makes')
+    args = parser.parse_args()
+
+    print(f"🔧 {args.workers} workers, {args.clients} clients x {args.requests} GET {args.path}, "
+          f"{args.renders} renders of {args.render_seconds:g}s in flight")
+
+    for name in args.configs:
+        workdir = tempfile.mkdtemp(prefix='vidx-gunicorn-')
+        with open(os.path.join(workdir, 'loadtest_app.py'), 'w') as f:
+            f.write(RENDER_APP)
+        open(os.path.join(workdir, 'legacy.conf.py'), 'w').close()
+
+        port = free_port()
+        process = None
+        try:
+            process, boot_ms = start_gunicorn(name, port, args.workers, workdir)
+            time.sleep(1)
+            memory_mb = sum(pss_kb(pid) for pid in process_tree(process.pid)) / 1024
+
+            renders = run_renders(port, args.renders, args.render_seconds)
+            time.sleep(0.5)
+            samples, errors = [], []
+            workers = [threading.Thread(target=run_client,
+                                        args=('127.0.0.1', port, args.path, {}, args.requests, samples, errors))
+                       for _ in range(args.clients)]
+            start = time.perf_counter()
+            for thread in workers:
+                thread.start()
+            for thread in workers:
+                thread.join()
+            elapsed = time.perf_counter() - start
+
+            print(f"\n  {name}: boot {boot_ms:.0f} ms, {memory_mb:.0f} MB PSS")
+            report(name, samples, errors, elapsed)
+            for thread in renders:
+                thread.join(timeout=0)
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -4,9 +4,8 @@ Migration script to convert db.json to auth_db.json with hashed passwords
 """
 
 import json
-import hashlib
-import secrets
 import os
+import sys
 
 # Get paths relative to script location
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -15,11 +14,8 @@ DATA_DIR = os.path.join(PROJECT_ROOT, 'data')
 OLD_DB_PATH = os.path.join(DATA_DIR, 'db.json')
 NEW_DB_PATH = os.path.join(DATA_DIR, 'auth_db.json')
 
-def hash_password(password):
-    """Hash a password using SHA-256 with salt"""
-    salt = secrets.token_hex(16)
-    pwd_hash = hashlib.sha256((password + salt).encode()).hexdigest()
-    return f"{salt}${pwd_hash}"
+sys.path.insert(0, PROJECT_ROOT)
+from services.passwords import hash_password  # noqa: E402
 
 def migrate():
     # Load old database
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Rewrite metadata.make/model of existing automotive listings to the canonical
+catalogue names (services/catalog.py), so the generated facet_values column
+(migration 002) matches the make filter
+"""
+
+import json
+import os
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+import psycopg2  # noqa: E402
+from psycopg2.extras import execute_values  # noqa: E402
+
+from services.catalog import normalize_metadata  # noqa: E402
+
+
+def normalize():
+    conn = psycopg2.connect(os.environ['DATABASE_URL'])
+    cur = conn.cursor()
+    cur.execute("SELECT id, metadata FROM listings WHERE category = 'automotive' AND metadata ? 'make'")
+    rows = cur.fetchall()
+
+    updates = []
+    for listing_id, metadata in rows:
+        normalized = normalize_metadata('automotive', metadata)
+        if normalized != metadata:
+            updates.append((listing_id, json.dumps(normalized)))
+
+    execute_values(cur, """
+        UPDATE listings AS l
+        SET metadata = v.metadata::jsonb
+        FROM (VALUES %s) AS v(id, metadata)
+        WHERE l.id = v.id
+    """, updates, page_size=1000)
+    conn.commit()
+    cur.close()
+    conn.close()
+
+    print(f"✅ Normalised make/model on {len(updates)} of {len(rows)} automotive listings")
+
+
+if __name__ == '__main__':
+    normalize()
@@ -1,26 +1,101 @@
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from http.server import HTTPServer, ThreadingHTTPServer, BaseHTTPRequestHandler
+import argparse
+import copy
 import json
 import os
+import tempfile
+import threading
 from urllib.parse import parse_qs, urlparse
 
+
+class JsonSnapshot:
+    """
+    In-memory copy of db.json shared by all request threads.
+    The file is re-read only when its mtime/size change. Writes go through
+    the lock, work on a deep copy and replace the file atomically before the
+    copy is published, so readers never see a half-applied write and a
+    failing write leaves the data untouched.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.RLock()
+        self.data = None
+        self.signature = None
+
+    def _signature(self):
+        try:
+            stat = os.stat(self.path)
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+
+    def read(self):
+        """Current data (do not mutate it outside write())"""
+        signature = self._signature()
+        if signature != self.signature or self.data is None:
+            with self.lock:
+                if signature != self.signature or self.data is None:
+                    try:
+                        with open(self.path, 'r') as f:
+                            self.data = json.load(f)
+                    except FileNotFoundError:
+                        self.data = {}
+                    self.signature = signature
+        return self.data
+
+    def write(self, mutate):
+        """Apply mutate(data) to a copy, persist it, then publish it; returns what mutate returned"""
+        with self.lock:
+            data = copy.deepcopy(self.read())
+            result = mutate(data)
+            directory = os.path.dirname(os.path.abspath(self.path))
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.db.json.')
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(data, f, indent=2)
+                os.replace(tmp_path, self.path)
+            except Exception:
+                os.unlink(tmp_path)
+                raise
+            self.data = data
+            self.signature = self._signature()
+            return result
+
+
 class RequestHandler(BaseHTTPRequestHandler):
-    def _set_headers(self, status_code=200, content_type='application/json'):
+    # Keep-alive: clients reuse one connection for many requests
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are separate writes; without TCP_NODELAY each response waits on delayed ACK
+    disable_nagle_algorithm = True
+    db = JsonSnapshot('db.json')
+
+    def _set_headers(self, status_code=200, content_type='application/json', content_length=0):
         self.send_response(status_code)
         self.send_header('Content-type', content_type)
+        self.send_header('Content-Length', str(content_length))
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, PUT, DELETE, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
         self.end_headers()
 
+    def _send_json(self, data, status_code=200):
+        body = json.dumps(data).encode()
+        self._set_headers(status_code, content_length=len(body))
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Per-request logging dominates response time under load
+        pass
+
     def do_OPTIONS(self):
         self._set_headers()
-        
+
     def do_GET(self):
         parsed_path = urlparse(self.path)
         query = parse_qs(parsed_path.query)
 
-        with open('db.json', 'r') as f:
-            db = json.load(f)
+        db = self.db.read()
 
         # /users optionally supports ?email=<email>
         if parsed_path.path == '/users':
@@ -29,8 +104,7 @@ class RequestHandler(BaseHTTPRequestHandler):
                 users = [u for u in db.get('users', []) if u.get('email') == email]
             else:
                 users = db.get('users', [])
-            self._set_headers()
-            self.wfile.write(json.dumps(users).encode())
+            self._send_json(users)
             return
 
         # /profiles supports ?userId=<id>
@@ -44,8 +118,7 @@ class RequestHandler(BaseHTTPRequestHandler):
                 profiles = [p for p in db.get('profiles', []) if p.get('userId') == uid]
             else:
                 profiles = db.get('profiles', [])
-            self._set_headers()
-            self.wfile.write(json.dumps(profiles).encode())
+            self._send_json(profiles)
             return
 
         # /sessions supports ?token=<token>
@@ -55,134 +128,123 @@ class RequestHandler(BaseHTTPRequestHandler):
                 sessions = [s for s in db.get('sessions', []) if s.get('token') == token]
             else:
                 sessions = db.get('sessions', [])
-            self._set_headers()
-            self.wfile.write(json.dumps(sessions).encode())
+            self._send_json(sessions)
             return
 
-        self._set_headers(404)
-        self.wfile.write(json.dumps({"error": "Not found"}).encode())
+        self._send_json({"error": "Not found"}, 404)
 
     def do_POST(self):
         content_length = int(self.headers['Content-Length'])
         post_data = self.rfile.read(content_length)
-        
+
         try:
             data = json.loads(post_data.decode('utf-8'))
-            
-            with open('db.json', 'r') as f:
-                db = json.load(f)
 
             parsed_path = urlparse(self.path)
             if parsed_path.path == '/users':
-                # Simple user creation
-                new_user = {
-                    "id": len(db['users']) + 1,
-                    "name": data.get('name'),
-                    "email": data.get('email'),
-                    "password": data.get('password')  # In real app, hash this!
-                }
-                db['users'].append(new_user)
-                
-                # Create profile
-                new_profile = {
-                    "id": len(db['profiles']) + 1,
-                    "userId": new_user['id'],
-                    "avatar": f"https://api.dicebear.com/7.x/avataaars/svg?seed={data.get('email')}",
-                    "bio": ""
-                }
-                db['profiles'].append(new_profile)
-                
-                with open('db.json', 'w') as f:
-                    json.dump(db, f, indent=2)
-                
-                self._set_headers(201)
+                def create_user(db):
+                    # Simple user creation
+                    new_user = {
+                        "id": len(db['users']) + 1,
+                        "name": data.get('name'),
+                        "email": data.get('email'),
+                        "password": data.get('password')  # In real app, hash this!
+                    }
+                    db['users'].append(new_user)
+
+                    # Create profile
+                    new_profile = {
+                        "id": len(db['profiles']) + 1,
+                        "userId": new_user['id'],
+                        "avatar": f"https://api.dicebear.com/7.x/avataaars/svg?seed={data.get('email')}",
+                        "bio": ""
+                    }
+                    db['profiles'].append(new_profile)
+                    return new_user, new_profile
+
+                new_user, new_profile = self.db.write(create_user)
+
                 # Return created user and profile to match client expectations
-                self.wfile.write(json.dumps({"user": new_user, "profile": new_profile}).encode())
-                
+                self._send_json({"user": new_user, "profile": new_profile}, 201)
+
             elif parsed_path.path == '/login':
                 # Simple login
                 email = data.get('email')
                 password = data.get('password')
-                
+
+                db = self.db.read()
                 user = next((u for u in db['users'] if u['email'] == email and u['password'] == password), None)
                 if user:
                     profile = next((p for p in db['profiles'] if p['userId'] == user['id']), None)
                     session = {"token": f"session_{user['id']}_{hash(email)}"}
-                    
-                    self._set_headers(200)
-                    self.wfile.write(json.dumps({
+
+                    self._send_json({
                         "user": user,
                         "profile": profile,
                         "session": session['token']
-                    }).encode())
+                    })
                 else:
-                    self._set_headers(401)
-                    self.wfile.write(json.dumps({"error": "Invalid credentials"}).encode())
+                    self._send_json({"error": "Invalid credentials"}, 401)
             elif parsed_path.path == '/sessions':
-                # create a session record
-                token = data.get('token')
-                userId = data.get('userId')
-                createdAt = data.get('createdAt')
-                new_session = {
-                    "id": len(db.get('sessions', [])) + 1,
-                    "userId": userId,
-                    "token": token,
-                    "createdAt": createdAt
-                }
-                db.setdefault('sessions', []).append(new_session)
-                with open('db.json', 'w') as f:
-                    json.dump(db, f, indent=2)
-                self._set_headers(201)
-                self.wfile.write(json.dumps(new_session).encode())
+                def create_session(db):
+                    # create a session record
+                    new_session = {
+                        "id": len(db.get('sessions', [])) + 1,
+                        "userId": data.get('userId'),
+                        "token": data.get('token'),
+                        "createdAt": data.get('createdAt')
+                    }
+                    db.setdefault('sessions', []).append(new_session)
+                    return new_session
+
+                self._send_json(self.db.write(create_session), 201)
             else:
-                self._set_headers(404)
-                self.wfile.write(json.dumps({"error": "Not found"}).encode())
-                
+                self._send_json({"error": "Not found"}, 404)
+
         except json.JSONDecodeError:
-            self._set_headers(400)
-            self.wfile.write(json.dumps({"error": "Invalid JSON"}).encode())
+            self._send_json({"error": "Invalid JSON"}, 400)
         except Exception as e:
-            self._set_headers(500)
-            self.wfile.write(json.dumps({"error": str(e)}).encode())
+            self._send_json({"error": str(e)}, 500)
 
     def do_DELETE(self):
         parsed_path = urlparse(self.path)
         query = parse_qs(parsed_path.query)
 
-        with open('db.json', 'r') as f:
-            db = json.load(f)
-
         # Delete sessions by token: /sessions?token=...
         if parsed_path.path == '/sessions':
             token = query.get('token', [None])[0]
             if not token:
-                self._set_headers(400)
-                self.wfile.write(json.dumps({"error": "token query required"}).encode())
+                self._send_json({"error": "token query required"}, 400)
                 return
 
-            before = len(db.get('sessions', []))
-            db['sessions'] = [s for s in db.get('sessions', []) if s.get('token') != token]
-            after = len(db.get('sessions', []))
-
-            with open('db.json', 'w') as f:
-                json.dump(db, f, indent=2)
+            def delete_session(db):
+                before = len(db.get('sessions', []))
+                db['sessions'] = [s for s in db.get('sessions', []) if s.get('token') != token]
+                return before != len(db['sessions'])
 
-            if before == after:
-                self._set_headers(404)
-                self.wfile.write(json.dumps({"error": "session not found"}).encode())
+            if self.db.write(delete_session):
+                self._send_json({"deleted": True})
             else:
-                self._set_headers(200)
-                self.wfile.write(json.dumps({"deleted": True}).encode())
+                self._send_json({"error": "session not found"}, 404)
             return
 
-        self._set_headers(404)
-        self.wfile.write(json.dumps({"error": "Not found"}).encode())
+        self._send_json({"error": "Not found"}, 404)
 
-def run(server_class=HTTPServer, handler_class=RequestHandler, port=3001):
+def run(server_class=ThreadingHTTPServer, handler_class=RequestHandler, port=3001):
     server_address = ('', port)
     httpd = server_class(server_address, handler_class)
-    print(f'Starting server on port {port}...')
+    print(f'Starting server on port {port} ({server_class.__name__}, {handler_class.protocol_version})...')
     httpd.serve_forever()
 
 if __name__ == '__main__':
-    run()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Development JSON server')
+    parser.add_argument('--port', type=int, default=3001)
+    parser.add_argument('--single-threaded', action='store_true',
+                        help='Legacy HTTPServer without keep-alive (for load-test comparisons)')
+    args = parser.parse_args()
+
+    if args.single_threaded:
+        RequestHandler.protocol_version = 'HTTP/1.0'
+        run(HTTPServer, port=args.port)
+    else:
+        run(port=args.port)
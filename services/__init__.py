@@ -0,0 +1,4 @@
+"""
+Services package for VidX Marketplace
+Shared data access, indexing and domain logic used by routes and api blueprints
+"""
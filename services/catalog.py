@@ -0,0 +1,186 @@
+"""
+Car make/model catalogue
+Built once from the scraped make list in data/Cars.txt (HTML <li> markup with
+listing counts) and the model lists in static/js/automotive-filter-schema.js,
+then kept in memory and pickled via services.snapshot.
+
+normalize_metadata() maps free-text makes ("mercedes", "VW", "Škoda") to the
+canonical catalogue entry when listings are written, so metadata.make always
+produces the same facet token the automotive make filter looks up.
+"""
+
+import os
+import re
+import threading
+from functools import lru_cache
+from html.parser import HTMLParser
+
+from services.filters import facet_value
+from services.snapshot import DATA_DIR, load_snapshot
+
+CARS_PATH = os.path.join(DATA_DIR, 'Cars.txt')
+MODELS_PATH = os.path.join(os.path.dirname(DATA_DIR), 'static', 'js', 'automotive-filter-schema.js')
+
+# Spellings that do not slug to the catalogue slug
+MAKE_ALIASES = {
+    'mercedes': 'mercedes-benz',
+    'merc': 'mercedes-benz',
+    'vw': 'volkswagen',
+    'ds': 'ds-automobiles',
+    'chevy': 'chevrolet',
+    'range-rover': 'land-rover',
+    'alfa': 'alfa-romeo',
+    'lynk-and-co': 'lynk-co',
+    'other': 'alte-marci',
+    'altele': 'alte-marci',
+}
+
+_CAR_MODELS_RE = re.compile(r'const carModels = \{(.*?)\n\};', re.S)
+_MODEL_LINE_RE = re.compile(r"^\s*'([^']+)':\s*\[(.*)\],?\s*$", re.M)
+_QUOTED_RE = re.compile(r"'([^']*)'")
+
+
+class _MakeListParser(HTMLParser):
+    """Collects (slug, name, count) from <a href=".../autoturisme/<slug>/">Name <span>count</span></a>"""
+
+    def __init__(self):
+        super().__init__()
+        self.makes = []
+        self._current = None
+        self._in_count = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'a':
+            href = dict(attrs).get('href') or ''
+            slug = href.rstrip('/').rsplit('/', 1)[-1]
+            self._current = {'slug': slug, 'name': '', 'count': 0}
+        elif tag == 'span' and self._current is not None:
+            self._in_count = True
+
+    def handle_endtag(self, tag):
+        if tag == 'span':
+            self._in_count = False
+        elif tag == 'a' and self._current is not None:
+            if self._current['slug'] and self._current['name']:
+                self.makes.append(self._current)
+            self._current = None
+
+    def handle_data(self, data):
+        if self._current is None or not data.strip():
+            return
+        if self._in_count:
+            digits = re.sub(r'\D', '', data)
+            self._current['count'] = int(digits) if digits else 0
+        else:
+            self._current['name'] += data.strip()
+
+
+def parse_makes(html):
+    """Make entries from the Cars.txt markup"""
+    parser = _MakeListParser()
+    parser.feed(html)
+    return parser.makes
+
+
+def parse_models(source):
+    """{make name: [models]} from the carModels object literal"""
+    block = _CAR_MODELS_RE.search(source)
+    if not block:
+        return {}
+    return {make: _QUOTED_RE.findall(models) for make, models in _MODEL_LINE_RE.findall(block.group(1))}
+
+
+class Catalogue:
+    """Makes ordered by name with slug and alias lookup tables"""
+
+    def __init__(self, makes, models):
+        # Slugs are facet_value(name) so stored makes and facet tokens agree;
+        # the scraped URL slug ("diverse" for "Alte marci") becomes an alias
+        entries = {}
+        self.aliases = dict(MAKE_ALIASES)
+        for make in makes:
+            slug = facet_value(make['name'])
+            entries[slug] = {'slug': slug, 'name': make['name'], 'count': make['count'], 'models': []}
+            self.aliases.setdefault(make['slug'], slug)
+
+        for make_name, make_models in models.items():
+            slug = self._resolve(facet_value(make_name), entries)
+            if slug is None:
+                slug = facet_value(make_name)
+                entries[slug] = {'slug': slug, 'name': make_name, 'count': 0, 'models': []}
+            entries[slug]['models'] = list(make_models)
+
+        self.makes = sorted(entries.values(), key=lambda entry: facet_value(entry['name']))
+        self.by_slug = {entry['slug']: entry for entry in self.makes}
+        self.model_slugs = {
+            entry['slug']: {facet_value(model): model for model in entry['models']}
+            for entry in self.makes
+        }
+
+    def _resolve(self, slug, entries=None):
+        entries = self.by_slug if entries is None else entries
+        if slug in entries:
+            return slug
+        slug = self.aliases.get(slug)
+        return slug if slug in entries else None
+
+    def make(self, value):
+        """Catalogue entry for a free-text make, or None"""
+        if not value:
+            return None
+        slug = self._resolve(facet_value(value))
+        return self.by_slug[slug] if slug else None
+
+    def model(self, make_slug, value):
+        """Canonical model name within a make, or None"""
+        return self.model_slugs.get(make_slug, {}).get(facet_value(value or ''))
+
+
+def _build_catalogue():
+    with open(CARS_PATH, 'r', encoding='utf-8') as f:
+        makes = parse_makes(f.read())
+    try:
+        with open(MODELS_PATH, 'r', encoding='utf-8') as f:
+            models = parse_models(f.read())
+    except FileNotFoundError:
+        models = {}
+    return Catalogue(makes, models)
+
+
+_catalogue = None
+_catalogue_lock = threading.Lock()
+
+
+def load_catalogue(rebuild=False):
+    """Shared Catalogue, loaded from the pickle snapshot when it is current"""
+    global _catalogue
+    if _catalogue is None or rebuild:
+        with _catalogue_lock:
+            if _catalogue is None or rebuild:
+                _catalogue = load_snapshot('catalog', [CARS_PATH, MODELS_PATH], _build_catalogue, rebuild)
+                make_slug.cache_clear()
+    return _catalogue
+
+
+@lru_cache(maxsize=1024)
+def make_slug(value):
+    """Catalogue slug for a free-text make; unknown makes keep their own slug"""
+    entry = load_catalogue().make(value)
+    return entry['slug'] if entry else facet_value(value)
+
+
+def normalize_metadata(category, metadata):
+    """
+    Canonicalise metadata.make/model for automotive listings before they are stored.
+    Unknown makes are left as entered.
+    """
+    if category != 'automotive' or not isinstance(metadata, dict) or not metadata.get('make'):
+        return metadata
+    entry = load_catalogue().make(metadata['make'])
+    if entry is None:
+        return metadata
+    metadata = dict(metadata, make=entry['name'])
+    model = load_catalogue().model(entry['slug'], metadata.get('model'))
+    if model:
+        metadata['model'] = model
+    return metadata
@@ -0,0 +1,261 @@
+"""
+Listing counters
+Write-behind buffer for listing views and likes. Increments are added to a
+per-process dict and coalesced per listing; a background thread flushes
+them every COUNTER_FLUSH_INTERVAL seconds as one batched
+UPDATE ... FROM (VALUES ...) (see add_counters in services/listing_store.py),
+so a popular listing costs one row update per interval instead of one per
+view.
+
+Reads add the increments that have not reached the store yet, so counts
+shown on pages are approximately real-time. Increments buffered in a
+process that dies before its next flush are lost; for view counts that is
+the accepted trade-off.
+
+Only ids of listings that exist are buffered (checked once per process and
+remembered until the listing is deleted; ids found missing are remembered
+for KNOWN_LISTING_MISS_TTL seconds), and the buffer never holds more than MAX_BUFFERED listings:
+past that, and when a failed flush puts its deltas back during a database
+outage, increments for new listings are dropped and counted in the log.
+"""
+
+import atexit
+import os
+import threading
+import time
+from collections import OrderedDict
+
+FLUSH_INTERVAL = float(os.environ.get('COUNTER_FLUSH_INTERVAL', 5))
+# A buffer this large (distinct listings) is flushed without waiting for the interval
+MAX_PENDING = int(os.environ.get('COUNTER_MAX_PENDING', 5000))
+# Hard cap on distinct listings held, including deltas put back by failed flushes
+MAX_BUFFERED = int(os.environ.get('COUNTER_MAX_BUFFERED', 50000))
+# Listing ids remembered as existing, per process
+MAX_KNOWN_LISTINGS = 100000
+# Seconds an id found missing is answered from memory, so bots hitting dead ids
+# do not cost a lookup per request
+KNOWN_LISTING_MISS_TTL = float(os.environ.get('KNOWN_LISTING_MISS_TTL', 30))
+
+COUNTERS = ('views', 'likes')
+
+
+class CounterBuffer:
+    """Coalesced {listing_id: [views, likes]} deltas waiting to be written"""
+
+    def __init__(self, max_pending=MAX_PENDING, max_buffered=MAX_BUFFERED):
+        self.max_pending = max_pending
+        self.max_buffered = max_buffered
+        # Increments refused because the buffer was at max_buffered
+        self.dropped = 0
+        self._pending = {}
+        # Deltas taken by a flush that has not committed yet; still counted by reads
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._full = threading.Event()
+
+    def _slot(self, listing_id):
+        """Deltas of listing_id, or None when the buffer is at max_buffered (caller holds _lock)"""
+        deltas = self._pending.get(listing_id)
+        if deltas is None:
+            if len(self._pending) >= self.max_buffered:
+                self.dropped += 1
+                return None
+            deltas = self._pending[listing_id] = [0, 0]
+            if len(self._pending) >= self.max_pending:
+                self._full.set()
+        return deltas
+
+    def increment(self, listing_id, counter, amount=1):
+        """Buffer an increment; False if it was dropped because the buffer is full"""
+        index = COUNTERS.index(counter)
+        with self._lock:
+            deltas = self._slot(listing_id)
+            if deltas is None:
+                return False
+            deltas[index] += amount
+            return True
+
+    def pending(self, listing_id):
+        """(views, likes) not yet in the store"""
+        with self._lock:
+            pending = self._pending.get(listing_id, (0, 0))
+            in_flight = self._in_flight.get(listing_id, (0, 0))
+            return pending[0] + in_flight[0], pending[1] + in_flight[1]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._pending)
+
+    def take_dropped(self):
+        """Increments dropped since the last call"""
+        with self._lock:
+            dropped, self.dropped = self.dropped, 0
+            return dropped
+
+    def flush(self, store=None):
+        """
+        Write the buffered deltas. On failure they go back into the buffer, as
+        far as max_buffered allows. Returns listings written.
+        """
+        from services.listing_store import get_listing_store
+
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                self._in_flight = batch
+                self._full.clear()
+            batch = {listing_id: deltas for listing_id, deltas in batch.items() if any(deltas)}
+            try:
+                if batch:
+                    (store or get_listing_store()).add_counters(batch)
+            except Exception:
+                with self._lock:
+                    for listing_id, (views, likes) in batch.items():
+                        deltas = self._slot(listing_id)
+                        if deltas is not None:
+                            deltas[0] += views
+                            deltas[1] += likes
+                    self._in_flight = {}
+                raise
+            with self._lock:
+                self._in_flight = {}
+            return len(batch)
+
+    def wait_until_full(self, timeout):
+        return self._full.wait(timeout)
+
+
+class KnownListings:
+    """
+    Bounded caches of listing ids confirmed to exist (until forgotten) and of
+    ids found missing (for miss_ttl seconds), so each is looked up once
+    """
+
+    def __init__(self, max_entries=MAX_KNOWN_LISTINGS, miss_ttl=KNOWN_LISTING_MISS_TTL):
+        self.max_entries = max_entries
+        self.miss_ttl = miss_ttl
+        self._ids = OrderedDict()
+        # {listing_id: monotonic time the miss expires}, oldest first
+        self._misses = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _cached(self, listing_id):
+        """True/False when the answer is cached, else None (caller holds _lock)"""
+        if listing_id in self._ids:
+            self._ids.move_to_end(listing_id)
+            return True
+        expires = self._misses.get(listing_id)
+        if expires is not None:
+            if expires > time.monotonic():
+                return False
+            del self._misses[listing_id]
+        return None
+
+    def _remember(self, entries, listing_id, value):
+        entries[listing_id] = value
+        entries.move_to_end(listing_id)
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+
+    def exists(self, listing_id):
+        with self._lock:
+            cached = self._cached(listing_id)
+        if cached is not None:
+            return cached
+        from services.listings import get_listing
+
+        try:
+            found = get_listing(listing_id) is not None
+        except Exception as e:
+            print(f"⚠️ Could not check listing {listing_id} for counters: {e}")
+            return False
+        with self._lock:
+            if found:
+                self._misses.pop(listing_id, None)
+                self._remember(self._ids, listing_id, True)
+            elif self.miss_ttl > 0:
+                self._remember(self._misses, listing_id, time.monotonic() + self.miss_ttl)
+        return found
+
+    def forget(self, listing_ids):
+        """Drop cached answers for listing_ids (deleted or just created listings)"""
+        with self._lock:
+            for listing_id in listing_ids:
+                self._ids.pop(str(listing_id), None)
+                self._misses.pop(str(listing_id), None)
+
+
+_buffer = CounterBuffer()
+_known = KnownListings()
+
+
+def record_view(listing_id):
+    """Buffer a view; False if the listing does not exist or the buffer is full"""
+    listing_id = str(listing_id)
+    return _known.exists(listing_id) and _buffer.increment(listing_id, 'views')
+
+
+def record_like(listing_id, liked=True):
+    """
+    +1 for a like, -1 for taking it back (the stored count never drops below
+    0). Callers record a like only when the user's like row changed (see
+    get_likes_store in services/favourites.py).
+    """
+    listing_id = str(listing_id)
+    return _known.exists(listing_id) and _buffer.increment(listing_id, 'likes', 1 if liked else -1)
+
+
+def forget_listings(listing_ids):
+    """Stop counting listing_ids until they are looked up again (called on delete and save)"""
+    _known.forget(listing_ids)
+
+
+def counts(listing):
+    """(views, likes) of a listing dict including increments that have not been flushed"""
+    views, likes = _buffer.pending(str(listing['id']))
+    return (listing.get('views') or 0) + views, max(0, (listing.get('likes') or 0) + likes)
+
+
+def flush_counters():
+    """Flush now (also run at exit and from gunicorn's worker_exit)"""
+    try:
+        written = _buffer.flush()
+        if written:
+            print(f"📊 Flushed counters for {written} listings")
+        return written
+    except Exception as e:
+        print(f"⚠️ Counter flush failed, keeping {len(_buffer)} listings buffered: {e}")
+        return 0
+    finally:
+        dropped = _buffer.take_dropped()
+        if dropped:
+            print(f"⚠️ Dropped {dropped} counter increments, buffer full ({_buffer.max_buffered} listings)")
+
+
+_flusher = None
+_flusher_lock = threading.Lock()
+
+
+def _flush_forever(interval):
+    while True:
+        _buffer.wait_until_full(interval)
+        flush_counters()
+        # Do not spin if the store is down and the buffer stays full
+        time.sleep(0.1)
+
+
+def start_counter_flusher(interval=FLUSH_INTERVAL):
+    """Start the flusher thread once per process"""
+    global _flusher
+    if interval <= 0:
+        return None
+    with _flusher_lock:
+        if _flusher is None or not _flusher.is_alive():
+            _flusher = threading.Thread(target=_flush_forever, args=(interval,),
+                                        name='counter-flusher', daemon=True)
+            _flusher.start()
+    return _flusher
+
+
+atexit.register(flush_counters)
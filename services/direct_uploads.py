@@ -0,0 +1,203 @@
+"""
+Direct uploads
+The browser sends photos and videos straight to storage; the app only signs
+the transfer and checks the stored object, so workers never hold the media.
+
+start_upload picks the transfer:
+- single PUT (files up to SINGLE_PUT_MAX_BYTES with a SHA-256 from the
+  browser): the key is the content hash (see services/media.py) and the
+  checksum is part of the signed request, so R2 refuses a body that does not
+  hash to its key. A file that is already stored is not sent again.
+- multipart (larger files, i.e. videos): presigned part URLs under a random
+  key. R2 cannot check a whole-object SHA-256 across parts, so these are not
+  deduplicated.
+complete_upload finishes a multipart upload, checks the stored object
+(size; for photos also format and pixel count, like ingest_image) and queues
+photo derivatives. Objects that fail the checks are deleted.
+
+Without R2 the signed URL points back at the app (LOCAL_UPLOAD_PATH), so the
+same browser code works in development.
+"""
+
+import base64
+import hashlib
+import hmac
+import math
+import os
+import re
+import time
+import uuid
+from urllib.parse import urlencode
+
+from services.media import (
+    IMAGE_FORMATS, MAX_IMAGE_BYTES, VIDEO_TYPES, MediaError, describe, get_media_storage, original_key,
+    spool_upload, verify_stored_image,
+)
+
+UPLOAD_URL_TTL = int(os.environ.get('UPLOAD_URL_TTL', 900))
+SINGLE_PUT_MAX_BYTES = 32 * 1024 * 1024
+# Multipart part size (S3 minimum is 5 MB for every part but the last)
+PART_SIZE = 16 * 1024 * 1024
+MAX_VIDEO_BYTES = int(os.environ.get('MEDIA_MAX_VIDEO_BYTES', 500 * 1024 * 1024))
+
+LOCAL_UPLOAD_PATH = '/api/media/local'
+
+# Content type -> extension
+IMAGE_TYPES = {content_type: extension for extension, content_type in IMAGE_FORMATS.values()}
+
+class UploadDenied(MediaError):
+    """A local upload URL whose signature is wrong or has expired"""
+
+
+_SHA256_RE = re.compile(r'^[0-9a-f]{64}$')
+# Content-addressed keys carry the SHA-256 of the object (group 1); multipart uploads a random id
+_UPLOAD_KEY_RE = re.compile(
+    r'^media/(?:(?:originals|videos)/([0-9a-f]{64})|uploads/[0-9a-f]{32})\.([a-z0-9]+)$'
+)
+
+
+def _validate(content_type, size):
+    """(extension, is_image, size) for an accepted upload, or raise MediaError"""
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        raise MediaError('size must be the file size in bytes')
+    if content_type in IMAGE_TYPES:
+        extension, is_image, limit = IMAGE_TYPES[content_type], True, MAX_IMAGE_BYTES
+    elif content_type in VIDEO_TYPES:
+        extension, is_image, limit = VIDEO_TYPES[content_type], False, MAX_VIDEO_BYTES
+    else:
+        raise MediaError(f'Unsupported file type: {content_type}')
+    if size <= 0 or size > limit:
+        raise MediaError(f'File must be between 1 byte and {limit // (1024 * 1024)} MB')
+    return extension, is_image, size
+
+
+def _local_signature(secret_key, key, content_type, size, expires):
+    message = f"{key}\n{content_type}\n{size}\n{expires}".encode('utf-8')
+    return hmac.new(secret_key.encode('utf-8'), message, hashlib.sha256).hexdigest()
+
+
+def _local_upload_url(secret_key, key, content_type, size):
+    expires = int(time.time()) + UPLOAD_URL_TTL
+    signature = _local_signature(secret_key, key, content_type, size, expires)
+    return f"{LOCAL_UPLOAD_PATH}/{key}?" + urlencode({'size': size, 'expires': expires, 'signature': signature})
+
+
+def start_upload(content_type, size, sha256, secret_key):
+    """
+    Sign the transfer of one file.
+
+    Returns:
+        dict: key and either exists=True with the stored media, method='PUT'
+        with url and headers, or method='multipart' with upload_id, part_size
+        and presigned parts [{part_number, url}]
+    """
+    extension, is_image, size = _validate(content_type, size)
+    sha256 = (sha256 or '').lower()
+    storage = get_media_storage()
+
+    if sha256 and size <= SINGLE_PUT_MAX_BYTES:
+        if not _SHA256_RE.match(sha256):
+            raise MediaError('sha256 must be a hex SHA-256 digest')
+        key = original_key(sha256, extension) if is_image else f"media/videos/{sha256}.{extension}"
+        if storage.stat(key) is not None:
+            return {'key': key, 'exists': True, 'media': describe(key, storage)}
+        if storage.backend == 'local':
+            url = _local_upload_url(secret_key, key, content_type, size)
+            headers = {'Content-Type': content_type}
+        else:
+            checksum = base64.b64encode(bytes.fromhex(sha256)).decode('ascii')
+            url, headers = storage.presign_put(key, content_type, size, checksum, UPLOAD_URL_TTL)
+        return {'key': key, 'exists': False, 'method': 'PUT', 'url': url, 'headers': headers}
+
+    if storage.backend == 'local':
+        raise MediaError(f'Files over {SINGLE_PUT_MAX_BYTES // (1024 * 1024)} MB need R2 storage')
+    key = f"media/uploads/{uuid.uuid4().hex}.{extension}"
+    upload_id = storage.create_multipart(key, content_type)
+    parts = [{'part_number': number, 'url': storage.presign_part(key, upload_id, number, UPLOAD_URL_TTL)}
+             for number in range(1, math.ceil(size / PART_SIZE) + 1)]
+    return {'key': key, 'exists': False, 'method': 'multipart', 'upload_id': upload_id,
+            'part_size': PART_SIZE, 'parts': parts}
+
+
+def _check_key(key):
+    match = _UPLOAD_KEY_RE.match(key or '')
+    if not match:
+        raise MediaError('Invalid upload key')
+    return match
+
+
+def complete_upload(key, upload_id=None, parts=None):
+    """
+    Register a finished upload: complete the multipart upload if there is
+    one, check the stored object (deleting it if it is rejected) and queue
+    photo derivatives.
+
+    Returns:
+        dict: the media (id, key, url, derivatives, size, content_type)
+    """
+    _check_key(key)
+    storage = get_media_storage()
+    if upload_id:
+        try:
+            parts = [(int(part['part_number']), str(part['etag'])) for part in parts or []]
+        except (KeyError, TypeError, ValueError):
+            raise MediaError('parts must be [{"part_number", "etag"}]')
+        if not parts:
+            raise MediaError('parts must be [{"part_number", "etag"}]')
+        storage.complete_multipart(key, upload_id, parts)
+
+    stored = storage.stat(key)
+    if stored is None:
+        raise MediaError('Upload not found')
+    content_type = stored['content_type']
+    limit = MAX_IMAGE_BYTES if content_type in IMAGE_TYPES else MAX_VIDEO_BYTES
+    if stored['size'] > limit:
+        # Multipart sizes are not signed; do not leave the object in the bucket
+        storage.delete(key)
+        print(f"⚠️ Deleted oversized upload {key} ({stored['size']} bytes)")
+        raise MediaError('Stored file is too large')
+    if content_type in IMAGE_TYPES:
+        try:
+            verify_stored_image(key, storage)
+        except MediaError:
+            storage.delete(key)
+            print(f"⚠️ Deleted rejected image upload {key}")
+            raise
+
+    media = describe(key, storage)
+    media.update(size=stored['size'], content_type=content_type)
+    print(f"✅ Registered direct upload {key} ({stored['size']} bytes, {storage.backend})")
+    return media
+
+
+def abort_upload(key, upload_id):
+    """Drop the parts of an unfinished multipart upload"""
+    _check_key(key)
+    storage = get_media_storage()
+    if storage.backend != 'local':
+        storage.abort_multipart(key, upload_id)
+
+
+def receive_local_upload(key, stream, content_type, size, expires, signature, secret_key):
+    """The PUT target of a local upload URL (development without R2)"""
+    match = _check_key(key)
+    try:
+        size, expires = int(size), int(expires)
+    except (TypeError, ValueError):
+        raise MediaError('Invalid upload URL')
+    expected = _local_signature(secret_key, key, content_type, size, expires)
+    if not hmac.compare_digest(expected, signature or '') or expires < time.time():
+        raise UploadDenied('Upload URL is invalid or expired')
+
+    path, digest, received = spool_upload(stream, max_bytes=size)
+    try:
+        if received != size:
+            raise MediaError('Body does not match the signed size')
+        # Content-addressed keys must hash to their name, as R2 checks with the signed checksum
+        if digest != match.group(1):
+            raise MediaError('Body does not match the signed checksum')
+        get_media_storage().put_file(path, key, content_type)
+    finally:
+        os.unlink(path)
@@ -0,0 +1,255 @@
+"""
+Favourites
+(user, listing) rows in the favourites table (migration 006), replacing the
+ads.favourited_by array. PostgresFavourites and SQLiteFavourites share one
+interface (add / remove / states / page); the SQLite one keeps its table in
+the embedded listings database and is used when DATABASE_URL is not set.
+
+A user's favourites are paged newest first with a keyset cursor on
+(created_at, listing_id), so every page is one index range scan no matter
+how deep the user scrolls.
+
+Likes are the same kind of (user, listing) rows in the listing_likes table
+(migration 010), so a user can like a listing once; the like counter only
+moves when a row is added or removed.
+"""
+
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+from services.listing_store import SQLITE_PATH, get_fallback_store
+from services.search import decode_cursor, keyset_cursor
+
+PAGE_SIZE = 24
+MAX_PAGE_SIZE = 100
+# Card ids accepted by one bulk state lookup
+MAX_STATE_IDS = 500
+
+DELETED = 'deleted'
+
+
+class FavouriteError(ValueError):
+    """Favourite of a listing that does not exist"""
+
+
+class PostgresFavourites:
+    """favourites table in PostgreSQL (DATABASE_URL)"""
+
+    backend = 'database'
+    table = 'favourites'
+
+    def _connect(self):
+        from app import get_db
+        return get_db()
+
+    def add(self, user_id, listing_id):
+        """True if added, False if it already was a favourite"""
+        import psycopg2
+
+        conn = self._connect()
+        try:
+            cur = conn.cursor()
+            cur.execute(f"""
+                INSERT INTO {self.table} (user_id, listing_id) VALUES (%s, %s)
+                ON CONFLICT DO NOTHING
+                RETURNING listing_id
+            """, (user_id, str(listing_id)))
+            added = cur.fetchone() is not None
+            conn.commit()
+            return added
+        except psycopg2.errors.ForeignKeyViolation:
+            raise FavouriteError('Listing not found')
+        finally:
+            conn.close()
+
+    def remove(self, user_id, listing_id):
+        conn = self._connect()
+        try:
+            cur = conn.cursor()
+            cur.execute(f"DELETE FROM {self.table} WHERE user_id = %s AND listing_id = %s",
+                        (user_id, str(listing_id)))
+            removed = cur.rowcount > 0
+            conn.commit()
+            return removed
+        finally:
+            conn.close()
+
+    def states(self, user_id, listing_ids):
+        """The subset of listing_ids the user has favourited (primary key probes)"""
+        conn = self._connect()
+        try:
+            cur = conn.cursor()
+            cur.execute(f"SELECT listing_id FROM {self.table} WHERE user_id = %s AND listing_id = ANY(%s)",
+                        (user_id, [str(listing_id) for listing_id in listing_ids]))
+            return {row['listing_id'] for row in cur.fetchall()}
+        finally:
+            conn.close()
+
+    def page(self, user_id, limit=PAGE_SIZE, cursor=None):
+        """
+        One page of favourited listings, newest first.
+
+        Returns:
+            (listings, next_cursor): next_cursor is None on the last page
+        """
+        params = [user_id]
+        keyset = ''
+        after = decode_cursor(cursor)
+        if after is not None:
+            keyset = 'AND (f.created_at, f.listing_id) < (%s::timestamptz, %s)'
+            params.extend(after[1:])
+        params.extend([DELETED, limit + 1])
+
+        conn = self._connect()
+        try:
+            cur = conn.cursor()
+            cur.execute(f"""
+                SELECT f.created_at AS favourited_at, l.*
+                FROM {self.table} f
+                JOIN listings l ON l.id = f.listing_id
+                WHERE f.user_id = %s {keyset} AND l.status <> %s
+                ORDER BY f.created_at DESC, f.listing_id DESC
+                LIMIT %s
+            """, params)
+            rows = [dict(row) for row in cur.fetchall()]
+        finally:
+            conn.close()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = keyset_cursor(rows[-1]['favourited_at'], rows[-1]['id'])
+        return rows, next_cursor
+
+
+class SQLiteFavourites:
+    """Embedded fallback, stored next to the listings in the SQLite database"""
+
+    backend = 'sqlite'
+    table = 'favourites'
+
+    def __init__(self, path=SQLITE_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA busy_timeout=10000")
+            self._local.conn = conn
+        if not self._initialized:
+            with self._init_lock:
+                conn.executescript(f"""
+                    CREATE TABLE IF NOT EXISTS {self.table} (
+                        user_id TEXT NOT NULL,
+                        listing_id TEXT NOT NULL,
+                        created_at TEXT NOT NULL,
+                        PRIMARY KEY (user_id, listing_id)
+                    ) WITHOUT ROWID;
+                    CREATE INDEX IF NOT EXISTS idx_{self.table}_user_created
+                        ON {self.table} (user_id, created_at DESC, listing_id DESC);
+                    CREATE INDEX IF NOT EXISTS idx_{self.table}_listing ON {self.table} (listing_id);
+                """)
+                self._initialized = True
+        return conn
+
+    def add(self, user_id, listing_id):
+        if get_fallback_store().get(listing_id) is None:
+            raise FavouriteError('Listing not found')
+        cursor = self._connect().execute(
+            f"INSERT OR IGNORE INTO {self.table} VALUES (?, ?, ?)",
+            (str(user_id), str(listing_id), datetime.now(timezone.utc).isoformat())
+        )
+        return cursor.rowcount > 0
+
+    def remove(self, user_id, listing_id):
+        cursor = self._connect().execute(
+            f"DELETE FROM {self.table} WHERE user_id = ? AND listing_id = ?", (str(user_id), str(listing_id))
+        )
+        return cursor.rowcount > 0
+
+    def states(self, user_id, listing_ids):
+        ids = [str(listing_id) for listing_id in listing_ids]
+        if not ids:
+            return set()
+        rows = self._connect().execute(
+            f"SELECT listing_id FROM {self.table} WHERE user_id = ? AND listing_id IN ({', '.join('?' * len(ids))})",
+            [str(user_id), *ids]
+        )
+        return {row[0] for row in rows}
+
+    def page(self, user_id, limit=PAGE_SIZE, cursor=None):
+        params = [str(user_id)]
+        keyset = ''
+        after = decode_cursor(cursor)
+        if after is not None:
+            keyset = 'AND (created_at, listing_id) < (?, ?)'
+            params.extend(after[1:])
+        params.append(limit + 1)
+        favourites = self._connect().execute(f"""
+            SELECT listing_id, created_at FROM {self.table}
+            WHERE user_id = ? {keyset}
+            ORDER BY created_at DESC, listing_id DESC
+            LIMIT ?
+        """, params).fetchall()
+
+        next_cursor = None
+        if len(favourites) > limit:
+            favourites = favourites[:limit]
+            next_cursor = keyset_cursor(favourites[-1][1], favourites[-1][0])
+
+        listings = get_fallback_store().get_many([listing_id for listing_id, _ in favourites])
+        rows = [
+            dict(listings[listing_id], favourited_at=created_at)
+            for listing_id, created_at in favourites
+            # Soft-deleted listings keep their favourite rows but are not shown
+            if listing_id in listings and listings[listing_id].get('status') != DELETED
+        ]
+        return rows, next_cursor
+
+
+class PostgresLikes(PostgresFavourites):
+    """listing_likes table in PostgreSQL: one like per (user, listing)"""
+
+    table = 'listing_likes'
+
+
+class SQLiteLikes(SQLiteFavourites):
+    """listing_likes in the embedded database"""
+
+    table = 'listing_likes'
+
+
+_fallback = None
+_fallback_likes = None
+_fallback_lock = threading.Lock()
+
+
+def get_favourites_store():
+    """PostgreSQL when DATABASE_URL is set, otherwise the embedded store"""
+    global _fallback
+    if os.environ.get('DATABASE_URL'):
+        return PostgresFavourites()
+    if _fallback is None:
+        with _fallback_lock:
+            if _fallback is None:
+                _fallback = SQLiteFavourites()
+    return _fallback
+
+
+def get_likes_store():
+    """Like rows, in the same backend as get_favourites_store"""
+    global _fallback_likes
+    if os.environ.get('DATABASE_URL'):
+        return PostgresLikes()
+    if _fallback_likes is None:
+        with _fallback_lock:
+            if _fallback_likes is None:
+                _fallback_likes = SQLiteLikes()
+    return _fallback_likes
@@ -0,0 +1,558 @@
+"""
+Server-side category filters
+Turns the category filter definitions (same ids as static/js/filter-modal.js)
+into indexed SQL predicates and facet counts, with an in-memory equivalent
+for the embedded fallback store.
+
+URL conventions (as produced by filter-modal.js):
+    ?make=bmw&fuel_type=petrol,diesel&price_min=1000&price_max=9000
+Every category also accepts a radius filter around a locality from data/Cities.txt:
+    ?city=abrud&radius_km=25
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter
+
+from services.search import normalize_text, encode_cursor, decode_cursor, keyset_cursor
+from services import geo
+
+DEFAULT_PAGE_SIZE = 24
+MAX_PAGE_SIZE = 100
+DEFAULT_RADIUS_KM = 25
+MAX_RADIUS_KM = 500
+
+# Facet counts / totals of unfiltered category pages are reused this long
+CATEGORY_FACETS_TTL = float(os.environ.get('CATEGORY_FACETS_TTL', 60))
+
+# Filter types
+CHOICE = 'choice'   # select / chips / radio -> metadata value, OR within a filter
+RANGE = 'range'     # {id}_min / {id}_max -> numeric column or metadata value
+
+
+def _choice(key=None, aliases=None, catalog=False):
+    return {'type': CHOICE, 'key': key, 'aliases': aliases or {}, 'catalog': catalog}
+
+
+def _range(key=None, column=None):
+    return {'type': RANGE, 'key': key, 'column': column}
+
+
+# Client filter values are English slugs while sellers write Romanian text,
+# so each slug also matches the Romanian spellings found in metadata
+CONDITION_ALIASES = {
+    'new': ['nou', 'noua'],
+    'used': ['utilizat', 'folosit', 'second-hand', 'foarte-buna', 'buna'],
+    'like-new': ['ca-nou', 'ca-noua'],
+}
+
+FILTER_SCHEMAS = {
+    'automotive': {
+        'vehicle_type': _choice(),
+        'make': _choice(catalog=True),
+        'fuel_type': _choice(aliases={
+            'petrol': ['benzina'],
+            'diesel': ['motorina'],
+            'hybrid': ['hibrid'],
+            'cng': ['gpl'],
+        }),
+        'transmission': _choice(aliases={
+            'manual': ['manuala'],
+            'automatic': ['automata', 'automat'],
+            'semi-automatic': ['semi-automata'],
+        }),
+        'price': _range(column='price'),
+        'year': _range(),
+        'mileage': _range(),
+        'condition': _choice(aliases=CONDITION_ALIASES),
+    },
+    'electronics': {
+        'subcategory': _choice(),
+        'brand': _choice(),
+        'storage': _choice(),
+        'price': _range(column='price'),
+        'warranty': _choice(),
+        'condition': _choice(aliases=CONDITION_ALIASES),
+    },
+    'fashion': {
+        'subcategory': _choice(),
+        'gender': _choice(),
+        'brand': _choice(),
+        'size': _choice(),
+        'price': _range(column='price'),
+        'material': _choice(),
+        'condition': _choice(aliases=CONDITION_ALIASES),
+    },
+    'home-garden': {
+        'subcategory': _choice(),
+        'room': _choice(),
+        'style': _choice(),
+        'price': _range(column='price'),
+        'material': _choice(),
+        'condition': _choice(aliases=CONDITION_ALIASES),
+    },
+    'sports': {
+        'sport_type': _choice(),
+        'brand': _choice(),
+        'gender': _choice(),
+        'price': _range(column='price'),
+        'size': _choice(),
+        'condition': _choice(aliases=CONDITION_ALIASES),
+    },
+    'real-estate': {
+        'property_type': _choice(),
+        'listing_type': _choice(),
+        'bedrooms': _choice(),
+        'bathrooms': _choice(),
+        'price': _range(column='price'),
+        'area': _range(),
+        'furnished': _choice(),
+    },
+    'jobs': {
+        'job_category': _choice(),
+        'job_type': _choice(),
+        'experience_level': _choice(),
+        'salary': _range(),
+    },
+    'services': {
+        'service_category': _choice(),
+        'provider_type': _choice(),
+        'availability': _choice(),
+        'price': _range(column='price'),
+        'certification': _choice(),
+    },
+}
+
+_SLUG_RE = re.compile(r'[^a-z0-9]+')
+
+
+def facet_value(value):
+    """
+    Canonical facet slug: "Benzină" -> "benzina", "Land Rover" -> "land-rover".
+    Must stay in sync with vidx_facet() in database/migrations/002_listing_facets.sql
+    """
+    return _SLUG_RE.sub('-', normalize_text(value).strip()).strip('-')
+
+
+def facet_token(key, value):
+    """Token stored in listings.facet_values for one metadata key/value pair"""
+    return f"{key}={facet_value(value)}"
+
+
+def _to_number(value):
+    try:
+        return float(str(value).replace(',', '').strip())
+    except (TypeError, ValueError):
+        return None
+
+
+def filter_args(category, args):
+    """
+    The query string parameters that are filters for category (choice ids,
+    {id}_min / {id}_max, city, radius_km); page state such as show, cursor,
+    format or a stray ?category= is left out
+    """
+    names = {'city', 'radius_km'}
+    for filter_id, spec in FILTER_SCHEMAS.get(category, {}).items():
+        if spec['type'] == CHOICE:
+            names.add(filter_id)
+        else:
+            names.update((f'{filter_id}_min', f'{filter_id}_max'))
+    return {name: value for name, value in args.items() if name in names and value}
+
+
+class FilterQuery:
+    """Parsed filters for one category page request"""
+
+    def __init__(self, category, args):
+        self.category = category
+        self.schema = FILTER_SCHEMAS.get(category, {})
+        self.choices = {}   # filter id -> set of facet tokens (any may match)
+        self.ranges = {}    # filter id -> (min, max)
+        self.near = None    # (lat, lon, radius_km)
+        self.unresolved = False  # a filter that can match nothing (unknown city)
+        self.applied = {}
+        self.catalog_keys = {spec['key'] or filter_id for filter_id, spec in self.schema.items()
+                             if spec.get('catalog')}
+
+        city = args.get('city')
+        if city:
+            index = geo.load_city_index()
+            position = index.lookup(city)
+            if position is not None:
+                radius_km = _to_number(args.get('radius_km')) or DEFAULT_RADIUS_KM
+                radius_km = max(1.0, min(radius_km, MAX_RADIUS_KM))
+                self.near = (float(index.lat[position]), float(index.lon[position]), radius_km)
+                self.applied['city'] = {'name': index.names[position], 'radius_km': radius_km}
+            else:
+                # Not in data/Cities.txt: nothing is known to be near it, so
+                # nothing matches (rather than silently showing every listing)
+                self.unresolved = True
+                self.applied['city'] = {'name': city, 'unresolved': True}
+
+        for filter_id, spec in self.schema.items():
+            key = spec['key'] or filter_id
+            if spec['type'] == CHOICE:
+                raw = args.get(filter_id)
+                if not raw:
+                    continue
+                values = [v for v in (facet_value(part) for part in str(raw).split(',')) if v]
+                if not values:
+                    continue
+                if spec['catalog']:
+                    from services.catalog import make_slug
+                    values = [make_slug(value) for value in values]
+                tokens = set()
+                for value in values:
+                    tokens.add(f"{key}={value}")
+                    tokens.update(f"{key}={alias}" for alias in spec['aliases'].get(value, []))
+                self.choices[filter_id] = tokens
+                self.applied[filter_id] = values
+            else:
+                low = _to_number(args.get(f'{filter_id}_min'))
+                high = _to_number(args.get(f'{filter_id}_max'))
+                if low is None and high is None:
+                    continue
+                self.ranges[filter_id] = (low, high)
+                self.applied[filter_id] = {'min': low, 'max': high}
+
+    @property
+    def facet_keys(self):
+        return [spec['key'] or filter_id for filter_id, spec in self.schema.items() if spec['type'] == CHOICE]
+
+    def choice_key(self, filter_id):
+        """Metadata key (facet token prefix) of a choice filter"""
+        return self.schema[filter_id]['key'] or filter_id
+
+    def sql(self, choices=True):
+        """
+        Return (where_clause, params) using the indexed expressions from migration 002.
+        With choices=False the choice filters are left out (facet counting
+        applies them one by one, see filter_listings_db).
+        """
+        conditions = ["l.status = 'active'", "l.category = %s"]
+        params = [self.category]
+        if self.unresolved:
+            conditions.append("FALSE")
+
+        if choices:
+            for tokens in self.choices.values():
+                conditions.append("l.facet_values && %s::text[]")
+                params.append(sorted(tokens))
+
+        for filter_id, (low, high) in self.ranges.items():
+            spec = self.schema[filter_id]
+            if spec['column']:
+                expression = f"l.{spec['column']}"
+            else:
+                expression = "vidx_numeric(l.metadata->>%s)"
+            for bound, operator in ((low, '>='), (high, '<=')):
+                if bound is None:
+                    continue
+                conditions.append(f"{expression} {operator} %s")
+                if not spec['column']:
+                    params.append(spec['key'] or filter_id)
+                params.append(bound)
+
+        if self.near:
+            clause, near_params = geo.listing_radius_sql(*self.near)
+            conditions.append(clause)
+            params.extend(near_params)
+
+        return ' AND '.join(conditions), params
+
+    def listing_tokens(self, listing):
+        """Facet tokens for an in-memory listing (mirrors the facet_values column)"""
+        metadata = listing.get('metadata') or {}
+        if isinstance(metadata, str):
+            try:
+                metadata = json.loads(metadata)
+            except ValueError:
+                metadata = {}
+        tokens = set()
+        for key in self.facet_keys:
+            value = metadata.get(key, listing.get(key))
+            if value is None or isinstance(value, (dict, list)):
+                continue
+            if key in self.catalog_keys:
+                # Older fallback rows were stored before makes were canonicalised
+                from services.catalog import make_slug
+                tokens.add(f"{key}={make_slug(str(value))}")
+            else:
+                tokens.add(facet_token(key, value))
+        return tokens, metadata
+
+    def missed_choices(self, listing):
+        """
+        In-memory equivalent of sql() split for facet counting:
+        (tokens, ids of the choice filters the listing misses), or
+        (None, None) when it fails a non-choice filter
+        """
+        if self.unresolved:
+            return None, None
+        if listing.get('status', 'active') != 'active' or listing.get('category') != self.category:
+            return None, None
+        tokens, metadata = self.listing_tokens(listing)
+        for filter_id, (low, high) in self.ranges.items():
+            spec = self.schema[filter_id]
+            if spec['column']:
+                value = _to_number(listing.get(spec['column']))
+            else:
+                value = _to_number(metadata.get(spec['key'] or filter_id))
+            if value is None:
+                return None, None
+            if (low is not None and value < low) or (high is not None and value > high):
+                return None, None
+        if self.near:
+            resolved = geo.resolve_location(listing.get('location'))
+            if resolved is None:
+                return None, None
+            lat, lon, radius_km = self.near
+            if geo.haversine_km(lat, lon, resolved[0], resolved[1]) > radius_km:
+                return None, None
+        missed = [filter_id for filter_id, wanted in self.choices.items() if not tokens & wanted]
+        return tokens, missed
+
+    def matches(self, listing):
+        """In-memory equivalent of sql() for the fallback store"""
+        tokens, missed = self.missed_choices(listing)
+        if tokens is None or missed:
+            return False, None
+        return True, tokens
+
+    def facet_tokens(self, tokens, missed):
+        """
+        Tokens a listing contributes to the facet counts. Each choice facet is
+        counted with its own selection left out (disjunctive faceting), so a
+        listing that misses exactly one selected filter still counts towards
+        that filter's other values.
+        """
+        if not missed:
+            return tokens
+        if len(missed) == 1:
+            prefix = f"{self.choice_key(missed[0])}="
+            return {token for token in tokens if token.startswith(prefix)}
+        return ()
+
+    def group_facets(self, counts):
+        """
+        {'fuel_type=benzina': 3, 'fuel_type=petrol': 1} -> {'fuel_type': {'petrol': 4}}:
+        keyed by filter id and by the client's value, Romanian aliases folded in
+        """
+        facets = {}
+        for filter_id, spec in self.schema.items():
+            if spec['type'] != CHOICE:
+                continue
+            canonical = {alias: value for value, aliases in spec['aliases'].items() for alias in aliases}
+            prefix = f"{self.choice_key(filter_id)}="
+            values = Counter()
+            for token, count in counts.items():
+                if token.startswith(prefix):
+                    value = token[len(prefix):]
+                    values[canonical.get(value, value)] += count
+            if values:
+                facets[filter_id] = dict(sorted(values.items(), key=lambda item: (-item[1], item[0])))
+        return facets
+
+
+CARD_COLUMNS = """
+    l.id, l.user_id, l.title, l.description, l.category, l.price, l.price_display, l.currency,
+    l.location, l.video_url, l.thumbnail_url, l.seller_name, l.seller_avatar,
+    l.views, l.likes, l.status, l.metadata, l.created_at
+"""
+
+
+def _page_result(items, limit):
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = keyset_cursor(items[-1]['created_at'], items[-1]['id'])
+    return items, next_cursor
+
+
+def filter_listings_db(query, limit=DEFAULT_PAGE_SIZE, cursor=None):
+    """
+    Filtered page, facet counts and total in one PostgreSQL round trip.
+    Later pages (cursor set) only fetch the page: total and facets are
+    None / {} there, the client keeps the ones from the first page.
+    """
+    from app import get_db
+
+    after = decode_cursor(cursor)
+    conn = get_db()
+    cur = conn.cursor()
+    try:
+        if after is not None:
+            where, params = query.sql()
+            cur.execute(f"""
+                SELECT {CARD_COLUMNS}
+                FROM listings l
+                WHERE {where} AND (l.created_at, l.id) < (%s::timestamp, %s)
+                ORDER BY l.created_at DESC, l.id DESC
+                LIMIT %s
+            """, params + after[1:] + [limit + 1])
+            items, next_cursor = _page_result([dict(row) for row in cur.fetchall()], limit)
+            return {'items': items, 'facets': {}, 'total': None, 'next_cursor': next_cursor}
+
+        # base: every non-choice filter applied, plus one flag per selected
+        # choice filter; the page and total need all flags, each facet all
+        # flags but its own
+        where, params = query.sql(choices=False)
+        selected = list(query.choices.items())
+        flags = ''.join(f", l.facet_values && %s::text[] AS c{i}" for i in range(len(selected)))
+        all_flags = ' AND '.join(f"c{i}" for i in range(len(selected))) or 'TRUE'
+        facet_flags = ''.join(f" AND (c{i} OR split_part(f, '=', 1) = %s)" for i in range(len(selected)))
+        params = ([sorted(tokens) for _, tokens in selected] + params + [limit + 1, query.facet_keys]
+                  + [query.choice_key(filter_id) for filter_id, _ in selected])
+
+        cur.execute(f"""
+            WITH base AS (
+                SELECT l.id, l.created_at, l.facet_values{flags}
+                FROM listings l
+                WHERE {where}
+            ),
+            matched AS (
+                SELECT id, created_at FROM base WHERE {all_flags}
+            ),
+            page AS (
+                SELECT id FROM matched
+                ORDER BY created_at DESC, id DESC
+                LIMIT %s
+            ),
+            facet_counts AS (
+                SELECT f AS facet, count(*) AS n
+                FROM base, unnest(base.facet_values) AS f
+                WHERE split_part(f, '=', 1) = ANY(%s){facet_flags}
+                GROUP BY f
+            )
+            SELECT
+                (SELECT count(*) FROM matched) AS total,
+                (SELECT coalesce(json_object_agg(facet, n), '{{}}') FROM facet_counts) AS facets,
+                (SELECT coalesce(json_agg(c ORDER BY c.created_at DESC, c.id DESC), '[]')
+                 FROM (SELECT {CARD_COLUMNS} FROM listings l JOIN page p ON p.id = l.id) c) AS items
+        """, params)
+        row = cur.fetchone()
+    finally:
+        cur.close()
+        conn.close()
+
+    items, next_cursor = _page_result(row['items'], limit)
+    return {
+        'items': items,
+        'facets': query.group_facets(row['facets']),
+        'total': row['total'],
+        'next_cursor': next_cursor,
+    }
+
+
+def filter_listings_in_memory(query, listings, limit=DEFAULT_PAGE_SIZE, cursor=None):
+    """Same result shape as filter_listings_db, computed over a list of listing dicts"""
+    after = decode_cursor(cursor)
+    matched = []
+    counts = Counter()
+    for listing in listings:
+        tokens, missed = query.missed_choices(listing)
+        if tokens is None:
+            continue
+        if not missed:
+            matched.append(listing)
+        if after is None:
+            counts.update(query.facet_tokens(tokens, missed))
+
+    matched.sort(key=lambda l: (str(l.get('created_at') or ''), str(l.get('id'))), reverse=True)
+    if after is not None:
+        position = (str(after[1]), str(after[2]))
+        matched_page = [l for l in matched if (str(l.get('created_at') or ''), str(l.get('id'))) < position]
+    else:
+        matched_page = matched
+
+    items = matched_page[:limit]
+    next_cursor = None
+    if len(matched_page) > limit:
+        next_cursor = encode_cursor([None, str(items[-1].get('created_at') or ''), str(items[-1].get('id'))])
+    return {
+        'items': items,
+        'facets': query.group_facets(counts) if after is None else {},
+        'total': len(matched) if after is None else None,
+        'next_cursor': next_cursor,
+    }
+
+
+_category_facets = {}   # category -> (computed_at, total, facets)
+_category_facets_lock = threading.Lock()
+
+
+def _compute_facets(query, fallback_listings):
+    if os.environ.get('DATABASE_URL'):
+        try:
+            result = filter_listings_db(query, limit=1)
+            return result['total'], result['facets']
+        except Exception as e:
+            print(f"[ERROR] Database facet query failed, using fallback: {e}")
+    listings = fallback_listings() if fallback_listings else []
+    result = filter_listings_in_memory(query, listings, limit=1)
+    return result['total'], result['facets']
+
+
+def category_facets(query, fallback_listings=None, max_age=CATEGORY_FACETS_TTL):
+    """
+    (total, facets) of an unfiltered category, cached per category for
+    max_age seconds so the landing page does not rescan the category on
+    every visit. Only one request recomputes an expired entry.
+    """
+    cached = _category_facets.get(query.category)
+    if cached is not None and time.monotonic() - cached[0] < max_age:
+        return cached[1], cached[2]
+    with _category_facets_lock:
+        cached = _category_facets.get(query.category)
+        if cached is None or time.monotonic() - cached[0] >= max_age:
+            total, facets = _compute_facets(query, fallback_listings)
+            cached = _category_facets[query.category] = (time.monotonic(), total, facets)
+    return cached[1], cached[2]
+
+
+def filter_listings(category, args, limit=DEFAULT_PAGE_SIZE, cursor=None, fallback_listings=None):
+    """
+    Filter one category page.
+
+    Args:
+        category: Category slug (key of FILTER_SCHEMAS)
+        args: Mapping of query string parameters
+        limit: Page size
+        cursor: Keyset cursor from a previous page
+        fallback_listings: Callable returning listing dicts when the database is unavailable
+
+    Returns:
+        dict: {items, facets, total, next_cursor, applied}. facets maps each
+        choice filter id to {value: count}, counted with that filter's own
+        selection left out. Pages after the first (cursor set) do not
+        compute total / facets (None / {}). Without any filter the page comes
+        from the feed_items projection and total / facets from
+        category_facets().
+    """
+    limit = max(1, min(int(limit or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE))
+    query = FilterQuery(category, args)
+
+    if not query.applied:
+        from services.listings import category_feed
+
+        items, next_cursor = category_feed(category, limit, cursor)
+        total, facets = (None, {}) if cursor else category_facets(query, fallback_listings)
+        return {'items': items, 'facets': facets, 'total': total, 'next_cursor': next_cursor, 'applied': {}}
+
+    result = None
+    if os.environ.get('DATABASE_URL'):
+        try:
+            result = filter_listings_db(query, limit, cursor)
+        except Exception as e:
+            print(f"[ERROR] Database filter query failed, using fallback: {e}")
+
+    if result is None:
+        listings = fallback_listings() if fallback_listings else []
+        result = filter_listings_in_memory(query, listings, limit, cursor)
+
+    result['applied'] = query.applied
+    return result
@@ -0,0 +1,232 @@
+"""
+Geo index over data/Cities.txt
+Array-backed city coordinates with a uniform grid index for radius queries,
+plus resolution of free-text listing locations ("Abrud, Alba") to coordinates.
+
+The same bounding box + Haversine approach is used in SQL by
+listing_radius_sql() (see database/migrations/003_listing_geo.sql).
+"""
+
+import json
+import math
+import os
+import threading
+from functools import lru_cache
+
+import numpy as np
+
+from services.search import normalize_text
+from services.snapshot import DATA_DIR, load_snapshot
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+
+# Grid cell size in degrees (~0.25 deg is ~28 km north-south in Romania)
+GRID_CELL_DEG = 0.25
+
+CITIES_PATH = os.path.join(DATA_DIR, 'Cities.txt')
+
+
+def slugify(text):
+    """Same shape as Cities.txt normalized_name: "Abrud-Sat" / "Abrud Sat" -> "abrud-sat" """
+    return '-'.join(normalize_text(text).replace('-', ' ').split())
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km; works on scalars and NumPy arrays"""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2.0) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2.0) ** 2
+    return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def bounding_box(lat, lon, radius_km):
+    """(min_lat, max_lat, min_lon, max_lon) enclosing a circle of radius_km"""
+    delta_lat = radius_km / KM_PER_DEGREE_LAT
+    delta_lon = radius_km / (KM_PER_DEGREE_LAT * max(math.cos(math.radians(lat)), 0.01))
+    return lat - delta_lat, lat + delta_lat, lon - delta_lon, lon + delta_lon
+
+
+class CityIndex:
+    """
+    Compact city table: parallel NumPy arrays indexed by position, a slug
+    lookup table and a grid of cell -> position arrays for radius queries.
+    """
+
+    def __init__(self, cities):
+        self.ids = np.array([c['id'] for c in cities], dtype=np.int32)
+        self.lat = np.array([c['latitude'] for c in cities], dtype=np.float64)
+        self.lon = np.array([c['longitude'] for c in cities], dtype=np.float64)
+        self.radius = np.array([c.get('radius') or 0 for c in cities], dtype=np.float32)
+        self.zoom = np.array([c.get('zoom') or 0 for c in cities], dtype=np.int8)
+        self.names = [c['name'] for c in cities]
+        self.slugs = [c.get('normalized_name') or slugify(c['name']) for c in cities]
+        self.counties = [c.get('county', '') for c in cities]
+        self.county_slugs = [slugify(county) for county in self.counties]
+
+        self.by_slug = {}
+        for position, slug in enumerate(self.slugs):
+            self.by_slug.setdefault(slug, []).append(position)
+        self.by_id = {int(city_id): position for position, city_id in enumerate(self.ids)}
+
+        cells = {}
+        rows = np.floor(self.lat / GRID_CELL_DEG).astype(np.int32)
+        cols = np.floor(self.lon / GRID_CELL_DEG).astype(np.int32)
+        for position, cell in enumerate(zip(rows.tolist(), cols.tolist())):
+            cells.setdefault(cell, []).append(position)
+        self.grid = {cell: np.array(positions, dtype=np.int32) for cell, positions in cells.items()}
+
+    def __len__(self):
+        return len(self.names)
+
+    def city(self, position):
+        """City dict for an array position"""
+        return {
+            'id': int(self.ids[position]),
+            'name': self.names[position],
+            'normalized_name': self.slugs[position],
+            'county': self.counties[position],
+            'latitude': float(self.lat[position]),
+            'longitude': float(self.lon[position]),
+            'radius': float(self.radius[position]),
+            'zoom': int(self.zoom[position]),
+        }
+
+    def lookup(self, name, county=None):
+        """Array position of a city by name (diacritic-insensitive), preferring county matches"""
+        positions = self.by_slug.get(slugify(name))
+        if not positions:
+            return None
+        if county:
+            county_slug = slugify(county)
+            in_county = [p for p in positions if self.county_slugs[p] == county_slug]
+            if in_county:
+                positions = in_county
+        # Prefer the larger locality when a name is ambiguous
+        return max(positions, key=lambda p: (-self.zoom[p], self.radius[p]))
+
+    def _grid_candidates(self, lat, lon, radius_km):
+        min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius_km)
+        row_range = range(math.floor(min_lat / GRID_CELL_DEG), math.floor(max_lat / GRID_CELL_DEG) + 1)
+        col_range = range(math.floor(min_lon / GRID_CELL_DEG), math.floor(max_lon / GRID_CELL_DEG) + 1)
+
+        # Large radii cover more cells than there are occupied cells: scan the occupied ones
+        if len(row_range) * len(col_range) > len(self.grid):
+            chunks = [positions for (row, col), positions in self.grid.items()
+                      if row in row_range and col in col_range]
+        else:
+            chunks = [self.grid[(row, col)] for row in row_range for col in col_range
+                      if (row, col) in self.grid]
+        if not chunks:
+            return np.empty(0, dtype=np.int32)
+        return np.concatenate(chunks)
+
+    def within(self, lat, lon, radius_km):
+        """Positions and distances of cities within radius_km of a point, nearest first"""
+        candidates = self._grid_candidates(lat, lon, radius_km)
+        if not len(candidates):
+            return candidates, np.empty(0)
+        distances = haversine_km(lat, lon, self.lat[candidates], self.lon[candidates])
+        mask = distances <= radius_km
+        candidates, distances = candidates[mask], distances[mask]
+        order = np.argsort(distances, kind='stable')
+        return candidates[order], distances[order]
+
+    def nearest(self, lat, lon):
+        """Position of the closest city to a point"""
+        distances = haversine_km(lat, lon, self.lat, self.lon)
+        return int(np.argmin(distances))
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def _build_index():
+    with open(CITIES_PATH, 'r', encoding='utf-8') as f:
+        cities = json.load(f).get('data', [])
+    return CityIndex(cities)
+
+
+def load_city_index(rebuild=False):
+    """Shared CityIndex, loaded from the pickle snapshot when it is current"""
+    global _index
+    if _index is None or rebuild:
+        with _index_lock:
+            if _index is None or rebuild:
+                _index = load_snapshot('cities', [CITIES_PATH], _build_index, rebuild)
+                resolve_location.cache_clear()
+    return _index
+
+
+@lru_cache(maxsize=4096)
+def resolve_location(location):
+    """
+    Resolve a free-text listing location to (latitude, longitude, city position).
+
+    "Abrud, Alba, România" -> the Abrud entry; parts that name a county are used
+    to disambiguate. Returns None when no part matches a known locality.
+    """
+    if not location:
+        return None
+    index = load_city_index()
+    parts = [part.strip() for part in str(location).split(',') if part.strip()]
+    county_slugs = set(index.county_slugs)
+    county = next((part for part in parts[1:] if slugify(part) in county_slugs), None)
+
+    for part in parts:
+        position = index.lookup(part, county)
+        if position is not None:
+            return float(index.lat[position]), float(index.lon[position]), position
+    return None
+
+
+def geocode_listing(listing):
+    """(latitude, longitude) for a listing dict, or (None, None) if its location is unknown"""
+    resolved = resolve_location(listing.get('location'))
+    if resolved is None:
+        return None, None
+    return resolved[0], resolved[1]
+
+
+def listings_within(listings, city, radius_km):
+    """
+    Listings located within radius_km of a city (name or Cities.txt id).
+
+    Returns:
+        list: [(distance_km, listing)] nearest first, or None if the city is unknown
+    """
+    index = load_city_index()
+    position = index.by_id.get(city) if isinstance(city, int) else index.lookup(city)
+    if position is None:
+        return None
+    lat, lon = index.lat[position], index.lon[position]
+
+    located = []
+    for listing in listings:
+        resolved = resolve_location(listing.get('location'))
+        if resolved is not None:
+            located.append((resolved[0], resolved[1], listing))
+    if not located:
+        return []
+
+    lats = np.fromiter((item[0] for item in located), dtype=np.float64, count=len(located))
+    lons = np.fromiter((item[1] for item in located), dtype=np.float64, count=len(located))
+    distances = haversine_km(lat, lon, lats, lons)
+    order = np.argsort(distances, kind='stable')
+    return [(float(distances[i]), located[i][2]) for i in order if distances[i] <= radius_km]
+
+
+def listing_radius_sql(lat, lon, radius_km, alias='l'):
+    """
+    SQL predicate (bounding box on the indexed columns, then Haversine) and params
+    for listings within radius_km of a point.
+    """
+    min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius_km)
+    clause = (
+        f"{alias}.latitude BETWEEN %s AND %s AND {alias}.longitude BETWEEN %s AND %s "
+        f"AND 2 * {EARTH_RADIUS_KM} * asin(sqrt("
+        f"power(sin(radians({alias}.latitude - %s) / 2), 2) + "
+        f"cos(radians(%s)) * cos(radians({alias}.latitude)) * "
+        f"power(sin(radians({alias}.longitude - %s) / 2), 2))) <= %s"
+    )
+    return clause, [min_lat, max_lat, min_lon, max_lon, lat, lat, lon, radius_km]
@@ -0,0 +1,193 @@
+"""
+Health checks
+Dependency probes behind /health and /health/ready:
+
+- database: SELECT 1 on one long-lived connection (reconnects on failure)
+- r2:       HEAD on a sentinel object in the video bucket
+- ffmpeg:   `ffmpeg -version`
+- openai:   API key configured (no network call)
+
+The probes run concurrently, each with its own timeout, and the combined
+result is cached for HEALTH_CACHE_TTL seconds. Only one request runs the
+probes at a time; a storm of load balancer checks waits for that run and
+shares its result instead of opening a connection each.
+
+Only the database is critical for readiness; the others report degraded.
+"""
+
+import os
+import shutil
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from datetime import datetime
+
+HEALTH_CACHE_TTL = float(os.environ.get('HEALTH_CACHE_TTL', 10))
+CHECK_TIMEOUT = float(os.environ.get('HEALTH_CHECK_TIMEOUT', 2))
+R2_SENTINEL_KEY = os.environ.get('R2_HEALTH_KEY', 'health/sentinel.txt')
+
+CRITICAL_CHECKS = ('database',)
+
+OK = 'ok'
+SKIPPED = 'not configured'
+
+
+class CheckFailed(Exception):
+    """A probe ran and the dependency is unhealthy"""
+
+
+# Database
+
+_db_conn = None
+_db_lock = threading.Lock()
+
+
+def check_database():
+    global _db_conn
+    if not os.environ.get('DATABASE_URL'):
+        return SKIPPED
+    import psycopg2
+
+    with _db_lock:
+        for attempt in range(2):
+            try:
+                if _db_conn is None or _db_conn.closed:
+                    _db_conn = psycopg2.connect(
+                        os.environ['DATABASE_URL'],
+                        connect_timeout=max(1, int(CHECK_TIMEOUT)),
+                        options=f'-c statement_timeout={int(CHECK_TIMEOUT * 1000)}',
+                    )
+                    _db_conn.autocommit = True
+                with _db_conn.cursor() as cur:
+                    cur.execute('SELECT 1')
+                    cur.fetchone()
+                return OK
+            except psycopg2.Error as e:
+                # A dropped connection gets one fresh retry
+                try:
+                    if _db_conn is not None:
+                        _db_conn.close()
+                except psycopg2.Error:
+                    pass
+                _db_conn = None
+                if attempt:
+                    raise CheckFailed(str(e).strip())
+
+
+def reset_connections():
+    """Forget connections inherited from a parent process (gunicorn post_fork)"""
+    global _db_conn
+    _db_conn = None
+
+
+# R2
+
+_r2_client = None
+
+
+def _get_r2_client():
+    global _r2_client
+    if _r2_client is None:
+        import boto3
+        from botocore.config import Config
+
+        _r2_client = boto3.client(
+            's3',
+            endpoint_url=f"https://{os.environ['R2_ACCOUNT_ID']}.r2.cloudflarestorage.com",
+            aws_access_key_id=os.environ.get('R2_ACCESS_KEY_ID'),
+            aws_secret_access_key=os.environ.get('R2_SECRET_ACCESS_KEY'),
+            region_name='auto',
+            config=Config(connect_timeout=CHECK_TIMEOUT, read_timeout=CHECK_TIMEOUT,
+                          retries={'max_attempts': 1}),
+        )
+    return _r2_client
+
+
+def check_r2():
+    if not os.environ.get('R2_ACCOUNT_ID') or not os.environ.get('R2_ACCESS_KEY_ID'):
+        return SKIPPED
+    from botocore.exceptions import BotoCoreError, ClientError
+
+    bucket = os.environ.get('R2_BUCKET_NAME', 'video-marketplace-videos')
+    try:
+        _get_r2_client().head_object(Bucket=bucket, Key=R2_SENTINEL_KEY)
+    except ClientError as e:
+        code = e.response.get('Error', {}).get('Code')
+        # Reachable and authenticated, the sentinel just has not been uploaded
+        if code in ('404', 'NoSuchKey', 'NotFound'):
+            return f'{OK} (sentinel {R2_SENTINEL_KEY} missing)'
+        raise CheckFailed(f'{code}: {e}')
+    except BotoCoreError as e:
+        raise CheckFailed(str(e))
+    return OK
+
+
+# FFmpeg and OpenAI
+
+def check_ffmpeg():
+    if not shutil.which('ffmpeg'):
+        raise CheckFailed('ffmpeg not found on PATH')
+    result = subprocess.run(['ffmpeg', '-version'], capture_output=True, timeout=CHECK_TIMEOUT)
+    if result.returncode != 0:
+        raise CheckFailed(f'ffmpeg -version exited with {result.returncode}')
+    return OK
+
+
+def check_openai():
+    if not os.environ.get('OPENAI_API_KEY'):
+        return SKIPPED
+    return OK
+
+
+CHECKS = {
+    'database': check_database,
+    'r2': check_r2,
+    'ffmpeg': check_ffmpeg,
+    'openai': check_openai,
+}
+
+
+# Runner and cache
+
+_executor = ThreadPoolExecutor(max_workers=len(CHECKS) * 2, thread_name_prefix='health')
+_cache = {'result': None, 'at': 0.0}
+_run_lock = threading.Lock()
+
+
+def _run_checks():
+    started = time.monotonic()
+    futures = {name: _executor.submit(check) for name, check in CHECKS.items()}
+    checks = {}
+    for name, future in futures.items():
+        check_started = time.monotonic()
+        try:
+            status = future.result(timeout=max(0.0, CHECK_TIMEOUT - (check_started - started)))
+            checks[name] = {'status': status}
+        except FutureTimeout:
+            checks[name] = {'status': 'error', 'error': f'timed out after {CHECK_TIMEOUT:g}s'}
+        except Exception as e:
+            checks[name] = {'status': 'error', 'error': str(e) or type(e).__name__}
+
+    failed = [name for name, check in checks.items() if check['status'] == 'error']
+    return {
+        'ready': not any(name in CRITICAL_CHECKS for name in failed),
+        'status': 'degraded' if failed else 'healthy',
+        'checks': checks,
+        'checked_at': datetime.now().isoformat(),
+        'duration_ms': round((time.monotonic() - started) * 1000, 1),
+    }
+
+
+def get_health(max_age=HEALTH_CACHE_TTL):
+    """Cached result of all checks, refreshed at most once per max_age seconds"""
+    result = _cache['result']
+    if result is not None and time.monotonic() - _cache['at'] < max_age:
+        return result
+    with _run_lock:
+        # Another request may have refreshed it while this one waited
+        result = _cache['result']
+        if result is None or time.monotonic() - _cache['at'] >= max_age:
+            result = _run_checks()
+            _cache['result'], _cache['at'] = result, time.monotonic()
+    return result
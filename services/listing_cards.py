@@ -0,0 +1,140 @@
+"""
+Listing cards
+ListingCard is the view-model shared by the home page, category pages and
+the JSON feed: the fields a video card shows, built from a listing row in
+one pass. The price string is computed at write time (price_display: a
+trigger in PostgreSQL, the document in the embedded store) and only
+formatted here for rows written before that column existed.
+
+Feed pages are serialised (and json/jsonb columns decoded) with orjson when
+it is installed, plain json otherwise.
+"""
+
+import json
+from datetime import date
+from decimal import Decimal
+
+from flask import Response
+
+from services import counters
+
+try:
+    import orjson
+except ImportError:  # optional, see requirements.txt
+    orjson = None
+
+DEFAULT_SELLER_NAME = 'VidX Demo'
+DEFAULT_SELLER_AVATAR = 'https://api.dicebear.com/7.x/avataaars/svg?seed=demo'
+
+CURRENCY_SYMBOLS = {'EUR': '€', 'USD': '$'}
+
+
+def format_price(value, currency='EUR'):
+    """€5,000 / €5,000.50 (same format as the price_display trigger in migration 008)"""
+    try:
+        value = float(value or 0)
+    except (TypeError, ValueError):
+        value = 0.0
+    symbol = CURRENCY_SYMBOLS.get(currency or 'EUR', '$')
+    if value == int(value):
+        return f"{symbol}{int(value):,}"
+    return f"{symbol}{value:,.2f}"
+
+
+class ListingCard:
+    """Display fields of one listing card"""
+
+    __slots__ = (
+        'id', 'title', 'category', 'price', 'price_value', 'currency', 'location', 'video_url',
+        'thumbnail', 'seller_name', 'seller_avatar', 'views', 'likes', 'description', 'features',
+    )
+
+    def __init__(self, listing):
+        get = listing.get
+        price_value = get('price') or 0
+        currency = get('currency') or 'EUR'
+        views, likes = counters.counts(listing)
+
+        self.id = listing['id']
+        self.title = listing['title']
+        self.category = get('category', '')
+        self.price = get('price_display') or format_price(price_value, currency)
+        # Decimal from PostgreSQL; float keeps sorting and JSON simple
+        self.price_value = float(price_value) if isinstance(price_value, Decimal) else price_value
+        self.currency = currency
+        self.location = get('location') or ''
+        self.video_url = get('video_url') or ''
+        self.thumbnail = get('thumbnail_url') or self.video_url
+        self.seller_name = get('seller_name') or DEFAULT_SELLER_NAME
+        self.seller_avatar = get('seller_avatar') or DEFAULT_SELLER_AVATAR
+        self.views = views
+        self.likes = likes
+        self.description = get('description') or ''
+
+        # JSONB arrives decoded from psycopg2; only legacy rows carry a JSON string
+        metadata = get('metadata') or {}
+        if isinstance(metadata, str):
+            try:
+                metadata = json.loads(metadata)
+            except ValueError:
+                metadata = {}
+        self.features = metadata.get('features', [])
+
+    # Nested shapes the templates use (item.user.name, item.stats.views)
+
+    @property
+    def user(self):
+        return {'name': self.seller_name, 'avatar': self.seller_avatar}
+
+    @property
+    def stats(self):
+        return {'views': self.views, 'likes': self.likes}
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'title': self.title,
+            'category': self.category,
+            'price': self.price,
+            'price_value': self.price_value,
+            'currency': self.currency,
+            'location': self.location,
+            'video_url': self.video_url,
+            'thumbnail': self.thumbnail,
+            'user': self.user,
+            'stats': self.stats,
+        }
+
+
+def listing_cards(listings):
+    """ListingCard for every listing row, in order"""
+    return [ListingCard(listing) for listing in listings]
+
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, ListingCard):
+        return value.to_dict()
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def dumps(data):
+    """JSON bytes; cards, Decimals and datetimes are handled"""
+    if orjson is not None:
+        return orjson.dumps(data, default=_default)
+    return json.dumps(data, default=_default, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def json_loads(data):
+    """orjson.loads when installed (psycopg2 uses it for json/jsonb columns, see app.py)"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_response(data, status=200):
+    """Flask response for a feed page, encoded with dumps()"""
+    return Response(dumps(data), status=status, mimetype='application/json')
@@ -0,0 +1,683 @@
+"""
+Listing repositories
+PostgresListingStore and SQLiteListingStore share one interface
+(get / get_many / list / status_pages / status_page / feed_page / upsert /
+upsert_many / update_many / add_counters) so routes can write through
+Postgres and fall back to the embedded store without knowing which one
+answered.
+
+The SQLite store replaces the old whole-file rewrites of db.json: it runs in
+WAL mode (readers never block the writer), every write is one transaction,
+and id / category / user_id lookups go through indexes. On first use it
+imports the listings from data/db.json.
+
+Both stores keep a feed_items projection (migration 009 in PostgreSQL,
+triggers created on first use in SQLite): one narrow card row per active
+listing, refreshed by triggers on every listing write, so feed_page is an
+index range scan instead of a sort over the listings of a category.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+from services.listing_cards import format_price
+from services.snapshot import DATA_DIR
+
+SQLITE_PATH = os.environ.get('LISTINGS_SQLITE_PATH', os.path.join(DATA_DIR, 'listings.sqlite3'))
+LEGACY_JSON_PATH = os.path.join(DATA_DIR, 'db.json')
+
+# Bound parameters per statement on older SQLite builds
+SQLITE_MAX_VARIABLES = 900
+
+# Columns written by create_listing (see POSTGRESQL_DEPLOYMENT_COMPLETE.md for the table)
+LISTING_COLUMNS = (
+    'id', 'user_id', 'title', 'description', 'category', 'price', 'currency', 'location',
+    'video_url', 'thumbnail_url', 'seller_name', 'seller_avatar', 'status', 'metadata',
+    'latitude', 'longitude',
+)
+
+# Columns a partial update may change, with their SQL types (metadata is merged separately)
+UPDATABLE_COLUMNS = {
+    'title': 'text',
+    'description': 'text',
+    'category': 'text',
+    'price': 'numeric',
+    'currency': 'text',
+    'location': 'text',
+    'video_url': 'text',
+    'thumbnail_url': 'text',
+    'status': 'text',
+    'latitude': 'double precision',
+    'longitude': 'double precision',
+}
+
+# Kept from the stored row when a listing is re-submitted with the same id
+PRESERVED_FIELDS = ('created_at', 'views', 'likes')
+
+# What a listing card shows (my-ads): the Postgres queries project only these
+CARD_COLUMNS = (
+    'id', 'title', 'category', 'price', 'price_display', 'currency', 'location', 'video_url',
+    'thumbnail_url', 'status', 'views', 'likes', 'created_at',
+)
+
+# Columns of a feed_items row (migration 009) besides listing_id: one listing card
+FEED_COLUMNS = (
+    'category', 'created_at', 'title', 'price', 'price_display', 'currency', 'location',
+    'video_url', 'thumbnail_url', 'seller_name', 'seller_avatar', 'views', 'likes',
+)
+
+
+def listing_user_id(listing):
+    """db.json rows use userId, the API and Postgres use user_id"""
+    user_id = listing.get('user_id', listing.get('userId'))
+    return None if user_id is None else str(user_id)
+
+
+class PostgresListingStore:
+    """Listings table in PostgreSQL (DATABASE_URL)"""
+
+    backend = 'database'
+
+    def _connect(self):
+        from app import get_db
+        return get_db()
+
+    def get(self, listing_id):
+        conn = self._connect()
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT * FROM listings WHERE id = %s", (listing_id,))
+            row = cur.fetchone()
+            return dict(row) if row else None
+        finally:
+            conn.close()
+
+    def get_many(self, listing_ids):
+        """{listing_id: listing} for the ids that exist"""
+        if not listing_ids:
+            return {}
+        conn = self._connect()
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT * FROM listings WHERE id = ANY(%s)", ([str(i) for i in listing_ids],))
+            return {row['id']: dict(row) for row in cur.fetchall()}
+        finally:
+            conn.close()
+
+    def list(self, category=None, user_id=None, status='active', limit=None):
+        conditions, params = [], []
+        for column, value in (('category', category), ('user_id', user_id), ('status', status)):
+            if value is not None:
+                conditions.append(f"{column} = %s")
+                params.append(value)
+        query = "SELECT * FROM listings"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY created_at DESC, id DESC"
+        if limit:
+            query += " LIMIT %s"
+            params.append(int(limit))
+
+        conn = self._connect()
+        try:
+            cur = conn.cursor()
+            cur.execute(query, params)
+            return [dict(row) for row in cur.fetchall()]
+        finally:
+            conn.close()
+
+    def status_pages(self, user_id, statuses, per_status):
+        """
+        Per-status counts and the first page of every status, in one query.
+
+        Returns:
+            dict: {status: {'count': n, 'listings': [card rows]}} for statuses that have listings
+        """
+        conn = self._connect()
+        try:
+            cur = conn.cursor()
+            cur.execute(f"""
+                SELECT *
+                FROM (
+                    SELECT {', '.join(CARD_COLUMNS)},
+                           count(*) OVER (PARTITION BY status) AS status_count,
+                           row_number() OVER (PARTITION BY status ORDER BY created_at DESC, id DESC) AS position
+                    FROM listings
+                    WHERE user_id = %s AND status = ANY(%s)
+                ) ranked
+                WHERE position <= %s
+                ORDER BY status, position
+            """, (str(user_id), list(statuses), int(per_status)))
+            rows = cur.fetchall()
+        finally:
+            conn.close()
+        return _group_status_rows(dict(row) for row in rows)
+
+    def status_page(self, user_id, status, limit, before=None):
+        """limit + 1 card rows of one status older than before=(created_at, id), newest first"""
+        params = [str(user_id), status]
+        keyset = ''
+        if before:
+            keyset = 'AND (created_at, id) < (%s::timestamp, %s)'
+            params.extend(before)
+        params.append(int(limit) + 1)
+
+        conn = self._connect()
+        try:
+            cur = conn.cursor()
+            cur.execute(f"""
+                SELECT {', '.join(CARD_COLUMNS)}
+                FROM listings
+                WHERE user_id = %s AND status = %s {keyset}
+                ORDER BY created_at DESC, id DESC
+                LIMIT %s
+            """, params)
+            return [dict(row) for row in cur.fetchall()]
+        finally:
+            conn.close()
+
+    def feed_page(self, category=None, limit=24, before=None):
+        """
+        limit + 1 active listing cards older than before=(created_at, id), newest
+        first, from the feed_items projection (one index range scan)
+        """
+        conditions, params = [], []
+        if category is not None:
+            conditions.append('category = %s')
+            params.append(category)
+        if before:
+            conditions.append('(created_at, listing_id) < (%s::timestamp, %s)')
+            params.extend(before)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        params.append(int(limit) + 1)
+
+        conn = self._connect()
+        try:
+            cur = conn.cursor()
+            cur.execute(f"""
+                SELECT listing_id AS id, {', '.join(FEED_COLUMNS)}
+                FROM feed_items
+                {where}
+                ORDER BY created_at DESC, listing_id DESC
+                LIMIT %s
+            """, params)
+            return [dict(row) for row in cur.fetchall()]
+        finally:
+            conn.close()
+
+    def upsert(self, listing):
+        return self.upsert_many([listing])[0]
+
+    def upsert_many(self, listings, page_size=1000):
+        """
+        Insert or replace listings in one transaction, batched into multi-row
+        INSERTs. An existing row is only replaced by a listing of the same
+        user; the ids written are returned.
+        """
+        from psycopg2.extras import execute_values
+
+        # ON CONFLICT cannot touch the same row twice in one statement: last one wins
+        listings = list({str(listing['id']): listing for listing in listings}.values())
+        rows = [
+            tuple(json.dumps(listing.get(column) or {}) if column == 'metadata' else listing.get(column)
+                  for column in LISTING_COLUMNS)
+            for listing in listings
+        ]
+        template = '(' + ', '.join('%s::jsonb' if column == 'metadata' else '%s' for column in LISTING_COLUMNS)
+        template += ', CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)'
+        updates = ', '.join(f"{column} = EXCLUDED.{column}" for column in LISTING_COLUMNS if column not in ('id', 'user_id'))
+
+        conn = self._connect()
+        try:
+            cur = conn.cursor()
+            written = execute_values(cur, f"""
+                INSERT INTO listings ({', '.join(LISTING_COLUMNS)}, created_at, updated_at)
+                VALUES %s
+                ON CONFLICT (id) DO UPDATE SET {updates}, updated_at = CURRENT_TIMESTAMP
+                WHERE listings.user_id IS NOT DISTINCT FROM EXCLUDED.user_id
+                RETURNING id
+            """, rows, template=template, page_size=page_size, fetch=True)
+            conn.commit()
+            written = {row['id'] for row in written}
+            return [listing['id'] for listing in listings if str(listing['id']) in written]
+        finally:
+            conn.close()
+
+    def update_many(self, changes, user_id=None, page_size=1000):
+        """
+        Partial updates in one statement per page.
+
+        Args:
+            changes: {listing_id: {column: value}}; metadata is merged, not replaced
+            user_id: only listings of this user are updated (None: any listing)
+
+        Returns:
+            list: ids that existed (and belong to user_id) and were updated
+        """
+        from psycopg2.extras import execute_values
+
+        assignments = [
+            f"{column} = CASE WHEN v.changes ? '{column}' THEN (v.changes->>'{column}')::{sql_type} ELSE l.{column} END"
+            for column, sql_type in UPDATABLE_COLUMNS.items()
+        ]
+        assignments.append(
+            "metadata = CASE WHEN v.changes ? 'metadata' "
+            "THEN coalesce(l.metadata, '{}'::jsonb) || (v.changes->'metadata') ELSE l.metadata END"
+        )
+        owner = None if user_id is None else str(user_id)
+        rows = [(str(listing_id), json.dumps(fields), owner) for listing_id, fields in changes.items()]
+
+        conn = self._connect()
+        try:
+            cur = conn.cursor()
+            updated = execute_values(cur, f"""
+                UPDATE listings AS l
+                SET {', '.join(assignments)}, updated_at = CURRENT_TIMESTAMP
+                FROM (VALUES %s) AS v(id, changes, owner)
+                WHERE l.id = v.id AND (v.owner IS NULL OR l.user_id::text = v.owner)
+                RETURNING l.id
+            """, rows, template='(%s, %s::jsonb, %s::text)', page_size=page_size, fetch=True)
+            conn.commit()
+            return [row['id'] for row in updated]
+        finally:
+            conn.close()
+
+    def add_counters(self, deltas, page_size=1000):
+        """
+        Add view/like deltas in one statement per page.
+
+        Args:
+            deltas: {listing_id: (views, likes)}
+
+        Rows are updated in id order so concurrent flushes from several
+        workers lock them in the same order and cannot deadlock.
+        updated_at is left alone: a view is not an edit.
+        """
+        from psycopg2.extras import execute_values
+
+        rows = sorted((str(listing_id), views, likes) for listing_id, (views, likes) in deltas.items())
+        conn = self._connect()
+        try:
+            cur = conn.cursor()
+            execute_values(cur, """
+                UPDATE listings AS l
+                SET views = coalesce(l.views, 0) + v.views,
+                    likes = greatest(coalesce(l.likes, 0) + v.likes, 0)
+                FROM (VALUES %s) AS v(id, views, likes)
+                WHERE l.id = v.id
+            """, rows, template='(%s, %s::integer, %s::integer)', page_size=page_size)
+            conn.commit()
+        finally:
+            conn.close()
+
+
+class SQLiteListingStore:
+    """
+    Embedded fallback store. Each listing is stored as its JSON document plus
+    the indexed columns used for lookups; one connection per thread.
+    """
+
+    backend = 'sqlite'
+
+    def __init__(self, path=SQLITE_PATH, legacy_json_path=LEGACY_JSON_PATH):
+        self.path = path
+        self.legacy_json_path = legacy_json_path
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=10000")
+            self._local.conn = conn
+        if not self._initialized:
+            self._initialize(conn)
+        return conn
+
+    def _initialize(self, conn):
+        with self._init_lock:
+            if self._initialized:
+                return
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS listings (
+                    id TEXT PRIMARY KEY,
+                    user_id TEXT,
+                    category TEXT,
+                    status TEXT,
+                    created_at TEXT NOT NULL,
+                    document TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_listings_category_created
+                    ON listings (category, created_at DESC, id DESC);
+                CREATE INDEX IF NOT EXISTS idx_listings_user_created
+                    ON listings (user_id, created_at DESC, id DESC);
+                CREATE INDEX IF NOT EXISTS idx_listings_status_created
+                    ON listings (status, created_at DESC, id DESC);
+                CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            """)
+            conn.executescript(_SQLITE_FEED_SCHEMA)
+            imported = conn.execute("SELECT value FROM meta WHERE key = 'legacy_import'").fetchone()
+            if imported is None:
+                self._import_legacy_json(conn)
+            if conn.execute("SELECT value FROM meta WHERE key = 'feed_items'").fetchone() is None:
+                # Databases created before the projection existed
+                with self._transaction(conn):
+                    conn.execute(f"""
+                        INSERT OR REPLACE INTO feed_items
+                        SELECT id, category, created_at, {_sqlite_feed_card('listings')}
+                        FROM listings WHERE status = 'active'
+                    """)
+                    conn.execute("INSERT OR REPLACE INTO meta VALUES ('feed_items', ?)", (datetime.now().isoformat(),))
+            self._initialized = True
+
+    def _import_legacy_json(self, conn):
+        listings = []
+        try:
+            with open(self.legacy_json_path, 'r', encoding='utf-8') as f:
+                listings = json.load(f).get('listings', [])
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"[ERROR] Failed to import db.json into the fallback store: {e}")
+            return
+
+        with self._transaction(conn):
+            conn.executemany(
+                "INSERT OR IGNORE INTO listings VALUES (?, ?, ?, ?, ?, ?)",
+                [self._row(listing) for listing in listings if listing.get('id')]
+            )
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('legacy_import', ?)", (datetime.now().isoformat(),))
+            self._bump_revision(conn)
+        print(f"✅ Imported {len(listings)} listings from db.json into {os.path.basename(self.path)}")
+
+    @staticmethod
+    @contextmanager
+    def _transaction(conn):
+        """BEGIN IMMEDIATE ... COMMIT, rolled back on error"""
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    @staticmethod
+    def _row(listing):
+        created_at = listing.get('created_at') or listing.get('createdAt') or datetime.now().isoformat()
+        # Stored with the document like the price_display column in PostgreSQL
+        listing = dict(listing, price_display=format_price(listing.get('price'), listing.get('currency')))
+        return (
+            str(listing['id']),
+            listing_user_id(listing),
+            listing.get('category'),
+            listing.get('status', 'active'),
+            str(created_at),
+            json.dumps(listing, ensure_ascii=False, default=str),
+        )
+
+    @staticmethod
+    def _bump_revision(conn):
+        conn.execute("""
+            INSERT INTO meta VALUES ('revision', '1')
+            ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1
+        """)
+
+    def revision(self):
+        """Increases on every write; lets in-process caches (search index) detect changes"""
+        row = self._connect().execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()
+        return int(row[0]) if row else 0
+
+    def get(self, listing_id):
+        row = self._connect().execute("SELECT document FROM listings WHERE id = ?", (str(listing_id),)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_many(self, listing_ids):
+        """{listing_id: listing} for the ids that exist"""
+        ids = [str(listing_id) for listing_id in listing_ids]
+        conn = self._connect()
+        found = {}
+        for start in range(0, len(ids), SQLITE_MAX_VARIABLES):
+            chunk = ids[start:start + SQLITE_MAX_VARIABLES]
+            for listing_id, document in conn.execute(
+                f"SELECT id, document FROM listings WHERE id IN ({', '.join('?' * len(chunk))})", chunk
+            ):
+                found[listing_id] = json.loads(document)
+        return found
+
+    def list(self, category=None, user_id=None, status='active', limit=None):
+        conditions, params = [], []
+        for column, value in (('category', category), ('user_id', user_id), ('status', status)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(str(value))
+        query = "SELECT document FROM listings"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY created_at DESC, id DESC"
+        if limit:
+            query += " LIMIT ?"
+            params.append(int(limit))
+        return [json.loads(row[0]) for row in self._connect().execute(query, params)]
+
+    def status_pages(self, user_id, statuses, per_status):
+        """Same as PostgresListingStore.status_pages (SQLite has window functions too)"""
+        statuses = list(statuses)
+        rows = self._connect().execute(f"""
+            SELECT document, status, status_count
+            FROM (
+                SELECT document, status,
+                       count(*) OVER (PARTITION BY status) AS status_count,
+                       row_number() OVER (PARTITION BY status ORDER BY created_at DESC, id DESC) AS position
+                FROM listings
+                WHERE user_id = ? AND status IN ({', '.join('?' * len(statuses))})
+            )
+            WHERE position <= ?
+            ORDER BY status, position
+        """, [str(user_id), *statuses, int(per_status)])
+        return _group_status_rows(
+            dict(json.loads(document), status=status, status_count=status_count)
+            for document, status, status_count in rows
+        )
+
+    def status_page(self, user_id, status, limit, before=None):
+        params = [str(user_id), status]
+        keyset = ''
+        if before:
+            keyset = 'AND (created_at, id) < (?, ?)'
+            params.extend(before)
+        params.append(int(limit) + 1)
+        rows = self._connect().execute(f"""
+            SELECT document FROM listings
+            WHERE user_id = ? AND status = ? {keyset}
+            ORDER BY created_at DESC, id DESC
+            LIMIT ?
+        """, params)
+        return [json.loads(row[0]) for row in rows]
+
+    def feed_page(self, category=None, limit=24, before=None):
+        """Same as PostgresListingStore.feed_page, over the trigger-maintained feed_items table"""
+        conditions, params = [], []
+        if category is not None:
+            conditions.append('category = ?')
+            params.append(category)
+        if before:
+            conditions.append('(created_at, listing_id) < (?, ?)')
+            params.extend(before)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        params.append(int(limit) + 1)
+        rows = self._connect().execute(f"""
+            SELECT card FROM feed_items
+            {where}
+            ORDER BY created_at DESC, listing_id DESC
+            LIMIT ?
+        """, params)
+        return [json.loads(row[0]) for row in rows]
+
+    def upsert(self, listing):
+        return self.upsert_many([listing])[0]
+
+    def upsert_many(self, listings):
+        """
+        Insert or replace listings in one transaction. An existing row is only
+        replaced by a listing of the same user; the ids written are returned.
+        """
+        conn = self._connect()
+        with self._transaction(conn):
+            ids = [str(listing['id']) for listing in listings]
+            existing = {}
+            for start in range(0, len(ids), SQLITE_MAX_VARIABLES):
+                chunk = ids[start:start + SQLITE_MAX_VARIABLES]
+                existing.update(conn.execute(
+                    f"SELECT id, document FROM listings WHERE id IN ({', '.join('?' * len(chunk))})", chunk
+                ).fetchall())
+
+            rows, written = [], []
+            for listing in listings:
+                previous = existing.get(str(listing['id']))
+                if previous:
+                    previous = json.loads(previous)
+                    if listing_user_id(previous) != listing_user_id(listing):
+                        continue
+                    # Keep creation time and counters, like the Postgres ON CONFLICT update
+                    listing = dict(listing, **{key: previous[key] for key in PRESERVED_FIELDS if key in previous})
+                rows.append(self._row(listing))
+                written.append(listing['id'])
+            conn.executemany("INSERT OR REPLACE INTO listings VALUES (?, ?, ?, ?, ?, ?)", rows)
+            if rows:
+                self._bump_revision(conn)
+        return written
+
+    def update_many(self, changes, user_id=None):
+        """
+        Partial updates in one transaction; metadata is merged, not replaced.
+        With user_id, only that user's listings are updated.
+        """
+        conn = self._connect()
+        updated = []
+        now = datetime.now().isoformat()
+        with self._transaction(conn):
+            rows = []
+            for listing_id, fields in changes.items():
+                row = conn.execute("SELECT document FROM listings WHERE id = ?", (str(listing_id),)).fetchone()
+                if row is None:
+                    continue
+                listing = json.loads(row[0])
+                if user_id is not None and listing_user_id(listing) != str(user_id):
+                    continue
+                fields = dict(fields)
+                if 'metadata' in fields:
+                    fields['metadata'] = dict(listing.get('metadata') or {}, **(fields['metadata'] or {}))
+                listing.update(fields, updated_at=now)
+                rows.append(self._row(listing))
+                updated.append(listing['id'])
+            conn.executemany("INSERT OR REPLACE INTO listings VALUES (?, ?, ?, ?, ?, ?)", rows)
+            if rows:
+                self._bump_revision(conn)
+        return updated
+
+    def add_counters(self, deltas):
+        """Add {listing_id: (views, likes)} deltas in one transaction"""
+        conn = self._connect()
+        with self._transaction(conn):
+            conn.executemany("""
+                UPDATE listings SET document = json_set(document,
+                    '$.views', coalesce(json_extract(document, '$.views'), 0) + ?,
+                    '$.likes', max(coalesce(json_extract(document, '$.likes'), 0) + ?, 0))
+                WHERE id = ?
+            """, [(views, likes, str(listing_id)) for listing_id, (views, likes) in deltas.items()])
+            # No revision bump: counters do not affect search results, so the index stays warm
+
+    def compact(self):
+        """Fold the WAL back into the database file and reclaim free pages"""
+        conn = self._connect()
+        conn.execute("VACUUM")
+        conn.execute("PRAGMA optimize")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+
+def _sqlite_feed_card(row):
+    """json_object() of the feed columns of a listings row (a table name, NEW or OLD)"""
+    fields = [f"'id', {row}.id", f"'category', {row}.category", f"'created_at', {row}.created_at"]
+    fields += [f"'{column}', json_extract({row}.document, '$.{column}')"
+               for column in FEED_COLUMNS if column not in ('category', 'created_at')]
+    return f"json_object({', '.join(fields)})"
+
+
+# feed_items for the embedded store: the card is kept as one JSON value. The
+# insert trigger removes the old row first because INSERT OR REPLACE does not
+# fire delete triggers.
+_SQLITE_FEED_SCHEMA = f"""
+    CREATE TABLE IF NOT EXISTS feed_items (
+        listing_id TEXT PRIMARY KEY,
+        category TEXT,
+        created_at TEXT NOT NULL,
+        card TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_feed_items_category_created
+        ON feed_items (category, created_at DESC, listing_id DESC);
+    CREATE INDEX IF NOT EXISTS idx_feed_items_created
+        ON feed_items (created_at DESC, listing_id DESC);
+
+    CREATE TRIGGER IF NOT EXISTS listings_feed_insert AFTER INSERT ON listings
+    BEGIN
+        DELETE FROM feed_items WHERE listing_id = NEW.id;
+        INSERT INTO feed_items
+        SELECT NEW.id, NEW.category, NEW.created_at, {_sqlite_feed_card('NEW')}
+        WHERE NEW.status = 'active';
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS listings_feed_update AFTER UPDATE ON listings
+    BEGIN
+        DELETE FROM feed_items WHERE listing_id IN (OLD.id, NEW.id);
+        INSERT INTO feed_items
+        SELECT NEW.id, NEW.category, NEW.created_at, {_sqlite_feed_card('NEW')}
+        WHERE NEW.status = 'active';
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS listings_feed_delete AFTER DELETE ON listings
+    BEGIN
+        DELETE FROM feed_items WHERE listing_id = OLD.id;
+    END;
+"""
+
+
+def _group_status_rows(rows):
+    """Rows carrying status_count (ordered by status) -> {status: {'count', 'listings'}}"""
+    buckets = {}
+    for row in rows:
+        count = row.pop('status_count')
+        row.pop('position', None)
+        bucket = buckets.setdefault(row['status'], {'count': count, 'listings': []})
+        bucket['listings'].append(row)
+    return buckets
+
+
+_fallback_store = None
+_fallback_lock = threading.Lock()
+
+
+def get_fallback_store():
+    """Shared SQLiteListingStore used when PostgreSQL is not configured or unreachable"""
+    global _fallback_store
+    if _fallback_store is None:
+        with _fallback_lock:
+            if _fallback_store is None:
+                _fallback_store = SQLiteListingStore()
+    return _fallback_store
+
+
+def get_listing_store():
+    """PostgreSQL when DATABASE_URL is set, otherwise the embedded store"""
+    if os.environ.get('DATABASE_URL'):
+        return PostgresListingStore()
+    return get_fallback_store()
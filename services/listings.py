@@ -0,0 +1,251 @@
+"""
+Listing service
+Validation and write/read paths shared by the /api/listings endpoints.
+Every operation goes to PostgreSQL when it is configured and falls back to
+the embedded store (services/listing_store.py) when it is not or when the
+database call fails.
+"""
+
+import uuid
+from datetime import datetime
+
+from services import counters
+from services.catalog import normalize_metadata
+from services.geo import geocode_listing
+from services.listing_store import UPDATABLE_COLUMNS, get_fallback_store, get_listing_store
+from services.search import decode_cursor, keyset_cursor
+
+# Largest batch accepted by the bulk endpoints
+MAX_BULK_SIZE = 5000
+
+DELETED = 'deleted'
+
+# Tabs of the my-ads page, in display order; also the statuses a payload may set
+STATUS_BUCKETS = ('active', 'pending', 'sold', 'archived')
+BUCKET_PAGE_SIZE = 12
+MAX_BUCKET_PAGE_SIZE = 60
+
+FEED_PAGE_SIZE = 24
+
+DEFAULT_SELLER_NAME = 'VidX User'
+DEFAULT_SELLER_AVATAR = 'https://api.dicebear.com/7.x/avataaars/svg?seed=vidx'
+
+# camelCase names sent by the upload flow and seed tools
+FIELD_ALIASES = {
+    'videoUrl': 'video_url',
+    'thumbnailUrl': 'thumbnail_url',
+}
+
+
+class ListingError(ValueError):
+    """Invalid listing payload"""
+
+
+def _with_fallback(operation):
+    """Run operation(store) on the primary store, retrying on the embedded one if the database fails"""
+    store = get_listing_store()
+    try:
+        return operation(store), store.backend
+    except Exception as db_error:
+        if store.backend != 'database':
+            raise
+        print(f"⚠️ Database error: {db_error}")
+        store = get_fallback_store()
+        return operation(store), store.backend
+
+
+def _check_status(status):
+    if status not in STATUS_BUCKETS:
+        raise ListingError(f"Status must be one of: {', '.join(STATUS_BUCKETS)}")
+    return status
+
+
+def _check_category(category):
+    if not isinstance(category, str) or not category.strip():
+        raise ListingError('Category must be a non-empty string')
+    return category.strip()
+
+
+def listing_from_payload(data, user_id):
+    """
+    Build a complete listing row from a create payload. A client-supplied id
+    is kept (re-submitting updates the listing), but save_listings only
+    replaces an existing row that belongs to the same user.
+    """
+    if not isinstance(data, dict) or not data.get('title') or not data.get('price'):
+        raise ListingError('Title and price are required')
+    try:
+        price = float(data['price'])
+    except (TypeError, ValueError):
+        raise ListingError('Price must be a number')
+    status = _check_status(data.get('status', 'active'))
+
+    category = _check_category(data.get('category') or 'other')
+    location = data.get('location', '')
+    video_url = data.get('videoUrl', data.get('video_url', ''))
+    latitude, longitude = geocode_listing({'location': location})
+    now = datetime.now().isoformat()
+
+    return {
+        'id': str(data.get('id') or f'listing-{uuid.uuid4()}'),
+        'user_id': user_id,
+        'title': data['title'],
+        'description': data.get('description', ''),
+        'category': category,
+        'price': price,
+        'currency': data.get('currency', 'EUR'),
+        'location': location,
+        'video_url': video_url,
+        'thumbnail_url': data.get('thumbnailUrl', data.get('thumbnail_url', video_url)),
+        'seller_name': DEFAULT_SELLER_NAME,
+        'seller_avatar': DEFAULT_SELLER_AVATAR,
+        'status': status,
+        'metadata': normalize_metadata(category, data.get('metadata') or {}),
+        'latitude': latitude,
+        'longitude': longitude,
+        'views': 0,
+        'likes': 0,
+        'created_at': now,
+        'updated_at': now,
+    }
+
+
+def changes_from_payload(data):
+    """Allowed columns from a partial update payload (unknown keys are ignored)"""
+    if not isinstance(data, dict):
+        raise ListingError('Expected a JSON object')
+    changes = {}
+    for key, value in data.items():
+        column = FIELD_ALIASES.get(key, key)
+        if column in UPDATABLE_COLUMNS or column == 'metadata':
+            changes[column] = value
+
+    if 'status' in changes:
+        _check_status(changes['status'])
+    if 'category' in changes:
+        changes['category'] = _check_category(changes['category'])
+    if 'price' in changes:
+        try:
+            changes['price'] = float(changes['price'])
+        except (TypeError, ValueError):
+            raise ListingError('Price must be a number')
+    # Metadata is canonicalised by update_listings, which knows the listing's category
+    if 'metadata' in changes and not isinstance(changes['metadata'], dict):
+        raise ListingError('Metadata must be an object')
+    if 'location' in changes and 'latitude' not in data:
+        changes['latitude'], changes['longitude'] = geocode_listing({'location': changes['location']})
+    return changes
+
+
+def get_listing(listing_id):
+    """Listing dict or None; soft-deleted listings are not returned"""
+    listing, _ = _with_fallback(lambda store: store.get(listing_id))
+    if listing is None or listing.get('status') == DELETED:
+        return None
+    return listing
+
+
+def save_listings(listings):
+    """
+    Insert or replace listings; returns (ids written, backend). Listings
+    whose id already belongs to another user are not written.
+    """
+    written, backend = _with_fallback(lambda store: store.upsert_many(listings))
+    # A view of an id before the listing existed may have cached it as missing
+    counters.forget_listings(written)
+    return written, backend
+
+
+def _normalize_changed_metadata(store, changes):
+    """
+    Canonicalise patched metadata for the listing's category: the one in the
+    patch, else the stored one (read only for patches that need it)
+    """
+    missing = [listing_id for listing_id, fields in changes.items() if 'metadata' in fields and 'category' not in fields]
+    stored = store.get_many(missing) if missing else {}
+    normalized = {}
+    for listing_id, fields in changes.items():
+        if 'metadata' in fields:
+            category = fields['category'] if 'category' in fields else (stored.get(str(listing_id)) or {}).get('category')
+            fields = dict(fields, metadata=normalize_metadata(category, fields['metadata']))
+        normalized[listing_id] = fields
+    return normalized
+
+
+def update_listings(changes, user_id):
+    """Apply {listing_id: changes} to user_id's listings; returns (updated ids, backend)"""
+    if not changes:
+        return [], None
+    return _with_fallback(
+        lambda store: store.update_many(_normalize_changed_metadata(store, changes), user_id=user_id)
+    )
+
+
+def delete_listings(listing_ids, user_id):
+    """Soft delete: the row is kept with status 'deleted' and drops out of every listing query"""
+    deleted, backend = update_listings({listing_id: {'status': DELETED} for listing_id in listing_ids}, user_id)
+    counters.forget_listings(deleted)
+    return deleted, backend
+
+
+def _with_live_counters(listings):
+    for listing in listings:
+        listing['views'], listing['likes'] = counters.counts(listing)
+    return listings
+
+
+def _created_at_key(listing):
+    return listing.get('created_at') or listing.get('createdAt'), listing['id']
+
+
+def user_listing_buckets(user_id, per_status=BUCKET_PAGE_SIZE):
+    """
+    My-ads summary: for every status bucket its count, first page and the
+    cursor of the next page, from one query.
+
+    Returns:
+        (buckets, backend): {status: {'count', 'listings', 'next_cursor'}} for every STATUS_BUCKETS entry
+    """
+    found, backend = _with_fallback(lambda store: store.status_pages(user_id, STATUS_BUCKETS, per_status))
+    buckets = {}
+    for status in STATUS_BUCKETS:
+        bucket = found.get(status, {'count': 0, 'listings': []})
+        listings = _with_live_counters(bucket['listings'])
+        next_cursor = None
+        if bucket['count'] > len(listings):
+            next_cursor = keyset_cursor(*_created_at_key(listings[-1]))
+        buckets[status] = {'count': bucket['count'], 'listings': listings, 'next_cursor': next_cursor}
+    return buckets, backend
+
+
+def user_listing_page(user_id, status, limit=BUCKET_PAGE_SIZE, cursor=None):
+    """Next page of one my-ads bucket; returns (listings, next_cursor)"""
+    if status not in STATUS_BUCKETS:
+        raise ListingError(f'Unknown status: {status}')
+    after = decode_cursor(cursor)
+    before = after[1:] if after is not None else None
+    listings, _ = _with_fallback(lambda store: store.status_page(user_id, status, limit, before))
+    next_cursor = None
+    if len(listings) > limit:
+        listings = listings[:limit]
+        next_cursor = keyset_cursor(*_created_at_key(listings[-1]))
+    return _with_live_counters(listings), next_cursor
+
+
+def category_feed(category=None, limit=FEED_PAGE_SIZE, cursor=None):
+    """
+    One page of the unfiltered feed (a category, or every category when None)
+    from the feed_items projection, newest first.
+
+    Returns:
+        (cards, next_cursor): card rows as stored in feed_items; counters are
+        overlaid by ListingCard
+    """
+    after = decode_cursor(cursor)
+    before = after[1:] if after is not None else None
+    cards, _ = _with_fallback(lambda store: store.feed_page(category, limit, before))
+    next_cursor = None
+    if len(cards) > limit:
+        cards = cards[:limit]
+        next_cursor = keyset_cursor(*_created_at_key(cards[-1]))
+    return cards, next_cursor
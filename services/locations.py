@@ -0,0 +1,130 @@
+"""
+Location autocomplete
+Prefix index over data/Cities.txt and data/Regions.txt for /api/locations/suggest.
+
+Keys are diacritic-free slugs (the datasets' normalized_name form) held in a
+sorted list, so a prefix lookup is two bisects. Every word start of a name is
+indexed too, so "bucu" finds "Valea Bucurului".
+"""
+
+import bisect
+import json
+import os
+import threading
+from functools import lru_cache
+
+from services.geo import slugify
+from services.snapshot import DATA_DIR, load_snapshot
+
+CITIES_PATH = os.path.join(DATA_DIR, 'Cities.txt')
+REGIONS_PATH = os.path.join(DATA_DIR, 'Regions.txt')
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+
+# Match quality, lower is better
+EXACT, NAME_PREFIX, WORD_PREFIX = 0, 1, 2
+
+
+class LocationIndex:
+    """Counties and localities with a sorted prefix key table"""
+
+    def __init__(self, cities, regions):
+        self.entries = []
+        for region in regions:
+            self.entries.append({
+                'id': region['id'],
+                'name': region['name'],
+                'type': 'county',
+                'county': region['name'],
+                'slug': slugify(region['name']),
+                'rank': (0.0, 0),
+            })
+        for city in cities:
+            self.entries.append({
+                'id': city['id'],
+                'name': city['name'],
+                'type': 'city',
+                'county': city.get('county', ''),
+                'slug': city.get('normalized_name') or slugify(city['name']),
+                'latitude': city.get('latitude'),
+                'longitude': city.get('longitude'),
+                # No population data: a lower map zoom and a wider radius mean a larger locality
+                'rank': (city.get('zoom') or 0, -(city.get('radius') or 0.0)),
+            })
+
+        keys = []
+        for position, entry in enumerate(self.entries):
+            words = entry['slug'].split('-')
+            for start in range(len(words)):
+                quality = NAME_PREFIX if start == 0 else WORD_PREFIX
+                keys.append(('-'.join(words[start:]), quality, position))
+        keys.sort()
+        self.keys = [key for key, _, _ in keys]
+        self.matches = [(quality, position) for _, quality, position in keys]
+
+    def suggest(self, query, county=None, limit=DEFAULT_LIMIT):
+        """Best matching locations for a typed prefix"""
+        prefix = slugify(query)
+        if not prefix:
+            return []
+        county_slug = slugify(county) if county else None
+
+        start = bisect.bisect_left(self.keys, prefix)
+        end = bisect.bisect_left(self.keys, prefix + '\uffff')
+
+        best = {}
+        for i in range(start, end):
+            quality, position = self.matches[i]
+            if self.keys[i] == prefix and quality == NAME_PREFIX:
+                quality = EXACT
+            if quality < best.get(position, WORD_PREFIX + 1):
+                best[position] = quality
+
+        def sort_key(position):
+            entry = self.entries[position]
+            in_county = county_slug is not None and slugify(entry['county']) == county_slug
+            return (
+                best[position],
+                not in_county,
+                entry['type'] != 'county',
+                entry['rank'],
+                entry['name'],
+            )
+
+        ranked = sorted(best, key=sort_key)[:limit]
+        return [self._public(self.entries[position]) for position in ranked]
+
+    @staticmethod
+    def _public(entry):
+        return {key: value for key, value in entry.items() if key not in ('slug', 'rank')}
+
+
+def _build_index():
+    with open(CITIES_PATH, 'r', encoding='utf-8') as f:
+        cities = json.load(f).get('data', [])
+    with open(REGIONS_PATH, 'r', encoding='utf-8') as f:
+        regions = json.load(f).get('data', [])
+    return LocationIndex(cities, regions)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def load_location_index(rebuild=False):
+    """Shared LocationIndex, loaded from the pickle snapshot when it is current"""
+    global _index
+    if _index is None or rebuild:
+        with _index_lock:
+            if _index is None or rebuild:
+                _index = load_snapshot('locations', [CITIES_PATH, REGIONS_PATH], _build_index, rebuild)
+                suggest_locations.cache_clear()
+    return _index
+
+
+@lru_cache(maxsize=2048)
+def suggest_locations(query, county=None, limit=DEFAULT_LIMIT):
+    """Memoized suggestions (typeahead repeats the same short prefixes constantly)"""
+    limit = max(1, min(int(limit), MAX_LIMIT))
+    return tuple(load_location_index().suggest(query, county, limit))
@@ -0,0 +1,472 @@
+"""
+Media ingestion
+Listing photos are stored once, under a content-addressed key
+(media/originals/<sha256>.<ext>). An upload is copied to a temp file in
+CHUNK_SIZE pieces while it is hashed, so worker memory stays flat, and a
+photo that is already stored is not uploaded again. Derivative sizes
+(DERIVATIVES) are rendered by a small background thread pool and stored
+under media/derived/<sha256>/.
+
+Storage is R2 when its credentials are configured (R2_ACCOUNT_ID and
+R2_ACCESS_KEY_ID), otherwise a local directory (MEDIA_ROOT) served at
+/media/. Video generation fetches originals by key (fetch_to_file) instead of
+receiving them again as base64.
+"""
+
+import hashlib
+import mimetypes
+import os
+import re
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from services.snapshot import DATA_DIR
+
+MEDIA_ROOT = os.environ.get('MEDIA_ROOT', os.path.join(DATA_DIR, 'media'))
+R2_BUCKET = os.environ.get('R2_BUCKET_NAME', 'video-marketplace-videos')
+
+# Bytes read per step while spooling and hashing an upload
+CHUNK_SIZE = 1024 * 1024
+MAX_IMAGE_BYTES = int(os.environ.get('MEDIA_MAX_IMAGE_BYTES', 15 * 1024 * 1024))
+# Larger images are refused before they are decoded (decompression bombs)
+MAX_IMAGE_PIXELS = 50_000_000
+# R2 uploads switch to multipart above this size
+MULTIPART_THRESHOLD = 8 * 1024 * 1024
+
+# Pillow format -> (extension, content type)
+IMAGE_FORMATS = {
+    'JPEG': ('jpg', 'image/jpeg'),
+    'MPO': ('jpg', 'image/jpeg'),
+    'PNG': ('png', 'image/png'),
+    'WEBP': ('webp', 'image/webp'),
+    'GIF': ('gif', 'image/gif'),
+}
+
+# Derivative name -> bounding box; JPEG, aspect ratio kept, never upscaled
+DERIVATIVES = {
+    'thumb': (320, 320),
+    'card': (720, 1280),
+    'full': (1080, 1920),
+}
+DERIVATIVE_WORKERS = int(os.environ.get('MEDIA_DERIVATIVE_WORKERS', 2))
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Video types accepted by direct uploads (photos are IMAGE_FORMATS)
+VIDEO_TYPES = {
+    'video/mp4': 'mp4',
+    'video/quicktime': 'mov',
+    'video/webm': 'webm',
+}
+
+_ORIGINAL_KEY_RE = re.compile(r'^media/originals/([0-9a-f]{64})\.(jpg|png|webp|gif)$')
+_DIGEST_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+class MediaError(ValueError):
+    """Rejected upload or unknown media key"""
+
+
+def original_key(digest, extension):
+    return f"media/originals/{digest}.{extension}"
+
+
+def derivative_key(digest, name):
+    return f"media/derived/{digest}/{name}.jpg"
+
+
+class LocalMediaStorage:
+    """Media directory on local disk (development and tests), served at /media/"""
+
+    backend = 'local'
+
+    def __init__(self, root=MEDIA_ROOT):
+        self.root = os.path.abspath(root)
+
+    def path(self, key):
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise MediaError('Invalid media key')
+        return path
+
+    def exists(self, key):
+        return os.path.exists(self.path(key))
+
+    def put_file(self, source_path, key, content_type):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Copy next to the target and rename, so readers never see half a file
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.part')
+        os.close(fd)
+        try:
+            shutil.copyfile(source_path, temp_path)
+            os.replace(temp_path, path)
+        except Exception:
+            os.unlink(temp_path)
+            raise
+
+    def get_file(self, key, destination_path):
+        try:
+            shutil.copyfile(self.path(key), destination_path)
+        except FileNotFoundError:
+            raise MediaError('Media not found')
+
+    def stat(self, key):
+        """{'size', 'content_type'} of a stored object, or None"""
+        path = self.path(key)
+        try:
+            size = os.path.getsize(path)
+        except FileNotFoundError:
+            return None
+        return {'size': size, 'content_type': mimetypes.guess_type(path)[0]}
+
+    def delete(self, key):
+        try:
+            os.unlink(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def url(self, key):
+        # Keys start with media/, served by routes/upload.py media_file
+        return f"/{key}"
+
+
+class R2MediaStorage:
+    """R2 bucket (S3 API); objects are public through R2_PUBLIC_URL"""
+
+    backend = 'r2'
+
+    def __init__(self, bucket=R2_BUCKET):
+        self.bucket = bucket
+        self.public_url = os.environ.get('R2_PUBLIC_URL', f"https://pub-{os.environ.get('R2_ACCOUNT_ID')}.r2.dev")
+
+    @property
+    def client(self):
+        from video_pipeline import get_r2_client
+        return get_r2_client()
+
+    def exists(self, key):
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+
+    def put_file(self, source_path, key, content_type):
+        from boto3.s3.transfer import TransferConfig
+
+        # Read from disk part by part; large files go up as a multipart upload
+        self.client.upload_file(
+            source_path, self.bucket, key,
+            ExtraArgs={'ContentType': content_type, 'CacheControl': IMMUTABLE_CACHE_CONTROL},
+            Config=TransferConfig(multipart_threshold=MULTIPART_THRESHOLD, multipart_chunksize=MULTIPART_THRESHOLD),
+        )
+
+    def get_file(self, key, destination_path):
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.download_file(self.bucket, key, destination_path)
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                raise MediaError('Media not found')
+            raise
+
+    def stat(self, key):
+        from botocore.exceptions import ClientError
+
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise
+        return {'size': head['ContentLength'], 'content_type': head.get('ContentType')}
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    # Direct browser uploads (services/direct_uploads.py)
+
+    def presign_put(self, key, content_type, size, checksum, expires):
+        """
+        Presigned single PUT. Content type, length and the SHA-256 checksum are
+        signed, so R2 rejects a body that does not match them.
+
+        Returns:
+            (url, headers the browser must send)
+        """
+        headers = {
+            'Content-Type': content_type,
+            'Cache-Control': IMMUTABLE_CACHE_CONTROL,
+            'x-amz-checksum-sha256': checksum,
+        }
+        url = self.client.generate_presigned_url('put_object', Params={
+            'Bucket': self.bucket, 'Key': key, 'ContentType': content_type, 'ContentLength': size,
+            'CacheControl': IMMUTABLE_CACHE_CONTROL, 'ChecksumSHA256': checksum,
+        }, ExpiresIn=expires)
+        return url, headers
+
+    def create_multipart(self, key, content_type):
+        upload = self.client.create_multipart_upload(
+            Bucket=self.bucket, Key=key, ContentType=content_type, CacheControl=IMMUTABLE_CACHE_CONTROL
+        )
+        return upload['UploadId']
+
+    def presign_part(self, key, upload_id, part_number, expires):
+        return self.client.generate_presigned_url('upload_part', Params={
+            'Bucket': self.bucket, 'Key': key, 'UploadId': upload_id, 'PartNumber': part_number,
+        }, ExpiresIn=expires)
+
+    def complete_multipart(self, key, upload_id, parts):
+        """parts: [(part_number, etag)]"""
+        self.client.complete_multipart_upload(
+            Bucket=self.bucket, Key=key, UploadId=upload_id,
+            MultipartUpload={'Parts': [{'PartNumber': number, 'ETag': etag} for number, etag in sorted(parts)]},
+        )
+
+    def abort_multipart(self, key, upload_id):
+        self.client.abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id)
+
+    def url(self, key):
+        return f"{self.public_url}/{key}"
+
+
+_local_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_media_storage():
+    """R2 when its credentials are configured, otherwise the local media directory"""
+    global _local_storage
+    if os.environ.get('R2_ACCOUNT_ID') and os.environ.get('R2_ACCESS_KEY_ID'):
+        return R2MediaStorage()
+    if _local_storage is None:
+        with _storage_lock:
+            if _local_storage is None:
+                _local_storage = LocalMediaStorage()
+    return _local_storage
+
+
+def spool_upload(stream, max_bytes=MAX_IMAGE_BYTES):
+    """
+    Copy a stream to a temp file in CHUNK_SIZE pieces, hashing as it goes.
+
+    Returns:
+        (temp path, sha256 hex digest, size); the caller removes the file
+    """
+    digest = hashlib.sha256()
+    size = 0
+    fd, path = tempfile.mkstemp(prefix='vidx-upload-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise MediaError(f'Image is larger than {max_bytes // (1024 * 1024)} MB')
+                digest.update(chunk)
+                f.write(chunk)
+    except Exception:
+        os.unlink(path)
+        raise
+    return path, digest.hexdigest(), size
+
+
+def _inspect_image(path):
+    """(Pillow format, width, height) from the image header, without decoding the pixels"""
+    from PIL import Image, UnidentifiedImageError
+
+    try:
+        with Image.open(path) as image:
+            width, height = image.size
+            image_format = image.format
+    except (UnidentifiedImageError, OSError):
+        raise MediaError('Unsupported or corrupt image')
+    if image_format not in IMAGE_FORMATS:
+        raise MediaError(f'Unsupported image type: {image_format}')
+    if width * height > MAX_IMAGE_PIXELS:
+        raise MediaError('Image dimensions are too large')
+    return image_format, width, height
+
+
+def _derivative_urls(storage, digest):
+    return {name: storage.url(derivative_key(digest, name)) for name in DERIVATIVES}
+
+
+def _render_derivatives(storage, digest, source_path):
+    """Render and store the missing derivative sizes; owns (and removes) source_path"""
+    from PIL import Image, ImageOps
+
+    try:
+        missing = [name for name in DERIVATIVES if not storage.exists(derivative_key(digest, name))]
+        if not missing:
+            return
+        # Never decode past MAX_IMAGE_PIXELS, whoever stored the original
+        _inspect_image(source_path)
+        with Image.open(source_path) as image:
+            image = ImageOps.exif_transpose(image).convert('RGB')
+        # Largest first, each one scaled down from the previous
+        for name in sorted(missing, key=lambda name: DERIVATIVES[name][0], reverse=True):
+            image.thumbnail(DERIVATIVES[name], Image.LANCZOS)
+            fd, temp_path = tempfile.mkstemp(suffix='.jpg')
+            os.close(fd)
+            try:
+                image.save(temp_path, 'JPEG', quality=85, optimize=True, progressive=True)
+                storage.put_file(temp_path, derivative_key(digest, name), 'image/jpeg')
+            finally:
+                os.unlink(temp_path)
+        print(f"✅ Rendered {len(missing)} derivatives for {digest[:12]}")
+    except Exception as e:
+        print(f"⚠️ Derivative rendering failed for {digest[:12]}: {e}")
+    finally:
+        try:
+            os.unlink(source_path)
+        except OSError:
+            pass
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _derivative_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=DERIVATIVE_WORKERS,
+                                               thread_name_prefix='media-derivatives')
+    return _executor
+
+
+def verify_stored_image(key, storage=None):
+    """
+    Check an image stored by a direct upload the way ingest_image checks
+    uploads (format and pixel count from the header, MediaError otherwise)
+    and queue its derivatives from the same download.
+    """
+    storage = storage or get_media_storage()
+    fd, path = tempfile.mkstemp(suffix=os.path.splitext(key)[1])
+    os.close(fd)
+    queued = False
+    try:
+        storage.get_file(key, path)
+        _inspect_image(path)
+        match = _ORIGINAL_KEY_RE.match(key or '')
+        if match:
+            _derivative_executor().submit(_render_derivatives, storage, match.group(1), path)
+            queued = True
+    finally:
+        if not queued:
+            os.unlink(path)
+
+
+def describe(key, storage=None):
+    """Media dict (same shape as ingest_image, without dimensions) of a stored key"""
+    storage = storage or get_media_storage()
+    match = _ORIGINAL_KEY_RE.match(key or '')
+    return {
+        'id': match.group(1) if match else None,
+        'key': key,
+        'url': storage.url(key),
+        'derivatives': _derivative_urls(storage, match.group(1)) if match else {},
+    }
+
+
+def ingest_image(stream, filename=None):
+    """
+    Store one uploaded image (a file-like object) and queue its derivatives.
+
+    Returns:
+        dict: id (sha256), key, url, content_type, width, height, size,
+        deduplicated (already stored), derivatives ({name: url}, filled in
+        asynchronously)
+    """
+    path, digest, size = spool_upload(stream)
+    queued = False
+    try:
+        image_format, width, height = _inspect_image(path)
+        extension, content_type = IMAGE_FORMATS[image_format]
+        key = original_key(digest, extension)
+        storage = get_media_storage()
+
+        deduplicated = storage.exists(key)
+        if not deduplicated:
+            storage.put_file(path, key, content_type)
+        _derivative_executor().submit(_render_derivatives, storage, digest, path)
+        queued = True
+    finally:
+        if not queued:
+            os.unlink(path)
+
+    print(f"{'♻️' if deduplicated else '✅'} Stored {filename or 'image'} as {key} ({size} bytes, {storage.backend})")
+    return {
+        'id': digest,
+        'key': key,
+        'url': storage.url(key),
+        'content_type': content_type,
+        'width': width,
+        'height': height,
+        'size': size,
+        'deduplicated': deduplicated,
+        'derivatives': _derivative_urls(storage, digest),
+    }
+
+
+def ingest_files(files):
+    """
+    Ingest uploaded werkzeug FileStorage objects.
+
+    Returns:
+        (stored, errors): media dicts with the original_name added, and
+        [{'original_name', 'error'}] for files that were rejected
+    """
+    stored, errors = [], []
+    for file in files:
+        if not file.filename:
+            continue
+        try:
+            media = ingest_image(file.stream, file.filename)
+        except MediaError as e:
+            errors.append({'original_name': file.filename, 'error': str(e)})
+            continue
+        media['original_name'] = file.filename
+        stored.append(media)
+    return stored, errors
+
+
+def media_status(digest):
+    """Which derivatives of a stored image exist yet: {name: url or None}"""
+    if not _DIGEST_RE.match(digest or ''):
+        raise MediaError('Invalid media id')
+    storage = get_media_storage()
+    return {name: storage.url(key) if storage.exists(key) else None
+            for name, key in ((name, derivative_key(digest, name)) for name in DERIVATIVES)}
+
+
+def media_url(key):
+    return get_media_storage().url(key)
+
+
+def fetch_to_file(key):
+    """Download a stored original to a temp file (removed by the caller)"""
+    match = _ORIGINAL_KEY_RE.match(key or '')
+    if not match:
+        raise MediaError(f'Invalid media key: {key}')
+    fd, path = tempfile.mkstemp(suffix=f'.{match.group(2)}')
+    os.close(fd)
+    try:
+        get_media_storage().get_file(key, path)
+    except Exception:
+        os.unlink(path)
+        raise
+    return path
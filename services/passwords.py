@@ -0,0 +1,210 @@
+"""
+Password hashing
+Memory-hard hashes for new passwords (scrypt by default, PBKDF2-SHA256 as
+an alternative), verification of the older formats still stored in the
+databases, and rehash-on-login so those migrate as users sign in.
+
+Encoded formats:
+    scrypt$<n>$<r>$<p>$<salt>$<hash>          salt/hash are unpadded base64
+    pbkdf2_sha256$<iterations>$<salt>$<hash>
+    <salt>$<sha256 hex>                       legacy (app.py, auth_server, migrate_db)
+    <sha256 hex>                              legacy unsalted (api/auth.py)
+
+KDF work runs on a small shared thread pool. hashlib releases the GIL while
+deriving keys, so the pool bounds how many hashes run at once (and how much
+memory scrypt takes) instead of letting a login spike occupy every request
+worker. Callers that cannot get a slot within PASSWORD_HASH_QUEUE_TIMEOUT get
+PasswordHasherBusy and should answer 503.
+
+Cost parameters are read from the environment; pick them for the deployment
+CPU with scripts/calibrate_password_hash.py. Stored hashes keep their own
+parameters, so changing them only affects new and rehashed passwords.
+"""
+
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+SALT_BYTES = 16
+KEY_BYTES = 32
+
+DEFAULT_HASHER = os.environ.get('PASSWORD_HASHER', 'scrypt')
+SCRYPT_N = int(os.environ.get('PASSWORD_SCRYPT_N', 2 ** 14))
+SCRYPT_R = int(os.environ.get('PASSWORD_SCRYPT_R', 8))
+SCRYPT_P = int(os.environ.get('PASSWORD_SCRYPT_P', 1))
+PBKDF2_ITERATIONS = int(os.environ.get('PASSWORD_PBKDF2_ITERATIONS', 600_000))
+
+HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', min(4, os.cpu_count() or 1)))
+# Requests allowed to wait for a worker before new ones are turned away
+HASH_QUEUE = int(os.environ.get('PASSWORD_HASH_QUEUE', HASH_WORKERS * 8))
+HASH_QUEUE_TIMEOUT = float(os.environ.get('PASSWORD_HASH_QUEUE_TIMEOUT', 5))
+
+
+class PasswordHasherBusy(RuntimeError):
+    """Every hashing slot is taken; retry later"""
+
+
+def _b64encode(raw):
+    return base64.b64encode(raw).decode('ascii').rstrip('=')
+
+
+def _b64decode(text):
+    return base64.b64decode(text + '=' * (-len(text) % 4))
+
+
+class ScryptHasher:
+    scheme = 'scrypt'
+
+    def __init__(self, n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P):
+        self.n, self.r, self.p = n, r, p
+
+    @staticmethod
+    def _derive(password, salt, n, r, p):
+        # scrypt needs 128 * n * r bytes; leave headroom over OpenSSL's 32 MiB default
+        return hashlib.scrypt(password.encode('utf-8'), salt=salt, n=n, r=r, p=p,
+                              maxmem=256 * n * r * p + (1 << 20), dklen=KEY_BYTES)
+
+    def encode(self, password):
+        salt = secrets.token_bytes(SALT_BYTES)
+        key = self._derive(password, salt, self.n, self.r, self.p)
+        return f"{self.scheme}${self.n}${self.r}${self.p}${_b64encode(salt)}${_b64encode(key)}"
+
+    def verify(self, password, encoded):
+        _, n, r, p, salt, key = encoded.split('$')
+        derived = self._derive(password, _b64decode(salt), int(n), int(r), int(p))
+        return hmac.compare_digest(derived, _b64decode(key))
+
+    def is_current(self, encoded):
+        return encoded.split('$')[1:4] == [str(self.n), str(self.r), str(self.p)]
+
+
+class Pbkdf2Hasher:
+    scheme = 'pbkdf2_sha256'
+
+    def __init__(self, iterations=PBKDF2_ITERATIONS):
+        self.iterations = iterations
+
+    def encode(self, password):
+        salt = secrets.token_bytes(SALT_BYTES)
+        key = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, self.iterations, KEY_BYTES)
+        return f"{self.scheme}${self.iterations}${_b64encode(salt)}${_b64encode(key)}"
+
+    def verify(self, password, encoded):
+        _, iterations, salt, key = encoded.split('$')
+        derived = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), _b64decode(salt), int(iterations), KEY_BYTES)
+        return hmac.compare_digest(derived, _b64decode(key))
+
+    def is_current(self, encoded):
+        return encoded.split('$')[1] == str(self.iterations)
+
+
+HASHERS = {
+    ScryptHasher.scheme: ScryptHasher,
+    Pbkdf2Hasher.scheme: Pbkdf2Hasher,
+}
+
+
+def get_hasher(scheme=None):
+    """Hasher used for new passwords (PASSWORD_HASHER), or the one for an explicit scheme"""
+    return HASHERS[scheme or DEFAULT_HASHER]()
+
+
+def _verify_legacy(password, encoded, allow_plaintext):
+    if '$' in encoded:
+        salt, digest = encoded.split('$', 1)
+        candidate = hashlib.sha256((password + salt).encode()).hexdigest()
+        return hmac.compare_digest(candidate, digest)
+    if len(encoded) == 64:
+        candidate = hashlib.sha256(password.encode()).hexdigest()
+        if hmac.compare_digest(candidate, encoded.lower()):
+            return True
+    return allow_plaintext and hmac.compare_digest(password.encode(), encoded.encode())
+
+
+_dummy_hash = None
+
+
+def _get_dummy_hash():
+    """Hash of a random password with the current hasher, made once per process"""
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = get_hasher().encode(secrets.token_urlsafe(16))
+    return _dummy_hash
+
+
+def _verify(password, encoded, allow_plaintext=False):
+    """(valid, replacement hash or None) - runs on the hashing pool"""
+    if not password:
+        return False, None
+    if not encoded:
+        # Unknown user: spend a real KDF run anyway so the response time does
+        # not tell which emails have an account
+        _verify(password, _get_dummy_hash())
+        return False, None
+    scheme = encoded.split('$', 1)[0]
+    hasher = get_hasher()
+    try:
+        if scheme in HASHERS:
+            valid = HASHERS[scheme]().verify(password, encoded)
+            outdated = scheme != hasher.scheme or not hasher.is_current(encoded)
+        else:
+            valid, outdated = _verify_legacy(password, encoded, allow_plaintext), True
+    except (ValueError, TypeError):
+        return False, None
+    return valid, hasher.encode(password) if valid and outdated else None
+
+
+# Bounded hashing pool
+
+_executor = None
+_executor_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(HASH_WORKERS + HASH_QUEUE)
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix='password-hash')
+    return _executor
+
+
+def _run(function, *args):
+    if not _slots.acquire(timeout=HASH_QUEUE_TIMEOUT):
+        raise PasswordHasherBusy('Too many concurrent password checks')
+    try:
+        return _get_executor().submit(function, *args).result()
+    finally:
+        _slots.release()
+
+
+def hash_password(password, hasher=None):
+    """Encoded hash of password with the configured hasher (or an explicit one)"""
+    return _run((hasher or get_hasher()).encode, password)
+
+
+def verify_password(password, encoded, allow_plaintext=False):
+    """True if password matches encoded (any supported format)"""
+    return _run(_verify, password, encoded, allow_plaintext)[0]
+
+
+def verify_and_update(password, encoded, allow_plaintext=False):
+    """
+    Check a login password and return (valid, new_hash).
+    new_hash is set when the stored hash uses a legacy format or outdated
+    cost parameters; the caller stores it in place of the old one.
+    Pass encoded=None for an unknown user: it is checked against a dummy
+    hash so the call takes as long as for a real account.
+    """
+    return _run(_verify, password, encoded, allow_plaintext)
+
+
+def needs_rehash(encoded):
+    scheme = (encoded or '').split('$', 1)[0]
+    hasher = get_hasher()
+    return scheme != hasher.scheme or not hasher.is_current(encoded)
@@ -0,0 +1,257 @@
+"""
+Streaming JSON payloads with base64 images
+/api/video/generate receives photos as base64 strings (optionally data URIs)
+inside a JSON object. request.get_json() would hold the whole body, then a
+split() copy and a decoded copy of every image: about three times the
+payload. read_image_payload instead reads the body in CHUNK_SIZE pieces and
+decodes each string of the "images" array straight into its own temp file,
+so memory stays at a few chunks however many photos are attached. The other
+fields are small and are parsed with json.loads.
+"""
+
+import binascii
+import json
+import os
+import re
+import tempfile
+
+CHUNK_SIZE = 64 * 1024
+# Upper bound for any field other than the image array
+MAX_FIELD_BYTES = 1024 * 1024
+MAX_IMAGES = 20
+MAX_IMAGE_BYTES = int(os.environ.get('MEDIA_MAX_IMAGE_BYTES', 15 * 1024 * 1024))
+# "data:image/jpeg;base64," is dropped; longer prefixes are not data URIs
+MAX_DATA_URI_PREFIX = 256
+
+_WHITESPACE = b' \t\r\n'
+_WHITESPACE_RE = re.compile(rb'[ \t\r\n]+')
+_NOT_BASE64 = re.compile(rb'[^A-Za-z0-9+/=]')
+_ESCAPES = {b'/': b'/', b'n': b'', b'r': b'', b't': b'', b'\\': b'\\', b'"': b'"', b'b': b'', b'f': b''}
+
+
+class PayloadError(ValueError):
+    """Malformed or oversized payload"""
+
+
+class _Reader:
+    """Buffered byte reader over a stream, refilled CHUNK_SIZE at a time"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.buffer = b''
+        self.pos = 0
+
+    def fill(self):
+        """Read more input; False at the end of the stream"""
+        chunk = self.stream.read(CHUNK_SIZE)
+        if not chunk:
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        while self.pos >= len(self.buffer):
+            if not self.fill():
+                raise PayloadError('Unexpected end of JSON payload')
+        return self.buffer[self.pos:self.pos + 1]
+
+    def next(self):
+        byte = self.peek()
+        self.pos += 1
+        return byte
+
+    def skip_whitespace(self):
+        while self.peek() in _WHITESPACE:
+            self.pos += 1
+
+    def expect(self, byte):
+        self.skip_whitespace()
+        found = self.next()
+        if found != byte:
+            raise PayloadError(f'Expected {byte.decode()!r} in JSON payload, found {found.decode(errors="replace")!r}')
+
+    def raw_value(self, limit=MAX_FIELD_BYTES):
+        """Bytes of the next JSON value (object, array, string or literal), without decoding it"""
+        self.skip_whitespace()
+        raw = bytearray()
+        depth = 0
+        in_string = escaped = False
+        while True:
+            byte = self.peek()
+            if not in_string and depth == 0 and raw and byte in b',}]' + _WHITESPACE:
+                break
+            self.pos += 1
+            raw += byte
+            if len(raw) > limit:
+                raise PayloadError('JSON field is too large')
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif byte == b'\\':
+                    escaped = True
+                elif byte == b'"':
+                    in_string = False
+                    if depth == 0:
+                        break
+            elif byte == b'"':
+                in_string = True
+            elif byte in b'{[':
+                depth += 1
+            elif byte in b'}]':
+                depth -= 1
+                if depth == 0:
+                    break
+        return bytes(raw)
+
+    def string_chunks(self):
+        """
+        Yield the contents of the JSON string at the cursor in pieces (escapes
+        resolved for the base64 alphabet; whitespace escapes dropped).
+        """
+        self.expect(b'"')
+        while True:
+            if self.pos >= len(self.buffer) and not self.fill():
+                raise PayloadError('Unterminated string in JSON payload')
+            buffer = self.buffer
+            quote = buffer.find(b'"', self.pos)
+            backslash = buffer.find(b'\\', self.pos)
+            end = len(buffer) if quote < 0 else quote
+            if 0 <= backslash < end:
+                end = backslash
+            if end > self.pos:
+                yield buffer[self.pos:end]
+            self.pos = end
+            if end == quote:
+                self.pos += 1
+                return
+            if end == backslash:
+                self.pos += 1
+                escape = self.next()
+                if escape not in _ESCAPES:
+                    raise PayloadError('Unsupported escape in image data')
+                if _ESCAPES[escape]:
+                    yield _ESCAPES[escape]
+
+
+def _base64_text(piece):
+    """piece without whitespace (line-wrapped base64); any other byte outside the alphabet is an error"""
+    piece = _WHITESPACE_RE.sub(b'', piece)
+    invalid = _NOT_BASE64.search(piece)
+    if invalid:
+        raise PayloadError(f'Invalid base64 image: unexpected character {invalid.group().decode("latin-1")!r}')
+    return piece
+
+
+def _decode_image(reader, max_bytes):
+    """Decode one base64 string from the reader into a temp file; returns its path"""
+    fd, path = tempfile.mkstemp(suffix='.jpg')
+    written = 0
+    pending = b''
+    prefix = b''
+    in_prefix = True
+    padded = False
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for piece in reader.string_chunks():
+                if in_prefix:
+                    # Strip a data URI header ("data:image/png;base64,") if there is one
+                    prefix += piece
+                    comma = prefix.find(b',')
+                    if comma >= 0 and prefix.startswith(b'data:'):
+                        piece, in_prefix = prefix[comma + 1:], False
+                    elif len(prefix) > MAX_DATA_URI_PREFIX or not b'data:'.startswith(prefix[:5]):
+                        piece, in_prefix = prefix, False
+                    else:
+                        continue
+                pending += _base64_text(piece)
+                usable = len(pending) - len(pending) % 4
+                if usable:
+                    # Quanta are decoded chunk by chunk, so padding must also end the whole string
+                    if padded:
+                        raise PayloadError('Invalid base64 image: data after padding')
+                    chunk = pending[:usable]
+                    written += f.write(binascii.a2b_base64(chunk, strict_mode=True))
+                    padded = b'=' in chunk
+                    pending = pending[usable:]
+                    if written > max_bytes:
+                        raise PayloadError(f'Image is larger than {max_bytes // (1024 * 1024)} MB')
+            if in_prefix:
+                pending += _base64_text(prefix)
+            if pending:
+                if padded:
+                    raise PayloadError('Invalid base64 image: data after padding')
+                # Unpadded tail
+                pending += b'=' * (-len(pending) % 4)
+                written += f.write(binascii.a2b_base64(pending, strict_mode=True))
+    except binascii.Error as e:
+        os.unlink(path)
+        raise PayloadError(f'Invalid base64 image: {e}')
+    except Exception:
+        os.unlink(path)
+        raise
+    if not written:
+        os.unlink(path)
+        return None
+    return path
+
+
+def read_image_payload(stream, image_field='images', max_images=MAX_IMAGES, max_image_bytes=MAX_IMAGE_BYTES):
+    """
+    Parse a JSON object from a stream, decoding the image_field array of
+    base64 strings into temp files as it is read.
+
+    Returns:
+        (fields, image_paths): every other field, and the temp files in array
+        order (the caller removes them)
+    """
+    reader = _Reader(stream)
+    fields = {}
+    image_paths = []
+    try:
+        reader.expect(b'{')
+        reader.skip_whitespace()
+        if reader.peek() == b'}':
+            return fields, image_paths
+        while True:
+            raw_key = reader.raw_value(limit=1024)
+            try:
+                key = json.loads(raw_key)
+            except ValueError:
+                raise PayloadError('Invalid key in JSON payload')
+            reader.expect(b':')
+            reader.skip_whitespace()
+            if key == image_field and reader.peek() == b'[':
+                reader.expect(b'[')
+                reader.skip_whitespace()
+                if reader.peek() == b']':
+                    reader.next()
+                else:
+                    while True:
+                        if len(image_paths) >= max_images:
+                            raise PayloadError(f'At most {max_images} images per request')
+                        path = _decode_image(reader, max_image_bytes)
+                        if path:
+                            image_paths.append(path)
+                        reader.skip_whitespace()
+                        separator = reader.next()
+                        if separator == b']':
+                            break
+                        if separator != b',':
+                            raise PayloadError('Expected , or ] in image array')
+            else:
+                raw = reader.raw_value()
+                try:
+                    fields[key] = json.loads(raw)
+                except ValueError:
+                    raise PayloadError(f'Invalid JSON value for {key!r}')
+            reader.skip_whitespace()
+            separator = reader.next()
+            if separator == b'}':
+                return fields, image_paths
+            if separator != b',':
+                raise PayloadError('Expected , or } in JSON payload')
+    except Exception:
+        for path in image_paths:
+            os.unlink(path)
+        raise
@@ -0,0 +1,241 @@
+"""
+Placeholder frames for listings without photos
+/api/video/generate used to probe three font paths, draw a 1920x1080 card
+and save a JPEG on every imageless request, and create_video then cropped
+the landscape card to portrait, cutting the text off.
+
+Fonts are now loaded once per process and the card is drawn at the video
+size (1080x1920), so the scale/crop in create_video is a no-op. Two modes
+(PLACEHOLDER_MODE):
+- image (default): a JPEG cached on disk by (title, price, theme), so a
+  retried or regenerated listing reuses the same file.
+- ffmpeg: no image at all; create_video gets a lavfi color source with
+  drawtext overlays (see PlaceholderSource). Needs an FFmpeg built with
+  libfreetype and a TrueType font on disk, else it falls back to image.
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+from services.snapshot import DATA_DIR
+
+PLACEHOLDER_MODE = os.environ.get('PLACEHOLDER_MODE', 'image')
+PLACEHOLDER_CACHE_DIR = os.environ.get('PLACEHOLDER_CACHE_DIR', os.path.join(DATA_DIR, '.cache', 'placeholders'))
+# Cached JPEGs kept on disk; the oldest are removed past this
+PLACEHOLDER_CACHE_MAX = int(os.environ.get('PLACEHOLDER_CACHE_MAX', 500))
+
+WIDTH, HEIGHT = 1080, 1920
+TITLE_SIZE = 96
+PRICE_SIZE = 72
+TITLE_MAX_LINES = 3
+MARGIN = 90
+LINE_SPACING = 1.2
+
+FONT_PATHS = [
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",  # Linux (Azure, fonts-dejavu-core)
+    "/System/Library/Fonts/Helvetica.ttc",  # macOS
+    "C:\\Windows\\Fonts\\Arial.ttf",  # Windows
+]
+
+# theme -> (background, text, accent)
+THEMES = {
+    'dark': ('#1f2937', '#ffffff', '#6366f1'),
+    'light': ('#f9fafb', '#111827', '#4f46e5'),
+    'midnight': ('#0f172a', '#e2e8f0', '#22d3ee'),
+}
+DEFAULT_THEME = 'dark'
+
+# Graph strings built for ffmpeg mode, by (title, price, theme)
+MAX_SOURCES = 256
+
+_sources = OrderedDict()
+_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def _fonts():
+    """(font path or None, title font, price font), loaded once per process"""
+    from PIL import ImageFont
+
+    for font_path in FONT_PATHS:
+        try:
+            return font_path, ImageFont.truetype(font_path, TITLE_SIZE), ImageFont.truetype(font_path, PRICE_SIZE)
+        except OSError:
+            continue
+    print("⚠️ No TrueType font found for placeholders, using the default bitmap font")
+    font = ImageFont.load_default()
+    return None, font, font
+
+
+def _theme(theme):
+    return THEMES.get(theme) or THEMES[DEFAULT_THEME]
+
+
+def _price_text(price):
+    return f"€{price:,.0f}"
+
+
+def _title_lines(title, font):
+    """Word-wrap the title to the card width, at most TITLE_MAX_LINES lines"""
+    width = WIDTH - 2 * MARGIN
+    lines = []
+    for word in ' '.join(str(title).split()).split(' '):
+        candidate = f"{lines[-1]} {word}" if lines else word
+        if lines and font.getlength(candidate) <= width:
+            lines[-1] = candidate
+        else:
+            lines.append(word)
+    if len(lines) > TITLE_MAX_LINES:
+        lines = lines[:TITLE_MAX_LINES]
+        lines[-1] += '…'
+    # Single words longer than the card are cut
+    for i, line in enumerate(lines):
+        while len(line) > 1 and font.getlength(line) > width:
+            line = line[:-2] + '…'
+        lines[i] = line
+    return lines or ['']
+
+
+def _layout(title, price):
+    """[(text, font, y, is_price)] with y the top of each line, the block centred vertically"""
+    _, title_font, price_font = _fonts()
+    title_height = int(TITLE_SIZE * LINE_SPACING)
+    lines = _title_lines(title, title_font)
+    block = len(lines) * title_height + PRICE_SIZE * 2
+    y = (HEIGHT - block) // 2
+    layout = []
+    for line in lines:
+        layout.append((line, title_font, y, False))
+        y += title_height
+    layout.append((_price_text(price), price_font, y + PRICE_SIZE, True))
+    return layout
+
+
+def _cache_key(title, price, theme):
+    return hashlib.sha256(f"{title}\n{_price_text(price)}\n{theme}".encode('utf-8')).hexdigest()
+
+
+def _prune_cache():
+    try:
+        entries = [entry for entry in os.scandir(PLACEHOLDER_CACHE_DIR) if entry.name.endswith('.jpg')]
+    except OSError:
+        return
+    if len(entries) <= PLACEHOLDER_CACHE_MAX:
+        return
+    entries.sort(key=lambda entry: entry.stat().st_mtime)
+    for entry in entries[:len(entries) - PLACEHOLDER_CACHE_MAX]:
+        try:
+            os.unlink(entry.path)
+        except OSError:
+            pass
+
+
+def render_placeholder(title, price, theme=DEFAULT_THEME):
+    """
+    Path of a 1080x1920 JPEG card for the listing, rendered on first use and
+    then served from the disk cache. The file is shared: callers must not
+    delete it.
+    """
+    from PIL import Image, ImageDraw
+
+    theme = theme if theme in THEMES else DEFAULT_THEME
+    path = os.path.join(PLACEHOLDER_CACHE_DIR, f"{_cache_key(title, price, theme)}.jpg")
+    if os.path.exists(path):
+        return path
+
+    background, text_color, accent = _theme(theme)
+    img = Image.new('RGB', (WIDTH, HEIGHT), color=background)
+    draw = ImageDraw.Draw(img)
+    for text, font, y, is_price in _layout(title, price):
+        x = (WIDTH - font.getlength(text)) / 2
+        draw.text((x, y), text, fill=accent if is_price else text_color, font=font)
+
+    os.makedirs(PLACEHOLDER_CACHE_DIR, exist_ok=True)
+    # Written under a temp name and renamed, so a concurrent request never reads half a file
+    fd, temp_path = tempfile.mkstemp(suffix='.tmp', dir=PLACEHOLDER_CACHE_DIR)
+    with os.fdopen(fd, 'wb') as f:
+        img.save(f, 'JPEG', quality=85)
+    os.replace(temp_path, path)
+    _prune_cache()
+    print(f"✅ Rendered placeholder {os.path.basename(path)} ({theme})")
+    return path
+
+
+def _escape_option(value):
+    """Escape a drawtext option value (first level of FFmpeg filter escaping)"""
+    for char in "\\':=":
+        value = value.replace(char, '\\' + char)
+    return value
+
+
+def _escape_graph(value):
+    """Escape a filter description inside a filtergraph (second level)"""
+    for char in "\\'[],;":
+        value = value.replace(char, '\\' + char)
+    return value
+
+
+class PlaceholderSource:
+    """
+    A placeholder card as an FFmpeg lavfi input: a color source with one
+    drawtext overlay per line, so no image is written or decoded.
+    create_video accepts it in place of an image path.
+    """
+
+    def __init__(self, graph, description):
+        self.graph = graph
+        self.description = description
+
+    def ffmpeg_input(self, duration):
+        """Input arguments for a clip of duration seconds"""
+        return ['-f', 'lavfi', '-t', str(duration), '-i', self.graph]
+
+    def __repr__(self):
+        return f"<PlaceholderSource {self.description}>"
+
+
+def _build_source(title, price, theme):
+    font_path = _fonts()[0]
+    background, text_color, accent = _theme(theme)
+    filters = [f"color=c={background.replace('#', '0x')}:s={WIDTH}x{HEIGHT}:r=30"]
+    for text, _, y, is_price in _layout(title, price):
+        options = {
+            'fontfile': font_path,
+            'text': text,
+            'expansion': 'none',
+            'fontsize': PRICE_SIZE if is_price else TITLE_SIZE,
+            'fontcolor': (accent if is_price else text_color).replace('#', '0x'),
+            'x': '(w-text_w)/2',
+            'y': y,
+        }
+        filters.append('drawtext=' + ':'.join(f"{key}={_escape_option(str(value))}" for key, value in options.items()))
+    graph = ','.join(_escape_graph(f) for f in filters)
+    return PlaceholderSource(graph, f"{title[:40]!r} {_price_text(price)} {theme}")
+
+
+def placeholder_source(title, price, theme=DEFAULT_THEME):
+    """PlaceholderSource for the listing (built once per (title, price, theme))"""
+    theme = theme if theme in THEMES else DEFAULT_THEME
+    key = (title, _price_text(price), theme)
+    with _lock:
+        source = _sources.get(key)
+        if source is not None:
+            _sources.move_to_end(key)
+            return source
+    source = _build_source(title, price, theme)
+    with _lock:
+        _sources[key] = source
+        while len(_sources) > MAX_SOURCES:
+            _sources.popitem(last=False)
+    return source
+
+
+def get_placeholder(title, price, theme=DEFAULT_THEME):
+    """The placeholder in PLACEHOLDER_MODE: a cached JPEG path or a PlaceholderSource"""
+    if PLACEHOLDER_MODE == 'ffmpeg' and _fonts()[0]:
+        return placeholder_source(title, price, theme)
+    return render_placeholder(title, price, theme)
@@ -0,0 +1,277 @@
+"""
+"For You" feed ranking
+Scores active listings by recency, engagement velocity and distance from the
+viewer instead of plain newest-first, so an older listing that is still
+getting views and likes keeps surfacing.
+
+The candidate set (the newest FEED_CANDIDATES cards of the feed_items
+projection) is loaded and scored in one batch: recency decay and
+engagement velocity become one NumPy base-score array that is reused for
+FEED_CANDIDATE_TTL seconds. A request only adds the locality term (a
+vectorised Haversine against the viewer's city from data/Cities.txt),
+masks the category and the items the viewer has already watched, and picks
+the top of what remains, so a page costs milliseconds.
+
+Watched items are remembered per user in memory (see mark_seen); like the
+counter buffer this is per process, so a user served by another worker may
+see an item again.
+"""
+
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from datetime import datetime
+
+import numpy as np
+
+from services import counters, geo
+from services.search import decode_cursor, encode_cursor
+
+# Newest active listings considered by the ranking
+FEED_CANDIDATES = int(os.environ.get('FEED_CANDIDATES', 5000))
+# Seconds a scored candidate set is served before it is rebuilt
+FEED_CANDIDATE_TTL = float(os.environ.get('FEED_CANDIDATE_TTL', 60))
+
+PAGE_SIZE = 24
+MAX_PAGE_SIZE = 100
+
+# Score = sum of weight * component, every component in [0, 1]
+WEIGHTS = {'recency': 1.0, 'engagement': 1.0, 'locality': 0.5}
+RECENCY_HALF_LIFE_HOURS = 72.0
+# Engagement velocity: (views + LIKE_WEIGHT * likes) / (age_hours + 2) ** GRAVITY
+LIKE_WEIGHT = 5.0
+GRAVITY = 1.5
+# Locality decays by 1/e every DISTANCE_SCALE_KM from the viewer
+DISTANCE_SCALE_KM = 50.0
+
+# Watched items remembered per user, and users remembered per process
+MAX_SEEN_PER_USER = 1000
+MAX_SEEN_USERS = 10000
+
+
+def _timestamp(value, default):
+    if isinstance(value, datetime):
+        return value.timestamp()
+    try:
+        return datetime.fromisoformat(str(value)).timestamp()
+    except (TypeError, ValueError):
+        return default
+
+
+def _sort_key(card):
+    created_at = card.get('created_at')
+    if isinstance(created_at, datetime):
+        created_at = created_at.isoformat()
+    return str(created_at or ''), str(card['id'])
+
+
+class FeedCandidates:
+    """
+    Scored candidate set: the cards (newest first) and parallel NumPy arrays
+    of their base score and coordinates (NaN where the location is unknown).
+    """
+
+    def __init__(self, cards, now=None):
+        now = time.time() if now is None else now
+        self.cards = cards
+        self.built_at = now
+        size = len(cards)
+
+        self.ids = [str(card['id']) for card in cards]
+        self.positions = {listing_id: position for position, listing_id in enumerate(self.ids)}
+        # (created_at, id) keys ascending, for placing a cursor among equal scores
+        self.keys_ascending = [_sort_key(card) for card in reversed(cards)]
+
+        created = np.fromiter((_timestamp(card.get('created_at'), now) for card in cards),
+                              dtype=np.float64, count=size)
+        engagement = np.empty(size, dtype=np.float64)
+        for position, card in enumerate(cards):
+            views, likes = counters.counts(card)
+            engagement[position] = views + LIKE_WEIGHT * likes
+        self.lat = np.full(size, np.nan)
+        self.lon = np.full(size, np.nan)
+        for position, card in enumerate(cards):
+            resolved = geo.resolve_location(card.get('location'))
+            if resolved is not None:
+                self.lat[position], self.lon[position] = resolved[0], resolved[1]
+
+        age_hours = np.maximum(now - created, 0.0) / 3600.0
+        recency = np.exp2(-age_hours / RECENCY_HALF_LIFE_HOURS)
+        velocity = np.log1p(engagement / (age_hours + 2.0) ** GRAVITY)
+        peak = velocity.max() if size else 0.0
+        if peak > 0:
+            velocity /= peak
+        self.base = WEIGHTS['recency'] * recency + WEIGHTS['engagement'] * velocity
+
+        categories = {}
+        for position, card in enumerate(cards):
+            categories.setdefault(card.get('category'), []).append(position)
+        self.category_positions = {category: np.array(positions, dtype=np.int64)
+                                   for category, positions in categories.items()}
+
+    def __len__(self):
+        return len(self.cards)
+
+    def scores(self, lat=None, lon=None):
+        """Score of every candidate for a viewer at (lat, lon), rounded so cursors compare exactly"""
+        scores = self.base
+        if lat is not None and lon is not None and len(self):
+            distances = geo.haversine_km(lat, lon, self.lat, self.lon)
+            locality = np.nan_to_num(np.exp(-distances / DISTANCE_SCALE_KM), nan=0.0)
+            scores = scores + WEIGHTS['locality'] * locality
+        return np.round(scores, 6)
+
+    def page(self, limit=PAGE_SIZE, category=None, lat=None, lon=None, seen=(), cursor=None):
+        """
+        One page ordered by (score DESC, created_at DESC, id DESC).
+
+        Returns:
+            (cards, next_cursor): next_cursor is None on the last page
+        """
+        size = len(self)
+        scores = self.scores(lat, lon)
+        if category is not None:
+            eligible = np.zeros(size, dtype=bool)
+            eligible[self.category_positions.get(category, [])] = True
+        else:
+            eligible = np.ones(size, dtype=bool)
+        seen_positions = [self.positions[listing_id] for listing_id in seen if listing_id in self.positions]
+        if seen_positions:
+            eligible[seen_positions] = False
+
+        # Positions are newest first, so among equal scores a lower position comes first
+        order = np.arange(size)
+        after = decode_cursor(cursor)
+        if after is not None and isinstance(after[0], (int, float)):
+            boundary = size - bisect_left(self.keys_ascending, (str(after[1]), str(after[2])))
+            eligible &= (scores < after[0]) | ((scores == after[0]) & (order >= boundary))
+
+        candidates = np.flatnonzero(eligible)
+        if len(candidates) > limit + 1:
+            # Everything scoring at least the (limit + 1)-th best, ties included
+            threshold = np.partition(scores[candidates], -(limit + 1))[-(limit + 1)]
+            candidates = candidates[scores[candidates] >= threshold]
+        ranked = candidates[np.lexsort((candidates, -scores[candidates]))][:limit + 1]
+
+        page = ranked[:limit]
+        next_cursor = None
+        if len(ranked) > limit:
+            last = int(page[-1])
+            created_at, listing_id = _sort_key(self.cards[last])
+            next_cursor = encode_cursor([float(scores[last]), created_at, listing_id])
+        return [self.cards[position] for position in page], next_cursor
+
+
+class SeenItems:
+    """Listings each user has watched, most recent last; least recently active users are dropped first"""
+
+    def __init__(self, per_user=MAX_SEEN_PER_USER, max_users=MAX_SEEN_USERS):
+        self.per_user = per_user
+        self.max_users = max_users
+        self._users = OrderedDict()
+        self._lock = threading.Lock()
+
+    def mark(self, user_id, listing_id):
+        with self._lock:
+            items = self._users.get(user_id)
+            if items is None:
+                items = self._users[user_id] = OrderedDict()
+                if len(self._users) > self.max_users:
+                    self._users.popitem(last=False)
+            else:
+                self._users.move_to_end(user_id)
+            items[str(listing_id)] = None
+            items.move_to_end(str(listing_id))
+            if len(items) > self.per_user:
+                items.popitem(last=False)
+
+    def get(self, user_id):
+        with self._lock:
+            return list(self._users.get(user_id, ()))
+
+
+_seen = SeenItems()
+_candidates = None
+_candidates_lock = threading.Lock()
+
+
+def _load_candidates():
+    from services.listings import category_feed
+
+    started = time.perf_counter()
+    cards, _ = category_feed(limit=FEED_CANDIDATES)
+    candidates = FeedCandidates(cards)
+    print(f"📊 Scored {len(candidates)} feed candidates in {(time.perf_counter() - started) * 1000:.1f} ms")
+    return candidates
+
+
+def get_candidates():
+    """
+    Shared FeedCandidates, rebuilt after FEED_CANDIDATE_TTL seconds. While one
+    thread rebuilds, the others keep serving the previous set.
+    """
+    global _candidates
+    candidates = _candidates
+    if candidates is not None and time.time() - candidates.built_at < FEED_CANDIDATE_TTL:
+        return candidates
+    if candidates is None:
+        with _candidates_lock:
+            if _candidates is None:
+                _candidates = _load_candidates()
+            return _candidates
+    if _candidates_lock.acquire(blocking=False):
+        try:
+            _candidates = _load_candidates()
+        except Exception as e:
+            print(f"⚠️ Feed candidate refresh failed, serving the previous set: {e}")
+        finally:
+            _candidates_lock.release()
+    return _candidates
+
+
+def viewer_location(city=None, lat=None, lon=None):
+    """(lat, lon) of the viewer from a Cities.txt name or explicit coordinates, or (None, None)"""
+    if city:
+        index = geo.load_city_index()
+        position = index.lookup(city)
+        if position is not None:
+            return float(index.lat[position]), float(index.lon[position])
+        return None, None
+    if lat is None or lon is None:
+        return None, None
+    try:
+        lat, lon = float(lat), float(lon)
+    except (TypeError, ValueError):
+        raise ValueError('lat and lon must be numbers')
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180) or math.isnan(lat) or math.isnan(lon):
+        raise ValueError('lat/lon out of range')
+    return lat, lon
+
+
+def mark_seen(user_id, listing_id):
+    """Exclude a watched listing from the user's next For You pages"""
+    if user_id is not None:
+        _seen.mark(user_id, listing_id)
+
+
+def for_you_page(limit=PAGE_SIZE, category=None, city=None, lat=None, lon=None, user_id=None, cursor=None):
+    """
+    One page of the ranked feed.
+
+    Args:
+        limit: Page size (capped at MAX_PAGE_SIZE)
+        category: Only this category when given
+        city / lat, lon: Viewer location for the locality term
+        user_id: Listings this user has watched are left out
+        cursor: next_cursor of the previous page
+
+    Returns:
+        (cards, next_cursor)
+    """
+    limit = max(1, min(int(limit or PAGE_SIZE), MAX_PAGE_SIZE))
+    lat, lon = viewer_location(city, lat, lon)
+    seen = _seen.get(user_id) if user_id is not None else ()
+    return get_candidates().page(limit, category, lat, lon, seen, cursor)
@@ -0,0 +1,61 @@
+"""
+Request authentication
+Resolves the bearer token of the current request to a user, for the API
+blueprints (authenticated_user_id) and app.require_auth. Tokens are tried
+in order: signed (services/tokens.py, no lookup), the in-memory sessions of
+api/auth.py, then the sessions table (services/sessions.py) when
+DATABASE_URL is set.
+"""
+
+import os
+
+from flask import current_app, jsonify, request
+
+from services.tokens import is_signed_token, verify_token
+
+
+def bearer_token():
+    return request.headers.get('Authorization', '').replace('Bearer ', '')
+
+
+def resolve_token(token, memory_sessions=True):
+    """
+    Who a token belongs to, or None if it is missing, invalid or expired.
+
+    Returns:
+        dict: user_id, plus claims (signed tokens) or user (the users row
+        of a sessions-table token); in-memory sessions only have user_id
+    """
+    if not token:
+        return None
+    if is_signed_token(token):
+        claims = verify_token(token, current_app.config['SECRET_KEY'])
+        return {'user_id': claims['uid'], 'claims': claims} if claims else None
+    if memory_sessions:
+        from api.auth import sessions
+
+        session = sessions.get(token)
+        if session:
+            return {'user_id': session.get('user_id')}
+    if os.environ.get('DATABASE_URL'):
+        from app import get_db
+        from services.sessions import find_session_user
+
+        conn = get_db()
+        try:
+            cur = conn.cursor()
+            user = find_session_user(cur, token)
+            return {'user_id': user['id'], 'user': dict(user)} if user else None
+        finally:
+            conn.close()
+    return None
+
+
+def authenticated_user_id():
+    """User id behind the bearer token (signed, in-memory or sessions table), or None"""
+    identity = resolve_token(bearer_token())
+    return identity['user_id'] if identity else None
+
+
+def unauthorized():
+    return jsonify({'success': False, 'error': 'Authentication required'}), 401
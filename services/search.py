@@ -0,0 +1,324 @@
+"""
+Listing search
+Full-text search over listing title, description, location and metadata.
+
+Two backends share one result format:
+- PostgreSQL: `listings.search_vector` (see database/migrations/001_listing_search.sql)
+  queried with the `vidx_ro` text search configuration (Romanian stemmer + unaccent)
+- In-process inverted index over the embedded fallback store (services/listing_store.py)
+"""
+
+import base64
+import bisect
+import heapq
+import json
+import math
+import os
+import re
+import threading
+import unicodedata
+from array import array
+from datetime import datetime
+
+from services.listing_store import get_fallback_store
+
+DEFAULT_PAGE_SIZE = 24
+MAX_PAGE_SIZE = 100
+
+# Field weights mirror the setweight() letters used in the SQL migration (A/B/C/D)
+FIELD_WEIGHTS = {
+    'title': 3.0,
+    'metadata': 2.0,
+    'location': 1.5,
+    'description': 1.0,
+}
+
+# Metadata keys that carry searchable text (make/model for cars, brand/size for fashion, ...)
+METADATA_SEARCH_KEYS = (
+    'make', 'model', 'brand', 'type', 'fuel_type', 'transmission',
+    'body_type', 'color', 'condition', 'size', 'material',
+)
+
+# Query terms shorter than this must match a token exactly, longer ones also match as prefix
+MIN_PREFIX_LENGTH = 3
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def normalize_text(text):
+    """Lowercase and strip diacritics so "Benzină" and "benzina" compare equal"""
+    if not text:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', str(text).lower())
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def tokenize(text):
+    """Split text into normalized search tokens"""
+    return _TOKEN_RE.findall(normalize_text(text))
+
+
+def _decode_metadata(metadata):
+    """Metadata is a dict from Postgres/JSON, but may arrive as a JSON string"""
+    if isinstance(metadata, str):
+        try:
+            return json.loads(metadata)
+        except ValueError:
+            return {}
+    return metadata or {}
+
+
+def _metadata_text(metadata):
+    metadata = _decode_metadata(metadata)
+    return ' '.join(str(metadata[key]) for key in METADATA_SEARCH_KEYS if metadata.get(key))
+
+
+def encode_cursor(values):
+    """Encode a keyset position as an opaque URL-safe string"""
+    raw = json.dumps(values, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor (None if missing or malformed)"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(values, list) or len(values) != 3:
+        return None
+    return values
+
+
+def keyset_cursor(created_at, row_id):
+    """Cursor for the (created_at DESC, id DESC) position of a row (timestamps kept as stored)"""
+    if isinstance(created_at, datetime):
+        created_at = created_at.isoformat()
+    return encode_cursor([None, created_at, str(row_id)])
+
+
+class InvertedIndex:
+    """
+    In-memory inverted index over a list of listing dicts.
+
+    Postings are stored per token as two parallel arrays (document numbers and
+    field-weighted term frequencies). The vocabulary is kept sorted so prefix
+    expansion is a bisect range scan instead of a dictionary walk.
+    """
+
+    def __init__(self, listings):
+        self.listings = []
+        self.categories = []
+        self.sort_keys = []
+        postings = {}
+
+        for listing in listings:
+            if listing.get('status', 'active') != 'active':
+                continue
+            doc = len(self.listings)
+            self.listings.append(listing)
+            self.categories.append(listing.get('category'))
+            self.sort_keys.append((str(listing.get('created_at') or ''), str(listing.get('id'))))
+
+            weights = {}
+            fields = (
+                ('title', listing.get('title')),
+                ('metadata', _metadata_text(listing.get('metadata'))),
+                ('location', listing.get('location')),
+                ('description', listing.get('description')),
+            )
+            for field, text in fields:
+                for token in tokenize(text):
+                    weights[token] = weights.get(token, 0.0) + FIELD_WEIGHTS[field]
+
+            for token, weight in weights.items():
+                docs = postings.get(token)
+                if docs is None:
+                    docs = postings[token] = (array('I'), array('f'))
+                docs[0].append(doc)
+                docs[1].append(weight)
+
+        self.postings = postings
+        self.vocabulary = sorted(postings)
+        self.size = len(self.listings)
+
+    def _term_scores(self, term):
+        """Score contribution per document for one query term (exact + prefix matches)"""
+        if len(term) < MIN_PREFIX_LENGTH:
+            tokens = [term] if term in self.postings else []
+        else:
+            start = bisect.bisect_left(self.vocabulary, term)
+            end = bisect.bisect_left(self.vocabulary, term + '\uffff')
+            tokens = self.vocabulary[start:end]
+
+        scores = {}
+        for token in tokens:
+            docs, weights = self.postings[token]
+            idf = math.log(1.0 + self.size / len(docs))
+            # Prefix matches count a little less than exact ones
+            factor = idf if token == term else idf * 0.8
+            if not scores:
+                scores = dict(zip(docs, [weight * factor for weight in weights]))
+                continue
+            for doc, weight in zip(docs, weights):
+                score = weight * factor
+                if score > scores.get(doc, 0.0):
+                    scores[doc] = score
+        return scores
+
+    def search(self, query, category=None, limit=DEFAULT_PAGE_SIZE, cursor=None):
+        """
+        Return (listings, next_cursor) for a query. All terms must match (AND).
+        Results are ordered by score, then newest first.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return [], None
+
+        per_term = [self._term_scores(term) for term in terms]
+        per_term.sort(key=len)
+        candidates = per_term[0]
+        for scores in per_term[1:]:
+            candidates = {doc: total + scores[doc] for doc, total in candidates.items() if doc in scores}
+            if not candidates:
+                break
+        if not candidates:
+            return [], None
+
+        after = decode_cursor(cursor)
+        categories = self.categories
+        sort_keys = self.sort_keys
+
+        # Ordering is (score, created_at, id) descending for every component,
+        # so plain tuples work with nlargest and with the keyset comparison
+        entries = (
+            (round(score, 6),) + sort_keys[doc] + (doc,)
+            for doc, score in candidates.items()
+            if not category or categories[doc] == category
+        )
+        if after is not None:
+            after = tuple(after)
+            entries = (entry for entry in entries if entry[:3] < after)
+
+        top = heapq.nlargest(limit + 1, entries)
+        page = top[:limit]
+        results = [self.listings[entry[3]] for entry in page]
+
+        next_cursor = None
+        if len(top) > limit:
+            next_cursor = encode_cursor(list(page[-1][:3]))
+        return results, next_cursor
+
+
+# ---------------------------------------------------------------------------
+# Fallback store index (rebuilt only when the store changes)
+# ---------------------------------------------------------------------------
+
+_fallback_lock = threading.Lock()
+_fallback_index = None
+_fallback_revision = None
+
+
+def get_fallback_index():
+    """Return the inverted index over the embedded listing store, rebuilding it after writes"""
+    global _fallback_index, _fallback_revision
+
+    store = get_fallback_store()
+    try:
+        revision = store.revision()
+    except Exception as e:
+        print(f"[ERROR] Failed to read the fallback store for search: {e}")
+        revision = None
+
+    with _fallback_lock:
+        if _fallback_index is None or revision != _fallback_revision:
+            listings = []
+            if revision is not None:
+                try:
+                    listings = store.list()
+                except Exception as e:
+                    print(f"[ERROR] Failed to load the fallback store for search: {e}")
+            _fallback_index = InvertedIndex(listings)
+            _fallback_revision = revision
+        return _fallback_index
+
+
+# ---------------------------------------------------------------------------
+# PostgreSQL backend
+# ---------------------------------------------------------------------------
+
+SEARCH_COLUMNS = """
+    id, user_id, title, description, category, price, currency, location,
+    video_url, thumbnail_url, seller_name, seller_avatar, views, likes,
+    status, metadata, created_at
+"""
+
+
+def search_listings_db(query, category=None, limit=DEFAULT_PAGE_SIZE, cursor=None):
+    """Ranked full-text search in PostgreSQL with keyset pagination"""
+    from app import get_db
+
+    conditions = ["l.search_vector @@ q.query", "l.status = 'active'"]
+    params = [query]
+
+    if category:
+        conditions.append("l.category = %s")
+        params.append(category)
+
+    after = decode_cursor(cursor)
+    if after is not None:
+        conditions.append("(ts_rank_cd(l.search_vector, q.query), l.created_at, l.id) < (%s, %s::timestamp, %s)")
+        params.extend(after)
+
+    params.append(limit + 1)
+
+    conn = get_db()
+    cur = conn.cursor()
+    try:
+        cur.execute(f"""
+            SELECT {SEARCH_COLUMNS}, ts_rank_cd(l.search_vector, q.query) AS rank
+            FROM listings l, websearch_to_tsquery('vidx_ro', %s) AS q(query)
+            WHERE {' AND '.join(conditions)}
+            ORDER BY rank DESC, l.created_at DESC, l.id DESC
+            LIMIT %s
+        """, params)
+        rows = [dict(row) for row in cur.fetchall()]
+    finally:
+        cur.close()
+        conn.close()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor([last['rank'], last['created_at'].isoformat(), last['id']])
+    return rows, next_cursor
+
+
+def search_listings(query, category=None, limit=DEFAULT_PAGE_SIZE, cursor=None):
+    """
+    Search active listings.
+
+    Uses PostgreSQL when DATABASE_URL is configured and falls back to the
+    in-process index over the fallback store otherwise (or when the query fails).
+
+    Returns:
+        dict: {results: [listing dicts], next_cursor: str or None, backend: str}
+    """
+    query = (query or '').strip()
+    limit = max(1, min(int(limit or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE))
+    if not query:
+        return {'results': [], 'next_cursor': None, 'backend': None}
+
+    if os.environ.get('DATABASE_URL'):
+        try:
+            results, next_cursor = search_listings_db(query, category, limit, cursor)
+            return {'results': results, 'next_cursor': next_cursor, 'backend': 'database'}
+        except Exception as e:
+            print(f"[ERROR] Database search failed, using fallback index: {e}")
+
+    results, next_cursor = get_fallback_index().search(query, category, limit, cursor)
+    return {'results': results, 'next_cursor': next_cursor, 'backend': 'index'}
@@ -0,0 +1,222 @@
+"""
+Session tokens
+Sessions are looked up by a 32-byte SHA-256 digest of the bearer token
+(sessions.token_hash, see database/migrations/004_session_tokens.sql), so
+the table and its unique index stay small.
+
+While SESSION_LEGACY_TOKENS is on (the default, for the rollout) the
+plaintext token column is still written and matched too, so old and new app
+instances share sessions. Turn it off on every instance, then apply
+011_drop_session_token.sql so a leaked table no longer leaks usable tokens.
+
+Expired rows are deleted by a background sweeper in capped batches, each in
+its own short transaction, so it never holds locks on more than
+SWEEP_BATCH_SIZE rows or competes with logins for long.
+
+MemorySessions is the bounded, expiring replacement for the plain dict the
+in-memory auth API (api/auth.py) used to keep.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+SESSION_TTL = timedelta(days=30)
+
+SWEEP_INTERVAL = int(os.environ.get('SESSION_SWEEP_INTERVAL', 600))
+SWEEP_BATCH_SIZE = int(os.environ.get('SESSION_SWEEP_BATCH_SIZE', 1000))
+# Upper bound per sweep; the rest waits for the next run
+SWEEP_MAX_BATCHES = 50
+
+MAX_MEMORY_SESSIONS = int(os.environ.get('MAX_MEMORY_SESSIONS', 10000))
+
+# Keep sessions.token in sync for app instances that predate token_hash
+LEGACY_TOKENS = os.environ.get('SESSION_LEGACY_TOKENS', '1') == '1'
+
+
+def token_digest(token):
+    """Fixed-size digest stored in place of the token"""
+    return hashlib.sha256(token.encode('utf-8')).digest()
+
+
+# PostgreSQL sessions table (callers pass a cursor inside their transaction)
+
+def create_session(cur, user_id, token, ttl=SESSION_TTL):
+    expires_at = datetime.now() + ttl
+    if LEGACY_TOKENS:
+        cur.execute("""
+            INSERT INTO sessions (user_id, token_hash, token, expires_at)
+            VALUES (%s, %s, %s, %s)
+        """, (user_id, token_digest(token), token, expires_at))
+    else:
+        cur.execute("""
+            INSERT INTO sessions (user_id, token_hash, expires_at)
+            VALUES (%s, %s, %s)
+        """, (user_id, token_digest(token), expires_at))
+    return expires_at
+
+
+def _match_token(token):
+    """WHERE clause and params for the session of a token"""
+    if LEGACY_TOKENS:
+        # Rows from old instances only get their hash from the sweeper
+        return '(s.token_hash = %s OR s.token = %s)', (token_digest(token), token)
+    return 's.token_hash = %s', (token_digest(token),)
+
+
+def find_session_user(cur, token):
+    """User row joined to a live session, or None"""
+    where, params = _match_token(token)
+    cur.execute(f"""
+        SELECT s.user_id, u.*
+        FROM sessions s
+        JOIN users u ON s.user_id = u.id
+        WHERE {where} AND s.expires_at > NOW()
+    """, params)
+    return cur.fetchone()
+
+
+def delete_session(cur, token):
+    where, params = _match_token(token)
+    cur.execute(f'DELETE FROM sessions s WHERE {where}', params)
+
+
+# Sweeper
+
+def sweep_expired_sessions(batch_size=SWEEP_BATCH_SIZE, max_batches=SWEEP_MAX_BATCHES):
+    """
+    Delete expired sessions batch by batch; returns the number removed.
+    Rows from old app instances that only carry a plaintext token get their
+    token_hash on the way (the plaintext stays until 011).
+    """
+    from app import get_db
+    from services.tokens import purge_expired_revocations, signed_tokens_enabled
+
+    removed = 0
+    conn = get_db()
+    try:
+        cur = conn.cursor()
+        for _ in range(max_batches):
+            cur.execute("""
+                DELETE FROM sessions
+                WHERE id IN (
+                    SELECT id FROM sessions
+                    WHERE expires_at <= NOW()
+                    LIMIT %s
+                    FOR UPDATE SKIP LOCKED
+                )
+            """, (batch_size,))
+            deleted = cur.rowcount
+            conn.commit()
+            removed += deleted
+            if deleted < batch_size:
+                break
+
+        if LEGACY_TOKENS:
+            cur.execute("""
+                UPDATE sessions
+                SET token_hash = sha256(convert_to(token, 'UTF8'))
+                WHERE token_hash IS NULL AND token IS NOT NULL
+            """)
+            conn.commit()
+
+        if signed_tokens_enabled():
+            purge_expired_revocations(cur)
+            conn.commit()
+        cur.close()
+    finally:
+        conn.close()
+    return removed
+
+
+_sweeper = None
+_sweeper_lock = threading.Lock()
+
+
+def _sweep_forever(interval):
+    while True:
+        try:
+            removed = sweep_expired_sessions()
+            if removed:
+                print(f"🧹 Removed {removed} expired sessions")
+        except Exception as e:
+            print(f"⚠️ Session sweep failed: {e}")
+        time.sleep(interval)
+
+
+def start_session_sweeper(interval=SWEEP_INTERVAL):
+    """Start the sweeper thread once per process (no-op without DATABASE_URL)"""
+    global _sweeper
+    if not os.environ.get('DATABASE_URL') or interval <= 0:
+        return None
+    with _sweeper_lock:
+        if _sweeper is None or not _sweeper.is_alive():
+            _sweeper = threading.Thread(target=_sweep_forever, args=(interval,),
+                                        name='session-sweeper', daemon=True)
+            _sweeper.start()
+    return _sweeper
+
+
+# In-memory sessions
+
+class MemorySessions:
+    """
+    Dict-like token -> session store with expiry and a size cap.
+    Keys are token digests; expired entries disappear on access and the
+    least recently used session is dropped once max_entries is reached.
+    """
+
+    def __init__(self, max_entries=MAX_MEMORY_SESSIONS):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _expired(session):
+        expires_at = session.get('expires_at')
+        return bool(expires_at) and expires_at <= datetime.now().isoformat()
+
+    def get(self, token, default=None):
+        if not token:
+            return default
+        key = token_digest(token)
+        with self._lock:
+            session = self._entries.get(key)
+            if session is None:
+                return default
+            if self._expired(session):
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return session
+
+    def __contains__(self, token):
+        return self.get(token) is not None
+
+    def __getitem__(self, token):
+        session = self.get(token)
+        if session is None:
+            raise KeyError(token)
+        return session
+
+    def __setitem__(self, token, session):
+        key = token_digest(token)
+        with self._lock:
+            self._entries[key] = session
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __delitem__(self, token):
+        with self._lock:
+            del self._entries[token_digest(token)]
+
+    def pop(self, token, default=None):
+        with self._lock:
+            return self._entries.pop(token_digest(token), default)
+
+    def __len__(self):
+        return len(self._entries)
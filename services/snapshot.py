@@ -0,0 +1,76 @@
+"""
+Precompiled data snapshots
+Static datasets under data/ (Cities.txt, Regions.txt, Cars.txt) are parsed
+once into their in-memory index and pickled to data/.cache/. Later boots
+load the pickle instead of re-parsing JSON/HTML, and the snapshot is
+rebuilt automatically when a source file changes.
+
+Build ahead of time (e.g. during deployment) with:
+    python scripts/build_data_snapshots.py
+"""
+
+import os
+import pickle
+import tempfile
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data')
+CACHE_DIR = os.path.join(DATA_DIR, '.cache')
+
+# Bump when the pickled structures change shape
+SNAPSHOT_VERSION = 1
+
+
+def source_signature(paths):
+    """(path, mtime_ns, size) for each source file; missing files count as changed"""
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            signature.append((os.path.basename(path), stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append((os.path.basename(path), None, None))
+    return tuple(signature)
+
+
+def snapshot_path(name):
+    return os.path.join(CACHE_DIR, f'{name}.pickle')
+
+
+def load_snapshot(name, sources, build, rebuild=False):
+    """
+    Return the object produced by build(), cached as a pickle keyed on the sources.
+
+    Args:
+        name: Snapshot file name (without extension)
+        sources: Source file paths the object is derived from
+        build: Callable that parses the sources and returns the object to cache
+        rebuild: Ignore any existing snapshot
+    """
+    signature = (SNAPSHOT_VERSION, source_signature(sources))
+    path = snapshot_path(name)
+
+    if not rebuild:
+        try:
+            with open(path, 'rb') as f:
+                stored_signature, value = pickle.load(f)
+            if stored_signature == signature:
+                return value
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"⚠️ Ignoring unreadable snapshot {path}: {e}")
+
+    value = build()
+
+    # Write atomically so concurrent workers never read a half-written file
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, prefix=f'.{name}.')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump((signature, value), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        # Read-only deployments still work, they just parse on every boot
+        print(f"⚠️ Could not write snapshot {path}: {e}")
+
+    return value
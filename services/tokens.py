@@ -0,0 +1,216 @@
+"""
+Signed session tokens
+With AUTH_TOKEN_MODE=signed, login/register hand out tokens that carry the
+user id, expiry, a revocation epoch and a random token id (jti), signed
+with HMAC-SHA256 under a key derived from SECRET_KEY. require_auth checks
+them in-process without touching the sessions table.
+
+    v1.<base64url(json claims)>.<base64url(hmac)>
+
+Revocation:
+- Logout adds the jti to revoked_tokens (database/migrations/005_revoked_tokens.sql).
+  Each process keeps the live part of that table in memory and pulls new
+  rows at most every REVOCATION_REFRESH seconds, so a logout is honoured
+  immediately by the worker that served it and within that interval by
+  the others.
+- Bumping SESSION_EPOCH invalidates every signed token at once.
+
+Opaque tokens (the default mode, services/sessions.py) keep working in
+both modes; tokens without the v1. prefix take that path. Signed tokens are
+only accepted in signed mode, and that mode refuses to start without a real
+SECRET_KEY (see check_signing_key).
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import threading
+import time
+
+from services.sessions import SESSION_TTL
+
+AUTH_TOKEN_MODE = os.environ.get('AUTH_TOKEN_MODE', 'opaque')
+SESSION_EPOCH = int(os.environ.get('SESSION_EPOCH', 0))
+REVOCATION_REFRESH = float(os.environ.get('REVOCATION_REFRESH', 5))
+
+TOKEN_PREFIX = 'v1.'
+# Fallback SECRET_KEY in app.py; public, so it must never sign tokens
+DEV_SECRET_KEY = 'dev-secret-key-change-in-production'
+
+
+def signed_tokens_enabled():
+    return AUTH_TOKEN_MODE == 'signed'
+
+
+def check_signing_key(secret_key):
+    """Refuse to run signed mode with a missing or publicly known SECRET_KEY"""
+    if signed_tokens_enabled() and (not secret_key or secret_key == DEV_SECRET_KEY):
+        raise RuntimeError('AUTH_TOKEN_MODE=signed requires SECRET_KEY to be set to a private value')
+
+
+def is_signed_token(token):
+    return bool(token) and token.startswith(TOKEN_PREFIX)
+
+
+def _b64encode(raw):
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+def _signing_key(secret_key):
+    # Never sign with SECRET_KEY directly; Flask uses it for cookies too
+    return hmac.new(secret_key.encode('utf-8'), b'vidx-auth-token-v1', hashlib.sha256).digest()
+
+
+def _signature(secret_key, payload):
+    return hmac.new(_signing_key(secret_key), payload.encode('ascii'), hashlib.sha256).digest()
+
+
+def issue_token(user_id, secret_key, ttl=SESSION_TTL):
+    """Signed token for user_id; returns (token, claims)"""
+    claims = {
+        'uid': user_id,
+        'exp': int(time.time() + ttl.total_seconds()),
+        'ep': SESSION_EPOCH,
+        'jti': secrets.token_hex(8),
+    }
+    payload = _b64encode(json.dumps(claims, separators=(',', ':')).encode('utf-8'))
+    return f"{TOKEN_PREFIX}{payload}.{_b64encode(_signature(secret_key, payload))}", claims
+
+
+def verify_token(token, secret_key):
+    """Claims of a valid, unexpired, unrevoked signed token, else None (always None outside signed mode)"""
+    if not signed_tokens_enabled():
+        return None
+    try:
+        payload, signature = token[len(TOKEN_PREFIX):].split('.')
+        if not hmac.compare_digest(_b64decode(signature), _signature(secret_key, payload)):
+            return None
+        claims = json.loads(_b64decode(payload))
+    except (ValueError, TypeError):
+        return None
+
+    if claims.get('exp', 0) <= time.time() or claims.get('ep') != SESSION_EPOCH:
+        return None
+    if revocations.is_revoked(claims.get('jti')):
+        return None
+    return claims
+
+
+class RevocationList:
+    """In-memory mirror of revoked_tokens (jti -> expiry timestamp)"""
+
+    def __init__(self):
+        self._revoked = {}
+        self._lock = threading.Lock()
+        self._refreshing = threading.Lock()
+        self._refreshed_at = 0.0
+        self._seen_until = None
+
+    def _refresh(self):
+        from app import get_db
+
+        conn = get_db()
+        try:
+            cur = conn.cursor()
+            # Small overlap so rows committed out of order are not missed
+            cur.execute("""
+                SELECT encode(jti, 'hex') AS jti,
+                       EXTRACT(EPOCH FROM expires_at) AS expires,
+                       revoked_at
+                FROM revoked_tokens
+                WHERE expires_at > NOW()
+                  AND (%s::timestamptz IS NULL OR revoked_at >= %s::timestamptz - INTERVAL '30 seconds')
+            """, (self._seen_until, self._seen_until))
+            rows = cur.fetchall()
+            cur.close()
+        finally:
+            conn.close()
+
+        now = time.time()
+        with self._lock:
+            for row in rows:
+                self._revoked[row['jti']] = float(row['expires'])
+                if self._seen_until is None or row['revoked_at'] > self._seen_until:
+                    self._seen_until = row['revoked_at']
+            for jti in [jti for jti, expires in self._revoked.items() if expires <= now]:
+                del self._revoked[jti]
+
+    def _maybe_refresh(self):
+        if not os.environ.get('DATABASE_URL') or time.time() - self._refreshed_at < REVOCATION_REFRESH:
+            return
+        # One thread refreshes; the others keep answering from the current copy
+        if not self._refreshing.acquire(blocking=False):
+            return
+        try:
+            self._refresh()
+        except Exception as e:
+            print(f"⚠️ Could not refresh revoked tokens: {e}")
+        finally:
+            self._refreshed_at = time.time()
+            self._refreshing.release()
+
+    def is_revoked(self, jti):
+        self._maybe_refresh()
+        return jti in self._revoked
+
+    def add(self, jti, expires):
+        with self._lock:
+            self._revoked[jti] = expires
+
+    def __len__(self):
+        return len(self._revoked)
+
+
+revocations = RevocationList()
+
+
+def revoke_token(cur, claims):
+    """Revoke one signed token (logout); cur is None when there is no database"""
+    revocations.add(claims['jti'], claims['exp'])
+    if cur is not None:
+        cur.execute("""
+            INSERT INTO revoked_tokens (jti, expires_at)
+            VALUES (decode(%s, 'hex'), to_timestamp(%s))
+            ON CONFLICT (jti) DO NOTHING
+        """, (claims['jti'], claims['exp']))
+
+
+def purge_expired_revocations(cur):
+    """Drop revocations of tokens that have expired anyway (run by the session sweeper)"""
+    cur.execute('DELETE FROM revoked_tokens WHERE expires_at <= NOW()')
+    return cur.rowcount
+
+
+class TokenUser(dict):
+    """
+    request.user for a signed token: 'id' comes from the token and the
+    other user columns are loaded with loader(user_id) on first access, so
+    endpoints that only need the id never query the database.
+    """
+
+    def __init__(self, user_id, loader):
+        super().__init__(id=user_id, user_id=user_id)
+        self._loader = loader
+        self._loaded = False
+
+    def __missing__(self, key):
+        if not self._loaded:
+            self._loaded = True
+            self.update(self._loader(self['id']) or {})
+            if key in self:
+                return self[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        # dict.get does not call __missing__
+        try:
+            return self[key]
+        except KeyError:
+            return default
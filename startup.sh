@@ -21,6 +21,14 @@ PORT=${PORT:-8000}
 
 echo "✅ Starting Gunicorn on port $PORT..."
 
-# Start Gunicorn with production settings
-gunicorn --bind=0.0.0.0:$PORT --timeout 600 --workers 2 --access-logfile - --error-logfile - app:app
+export PORT
+
+# Optional separate process group for video generation (route /api/video/ to it from the proxy)
+if [ -n "$VIDEO_PORT" ]; then
+    echo "✅ Starting video workers on port $VIDEO_PORT..."
+    VIDX_SERVER_ROLE=video gunicorn app:app &
+fi
+
+# Start Gunicorn with production settings (gunicorn.conf.py: preload, gthread workers, workers from cores)
+exec gunicorn app:app
 
@@ -61,6 +61,8 @@ clearAllFiltersBtn.addEventListener('click', () => {
         chip.classList.remove('active', 'bg-indigo-600', 'text-white');
         chip.classList.add('bg-gray-100', 'dark:bg-dark-200', 'text-gray-700', 'dark:text-dark-500');
     });
+    
+    scheduleFacetRefresh();
 });
 
 // Collect filter values
@@ -88,6 +90,61 @@ function collectFilters() {
     return filters;
 }
 
+// Facet counts from the server (same URL with ?format=json): every option
+// shows how many listings it would match together with the other selections
+function facetSlug(value) {
+    // Mirrors facet_value() in services/filters.py
+    return String(value).normalize('NFD').replace(/[\u0300-\u036f]/g, '')
+        .toLowerCase().replace(/[^a-z0-9]+/g, '-').replace(/^-+|-+$/g, '');
+}
+
+let facetRequest = null;
+let facetTimer = null;
+
+function refreshFacetCounts() {
+    const params = new URLSearchParams();
+    Object.entries(collectFilters()).forEach(([key, value]) => {
+        if (value && value !== '') {
+            params.set(key, Array.isArray(value) ? value.join(',') : value);
+        }
+    });
+    params.set('format', 'json');
+    
+    // Only the latest selection matters
+    if (facetRequest) facetRequest.abort();
+    facetRequest = new AbortController();
+    
+    fetch(`${window.location.pathname}?${params.toString()}`, { signal: facetRequest.signal })
+        .then(response => response.ok ? response.json() : null)
+        .then(page => {
+            if (page) renderFacetCounts(page.facets || {}, page.total);
+        })
+        .catch(error => {
+            if (error.name !== 'AbortError') console.warn('Facet counts unavailable:', error);
+        });
+}
+
+function scheduleFacetRefresh() {
+    clearTimeout(facetTimer);
+    facetTimer = setTimeout(refreshFacetCounts, 250);
+}
+
+function renderFacetCounts(facets, total) {
+    document.querySelectorAll('#filter-options-container option, #filter-options-container .filter-chip').forEach(element => {
+        const isOption = element.tagName === 'OPTION';
+        const filterType = isOption ? element.parentElement.dataset.filterType : element.dataset.filterType;
+        const value = isOption ? element.value : element.dataset.value;
+        const counts = facets[filterType];
+        if (!value || !counts) return;
+        
+        if (element.dataset.label === undefined) element.dataset.label = element.textContent;
+        const count = counts[facetSlug(value)] || 0;
+        element.textContent = `${element.dataset.label} (${count})`;
+    });
+    
+    applyFiltersBtn.textContent = typeof total === 'number' ? `Show ${total} Videos` : 'Show Videos';
+}
+
 // Apply filters to video feed (placeholder - will be implemented with real data)
 function applyFiltersToFeed(filters) {
     console.log('Filters applied:', filters);
@@ -1130,6 +1187,13 @@ document.addEventListener('DOMContentLoaded', () => {
     
     // Load saved filters
     loadSavedFilters();
+    
+    // Keep the counts in step with the selection
+    filterOptionsContainer.addEventListener('change', scheduleFacetRefresh);
+    filterOptionsContainer.addEventListener('click', event => {
+        if (event.target.closest('.filter-chip')) scheduleFacetRefresh();
+    });
+    refreshFacetCounts();
 });
 
 } // End of safety check
@@ -0,0 +1,100 @@
+/**
+ * Media Uploader
+ *
+ * Sends photos and videos straight to storage (R2, or the app itself in
+ * development) with URLs signed by /api/media/uploads, then registers them
+ * with /api/media/uploads/complete. App workers never receive the bytes.
+ *
+ * Files up to 32 MB are hashed in the browser and go up in one PUT under
+ * their SHA-256, so a file that is already stored is not sent again.
+ * Larger files use a multipart upload, a few parts at a time.
+ */
+
+class MediaUploader {
+    constructor() {
+        this.singlePutMax = 32 * 1024 * 1024;  // SINGLE_PUT_MAX_BYTES in services/direct_uploads.py
+        this.partConcurrency = 4;
+    }
+
+    async postJson(url, body, method = 'POST') {
+        const response = await fetch(url, {
+            method,
+            headers: {
+                'Content-Type': 'application/json',
+                'Authorization': `Bearer ${localStorage.getItem('sessionToken')}`
+            },
+            body: JSON.stringify(body)
+        });
+        const result = await response.json();
+        if (!response.ok || !result.success) {
+            throw new Error(result.error || `Upload request failed (${response.status})`);
+        }
+        return result;
+    }
+
+    async sha256Hex(file) {
+        // crypto.subtle only exists on https and localhost; without it the file goes multipart
+        if (!window.crypto || !window.crypto.subtle) return null;
+        const digest = await window.crypto.subtle.digest('SHA-256', await file.arrayBuffer());
+        return Array.from(new Uint8Array(digest), byte => byte.toString(16).padStart(2, '0')).join('');
+    }
+
+    async put(url, body, headers = {}) {
+        const response = await fetch(url, { method: 'PUT', headers, body });
+        if (!response.ok) {
+            throw new Error(`Storage rejected the upload (${response.status})`);
+        }
+        return response;
+    }
+
+    async uploadParts(file, upload) {
+        const parts = [];
+        let next = 0;
+        const worker = async () => {
+            while (next < upload.parts.length) {
+                const part = upload.parts[next++];
+                const start = (part.part_number - 1) * upload.part_size;
+                const response = await this.put(part.url, file.slice(start, start + upload.part_size));
+                // R2 CORS must expose ETag (see r2-cors-config.json)
+                parts.push({ part_number: part.part_number, etag: response.headers.get('ETag') });
+            }
+        };
+        await Promise.all(Array.from({ length: this.partConcurrency }, worker));
+        return parts;
+    }
+
+    /**
+     * Upload one File; resolves to the stored media ({id, key, url, derivatives, ...})
+     */
+    async upload(file) {
+        const sha256 = file.size <= this.singlePutMax ? await this.sha256Hex(file) : null;
+        const upload = await this.postJson('/api/media/uploads', {
+            content_type: file.type,
+            size: file.size,
+            sha256
+        });
+        if (upload.exists) {
+            return upload.media;
+        }
+
+        if (upload.method === 'PUT') {
+            await this.put(upload.url, file, upload.headers);
+            return (await this.postJson('/api/media/uploads/complete', { key: upload.key })).media;
+        }
+
+        try {
+            const parts = await this.uploadParts(file, upload);
+            return (await this.postJson('/api/media/uploads/complete', {
+                key: upload.key,
+                upload_id: upload.upload_id,
+                parts
+            })).media;
+        } catch (error) {
+            this.postJson('/api/media/uploads', { key: upload.key, upload_id: upload.upload_id }, 'DELETE')
+                .catch(() => {});
+            throw error;
+        }
+    }
+}
+
+window.MediaUploader = MediaUploader;
@@ -60,4 +60,19 @@ export const searchLocations = (query) => {
         loc.name.toLowerCase().includes(searchTerm) ||
         (loc.county && loc.county.toLowerCase().includes(searchTerm))
     );
-};
\ No newline at end of file
+};
+// Server-side autocomplete over the full Cities/Regions datasets.
+// Falls back to the bundled sample list when the API is unreachable.
+export const suggestLocations = async (query, { county, limit = 10 } = {}) => {
+    const params = new URLSearchParams({ q: query, limit });
+    if (county) params.set('county', county);
+    try {
+        const response = await fetch(`/api/locations/suggest?${params}`);
+        if (!response.ok) throw new Error(`HTTP ${response.status}`);
+        const data = await response.json();
+        return data.results;
+    } catch (error) {
+        console.warn('Location suggest failed, using local list:', error);
+        return searchLocations(query).slice(0, limit);
+    }
+};
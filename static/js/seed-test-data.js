@@ -53,6 +53,34 @@ function seedTestData() {
     }
 }
 
+/**
+ * Push listings to the server in batches through the bulk endpoint
+ * (one request per batch instead of one per listing)
+ */
+async function seedListingsToServer(listings, { batchSize = 1000 } = {}) {
+    let created = 0;
+    const errors = [];
+
+    for (let start = 0; start < listings.length; start += batchSize) {
+        const batch = listings.slice(start, start + batchSize);
+        const response = await fetch('/api/listings/bulk', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'Authorization': `Bearer ${localStorage.getItem('sessionToken')}`
+            },
+            body: JSON.stringify({ listings: batch })
+        });
+        const result = await response.json();
+        created += result.created || 0;
+        (result.errors || []).forEach(error => errors.push({ ...error, index: error.index + start }));
+        if (result.error) errors.push({ batch: start / batchSize, error: result.error });
+    }
+
+    console.log(`✅ Seeded ${created} listing(s) on the server`, errors.length ? errors : '');
+    return { created, errors };
+}
+
 // Auto-seed on page load if in development
 // Allow any local network IP (192.168.x.x, 10.x.x.x, etc.) or localhost
 const isDevelopment = window.location.hostname === 'localhost' || 
@@ -70,3 +98,4 @@ if (isDevelopment) {
 
 // Expose globally for manual seeding
 window.seedTestData = seedTestData;
+window.seedListingsToServer = seedListingsToServer;
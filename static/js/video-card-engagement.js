@@ -9,6 +9,7 @@ class VideoCardEngagement {
         this.initializeStorage();
         this.migrateOldIDs(); // Migrate old IDs to new format
         this.attachEventListeners();
+        this.trackViews();
         this.initializeButtonStates();
     }
 
@@ -173,6 +174,86 @@ class VideoCardEngagement {
         });
     }
 
+    // ============= VIEW / LIKE COUNTERS =============
+
+    /**
+     * Fire-and-forget counter update; the server buffers it and writes in batches.
+     * keepalive lets the request finish if the user navigates away.
+     */
+    sendCounter(adId, counter, payload = {}) {
+        if (!adId) return;
+        const headers = { 'Content-Type': 'application/json' };
+        // Signed-in views also keep the listing out of the user's For You feed
+        const token = this.getAuthToken();
+        if (token) headers['Authorization'] = `Bearer ${token}`;
+        fetch(`/api/listings/${encodeURIComponent(adId)}/${counter}`, {
+            method: 'POST',
+            headers,
+            body: JSON.stringify(payload),
+            keepalive: true
+        }).catch(() => {});
+    }
+
+    /**
+     * Count one view per card per page load, when its video first starts playing
+     */
+    trackViews() {
+        this.viewedAds = new Set();
+        // play does not bubble; listen in the capture phase
+        document.addEventListener('play', (e) => {
+            const card = e.target.closest && e.target.closest('[data-ad-id]');
+            const adId = card && card.dataset.adId;
+            if (!adId || this.viewedAds.has(adId)) return;
+            this.viewedAds.add(adId);
+            this.sendCounter(adId, 'view');
+        }, true);
+    }
+
+    // ============= FAVOURITES API =============
+
+    getAuthToken() {
+        return localStorage.getItem('authToken') || localStorage.getItem('sessionToken');
+    }
+
+    syncFavorite(adId, favorited) {
+        const token = this.getAuthToken();
+        if (!token) return;
+        fetch(`/api/favourites/${encodeURIComponent(adId)}`, {
+            method: favorited ? 'PUT' : 'DELETE',
+            headers: { 'Authorization': `Bearer ${token}` }
+        }).catch((err) => console.warn('[FAVORITE] Sync failed:', err));
+    }
+
+    /**
+     * One request for the favourite state of every card on the page;
+     * the server is the source of truth, localStorage is only the first paint
+     */
+    async loadFavoriteStates() {
+        const token = this.getAuthToken();
+        const buttons = Array.from(document.querySelectorAll('[data-favorite-btn]'));
+        const ids = [...new Set(buttons.map(btn => btn.dataset.adId).filter(Boolean))];
+        if (!token || ids.length === 0) return;
+
+        try {
+            const response = await fetch('/api/favourites/state', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json', 'Authorization': `Bearer ${token}` },
+                body: JSON.stringify({ ids })
+            });
+            if (!response.ok) return;
+            const favorited = new Set((await response.json()).favourited || []);
+
+            buttons.forEach(btn => {
+                const icon = btn.querySelector('i, svg');
+                if (icon) icon.classList.toggle('fill-pink-500', favorited.has(btn.dataset.adId));
+            });
+            const others = this.getUserFavorites().filter(id => !ids.includes(id));
+            this.saveUserFavorites([...others, ...ids.filter(id => favorited.has(id))]);
+        } catch (err) {
+            console.warn('[FAVORITE] Could not load favourite state:', err);
+        }
+    }
+
     // ============= LIKE HANDLING =============
 
     handleLikeClick(btn) {
@@ -206,8 +287,8 @@ class VideoCardEngagement {
         }
 
         this.saveUserLikes(likedAds);
+        this.sendCounter(adId, 'like', { liked: !isLiked });
 
-        // TODO: Send to backend API when available
         console.log('Like toggled:', adId, 'Liked:', !isLiked, 'User:', this.getUserEmail());
     }
 
@@ -276,11 +357,11 @@ class VideoCardEngagement {
 
         this.saveUserFavorites(favoritedAds);
         this.saveGlobalFavoriteCounts(globalCounts);
+        this.syncFavorite(adId, !isFavorited);
 
         console.log('[FAVORITE] Saved favorites:', favoritedAds);
         console.log('[FAVORITE] localStorage userFavorites:', localStorage.getItem('userFavorites'));
 
-        // TODO: Send to backend API when available
         console.log('Favorite toggled:', adId, 'Favorited:', !isFavorited, 'User:', this.getUserEmail(), 'Global count:', globalCounts[adId]);
     }
 
@@ -498,6 +579,7 @@ class VideoCardEngagement {
         
         // Initialize all favorite buttons
         this.initializeFavoriteButtons();
+        this.loadFavoriteStates();
     }
 
     initializeLikeButtons() {
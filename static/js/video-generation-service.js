@@ -246,47 +246,25 @@ class VideoGenerationService {
 
     /**
      * Upload files to cloud storage
-     * Gets presigned URLs and uploads directly to R2/S3
+     * Gets presigned URLs and uploads directly to R2 (see media-upload.js)
      * 
      * @private
      * @param {Array} files - Files to upload
-     * @returns {Promise<Array>} Uploaded file URLs
+     * @returns {Promise<Array>} Uploaded file keys and URLs
      */
     async _uploadFiles(files) {
+        const uploader = new MediaUploader();
         const uploadedFiles = [];
 
         for (const file of files) {
             try {
-                // Get presigned upload URL
-                const urlResponse = await fetch(`${this.baseUrl}/upload-url`, {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json',
-                        'Authorization': `Bearer ${localStorage.getItem('sessionToken')}`
-                    },
-                    body: JSON.stringify({
-                        filename: file.name,
-                        contentType: file.type
-                    })
-                });
-
-                const { uploadUrl, fileKey } = await urlResponse.json();
-
-                // Upload directly to storage
-                await fetch(uploadUrl, {
-                    method: 'PUT',
-                    body: file,
-                    headers: {
-                        'Content-Type': file.type
-                    }
-                });
-
+                const media = await uploader.upload(file);
                 uploadedFiles.push({
-                    key: fileKey,
+                    key: media.key,
+                    url: media.url,
                     type: file.type,
                     name: file.name
                 });
-                
             } catch (error) {
                 console.error(`Failed to upload ${file.name}:`, error);
                 throw error;
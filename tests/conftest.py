@@ -0,0 +1,70 @@
+"""
+Test setup: the app runs on its SQLite/local fallbacks (no DATABASE_URL,
+no R2), with data files under a per-session temp directory.
+"""
+
+import os
+import sys
+import tempfile
+
+_tmp = tempfile.mkdtemp(prefix='vidx-tests-')
+os.environ['DATABASE_URL'] = ''
+os.environ['R2_ACCESS_KEY_ID'] = ''
+os.environ['LISTINGS_SQLITE_PATH'] = os.path.join(_tmp, 'listings.sqlite3')
+os.environ['MEDIA_ROOT'] = os.path.join(_tmp, 'media')
+os.environ['PLACEHOLDER_CACHE_DIR'] = os.path.join(_tmp, 'placeholders')
+os.environ['COUNTER_FLUSH_INTERVAL'] = '0'
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    from app import app as flask_app
+
+    flask_app.config['TESTING'] = True
+    return flask_app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def login():
+    """login(user_id) -> Authorization headers for an in-memory session of that user"""
+    import secrets
+    from datetime import datetime
+
+    from api.auth import sessions
+    from services.sessions import SESSION_TTL
+
+    tokens = []
+
+    def _login(user_id):
+        token = secrets.token_hex(32)
+        sessions[token] = {
+            'user_id': user_id,
+            'email': f'user{user_id}@example.com',
+            'expires_at': (datetime.now() + SESSION_TTL).isoformat(),
+        }
+        tokens.append(token)
+        return {'Authorization': f'Bearer {token}'}
+
+    yield _login
+    for token in tokens:
+        sessions.pop(token, None)
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """Empty embedded listing store used by the services for this test"""
+    from services import listing_store
+
+    fresh = listing_store.SQLiteListingStore(path=str(tmp_path / 'listings.sqlite3'),
+                                             legacy_json_path=str(tmp_path / 'db.json'))
+    monkeypatch.setattr(listing_store, '_fallback_store', fresh)
+    return fresh
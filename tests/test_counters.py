@@ -0,0 +1,149 @@
+"""View/like counters: CounterBuffer flushes, its size cap, and per-user likes"""
+
+import uuid
+
+import pytest
+
+from services import counters
+from services.counters import CounterBuffer
+from services.listings import delete_listings, get_listing, listing_from_payload, save_listings
+
+
+class RecordingStore:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.batches = []
+
+    def add_counters(self, deltas):
+        if self.fail:
+            raise ConnectionError('database is down')
+        self.batches.append({listing_id: tuple(values) for listing_id, values in deltas.items()})
+
+
+@pytest.fixture
+def listing_id():
+    listing = listing_from_payload({'id': f'listing-{uuid.uuid4()}', 'title': 'Bike', 'price': 100}, 201)
+    save_listings([listing])
+    return listing['id']
+
+
+def test_flush_writes_coalesced_deltas():
+    buffer = CounterBuffer()
+    for _ in range(3):
+        buffer.increment('a', 'views')
+    buffer.increment('a', 'likes')
+    buffer.increment('b', 'views')
+
+    store = RecordingStore()
+    assert buffer.flush(store) == 2
+    assert store.batches == [{'a': (3, 1), 'b': (1, 0)}]
+    assert len(buffer) == 0
+    assert buffer.pending('a') == (0, 0)
+
+
+def test_failed_flush_puts_deltas_back():
+    buffer = CounterBuffer()
+    buffer.increment('a', 'views', 2)
+    with pytest.raises(ConnectionError):
+        buffer.flush(RecordingStore(fail=True))
+    assert buffer.pending('a') == (2, 0)
+
+    buffer.increment('a', 'views')
+    store = RecordingStore()
+    buffer.flush(store)
+    assert store.batches == [{'a': (3, 0)}]
+
+
+def test_buffer_is_capped():
+    buffer = CounterBuffer(max_pending=10, max_buffered=2)
+    assert buffer.increment('a', 'views')
+    assert buffer.increment('b', 'views')
+    assert not buffer.increment('c', 'views')
+    # Listings already buffered keep counting
+    assert buffer.increment('a', 'views')
+    assert len(buffer) == 2
+    assert buffer.take_dropped() == 1
+    assert buffer.take_dropped() == 0
+
+
+def test_failed_flush_does_not_grow_past_cap():
+    buffer = CounterBuffer(max_pending=10, max_buffered=2)
+    buffer.increment('a', 'views')
+    buffer.increment('b', 'views')
+
+    class FillingStore(RecordingStore):
+        # New increments arrive while the flush is failing
+        def add_counters(self, deltas):
+            buffer.increment('c', 'views')
+            buffer.increment('a', 'views')
+            raise ConnectionError('database is down')
+
+    with pytest.raises(ConnectionError):
+        buffer.flush(FillingStore())
+
+    assert len(buffer) == 2
+    assert buffer.pending('a') == (2, 0)
+    assert buffer.pending('c') == (1, 0)
+    assert buffer.pending('b') == (0, 0)
+    assert buffer.take_dropped() == 1
+
+
+def test_unknown_listing_is_not_buffered(listing_id):
+    missing = f'listing-{uuid.uuid4()}'
+    assert not counters.record_view(missing)
+    assert counters._buffer.pending(missing) == (0, 0)
+    assert counters.record_view(listing_id)
+    assert counters._buffer.pending(listing_id) == (1, 0)
+
+
+def test_like_requires_authentication(client, listing_id):
+    assert client.post(f'/api/listings/{listing_id}/like', json={'liked': True}).status_code == 401
+
+
+def test_like_counts_once_per_user(client, login, listing_id):
+    user = login(202)
+    for _ in range(3):
+        assert client.post(f'/api/listings/{listing_id}/like', json={'liked': True}, headers=user).status_code == 202
+    assert counters.counts(get_listing(listing_id))[1] == 1
+
+    client.post(f'/api/listings/{listing_id}/like', json={'liked': True}, headers=login(203))
+    assert counters.counts(get_listing(listing_id))[1] == 2
+
+    for _ in range(2):
+        client.post(f'/api/listings/{listing_id}/like', json={'liked': False}, headers=user)
+    assert counters.counts(get_listing(listing_id))[1] == 1
+
+
+def test_like_of_unknown_listing(client, login):
+    response = client.post(f'/api/listings/listing-{uuid.uuid4()}/like', json={'liked': True}, headers=login(202))
+    assert response.status_code == 404
+
+
+def test_misses_are_cached_briefly(monkeypatch):
+    import services.listings
+
+    lookups = []
+    monkeypatch.setattr(services.listings, 'get_listing', lambda listing_id: lookups.append(listing_id))
+    known = counters.KnownListings(miss_ttl=30)
+    assert not known.exists('gone')
+    assert not known.exists('gone')
+    assert lookups == ['gone']
+
+    clock = [counters.time.monotonic() + 31]
+    monkeypatch.setattr(counters.time, 'monotonic', lambda: clock[0])
+    assert not known.exists('gone')
+    assert lookups == ['gone', 'gone']
+
+
+def test_deleted_listing_stops_counting(listing_id):
+    assert counters.record_view(listing_id)
+    deleted, _ = delete_listings([listing_id], 201)
+    assert deleted == [listing_id]
+    assert not counters.record_view(listing_id)
+
+
+def test_saved_listing_is_no_longer_a_cached_miss():
+    listing = listing_from_payload({'id': f'listing-{uuid.uuid4()}', 'title': 'Bike', 'price': 100}, 201)
+    assert not counters.record_view(listing['id'])
+    save_listings([listing])
+    assert counters.record_view(listing['id'])
@@ -0,0 +1,36 @@
+"""scripts/server.py: the shared db.json snapshot"""
+
+import json
+
+import pytest
+
+from scripts.server import JsonSnapshot
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    path = tmp_path / 'db.json'
+    path.write_text(json.dumps({'ads': [{'id': 1}]}))
+    return JsonSnapshot(str(path))
+
+
+def test_write_publishes_a_new_copy(snapshot):
+    before = snapshot.read()
+    assert snapshot.write(lambda data: data['ads'].append({'id': 2}) or len(data['ads'])) == 2
+    # Readers holding the old data are not changed under them
+    assert before == {'ads': [{'id': 1}]}
+    assert snapshot.read() == {'ads': [{'id': 1}, {'id': 2}]}
+    with open(snapshot.path) as f:
+        assert json.load(f) == snapshot.read()
+
+
+def test_failed_write_leaves_data_untouched(snapshot):
+    def half_applied(data):
+        data['ads'].append({'id': 2})
+        raise ValueError('bad request')
+
+    with pytest.raises(ValueError):
+        snapshot.write(half_applied)
+    assert snapshot.read() == {'ads': [{'id': 1}]}
+    with open(snapshot.path) as f:
+        assert json.load(f) == {'ads': [{'id': 1}]}
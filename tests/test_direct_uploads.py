@@ -0,0 +1,122 @@
+"""Direct uploads on local storage: authentication, signed PUTs and oversized objects"""
+
+import hashlib
+import io
+import time
+
+import pytest
+from PIL import Image
+
+from services import direct_uploads, media
+from services.media import get_media_storage
+
+
+def _jpeg(color='red'):
+    buffer = io.BytesIO()
+    Image.new('RGB', (32, 24), color).save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+def _start(client, headers, body):
+    return client.post('/api/media/uploads', headers=headers, json={
+        'content_type': 'image/jpeg', 'size': len(body), 'sha256': hashlib.sha256(body).hexdigest(),
+    })
+
+
+@pytest.mark.parametrize('method, path, kwargs', [
+    ('post', '/api/media', {'data': {}}),
+    ('post', '/api/media/uploads', {'json': {'content_type': 'image/jpeg', 'size': 10}}),
+    ('post', '/api/media/uploads/complete', {'json': {'key': 'x'}}),
+    ('delete', '/api/media/uploads', {'json': {'key': 'x', 'upload_id': 'y'}}),
+    ('post', '/api/listings/upload', {'data': {}}),
+])
+def test_uploads_require_authentication(client, method, path, kwargs):
+    assert getattr(client, method)(path, **kwargs).status_code == 401
+
+
+def test_signed_put_and_complete(client, login):
+    headers = login(301)
+    body = _jpeg('blue')
+    upload = _start(client, headers, body).json
+    assert upload['method'] == 'PUT'
+
+    response = client.put(upload['url'], data=body, headers=upload['headers'])
+    assert response.status_code == 200
+    response = client.post('/api/media/uploads/complete', headers=headers, json={'key': upload['key']})
+    assert response.status_code == 201
+    assert response.json['media']['key'] == upload['key']
+
+    assert _start(client, headers, body).json['exists'] is True
+
+
+def test_bad_signature_is_forbidden(client, login):
+    body = _jpeg('green')
+    upload = _start(client, login(301), body).json
+    url = upload['url'].replace('signature=', 'signature=0')
+    assert client.put(url, data=body, headers=upload['headers']).status_code == 403
+
+
+def test_body_not_matching_checksum_is_rejected(client, login):
+    body = _jpeg('yellow')
+    upload = _start(client, login(301), body).json
+    tampered = bytes([body[0] ^ 1]) + body[1:]
+    assert client.put(upload['url'], data=tampered, headers=upload['headers']).status_code == 400
+
+
+def test_oversized_upload_is_deleted(client, login, monkeypatch, tmp_path):
+    body = _jpeg('purple')
+    key = f"media/originals/{hashlib.sha256(body).hexdigest()}.jpg"
+    source = tmp_path / 'photo.jpg'
+    source.write_bytes(body)
+    storage = get_media_storage()
+    storage.put_file(str(source), key, 'image/jpeg')
+
+    monkeypatch.setattr(direct_uploads, 'MAX_IMAGE_BYTES', len(body) - 1)
+    response = client.post('/api/media/uploads/complete', headers=login(301), json={'key': key})
+    assert response.status_code == 400
+    assert storage.stat(key) is None
+
+
+def _stored(storage, tmp_path, body):
+    key = f"media/originals/{hashlib.sha256(body).hexdigest()}.jpg"
+    source = tmp_path / 'photo.jpg'
+    source.write_bytes(body)
+    storage.put_file(str(source), key, 'image/jpeg')
+    return key
+
+
+@pytest.mark.parametrize('body, pixels', [
+    (_jpeg('orange'), 100),         # more pixels than MAX_IMAGE_PIXELS
+    (b'not an image at all', None),
+])
+def test_rejected_image_is_deleted(client, login, monkeypatch, tmp_path, body, pixels):
+    if pixels:
+        monkeypatch.setattr(media, 'MAX_IMAGE_PIXELS', pixels)
+    storage = get_media_storage()
+    key = _stored(storage, tmp_path, body)
+    response = client.post('/api/media/uploads/complete', headers=login(301), json={'key': key})
+    assert response.status_code == 400
+    assert storage.stat(key) is None
+
+
+def test_derivatives_check_pixel_count(monkeypatch, tmp_path):
+    monkeypatch.setattr(media, 'MAX_IMAGE_PIXELS', 100)
+    storage = get_media_storage()
+    body = _jpeg('pink')
+    digest = hashlib.sha256(body).hexdigest()
+    source = tmp_path / 'photo.jpg'
+    source.write_bytes(body)
+    media._render_derivatives(storage, digest, str(source))
+    assert not any(storage.exists(media.derivative_key(digest, name)) for name in media.DERIVATIVES)
+    assert not source.exists()
+
+
+def test_local_put_needs_content_addressed_key(tmp_path):
+    body = _jpeg('teal')
+    key = f"media/uploads/{'a' * 32}.jpg"
+    expires = int(time.time()) + 60
+    signature = direct_uploads._local_signature('secret', key, 'image/jpeg', len(body), expires)
+    with pytest.raises(media.MediaError):
+        direct_uploads.receive_local_upload(key, io.BytesIO(body), 'image/jpeg', len(body), expires,
+                                            signature, 'secret')
+    assert get_media_storage().stat(key) is None
@@ -0,0 +1,210 @@
+"""Category filters: query parsing, facets, SQL/in-memory parity and the category page"""
+
+import json
+import re
+import sqlite3
+
+import pytest
+
+from services import filters, geo
+from services.filters import FilterQuery, facet_token, filter_args, filter_listings_in_memory
+from services.listings import listing_from_payload, save_listings
+
+
+def _cars(count, **metadata):
+    listings = [listing_from_payload({
+        'id': f'car-{index}', 'title': f'Car {index}', 'price': 1000 + index, 'category': 'automotive',
+        'metadata': metadata,
+    }, 1) for index in range(count)]
+    save_listings(listings)
+    return listings
+
+
+def test_filter_args_keeps_only_filters():
+    args = {'make': 'bmw', 'price_min': '100', 'year_max': '2020', 'city': 'abrud', 'radius_km': '10',
+            'category': 'x', 'show': 'videos', 'cursor': 'abc', 'format': 'json', 'price': '5', 'fuel_type': ''}
+    assert filter_args('automotive', args) == {
+        'make': 'bmw', 'price_min': '100', 'year_max': '2020', 'city': 'abrud', 'radius_km': '10',
+    }
+
+
+@pytest.mark.parametrize('query', ['', '&make=bmw'])
+def test_load_more_link_ignores_page_state(client, store, query):
+    _cars(30, make='BMW')
+    response = client.get(f'/automotive?show=videos&category=x&format=html{query}')
+    assert response.status_code == 200
+    assert b'Load more' in response.data
+    assert b'category=x' not in response.data
+
+
+def _listing(listing_id, make, fuel_type, price=1000, created_at='2024-01-01T00:00:00'):
+    return {
+        'id': listing_id, 'category': 'automotive', 'status': 'active', 'price': price,
+        'metadata': {'make': make, 'fuel_type': fuel_type}, 'created_at': created_at,
+    }
+
+
+FLEET = [
+    _listing('a', 'BMW', 'Benzină'),
+    _listing('b', 'BMW', 'petrol'),
+    _listing('c', 'BMW', 'Motorină'),
+    _listing('d', 'Audi', 'Benzina'),
+    _listing('e', 'Audi', 'diesel', price=50000),
+]
+
+
+def _filter(args, cursor=None, limit=10):
+    return filter_listings_in_memory(FilterQuery('automotive', args), FLEET, limit=limit, cursor=cursor)
+
+
+def test_facets_leave_out_their_own_selection():
+    page = _filter({'make': 'bmw'})
+    assert page['total'] == 3
+    assert page['facets']['make'] == {'bmw': 3, 'audi': 2}
+    # Romanian spellings are counted under the client's value
+    assert page['facets']['fuel_type'] == {'petrol': 2, 'diesel': 1}
+
+    page = _filter({'make': 'bmw', 'fuel_type': 'diesel'})
+    assert [item['id'] for item in page['items']] == ['c']
+    assert page['facets']['make'] == {'audi': 1, 'bmw': 1}
+    assert page['facets']['fuel_type'] == {'petrol': 2, 'diesel': 1}
+
+
+def test_range_filters_apply_to_every_facet():
+    page = _filter({'make': 'audi', 'price_max': '2000'})
+    assert page['total'] == 1
+    assert page['facets']['make'] == {'bmw': 3, 'audi': 1}
+    assert page['facets']['fuel_type'] == {'petrol': 1}
+
+
+def test_later_pages_skip_total_and_facets():
+    first = _filter({'make': 'bmw'}, limit=2)
+    assert first['total'] == 3 and first['next_cursor']
+    second = _filter({'make': 'bmw'}, cursor=first['next_cursor'], limit=2)
+    assert len(second['items']) == 1
+    assert second['total'] is None and second['facets'] == {}
+
+
+def test_category_json_has_facets_by_filter_id(client, store):
+    _cars(2, make='BMW', fuel_type='Benzină')
+    page = client.get('/automotive?format=json&make=bmw').json
+    assert page['total'] == 2
+    assert page['facets'] == {'make': {'bmw': 2}, 'fuel_type': {'petrol': 2}}
+
+
+def test_unfiltered_category_has_cached_facets(client, store, monkeypatch):
+    monkeypatch.setattr(filters, '_category_facets', {})
+    _cars(3, make='BMW', fuel_type='Benzină')
+    page = client.get('/automotive?format=json').json
+    assert page['total'] == 3
+    assert page['facets'] == {'make': {'bmw': 3}, 'fuel_type': {'petrol': 3}}
+
+    # Served from the cache until it expires
+    _cars(4, make='BMW')
+    assert client.get('/automotive?format=json').json['total'] == 3
+    monkeypatch.setattr(filters, '_category_facets', {})
+    assert client.get('/automotive?format=json').json['total'] == 4
+
+    later = client.get(f"/automotive?format=json&cursor={page['next_cursor'] or 'x'}").json
+    assert later['total'] is None and later['facets'] == {}
+
+
+def test_unknown_city_matches_nothing(client, store):
+    query = FilterQuery('automotive', {'city': 'Timisoara'})
+    assert query.applied['city'] == {'name': 'Timisoara', 'unresolved': True}
+    assert 'FALSE' in query.sql()[0].split(' AND ')
+    assert filter_listings_in_memory(query, FLEET)['total'] == 0
+
+    _cars(2)
+    page = client.get('/automotive?format=json&city=Cluj-Napoca').json
+    assert page['items'] == [] and page['total'] == 0
+    assert page['applied']['city']['unresolved'] is True
+
+
+# sql() parity: the WHERE clause is run on SQLite with the Postgres-only
+# pieces (text[] overlap, ->>, vidx_numeric) replaced by equivalents, and
+# must select the same listings as missed_choices()/matches()
+
+def _facet_values(metadata):
+    """vidx_facet_values() of migration 002"""
+    tokens = []
+    for key, value in metadata.items():
+        if isinstance(value, (dict, list)) or value is None:
+            continue
+        text = str(value).lower() if isinstance(value, bool) else str(value)
+        if len(text) <= 100:
+            tokens.append(facet_token(key, text))
+    return tokens
+
+
+def _vidx_numeric(text):
+    if text is None:
+        return None
+    text = str(text).replace(',', '')
+    return float(text) if re.match(r'^\s*-?[0-9]+(\.[0-9]+)?\s*$', text) else None
+
+
+PARITY_FLEET = [
+    dict(_listing('p1', 'BMW', 'Benzină', price=4500), metadata={'make': 'BMW', 'fuel_type': 'Benzină',
+                                                                  'year': '2012', 'mileage': '180,000'}),
+    dict(_listing('p2', 'Audi', 'diesel', price=12000), metadata={'make': 'Audi', 'fuel_type': 'diesel',
+                                                                   'year': 2018, 'transmission': 'Automată'}),
+    dict(_listing('p3', 'BMW', 'Motorină', price=900), location='Câmpeni',
+         metadata={'make': 'BMW', 'fuel_type': 'Motorină', 'year': 'around 2005', 'condition': 'Utilizat'}),
+    dict(_listing('p4', 'Dacia', 'hibrid', price=7000), location='Abrud, Alba',
+         metadata={'make': 'Dacia', 'fuel_type': 'hibrid', 'year': '2020', 'transmission': 'manual'}),
+    dict(_listing('p5', 'BMW', 'petrol', price=3000), location='Alba Iulia', status='sold',
+         metadata={'make': 'BMW', 'fuel_type': 'petrol', 'year': '2015'}),
+    dict(_listing('p6', 'BMW', 'petrol', price=3000), category='electronics', metadata={'brand': 'BMW'}),
+    dict(_listing('p7', 'Audi', 'petrol', price=2500), location='Alba Iulia',
+         metadata={'make': 'Audi', 'fuel_type': 'petrol', 'year': '2016', 'condition': 'nou'}),
+]
+
+
+@pytest.fixture(scope='module')
+def parity_db():
+    conn = sqlite3.connect(':memory:')
+    conn.create_function('overlaps', 2, lambda stored, wanted: bool(set(json.loads(stored)) & set(json.loads(wanted))))
+    conn.create_function('vidx_numeric', 1, _vidx_numeric)
+    conn.execute("""CREATE TABLE listings (id TEXT, status TEXT, category TEXT, price REAL, metadata TEXT,
+                                           facet_values TEXT, latitude REAL, longitude REAL)""")
+    for listing in PARITY_FLEET:
+        latitude, longitude = geo.geocode_listing(listing)
+        conn.execute("INSERT INTO listings VALUES (?, ?, ?, ?, ?, ?, ?, ?)", (
+            listing['id'], listing['status'], listing['category'], listing['price'],
+            json.dumps(listing['metadata']), json.dumps(_facet_values(listing['metadata'])), latitude, longitude,
+        ))
+    return conn
+
+
+def _sql_ids(conn, where, params):
+    where = re.sub(r"l\.facet_values && %s::text\[\]", "overlaps(l.facet_values, %s)", where)
+    where = where.replace("l.metadata->>%s", "json_extract(l.metadata, '$.' || %s)").replace('%s', '?')
+    params = [json.dumps(param) if isinstance(param, list) else param for param in params]
+    return {row[0] for row in conn.execute(f"SELECT l.id FROM listings l WHERE {where}", params)}
+
+
+@pytest.mark.parametrize('args', [
+    {},
+    {'make': 'bmw'},
+    {'make': 'bmw,audi', 'fuel_type': 'petrol'},
+    {'fuel_type': 'diesel'},
+    {'fuel_type': 'hybrid', 'transmission': 'manual'},
+    {'transmission': 'automatic'},
+    {'condition': 'used'},
+    {'condition': 'new,like-new'},
+    {'price_min': '1000', 'price_max': '8000'},
+    {'year_min': '2014'},
+    {'year_max': '2015', 'make': 'bmw'},
+    {'mileage_min': '100000'},
+    {'city': 'Abrud', 'radius_km': '15'},
+    {'city': 'Abrud', 'radius_km': '60', 'make': 'audi'},
+    {'city': 'Timisoara'},
+])
+def test_sql_matches_in_memory(parity_db, args):
+    query = FilterQuery('automotive', args)
+    expected = {listing['id'] for listing in PARITY_FLEET if query.matches(listing)[0]}
+    assert _sql_ids(parity_db, *query.sql()) == expected
+
+    without_choices = {listing['id'] for listing in PARITY_FLEET if query.missed_choices(listing)[0] is not None}
+    assert _sql_ids(parity_db, *query.sql(choices=False)) == without_choices
@@ -0,0 +1,62 @@
+"""City index radius queries and location resolution (services/geo.py)"""
+
+import numpy as np
+import pytest
+
+from services import geo
+from services.geo import CityIndex, haversine_km
+
+
+def _city(city_id, name, lat, lon, county='Alba', zoom=12, radius=0):
+    return {'id': city_id, 'name': name, 'county': county, 'latitude': lat, 'longitude': lon,
+            'zoom': zoom, 'radius': radius}
+
+
+SMALL = CityIndex([
+    _city(1, 'Centru', 46.0, 23.0),
+    # Across grid cell edges from the centre (cells are 0.25 degrees)
+    _city(2, 'Nord', 46.26, 23.0),
+    _city(3, 'Est', 46.0, 23.26),
+    _city(4, 'Departe', 47.5, 26.0),
+    _city(5, 'Sat', 46.0, 23.1, county='Cluj', zoom=14),
+    _city(6, 'Sat', 46.0, 23.2, county='Alba', zoom=13),
+])
+
+
+def test_within_is_sorted_and_crosses_grid_cells():
+    positions, distances = SMALL.within(46.0, 23.0, 30)
+    assert [SMALL.names[p] for p in positions] == ['Centru', 'Sat', 'Sat', 'Est', 'Nord']
+    assert list(distances) == sorted(distances)
+    assert all(distance <= 30 for distance in distances)
+    assert len(SMALL.within(46.0, 23.0, 0.5)[0]) == 1
+    assert len(SMALL.within(30.0, 10.0, 50)[0]) == 0
+
+
+def test_lookup_prefers_county_then_larger_locality():
+    assert SMALL.ids[SMALL.lookup('sat')] == 6
+    assert SMALL.ids[SMALL.lookup('Sat', county='Cluj')] == 5
+    assert SMALL.lookup('Nowhere') is None
+
+
+@pytest.mark.parametrize('radius_km', [5, 25, 120, 2000])
+def test_within_matches_brute_force(radius_km):
+    index = geo.load_city_index()
+    centre = index.lookup('Abrud')
+    lat, lon = index.lat[centre], index.lon[centre]
+    positions, _ = index.within(lat, lon, radius_km)
+    expected = np.flatnonzero(haversine_km(lat, lon, index.lat, index.lon) <= radius_km)
+    assert sorted(positions.tolist()) == expected.tolist()
+
+
+def test_resolve_location_uses_county_part():
+    index = geo.load_city_index()
+    resolved = geo.resolve_location('Abrud, Alba, România')
+    assert index.names[resolved[2]] == 'Abrud'
+    assert geo.geocode_listing({'location': 'Nowhere'}) == (None, None)
+
+
+def test_listings_within():
+    listings = [{'id': 'far', 'location': 'Alba Iulia'}, {'id': 'near', 'location': 'Câmpeni'},
+                {'id': 'unknown', 'location': 'Nowhere'}]
+    assert [listing['id'] for _, listing in geo.listings_within(listings, 'Abrud', 100)] == ['near', 'far']
+    assert geo.listings_within(listings, 'Nowhere', 100) is None
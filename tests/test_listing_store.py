@@ -0,0 +1,124 @@
+"""Embedded listing store (services/listing_store.py): legacy import, writes and the feed_items triggers"""
+
+import json
+
+import pytest
+
+from services.listing_store import SQLiteListingStore
+
+
+def _listing(listing_id, user_id=1, created_at='2026-01-01T10:00:00', **fields):
+    return dict({'id': listing_id, 'user_id': user_id, 'title': f'Listing {listing_id}', 'price': 100,
+                 'currency': 'EUR', 'category': 'automotive', 'status': 'active', 'created_at': created_at},
+                **fields)
+
+
+@pytest.fixture
+def sqlite_store(tmp_path):
+    return SQLiteListingStore(path=str(tmp_path / 'listings.sqlite3'), legacy_json_path=str(tmp_path / 'db.json'))
+
+
+def test_imports_db_json_once(tmp_path):
+    legacy = tmp_path / 'db.json'
+    legacy_row = {key: value for key, value in _listing('a').items() if key != 'user_id'}
+    legacy.write_text(json.dumps({'listings': [dict(legacy_row, userId=7), {'title': 'no id'}]}))
+    store = SQLiteListingStore(path=str(tmp_path / 'listings.sqlite3'), legacy_json_path=str(legacy))
+    assert store.get('a')['title'] == 'Listing a'
+    assert [listing['id'] for listing in store.list(user_id=7)] == ['a']
+
+    # A second store on the same file does not import again
+    legacy.write_text(json.dumps({'listings': [_listing('b')]}))
+    reopened = SQLiteListingStore(path=str(tmp_path / 'listings.sqlite3'), legacy_json_path=str(legacy))
+    assert reopened.get('b') is None
+
+
+def test_upsert_keeps_owner_creation_time_and_counters(sqlite_store):
+    sqlite_store.upsert_many([_listing('a', views=5, likes=2)])
+    revision = sqlite_store.revision()
+
+    assert sqlite_store.upsert_many([_listing('a', user_id=2, title='Hijacked')]) == []
+    assert sqlite_store.get('a')['title'] == 'Listing a'
+
+    written = sqlite_store.upsert_many([_listing('a', title='Renamed', created_at='2026-02-01', views=0)])
+    assert written == ['a']
+    stored = sqlite_store.get('a')
+    assert (stored['title'], stored['created_at'], stored['views'], stored['likes']) == (
+        'Renamed', '2026-01-01T10:00:00', 5, 2)
+    assert stored['price_display']
+    assert sqlite_store.revision() > revision
+
+
+def test_update_many_merges_metadata_for_owner_only(sqlite_store):
+    sqlite_store.upsert_many([_listing('a', metadata={'make': 'BMW', 'year': 2010}), _listing('b', user_id=2)])
+    updated = sqlite_store.update_many({'a': {'metadata': {'year': 2012}, 'price': 90}, 'b': {'price': 1},
+                                        'missing': {'price': 1}}, user_id=1)
+    assert updated == ['a']
+    assert sqlite_store.get('a')['metadata'] == {'make': 'BMW', 'year': 2012}
+    assert sqlite_store.get('b')['price'] == 100
+
+
+def test_add_counters_never_drops_likes_below_zero(sqlite_store):
+    sqlite_store.upsert_many([_listing('a', likes=1)])
+    revision = sqlite_store.revision()
+    sqlite_store.add_counters({'a': (3, -5), 'missing': (1, 1)})
+    stored = sqlite_store.get('a')
+    assert (stored['views'], stored['likes']) == (3, 0)
+    assert sqlite_store.revision() == revision
+
+
+def test_get_many_and_list_order(sqlite_store):
+    sqlite_store.upsert_many([_listing('a'), _listing('b'), _listing('c', created_at='2026-01-02'),
+                              _listing('d', status='sold')])
+    assert sorted(sqlite_store.get_many(['a', 'd', 'missing'])) == ['a', 'd']
+    # Newest first, id descending among equal timestamps
+    assert [listing['id'] for listing in sqlite_store.list()] == ['c', 'b', 'a']
+    assert [listing['id'] for listing in sqlite_store.list(status=None, limit=2)] == ['c', 'd']
+
+
+def _feed_ids(store, category=None, limit=24, before=None):
+    return [card['id'] for card in store.feed_page(category, limit, before)]
+
+
+def test_feed_items_follow_listing_writes(sqlite_store):
+    sqlite_store.upsert_many([_listing('a'), _listing('b', category='fashion'), _listing('c', status='pending')])
+    assert _feed_ids(sqlite_store) == ['b', 'a']
+    assert _feed_ids(sqlite_store, 'fashion') == ['b']
+
+    sqlite_store.update_many({'a': {'status': 'sold'}, 'c': {'status': 'active'}})
+    assert _feed_ids(sqlite_store) == ['c', 'b']
+
+    sqlite_store.update_many({'b': {'category': 'automotive', 'title': 'Moved'}})
+    assert _feed_ids(sqlite_store, 'fashion') == []
+    cards = sqlite_store.feed_page('automotive')
+    assert [(card['id'], card['title']) for card in cards] == [('c', 'Listing c'), ('b', 'Moved')]
+
+    sqlite_store.add_counters({'b': (4, 1)})
+    card = sqlite_store.feed_page('automotive')[1]
+    assert (card['views'], card['likes']) == (4, 1)
+
+    with sqlite_store._transaction(sqlite_store._connect()) as conn:
+        conn.execute("DELETE FROM listings WHERE id = 'c'")
+    assert _feed_ids(sqlite_store) == ['b']
+
+
+def test_feed_is_built_for_existing_databases(sqlite_store):
+    sqlite_store.upsert_many([_listing('a'), _listing('b', status='sold')])
+    conn = sqlite_store._connect()
+    conn.execute("DELETE FROM feed_items")
+    conn.execute("DELETE FROM meta WHERE key = 'feed_items'")
+
+    reopened = SQLiteListingStore(path=sqlite_store.path, legacy_json_path=sqlite_store.legacy_json_path)
+    assert _feed_ids(reopened) == ['a']
+
+
+def test_category_feed_pages_straddle_equal_timestamps(store):
+    from services.listings import category_feed
+
+    store.upsert_many([_listing(f'car-{index:02d}') for index in range(7)] + [_listing('bag', category='fashion')])
+    seen, cursor = [], None
+    while True:
+        cards, cursor = category_feed('automotive', limit=3, cursor=cursor)
+        seen += [card['id'] for card in cards]
+        if cursor is None:
+            break
+    assert seen == [f'car-{index:02d}' for index in range(6, -1, -1)]
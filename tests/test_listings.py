@@ -0,0 +1,170 @@
+"""Listing writes: authentication, ownership and status validation (SQLite store)"""
+
+import uuid
+
+import pytest
+
+from services.listing_store import SQLiteListingStore
+from services.listings import ListingError, changes_from_payload, get_listing
+
+
+@pytest.fixture
+def listing_id():
+    return f'listing-{uuid.uuid4()}'
+
+
+def _create(client, headers, listing_id, **fields):
+    payload = dict({'id': listing_id, 'title': 'Renault Wind', 'price': 4500, 'category': 'automotive'}, **fields)
+    return client.post('/api/listings', json=payload, headers=headers)
+
+
+@pytest.mark.parametrize('method, path, payload', [
+    ('post', '/api/listings', {'title': 'x', 'price': 1}),
+    ('post', '/api/listings/bulk', {'listings': [{'title': 'x', 'price': 1}]}),
+    ('patch', '/api/listings/bulk', {'listings': [{'id': 'a', 'price': 1}]}),
+    ('delete', '/api/listings/bulk', {'ids': ['a']}),
+    ('patch', '/api/listings/a', {'price': 1}),
+    ('delete', '/api/listings/a', None),
+])
+def test_writes_require_authentication(client, method, path, payload):
+    response = getattr(client, method)(path, json=payload)
+    assert response.status_code == 401
+
+
+def test_create_and_update_own_listing(client, login, listing_id):
+    owner = login(101)
+    assert _create(client, owner, listing_id).status_code == 201
+    response = client.patch(f'/api/listings/{listing_id}', json={'price': 4000, 'status': 'sold'}, headers=owner)
+    assert response.status_code == 200
+    assert get_listing(listing_id)['price'] == 4000
+
+
+def test_client_id_of_another_user_is_rejected(client, login, listing_id):
+    assert _create(client, login(101), listing_id).status_code == 201
+
+    response = _create(client, login(102), listing_id, title='Hijacked')
+    assert response.status_code == 403
+    listing = get_listing(listing_id)
+    assert listing['title'] == 'Renault Wind'
+    assert str(listing['user_id']) == '101'
+
+
+def test_bulk_create_reports_foreign_ids(client, login, listing_id):
+    assert _create(client, login(101), listing_id).status_code == 201
+
+    other = f'listing-{uuid.uuid4()}'
+    response = client.post('/api/listings/bulk', headers=login(102), json={'listings': [
+        {'id': listing_id, 'title': 'Hijacked', 'price': 1},
+        {'id': other, 'title': 'Mine', 'price': 2},
+    ]})
+    assert response.status_code == 201
+    assert response.json['listing_ids'] == [other]
+    assert response.json['errors'] == [{'index': 0, 'error': 'Listing id belongs to another user'}]
+    assert get_listing(listing_id)['title'] == 'Renault Wind'
+
+
+def test_other_user_cannot_update_or_delete(client, login, listing_id):
+    assert _create(client, login(101), listing_id).status_code == 201
+    intruder = login(102)
+
+    assert client.patch(f'/api/listings/{listing_id}', json={'price': 1}, headers=intruder).status_code == 404
+    assert client.delete(f'/api/listings/{listing_id}', headers=intruder).status_code == 404
+    response = client.patch('/api/listings/bulk', json={'listings': [{'id': listing_id, 'price': 1}]},
+                            headers=intruder)
+    assert response.json['missing'] == [listing_id]
+    response = client.delete('/api/listings/bulk', json={'ids': [listing_id]}, headers=intruder)
+    assert response.json['deleted'] == 0
+
+    assert get_listing(listing_id)['price'] == 4500
+
+
+def test_owner_can_delete(client, login, listing_id):
+    owner = login(101)
+    assert _create(client, owner, listing_id).status_code == 201
+    assert client.delete(f'/api/listings/{listing_id}', headers=owner).status_code == 200
+    assert get_listing(listing_id) is None
+
+
+@pytest.mark.parametrize('status', ['deleted', 'bogus'])
+def test_status_is_validated(client, login, listing_id, status):
+    owner = login(101)
+    assert _create(client, owner, listing_id, status=status).status_code == 400
+    assert _create(client, owner, listing_id).status_code == 201
+    assert client.patch(f'/api/listings/{listing_id}', json={'status': status}, headers=owner).status_code == 400
+    with pytest.raises(ListingError):
+        changes_from_payload({'status': status})
+
+
+def test_sqlite_upsert_keeps_other_users_rows(tmp_path):
+    store = SQLiteListingStore(path=str(tmp_path / 'listings.sqlite3'), legacy_json_path=str(tmp_path / 'db.json'))
+    mine = {'id': 'a', 'user_id': 1, 'title': 'Mine', 'price': 1, 'category': 'other', 'status': 'active'}
+    assert store.upsert_many([mine]) == ['a']
+    assert store.upsert_many([dict(mine, user_id=2, title='Theirs')]) == []
+    assert store.upsert_many([dict(mine, title='Renamed')]) == ['a']
+    assert store.get('a')['title'] == 'Renamed'
+    assert store.update_many({'a': {'title': 'x'}}, user_id=2) == []
+    assert store.update_many({'a': {'title': 'y'}}, user_id=1) == ['a']
+
+
+def test_my_listings_requires_authentication(client):
+    assert client.get('/api/listings/mine').status_code == 401
+    assert client.get('/api/listings/mine?status=sold').status_code == 401
+
+
+def test_my_listings_returns_own_buckets(client, login, listing_id):
+    owner = login(103)
+    assert _create(client, owner, listing_id).status_code == 201
+    buckets = client.get('/api/listings/mine', headers=owner).json['buckets']
+    assert [listing['id'] for listing in buckets['active']['listings']] == [listing_id]
+    assert client.get('/api/listings/mine', headers=login(104)).json['buckets']['active']['count'] == 0
+
+
+def test_missing_category_defaults_to_other(client, login, listing_id):
+    owner = login(101)
+    assert _create(client, owner, listing_id, category=None).status_code == 201
+    assert get_listing(listing_id)['category'] == 'other'
+    response = client.patch(f'/api/listings/{listing_id}', json={'category': None}, headers=owner)
+    assert response.status_code == 400
+
+
+def test_metadata_patch_is_normalised_for_the_stored_category(client, login, listing_id):
+    owner = login(101)
+    assert _create(client, owner, listing_id, category='electronics', metadata={'brand': 'x'}).status_code == 201
+    response = client.patch(f'/api/listings/{listing_id}', json={'metadata': {'make': 'bmw'}}, headers=owner)
+    assert response.status_code == 200
+    assert get_listing(listing_id)['metadata'] == {'brand': 'x', 'make': 'bmw'}
+
+    car = f'listing-{uuid.uuid4()}'
+    assert _create(client, owner, car).status_code == 201
+    client.patch(f'/api/listings/{car}', json={'metadata': {'make': 'bmw'}}, headers=owner)
+    assert get_listing(car)['metadata']['make'] == 'BMW'
+
+
+def _saved(user_id, count, status='active', created_at='2026-01-01T10:00:00'):
+    from services.listings import listing_from_payload, save_listings
+
+    listings = [dict(listing_from_payload({'id': f'{status}-{index:02d}', 'title': 'Bike', 'price': 100,
+                                           'status': status}, user_id), created_at=created_at)
+                for index in range(count)]
+    save_listings(listings)
+    return [listing['id'] for listing in listings]
+
+
+def test_my_listings_pages_straddle_equal_timestamps(client, login, store):
+    owner = login(301)
+    ids = _saved(301, 7)
+    _saved(301, 2, status='sold')
+    _saved(302, 3)
+
+    buckets = client.get('/api/listings/mine?limit=3', headers=owner).get_json()['buckets']
+    assert {status: bucket['count'] for status, bucket in buckets.items()} == {
+        'active': 7, 'pending': 0, 'sold': 2, 'archived': 0,
+    }
+    assert buckets['sold']['next_cursor'] is None
+    seen = [listing['id'] for listing in buckets['active']['listings']]
+    cursor = buckets['active']['next_cursor']
+    while cursor:
+        page = client.get(f'/api/listings/mine?status=active&limit=3&cursor={cursor}', headers=owner).get_json()
+        seen += [listing['id'] for listing in page['listings']]
+        cursor = page['next_cursor']
+    assert seen == sorted(ids, reverse=True)
@@ -0,0 +1,84 @@
+"""Image ingestion: content-addressed dedup, rejection and derivatives (services/media.py)"""
+
+import io
+import os
+
+import pytest
+from PIL import Image
+
+from services import media
+from services.media import LocalMediaStorage, MediaError, ingest_files, ingest_image
+
+
+class InlineExecutor:
+    def submit(self, function, *args):
+        function(*args)
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    storage = LocalMediaStorage(root=str(tmp_path / 'media'))
+    monkeypatch.setattr(media, 'get_media_storage', lambda: storage)
+    monkeypatch.setattr(media, '_derivative_executor', lambda: InlineExecutor())
+    monkeypatch.setattr(media.tempfile, 'tempdir', str(tmp_path))
+    return storage
+
+
+def _image(image_format='PNG', size=(400, 300), color='blue'):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, image_format)
+    buffer.seek(0)
+    return buffer
+
+
+def _temp_files(tmp_path):
+    return [name for name in os.listdir(tmp_path) if name != 'media']
+
+
+def test_same_bytes_are_stored_once(storage, tmp_path):
+    first = ingest_image(_image(), 'a.png')
+    assert (first['content_type'], first['width'], first['height']) == ('image/png', 400, 300)
+    assert first['key'] == f"media/originals/{first['id']}.png"
+    assert not first['deduplicated']
+
+    second = ingest_image(_image(), 'copy.png')
+    assert second['deduplicated'] and second['key'] == first['key']
+    assert ingest_image(_image(color='red'), 'other.png')['id'] != first['id']
+
+    thumb = storage.path(media.derivative_key(first['id'], 'thumb'))
+    with Image.open(thumb) as image:
+        assert image.format == 'JPEG' and max(image.size) <= 320
+    # Never upscaled past the original
+    with Image.open(storage.path(media.derivative_key(first['id'], 'full'))) as image:
+        assert image.size == (400, 300)
+    assert _temp_files(tmp_path) == []
+
+
+@pytest.mark.parametrize('body', [
+    io.BytesIO(b'not an image'),
+    _image('BMP', size=(50, 50)),
+    _image(size=(200, 200)),
+])
+def test_rejected_images_leave_nothing_behind(storage, tmp_path, monkeypatch, body):
+    monkeypatch.setattr(media, 'MAX_IMAGE_PIXELS', 30000)
+    with pytest.raises(MediaError):
+        ingest_image(body)
+    assert _temp_files(tmp_path) == []
+    assert not os.path.exists(storage.path('media/originals'))
+
+
+def test_oversized_upload_is_rejected(storage, tmp_path):
+    with pytest.raises(MediaError):
+        media.spool_upload(io.BytesIO(b'x' * 2048), max_bytes=1024)
+    assert _temp_files(tmp_path) == []
+
+
+def test_ingest_files_reports_rejected_files(storage):
+    class Upload:
+        def __init__(self, filename, stream):
+            self.filename, self.stream = filename, stream
+
+    stored, errors = ingest_files([Upload('ok.png', _image()), Upload('bad.png', io.BytesIO(b'nope')),
+                                   Upload('', _image())])
+    assert [item['original_name'] for item in stored] == ['ok.png']
+    assert [error['original_name'] for error in errors] == ['bad.png']
@@ -0,0 +1,32 @@
+"""Logins for unknown emails run the KDF like real ones"""
+
+import pytest
+
+from services import passwords
+
+
+@pytest.fixture
+def kdf_calls(monkeypatch):
+    calls = []
+    verify = passwords.ScryptHasher.verify
+
+    def recording_verify(self, password, encoded):
+        calls.append(encoded)
+        return verify(self, password, encoded)
+
+    monkeypatch.setattr(passwords, 'DEFAULT_HASHER', 'scrypt')
+    monkeypatch.setattr(passwords.ScryptHasher, 'verify', recording_verify)
+    return calls
+
+
+def test_unknown_user_is_checked_against_dummy_hash(kdf_calls):
+    assert passwords.verify_and_update('secret', None) == (False, None)
+    assert passwords.verify_and_update('secret', '') == (False, None)
+    assert len(kdf_calls) == 2
+    assert kdf_calls[0] == kdf_calls[1] == passwords._get_dummy_hash()
+
+
+def test_login_of_unknown_email_runs_kdf(client, kdf_calls):
+    response = client.post('/api/auth/login', json={'email': 'nobody@example.com', 'password': 'secret'})
+    assert response.status_code == 401
+    assert len(kdf_calls) == 1
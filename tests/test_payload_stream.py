@@ -0,0 +1,124 @@
+"""Streaming JSON payloads with base64 images (services/payload_stream.py)"""
+
+import base64
+import io
+import json
+import os
+
+import pytest
+
+from services import payload_stream
+from services.payload_stream import PayloadError, read_image_payload
+
+IMAGE = bytes(range(256)) * 40
+
+
+def _read(body, **kwargs):
+    if isinstance(body, dict):
+        body = json.dumps(body)
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    return read_image_payload(io.BytesIO(body), **kwargs)
+
+
+def _contents(paths):
+    try:
+        return [open(path, 'rb').read() for path in paths]
+    finally:
+        for path in paths:
+            os.unlink(path)
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    # Splits strings, escapes and base64 quanta across reads
+    monkeypatch.setattr(payload_stream, 'CHUNK_SIZE', 7)
+
+
+@pytest.mark.usefixtures('small_chunks')
+def test_decodes_images_and_fields():
+    encoded = base64.b64encode(IMAGE).decode()
+    fields, paths = _read({
+        'title': 'Renault "Wind"', 'price': 4500, 'details': {'tags': ['a', '}']},
+        'images': ['data:image/jpeg;base64,' + encoded, encoded, base64.encodebytes(IMAGE).decode()],
+    })
+    assert fields == {'title': 'Renault "Wind"', 'price': 4500, 'details': {'tags': ['a', '}']}}
+    assert _contents(paths) == [IMAGE, IMAGE, IMAGE]
+
+
+@pytest.mark.usefixtures('small_chunks')
+def test_escaped_slashes_and_unpadded_tail():
+    encoded = base64.b64encode(IMAGE[:100]).decode().rstrip('=')
+    body = json.dumps({'images': [encoded]}).replace('/', '\\/')
+    fields, paths = _read(body)
+    assert _contents(paths) == [IMAGE[:100]]
+
+
+@pytest.mark.parametrize('image', [
+    'abc!!def',
+    'QUJD QUJD@',
+    'data:image/png;base64,QUJD\\"QUJD',
+    'QQ==QUJD',
+    'QUJDQ',
+])
+def test_invalid_base64_is_rejected(image, tmp_path, monkeypatch):
+    monkeypatch.setattr(payload_stream.tempfile, 'tempdir', str(tmp_path))
+    body = '{"title": "x", "images": ["QUJD", "' + image + '"]}'
+    with pytest.raises(PayloadError):
+        _read(body)
+    # Files of the images decoded before the error are removed too
+    assert os.listdir(tmp_path) == []
+
+
+def test_padding_split_across_chunks_is_rejected(monkeypatch):
+    monkeypatch.setattr(payload_stream, 'CHUNK_SIZE', 4)
+    with pytest.raises(PayloadError):
+        _read('{"images":["QQ==QUJD"]}')
+
+
+@pytest.mark.parametrize('body', [
+    '{"title": "x", ',
+    '{"title": tru}',
+    '["not", "an", "object"]',
+    '{"images": ["QUJD" "QUJD"]}',
+])
+def test_malformed_json_is_rejected(body):
+    with pytest.raises(PayloadError):
+        _read(body)
+
+
+def test_image_limits():
+    encoded = base64.b64encode(IMAGE).decode()
+    with pytest.raises(PayloadError):
+        _read({'images': [encoded] * 3}, max_images=2)
+    with pytest.raises(PayloadError):
+        _read({'images': [encoded]}, max_image_bytes=len(IMAGE) // 2)
+
+
+def test_generate_rejects_bad_base64(client):
+    response = client.post('/api/video/generate', json={
+        'title': 'x', 'category': 'other', 'description': 'd', 'price': 1, 'images': ['abc!!def'],
+    })
+    assert response.status_code == 400
+
+
+def _generate(client, **fields):
+    payload = dict({'title': 'x', 'category': 'other', 'description': 'd', 'price': 1,
+                    'images': [base64.b64encode(IMAGE).decode()] * 2}, **fields)
+    return client.post('/api/video/generate', json=payload)
+
+
+def test_generate_removes_temp_files_on_errors(client, tmp_path, monkeypatch):
+    import video_pipeline
+
+    monkeypatch.setattr(payload_stream.tempfile, 'tempdir', str(tmp_path))
+    assert _generate(client, price='not a number').status_code == 500
+    assert os.listdir(tmp_path) == []
+
+    def failing_pipeline(**kwargs):
+        assert len(kwargs['images']) == 2 and all(os.path.exists(path) for path in kwargs['images'])
+        raise RuntimeError('ffmpeg failed')
+
+    monkeypatch.setattr(video_pipeline, 'generate_video_pipeline', failing_pipeline)
+    assert _generate(client).status_code == 500
+    assert os.listdir(tmp_path) == []
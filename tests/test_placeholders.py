@@ -0,0 +1,92 @@
+"""Placeholder cards: title wrapping, the JPEG cache and the FFmpeg drawtext graph (services/placeholders.py)"""
+
+import os
+
+import pytest
+
+from services import placeholders
+from services.placeholders import MARGIN, TITLE_MAX_LINES, WIDTH, _title_lines
+
+
+class FixedWidthFont:
+    """Every character is 50 px wide: the card fits 18 characters per line"""
+
+    def getlength(self, text):
+        return 50 * len(text)
+
+
+FONT = FixedWidthFont()
+LINE_CHARS = (WIDTH - 2 * MARGIN) // 50
+
+
+@pytest.mark.parametrize('title, lines', [
+    ('', ['']),
+    ('Audi A4', ['Audi A4']),
+    ('  Audi   A4\n2015  ', ['Audi A4 2015']),
+    ('Volkswagen Passat Variant Highline', ['Volkswagen Passat', 'Variant Highline']),
+    ('a' * 30, ['a' * (LINE_CHARS - 1) + '…']),
+])
+def test_title_wrapping(title, lines):
+    assert _title_lines(title, FONT) == lines
+
+
+def test_long_titles_are_cut_to_max_lines():
+    lines = _title_lines(' '.join(['Renault Megane'] * 10), FONT)
+    assert len(lines) == TITLE_MAX_LINES
+    assert lines[-1].endswith('…')
+    assert all(FONT.getlength(line) <= WIDTH - 2 * MARGIN for line in lines)
+
+
+def _split_unescape(value, separators):
+    """
+    Split at unescaped separator characters, removing one level of backslash
+    escaping, the way FFmpeg tokenises a filtergraph and then filter options
+    """
+    parts, current, chars = [], '', iter(value)
+    for char in chars:
+        if char == '\\':
+            current += next(chars)
+        elif char in separators:
+            parts.append(current)
+            current = ''
+        elif char == "'":
+            raise AssertionError('unescaped quote')
+        else:
+            current += char
+    return parts + [current]
+
+
+@pytest.mark.parametrize('title', [
+    "Audi A4: 'fast', [new]; 100% ok",
+    'C:\\Windows=bad, a\\b',
+])
+def test_drawtext_graph_round_trips_the_title(title, monkeypatch):
+    monkeypatch.setattr(placeholders, '_fonts', lambda: ('/fonts/My Font:1.ttf', FONT, FONT))
+    source = placeholders._build_source(title, 4500, 'dark')
+    filters = _split_unescape(source.graph, ',')
+    assert filters[0].startswith('color=c=0x1f2937:')
+
+    texts = []
+    for description in filters[1:]:
+        name, _, arguments = description.partition('=')
+        assert name == 'drawtext'
+        tokens = _split_unescape(arguments, ':=')
+        options = dict(zip(tokens[::2], tokens[1::2]))
+        assert options['fontfile'] == '/fonts/My Font:1.ttf'
+        assert options['expansion'] == 'none'
+        texts.append(options['text'])
+    assert ' '.join(texts[:-1]) == title
+    assert texts[-1] == '€4,500'
+    assert source.ffmpeg_input(3)[:4] == ['-f', 'lavfi', '-t', '3']
+
+
+def test_sources_and_images_are_cached(monkeypatch):
+    monkeypatch.setattr(placeholders, '_sources', placeholders.OrderedDict())
+    source = placeholders.placeholder_source('Bike', 100, 'unknown-theme')
+    assert placeholders.placeholder_source('Bike', 100.2, 'dark') is source
+
+    path = placeholders.render_placeholder('Bike', 100)
+    mtime = os.stat(path).st_mtime_ns
+    assert placeholders.render_placeholder('Bike', 100) == path
+    assert os.stat(path).st_mtime_ns == mtime
+    assert placeholders.render_placeholder('Bike', 200) != path
@@ -0,0 +1,59 @@
+"""For You ranking: candidate scoring and cursor paging (services/ranking.py)"""
+
+import time
+from datetime import datetime, timedelta
+
+from services.ranking import FeedCandidates, SeenItems
+
+NOW = time.time()
+
+
+def _card(listing_id, hours_old=1.0, **fields):
+    created_at = (datetime.fromtimestamp(NOW) - timedelta(hours=hours_old)).isoformat()
+    return dict({'id': listing_id, 'category': 'automotive', 'created_at': created_at, 'views': 0, 'likes': 0},
+                **fields)
+
+
+def _all_pages(candidates, limit, **kwargs):
+    seen, cursor = [], None
+    while True:
+        cards, cursor = candidates.page(limit, cursor=cursor, **kwargs)
+        seen += [card['id'] for card in cards]
+        if cursor is None:
+            return seen
+
+
+def test_pages_straddle_equal_scores():
+    # Same age and no engagement: equal scores, ordered by created_at then id
+    cards = [_card(f'car-{index:02d}') for index in range(9, -1, -1)]
+    candidates = FeedCandidates(cards, now=NOW)
+    assert _all_pages(candidates, 3) == [card['id'] for card in cards]
+    assert _all_pages(candidates, 4, seen=['car-05', 'unknown']) == [
+        card['id'] for card in cards if card['id'] != 'car-05']
+
+
+def test_engagement_lifts_an_older_listing():
+    candidates = FeedCandidates([_card('new', 1), _card('old', 48, views=500, likes=40), _card('stale', 48)],
+                                now=NOW)
+    assert _all_pages(candidates, 2) == ['old', 'new', 'stale']
+
+
+def test_category_and_locality():
+    candidates = FeedCandidates([
+        _card('z-far', location='Constanța'), _card('a-near', location='Abrud'),
+        _card('bag', category='fashion', location='Abrud'),
+    ], now=NOW)
+    near_abrud = (46.27, 23.06)
+    assert _all_pages(candidates, 5, category='automotive', lat=near_abrud[0], lon=near_abrud[1]) == [
+        'a-near', 'z-far']
+    assert _all_pages(candidates, 5, category='automotive') == ['z-far', 'a-near']
+    assert _all_pages(candidates, 5, category='kids') == []
+
+
+def test_seen_items_are_bounded():
+    seen = SeenItems(per_user=2, max_users=1)
+    for listing_id in ('a', 'b', 'c'):
+        seen.mark(1, listing_id)
+    assert seen.get(1) == ['b', 'c']
+    seen.mark(2, 'x')
+    assert seen.get(1) == []
@@ -0,0 +1,21 @@
+"""Bearer-token resolution shared by the blueprints and app.require_auth (services/request_auth.py)"""
+
+from services.request_auth import authenticated_user_id, resolve_token
+
+
+def test_in_memory_session_resolves(app, login):
+    headers = login(5)
+    with app.test_request_context('/', headers=headers):
+        assert authenticated_user_id() == 5
+    token = headers['Authorization'].split(' ', 1)[1]
+    with app.test_request_context('/'):
+        assert resolve_token(token) == {'user_id': 5}
+        # require_auth only trusts tokens it can load a users row for
+        assert resolve_token(token, memory_sessions=False) is None
+
+
+def test_missing_or_unknown_token(app):
+    with app.test_request_context('/'):
+        assert authenticated_user_id() is None
+    with app.test_request_context('/', headers={'Authorization': 'Bearer nope'}):
+        assert authenticated_user_id() is None
@@ -0,0 +1,61 @@
+"""Listing search: cursor encoding and in-process index paging (services/search.py)"""
+
+import pytest
+
+from services.search import InvertedIndex, decode_cursor, encode_cursor, keyset_cursor, tokenize
+
+
+def _listing(index, created_at='2026-01-01T10:00:00', **fields):
+    return dict({'id': f'bike-{index:02d}', 'title': 'Bicicleta', 'category': 'sports',
+                 'status': 'active', 'created_at': created_at}, **fields)
+
+
+def _all_pages(index, query, limit, **kwargs):
+    results, cursor, pages = [], None, 0
+    while True:
+        page, cursor = index.search(query, limit=limit, cursor=cursor, **kwargs)
+        results.extend(listing['id'] for listing in page)
+        pages += 1
+        if cursor is None:
+            return results, pages
+
+
+def test_cursor_round_trip():
+    values = [1.234567, '2026-01-01T10:00:00', 'bike-01']
+    assert decode_cursor(encode_cursor(values)) == values
+    assert '=' not in encode_cursor(values)
+    assert decode_cursor(keyset_cursor('2026-01-01T10:00:00', 7)) == [None, '2026-01-01T10:00:00', '7']
+
+
+@pytest.mark.parametrize('cursor', [None, '', 'not base64!', encode_cursor([1, 2]), encode_cursor({'a': 1})])
+def test_malformed_cursor_is_ignored(cursor):
+    assert decode_cursor(cursor) is None
+
+
+def test_pages_straddle_equal_scores_and_timestamps():
+    # Same title and created_at: only the id orders them, across page boundaries
+    index = InvertedIndex([_listing(i) for i in range(10)] + [_listing(10, '2026-01-02T10:00:00')])
+    results, pages = _all_pages(index, 'bicicleta', limit=3)
+    assert pages == 4
+    assert results == ['bike-10'] + [f'bike-{i:02d}' for i in range(9, -1, -1)]
+
+
+def test_better_match_ranks_first_and_category_filters():
+    index = InvertedIndex([
+        _listing(1, description='bicicleta'),
+        _listing(2, title='Trotinetă', description='nu e bicicleta'),
+        _listing(3, title='Bicicletă roșie', category='kids'),
+        _listing(4, status='sold'),
+    ])
+    results, _ = _all_pages(index, 'bicicleta', limit=10)
+    assert results[-1] == 'bike-02'
+    assert 'bike-04' not in results
+    assert _all_pages(index, 'bicicleta', limit=10, category='kids')[0] == ['bike-03']
+
+
+def test_prefix_and_diacritics():
+    assert tokenize('Benzină, Cutie AUTOMATĂ') == ['benzina', 'cutie', 'automata']
+    index = InvertedIndex([_listing(1, title='Benzină'), _listing(2, title='Bena')])
+    assert _all_pages(index, 'benz', limit=10)[0] == ['bike-01']
+    # Terms shorter than MIN_PREFIX_LENGTH match whole tokens only
+    assert _all_pages(index, 'be', limit=10)[0] == []
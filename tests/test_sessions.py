@@ -0,0 +1,37 @@
+"""Sessions table queries during and after the token_hash rollout"""
+
+import pytest
+
+from services import sessions
+
+
+class RecordingCursor:
+    def __init__(self):
+        self.queries = []
+
+    def execute(self, query, params=()):
+        self.queries.append((' '.join(query.split()), params))
+
+    def fetchone(self):
+        return None
+
+
+@pytest.mark.parametrize('legacy', [True, False])
+def test_session_queries(monkeypatch, legacy):
+    monkeypatch.setattr(sessions, 'LEGACY_TOKENS', legacy)
+    cur = RecordingCursor()
+    digest = sessions.token_digest('abc')
+
+    sessions.create_session(cur, 7, 'abc')
+    sessions.find_session_user(cur, 'abc')
+    sessions.delete_session(cur, 'abc')
+
+    (insert, insert_params), (select, select_params), (delete, delete_params) = cur.queries
+    if legacy:
+        # Old instances look sessions up by the plaintext token
+        assert 'token_hash, token,' in insert and insert_params[1:3] == (digest, 'abc')
+        assert select_params == delete_params == (digest, 'abc')
+    else:
+        assert 'token,' not in insert and 'abc' not in insert_params
+        assert select_params == delete_params == (digest,)
+        assert 's.token =' not in select + delete
@@ -0,0 +1,91 @@
+"""Signed session tokens: the AUTH_TOKEN_MODE gate, signing key checks and TokenUser"""
+
+import pytest
+
+from services import tokens
+
+
+@pytest.fixture
+def signed_mode(monkeypatch):
+    monkeypatch.setattr(tokens, 'AUTH_TOKEN_MODE', 'signed')
+
+
+def test_signed_tokens_rejected_in_opaque_mode():
+    forged, _ = tokens.issue_token(42, tokens.DEV_SECRET_KEY)
+    assert not tokens.signed_tokens_enabled()
+    assert tokens.verify_token(forged, tokens.DEV_SECRET_KEY) is None
+
+
+def test_forged_token_cannot_use_favourites(client):
+    forged, _ = tokens.issue_token(42, tokens.DEV_SECRET_KEY)
+    headers = {'Authorization': f'Bearer {forged}'}
+    assert client.get('/api/favourites', headers=headers).status_code == 401
+    assert client.put('/api/favourites/abc', headers=headers).status_code == 401
+
+
+def _require_auth_status(app, token):
+    from app import require_auth
+
+    @require_auth
+    def protected():
+        return 'ok'
+
+    with app.test_request_context('/', headers={'Authorization': f'Bearer {token}'}):
+        result = protected()
+    return 200 if result == 'ok' else result[1]
+
+
+def test_forged_token_rejected_by_require_auth(app):
+    forged, _ = tokens.issue_token(42, tokens.DEV_SECRET_KEY)
+    assert _require_auth_status(app, forged) == 401
+
+
+def test_require_auth_accepts_signed_token_in_signed_mode(app, signed_mode, monkeypatch):
+    monkeypatch.setitem(app.config, 'SECRET_KEY', 'a-private-key')
+    token, _ = tokens.issue_token(42, 'a-private-key')
+    assert _require_auth_status(app, token) == 200
+
+
+def test_signed_token_round_trip(signed_mode):
+    token, claims = tokens.issue_token(7, 'a-private-key')
+    assert tokens.verify_token(token, 'a-private-key')['uid'] == 7
+    assert tokens.verify_token(token, 'another-key') is None
+
+    payload, signature = token[len(tokens.TOKEN_PREFIX):].split('.')
+    forged_payload = tokens._b64encode(b'{"uid":1,"exp":9999999999,"ep":0,"jti":"00"}')
+    assert tokens.verify_token(f"{tokens.TOKEN_PREFIX}{forged_payload}.{signature}", 'a-private-key') is None
+
+
+def test_revoked_token_rejected(signed_mode):
+    token, claims = tokens.issue_token(7, 'a-private-key')
+    tokens.revoke_token(None, claims)
+    assert tokens.verify_token(token, 'a-private-key') is None
+
+
+@pytest.mark.parametrize('secret_key', [None, '', tokens.DEV_SECRET_KEY])
+def test_signed_mode_requires_private_key(signed_mode, secret_key):
+    with pytest.raises(RuntimeError):
+        tokens.check_signing_key(secret_key)
+
+
+def test_signing_key_check(signed_mode):
+    tokens.check_signing_key('a-private-key')
+
+
+def test_signing_key_not_checked_in_opaque_mode():
+    tokens.check_signing_key(None)
+
+
+def test_token_user_get_loads_profile():
+    loads = []
+
+    def loader(user_id):
+        loads.append(user_id)
+        return {'id': user_id, 'email': 'seller@example.com'}
+
+    user = tokens.TokenUser(3, loader)
+    assert user.get('id') == 3
+    assert loads == []
+    assert user.get('email') == 'seller@example.com'
+    assert user.get('phone', 'n/a') == 'n/a'
+    assert loads == [3]
@@ -11,30 +11,44 @@ import json
 import tempfile
 import subprocess
 from pathlib import Path
-from openai import AsyncOpenAI
-import boto3
 from datetime import datetime
+from functools import lru_cache
 import hashlib
-from dotenv import load_dotenv
 import asyncio
 from tts_config import get_tts_config, ROMANIAN_TTS_INSTRUCTIONS
 
-# Load environment variables from .env file
-load_dotenv()
+# Environment variables are loaded by the entry point (app.py or the test
+# scripts). The OpenAI and R2 SDKs are imported and their clients built on
+# first use, so importing this module stays cheap for web workers.
 
-# Initialize OpenAI async client for TTS
-openai_client = AsyncOpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+R2_BUCKET = os.getenv('R2_BUCKET_NAME', 'video-marketplace-videos')
 
-# Initialize R2 client (S3-compatible)
-r2_client = boto3.client(
-    's3',
-    endpoint_url=f"https://{os.getenv('R2_ACCOUNT_ID')}.r2.cloudflarestorage.com",
-    aws_access_key_id=os.getenv('R2_ACCESS_KEY_ID'),
-    aws_secret_access_key=os.getenv('R2_SECRET_ACCESS_KEY'),
-    region_name='auto'
-)
 
-R2_BUCKET = os.getenv('R2_BUCKET_NAME', 'video-marketplace-videos')
+@lru_cache(maxsize=None)
+def get_async_openai_client():
+    """Shared AsyncOpenAI client for TTS"""
+    from openai import AsyncOpenAI
+    return AsyncOpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+
+
+@lru_cache(maxsize=None)
+def get_openai_client():
+    """Shared sync OpenAI client for script generation and Whisper"""
+    from openai import OpenAI
+    return OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+
+
+@lru_cache(maxsize=None)
+def get_r2_client():
+    """Shared R2 client (S3-compatible)"""
+    import boto3
+    return boto3.client(
+        's3',
+        endpoint_url=f"https://{os.getenv('R2_ACCOUNT_ID')}.r2.cloudflarestorage.com",
+        aws_access_key_id=os.getenv('R2_ACCESS_KEY_ID'),
+        aws_secret_access_key=os.getenv('R2_SECRET_ACCESS_KEY'),
+        region_name='auto'
+    )
 
 
 def generate_script(description, title, category, price, details=None, language='ro'):
@@ -112,8 +126,7 @@ Just the script text, no labels or formatting."""
 
     try:
         # Use sync client for script generation
-        from openai import OpenAI
-        sync_client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+        sync_client = get_openai_client()
         
         response = sync_client.chat.completions.create(
             model="gpt-4o-mini",
@@ -173,7 +186,7 @@ async def generate_voiceover_async(script, category='automotive', language='ro')
         # Voice characteristics are controlled by the 'voice' parameter only
         
         # Create the speech using async client with streaming
-        async with openai_client.audio.speech.with_streaming_response.create(
+        async with get_async_openai_client().audio.speech.with_streaming_response.create(
             model=tts_config['model'],
             voice=tts_config['voice'],
             input=script,
@@ -235,8 +248,7 @@ def generate_captions(audio_path):
         print(f"  Audio: {audio_path} (exists: {os.path.exists(audio_path)})")
         
         # Use sync client for Whisper
-        from openai import OpenAI
-        sync_client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+        sync_client = get_openai_client()
         
         with open(audio_path, 'rb') as audio_file:
             transcript = sync_client.audio.transcriptions.create(
@@ -381,7 +393,8 @@ def create_video(images, audio_path, captions, output_path):
     Create video using FFmpeg with TikTok-style word-by-word captions
     
     Args:
-        images: List of image file paths
+        images: List of image file paths (or placeholder sources with an
+            ffmpeg_input(duration) method, see services/placeholders.py)
         audio_path: Path to audio file
         captions: Caption data from generate_captions() with word-level timestamps
         output_path: Where to save final video
@@ -394,13 +407,16 @@ def create_video(images, audio_path, captions, output_path):
         print(f"\n[FFmpeg] Creating video with word-by-word captions...")
         print(f"  Images: {len(images)} files")
         for i, img in enumerate(images):
-            print(f"    [{i}] {img} (exists: {os.path.exists(img)})")
+            if hasattr(img, 'ffmpeg_input'):
+                print(f"    [{i}] {img}")
+            else:
+                print(f"    [{i}] {img} (exists: {os.path.exists(img)})")
         print(f"  Audio: {audio_path} (exists: {os.path.exists(audio_path)})")
         print(f"  Caption words: {len(captions.get('words', []))}")
         
         # Verify all images exist
         for img_path in images:
-            if not os.path.exists(img_path):
+            if not hasattr(img_path, 'ffmpeg_input') and not os.path.exists(img_path):
                 raise FileNotFoundError(f"Image not found: {img_path}")
         
         if not os.path.exists(audio_path):
@@ -472,7 +488,10 @@ def create_video(images, audio_path, captions, output_path):
         
         # Add image inputs (only once, we'll loop them in filter)
         for img_path in images:
-            cmd.extend(['-loop', '1', '-t', str(base_duration_per_image), '-i', img_path])
+            if hasattr(img_path, 'ffmpeg_input'):
+                cmd.extend(img_path.ffmpeg_input(base_duration_per_image))
+            else:
+                cmd.extend(['-loop', '1', '-t', str(base_duration_per_image), '-i', img_path])
         
         # Add audio input
         cmd.extend(['-i', audio_path])
@@ -559,7 +578,7 @@ def upload_to_r2(file_path, object_key=None):
         
         # Upload to R2
         with open(file_path, 'rb') as f:
-            r2_client.upload_fileobj(
+            get_r2_client().upload_fileobj(
                 f,
                 R2_BUCKET,
                 object_key,
@@ -580,18 +599,20 @@ def upload_to_r2(file_path, object_key=None):
         raise
 
 
-def generate_video_pipeline(images, description, title, category, price, details=None, language='ro'):
+def generate_video_pipeline(images, description, title, category, price, details=None, language='ro',
+                            thumbnail_url=None):
     """
     Complete video generation pipeline
     
     Args:
-        images: List of image file paths
+        images: List of image file paths (or placeholder sources, see create_video)
         description: Product description
         title: Product title
         category: Product category
         price: Product price
         details: Additional details (dict)
         language: Language code (ro, en)
+        thumbnail_url: URL of an already stored first image (skips uploading it again)
     
     Returns:
         dict: {
@@ -639,8 +660,9 @@ def generate_video_pipeline(images, description, title, category, price, details
         print("\n[5/5] Uploading to cloud storage...")
         video_url = upload_to_r2(output_video.name)
         
-        # Generate thumbnail (use first image)
-        thumbnail_url = upload_to_r2(images[0], object_key=None) if images else None
+        # Generate thumbnail (use first image) unless it is already in storage
+        if thumbnail_url is None and images and isinstance(images[0], str):
+            thumbnail_url = upload_to_r2(images[0], object_key=None)
         
         total_cost = script_result['cost'] + 0.003 + 0.003  # Script + TTS + Whisper
         